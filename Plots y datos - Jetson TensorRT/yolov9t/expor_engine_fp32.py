@@ -13,4 +13,4 @@ output_file = "evaluation_results.json"  # Nombre del archivo para guardar los r
 model = YOLO(model_path)
 
 # Export the model to TensorRT
-model.export(format="engine", dynamic=True, device=0)
\ No newline at end of file
+model.export(format="engine", dynamic=True, batch=16, device=0)
\ No newline at end of file
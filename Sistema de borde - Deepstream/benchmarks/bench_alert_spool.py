@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Benchmark de la cola persistente de alertas (utils.alert_spool).
+
+Usa un servidor local (benchmarks/stub_server.py) que se puede caer y levantar:
+
+1. Rendimiento con el enlace arriba: alertas por segundo enviando directo contra
+   guardar en la cola, reservar, enviar y confirmar (costo del fsync por alerta).
+2. Recuperación: con el servidor caído se generan alertas que quedan en la cola; al
+   levantarlo se mide cuánto tarda el hilo de reenvío en vaciarla, uno por uno y
+   agrupado, y se verifica que llegaron todas y en orden.
+
+    python3 benchmarks/bench_alert_spool.py --alerts 200 --body-kb 100
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.alert_spool import AlertSpool, SpoolForwarder, json_batch_body
+from utils.alert_transport import AlertTransport
+from benchmarks.stub_server import StubServer
+
+HEADERS = {'Content-Type': 'application/json'}
+
+def make_body(seq, body_kb):
+    return json.dumps({'camera_id': seq % 5, 'seq': seq, 'image_data': "A" * (body_kb * 1024)}).encode('utf-8')
+
+def send_direct(transport, url, body):
+    return transport.post(url, body, lambda: HEADERS, max_retries=1) is not None
+
+def send_through_spool(spool, transport, url, camera_id, body):
+    # Misma secuencia que utils.send_alert con la cola activa
+    alert_id = spool.append(camera_id, body)
+    if not spool.claim(alert_id):
+        return False
+    if send_direct(transport, url, body):
+        spool.ack([alert_id])
+        return True
+    spool.release([alert_id])
+    return False
+
+def bench_throughput(server, transport, args, synchronous):
+    with tempfile.TemporaryDirectory() as tmp:
+        spool = AlertSpool(os.path.join(tmp, "alerts.db"), synchronous=synchronous)
+        bodies = [make_body(i, args.body_kb) for i in range(args.alerts)]
+
+        start = time.perf_counter()
+        for body in bodies:
+            send_direct(transport, server.url, body)
+        direct = args.alerts / (time.perf_counter() - start)
+
+        start = time.perf_counter()
+        for i, body in enumerate(bodies):
+            send_through_spool(spool, transport, server.url, i % 5, body)
+        spooled = args.alerts / (time.perf_counter() - start)
+        spool.close()
+    return direct, spooled
+
+def bench_recovery(server, transport, args, batched):
+    server.alerts.clear()
+    with tempfile.TemporaryDirectory() as tmp:
+        spool = AlertSpool(os.path.join(tmp, "alerts.db"), synchronous="NORMAL")
+        send_one = lambda alert: send_direct(transport, server.url, alert.body)
+        send_batch = (lambda alerts: send_direct(transport, server.url + "/batch", json_batch_body(alerts))) if batched else None
+        forwarder = SpoolForwarder(spool, send_one, send_batch=send_batch, batch_size=args.batch_size,
+                                   interval=0.05, max_interval=0.2)
+
+        server.set_up(False)
+        for i in range(args.alerts):
+            send_through_spool(spool, transport, server.url, i % 5, make_body(i, args.body_kb))
+        pending = spool.pending_count()
+
+        forwarder.start()
+        server.set_up(True)
+        start = time.perf_counter()
+        while spool.pending_count() and time.perf_counter() - start < 120:
+            spool.evict()
+            time.sleep(0.01)
+        elapsed = time.perf_counter() - start
+        forwarder.stop()
+        stats = forwarder.stats()
+        spool.close()
+
+    received = [alert['seq'] for alert in server.alerts]
+    return pending, elapsed, stats, received == list(range(args.alerts))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--alerts", type=int, default=200)
+    parser.add_argument("--body-kb", type=int, default=100, help="Tamaño aproximado de cada alerta en KB")
+    parser.add_argument("--batch-size", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.0, help="RTT artificial del servidor en segundos")
+    args = parser.parse_args()
+
+    server = StubServer(latency=args.latency).start()
+    transport = AlertTransport(http2=False)
+    try:
+        print(f"{args.alerts} alertas de ~{args.body_kb} KB, RTT artificial {args.latency * 1e3:.0f} ms\n")
+        for synchronous in ("FULL", "NORMAL"):
+            direct, spooled = bench_throughput(server, transport, args, synchronous)
+            print(f"enlace arriba, synchronous={synchronous:6s}: directo {direct:7.1f} alertas/s, "
+                  f"con cola {spooled:7.1f} alertas/s")
+
+        print()
+        for batched in (False, True):
+            pending, elapsed, stats, in_order = bench_recovery(server, transport, args, batched)
+            mode = f"agrupado x{args.batch_size}" if batched else "uno por uno"
+            print(f"recuperación {mode:14s}: {pending} pendientes vaciadas en {elapsed:6.2f} s "
+                  f"({stats['replayed']} reenviadas, {stats['batches']} lotes), completas y en orden: {in_order}")
+    finally:
+        transport.close()
+        server.stop()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Comparación de la supresión por tracks (pipeline.suppression) contra el temporizador fijo
+por cámara que la precedió (``LegacyTimer``, la lógica del antiguo
+``utils.should_send_alert``).
+
+Genera secuencias sintéticas de cajas (con ruido, detecciones perdidas y falsos positivos
+de un solo frame) y cuenta, para cada estrategia, las alertas enviadas y cuántas de las
+personas de la secuencia aparecieron en al menos una alerta. Además verifica que una
+persona nueva en el mismo lugar que otra que se fue hace más de ``max_track_age`` genere
+una alerta nueva; el proceso termina con código 1 si no es así:
+
+    python3 benchmarks/bench_alert_suppression.py --fps 10
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from pipeline.detections import DETECTION_DTYPE, UNTRACKED_OBJECT_ID
+from pipeline.suppression import AlertSuppressor
+
+WIDTH, HEIGHT = 1920, 1080
+LEGACY_INTERVAL = 5.0
+
+class LegacyTimer:
+    """
+    Línea base: el antiguo ``utils.should_send_alert``, retirado del paquete; una alerta
+    cada 5 s por cámara como máximo.
+    """
+
+    def __init__(self, interval=LEGACY_INTERVAL):
+        self.interval = interval
+        self.last_sent = {}
+
+    def update(self, camera_id, detections, now):
+        if len(detections) == 0:
+            return False
+        if now - self.last_sent.get(camera_id, -np.inf) < self.interval:
+            return False
+        self.last_sent[camera_id] = now
+        return True
+
+def person(rng, start, duration, still=False):
+    """
+    Trayectoria de una persona: instante de entrada, duración y posición en función del tiempo.
+    """
+    w, h = rng.uniform(60, 160), rng.uniform(150, 380)
+    x0, y0 = rng.uniform(0, WIDTH - w), rng.uniform(0, HEIGHT - h)
+    vx, vy = (0.0, 0.0) if still else (rng.uniform(-120, 120), rng.uniform(-30, 30))
+    return {'start': start, 'end': start + duration, 'x0': x0, 'y0': y0, 'vx': vx, 'vy': vy, 'w': w, 'h': h}
+
+def render(people, t, rng, tracker_ids, miss_rate=0.1, false_positive_rate=0.01, jitter=4.0):
+    """
+    Detecciones de un frame en el instante ``t``; retorna también los índices de las personas visibles.
+    """
+    rows = []
+    visible = []
+    for i, p in enumerate(people):
+        if not p['start'] <= t < p['end'] or rng.random() < miss_rate:
+            continue
+        dt = t - p['start']
+        left = np.clip(p['x0'] + p['vx'] * dt + rng.normal(0, jitter), 0, WIDTH - p['w'])
+        top = np.clip(p['y0'] + p['vy'] * dt + rng.normal(0, jitter), 0, HEIGHT - p['h'])
+        object_id = i if tracker_ids else UNTRACKED_OBJECT_ID
+        rows.append((0, 0.9, left, top, p['w'], p['h'], 0, 0, 0, object_id))
+        visible.append(i)
+    if rng.random() < false_positive_rate:
+        rows.append((0, 0.65, rng.uniform(0, WIDTH - 80), rng.uniform(0, HEIGHT - 200), 80, 200, 0, 0, 0,
+                     10_000 + int(t * 1000) if tracker_ids else UNTRACKED_OBJECT_ID))
+    return np.array(rows, dtype=DETECTION_DTYPE), visible
+
+def scenarios(rng, args):
+    yield "persona quieta 10 min", [person(rng, 0, 600, still=True)], 600, False
+    yield "segunda persona a los 2 s", [person(rng, 0, 60, still=True), person(rng, 2, 8)], 60, False
+    arrivals = np.cumsum(rng.exponential(args.mean_gap, size=int(600 / args.mean_gap * 2)))
+    crowd = [person(rng, t, rng.uniform(3, 15)) for t in arrivals if t < 600]
+    yield f"{len(crowd)} personas de paso", crowd, 600, False
+    yield f"{len(crowd)} personas, nvtracker", crowd, 600, True
+
+def run(strategy, people, duration, fps, seed, tracker_ids):
+    rng = np.random.default_rng(seed)
+    alerts = 0
+    covered = set()
+    elapsed = 0.0
+    for frame in range(int(duration * fps)):
+        t = frame / fps
+        detections, visible = render(people, t, rng, tracker_ids)
+        start = time.perf_counter()
+        send = strategy.update(0, detections, now=t)
+        elapsed += time.perf_counter() - start
+        if send:
+            alerts += 1
+            covered.update(visible)
+    return alerts, len(covered), elapsed / max(1, int(duration * fps))
+
+def check_reappearance(fps, cooldown):
+    """
+    La misma caja vista en t=0-0,4 s y de nuevo en t=60-62,5 s, sin frames con detecciones
+    entre ambas: la segunda aparición es una persona nueva.
+
+    Returns:
+        list: Problemas encontrados.
+    """
+    suppressor = AlertSuppressor(cooldown)
+    box = np.array([(0, 0.9, 800, 400, 120, 300, 0, 0, 0, UNTRACKED_OBJECT_ID)], dtype=DETECTION_DTYPE)
+    times = [t for t in np.arange(0, 62.5, 1 / fps).tolist() if t <= 0.4 or t >= 60]
+    alerts = [t for t in times if suppressor.update(0, box, now=t)]
+    problems = []
+    if not any(t >= 60 for t in alerts):
+        problems.append(f"la persona nueva en el mismo lugar no generó alerta (alertas en {alerts})")
+    if suppressor.stats()['evicted'] < 1:
+        problems.append(f"el track de la primera persona no se retiró (max_track_age={suppressor.max_track_age:g} s)")
+    return problems
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fps", type=float, default=10.0)
+    parser.add_argument("--cooldown", type=float, default=120.0)
+    parser.add_argument("--mean-gap", type=float, default=20.0, help="Segundos promedio entre personas de paso")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"{'escenario':30s} {'estrategia':12s} {'alertas':>8s} {'personas en alertas':>20s} {'µs/frame':>9s}")
+    for name, people, duration, tracker_ids in scenarios(np.random.default_rng(args.seed), args):
+        for label, strategy in (("temporizador", LegacyTimer()), ("tracks", AlertSuppressor(args.cooldown))):
+            alerts, covered, per_frame = run(strategy, people, duration, args.fps, args.seed, tracker_ids)
+            print(f"{name:30s} {label:12s} {alerts:8d} {f'{covered}/{len(people)}':>20s} {per_frame * 1e6:9.1f}")
+
+    problems = check_reappearance(args.fps, args.cooldown)
+    print()
+    if problems:
+        print("\n".join(f"misma posición tras una pausa larga: {problem}" for problem in problems))
+        sys.exit(1)
+    print("Misma posición tras una pausa larga: alerta nueva, verificación superada")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Benchmark del envío agrupado de alertas (utils.batch_uploader).
+
+Simula varias cámaras generando alertas a intervalos regulares contra el servidor local
+de benchmarks/stub_server.py (con un RTT artificial) y compara el envío de una solicitud
+por alerta contra lotes con distintas ventanas. Reporta solicitudes, bytes enviados y
+latencia de extremo a extremo por alerta:
+
+    python3 benchmarks/bench_batch_uploader.py --cameras 5 --period 1.0 --duration 20
+"""
+
+import argparse
+import glob
+import json
+import os
+import sys
+import threading
+import time
+
+import cv2
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.alert_transport import AlertTransport, percentile
+from utils.batch_uploader import BatchUploader, BatchItem
+from utils.payload_encoder import PayloadEncoder
+from benchmarks.stub_server import StubServer
+
+DEFAULT_IMAGES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..",
+                              "Datos experimentales", "Detections_jetson")
+
+def load_bodies(images, max_width, count=10):
+    encoder = PayloadEncoder(max_width=max_width, quality=80)
+    bodies = []
+    for i, path in enumerate(sorted(glob.glob(os.path.join(images, "*.jpg")))[:count]):
+        frame = cv2.imread(path)
+        if frame is not None:
+            body, _content_type, _info = encoder.build_body({'camera_id': i % 5, 'datealert': 0, 'client_id': 1}, frame)
+            bodies.append(body)
+    if not bodies:
+        sys.exit(f"No se encontraron imágenes en {images}")
+    return bodies
+
+def produce(args, bodies, deliver):
+    # Cada cámara emite una alerta cada 'period' segundos, desfasadas entre sí
+    threads = []
+    def camera(camera_id):
+        time.sleep(camera_id * args.period / args.cameras)
+        end = time.monotonic() + args.duration
+        i = 0
+        while time.monotonic() < end:
+            deliver(camera_id, bodies[(camera_id + i) % len(bodies)], time.monotonic())
+            i += 1
+            time.sleep(args.period)
+    for camera_id in range(args.cameras):
+        thread = threading.Thread(target=camera, args=(camera_id,))
+        thread.start()
+        threads.append(thread)
+    for thread in threads:
+        thread.join()
+
+def run_single(server, transport, args, bodies):
+    latencies = []
+    lock = threading.Lock()
+    def deliver(camera_id, body, enqueued_at):
+        if transport.post(server.url, body, lambda: {'Content-Type': 'application/json'}, max_retries=1) is not None:
+            with lock:
+                latencies.append(time.monotonic() - enqueued_at)
+    produce(args, bodies, deliver)
+    return sorted(latencies)
+
+def run_batched(server, transport, args, bodies, window):
+    def send_batch(body, count, compressed):
+        headers = {'Content-Type': 'application/json', 'Content-Encoding': 'gzip'} if compressed else {'Content-Type': 'application/json'}
+        return transport.post(server.url + "/batch", body, lambda: headers, max_retries=1) is not None
+    uploader = BatchUploader(send_batch, window=window, max_alerts=args.max_alerts, metrics_window=100000)
+    uploader.start()
+    produce(args, bodies, lambda camera_id, body, enqueued_at: uploader.submit(BatchItem(body, camera_id, enqueued_at)))
+    uploader.stop()
+    return uploader.stats()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--images", default=DEFAULT_IMAGES)
+    parser.add_argument("--cameras", type=int, default=5)
+    parser.add_argument("--period", type=float, default=1.0, help="Segundos entre alertas de una misma cámara")
+    parser.add_argument("--duration", type=float, default=20.0)
+    parser.add_argument("--latency", type=float, default=0.05, help="RTT artificial del servidor en segundos")
+    parser.add_argument("--max-width", type=int, default=640)
+    parser.add_argument("--max-alerts", type=int, default=20)
+    parser.add_argument("--windows", default="0.5,1,2,5", help="Ventanas de agrupación a probar, en segundos")
+    args = parser.parse_args()
+
+    bodies = load_bodies(args.images, args.max_width)
+    server = StubServer(latency=args.latency).start()
+    transport = AlertTransport(http2=False)
+    print(f"{args.cameras} cámaras, una alerta cada {args.period} s por cámara durante {args.duration} s, "
+          f"alertas de ~{sum(map(len, bodies)) // len(bodies) // 1024} KB, RTT {args.latency * 1e3:.0f} ms\n")
+    print(f"{'modo':18s} {'alertas':>8s} {'solicit.':>9s} {'MB enviados':>12s} {'lote medio':>11s} "
+          f"{'p50 ms':>8s} {'p90 ms':>8s} {'p99 ms':>8s}")
+    try:
+        server.requests = server.bytes_received = 0
+        latencies = run_single(server, transport, args, bodies)
+        print(f"{'una por alerta':18s} {len(latencies):8d} {server.requests:9d} {server.bytes_received / 1e6:12.2f} "
+              f"{1.0:11.1f} {percentile(latencies, 0.5) * 1e3:8.0f} {percentile(latencies, 0.9) * 1e3:8.0f} "
+              f"{percentile(latencies, 0.99) * 1e3:8.0f}")
+
+        for window in (float(w) for w in args.windows.split(",")):
+            server.requests = server.bytes_received = 0
+            stats = run_batched(server, transport, args, bodies, window)
+            print(f"{f'lotes {window:g} s':18s} {stats['alerts']:8d} {server.requests:9d} "
+                  f"{server.bytes_received / 1e6:12.2f} {stats['batch_avg']:11.1f} {stats['latency_p50_ms']:8.0f} "
+                  f"{stats['latency_p90_ms']:8.0f} {stats['latency_p99_ms']:8.0f}")
+    finally:
+        transport.close()
+        server.stop()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Costo de los callbacks de pipeline.launch_pipeline sin DeepStream ni GPU.
+
+Instala los dobles de benchmarks/fake_deepstream.py (pyds, Gst, GLib), importa el
+pipeline real y mide:
+
+- ``on_new_sample`` completo a través de un appsink falso, con batches cuyos metadatos
+  (listas enlazadas de NvDsFrameMeta/NvDsObjectMeta) salen de la escena sintética de
+  pipeline.replay y cuyas superficies son JPEG de Detections_jetson;
+- por separado, el adaptador (``batch_from_buffer``: recorrido de los metadatos) y el
+  motor (``FrameEngine.process``) sobre los mismos batches;
+- ``cb_newpad``, ``decodebin_child_added``, ``bus_call`` y ``source_bus_call``.
+
+Las alertas se despachan en línea sin codificarlas, de modo que se mide solo el hilo de
+streaming. Requiere las demás dependencias del sistema de borde (utils, monitoring):
+
+    python3 benchmarks/bench_callbacks.py --cameras 8 --batches 2000
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from benchmarks import fake_deepstream as fake
+
+Gst = fake.install()
+
+from common.bus_call import bus_call
+from pipeline import launch_pipeline
+from pipeline.engine import FrameEngine, FRAMES, ALERTS
+from pipeline.frame_processing import FramePool
+from pipeline.replay import SyntheticScene, InlineDispatcher, load_frames, synthetic_frames, synthetic_batches
+from pipeline.source_manager import source_bus_call
+from pipeline.suppression import AlertSuppressor
+
+DEFAULT_IMAGES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..",
+                              "Datos experimentales", "Detections_jetson")
+
+def fake_buffers(batches):
+    """
+    Convierte los FrameBatch sintéticos en buffers con metadatos de DeepStream falsos.
+    """
+    buffers = []
+    for batch in batches:
+        frames = []
+        for frame in batch.frames:
+            rows = batch.detections[batch.detections['batch_id'] == frame.batch_id]
+            objects = [fake.NvDsObjectMeta(int(row['class_id']), float(row['confidence']), float(row['left']),
+                                           float(row['top']), float(row['width']), float(row['height']),
+                                           int(row['object_id'])) for row in rows]
+            frames.append(fake.NvDsFrameMeta(frame.pad_index, frame.frame_num, frame.batch_id, objects,
+                                             buf_pts=frame.pts_ns))
+        surfaces = {frame.batch_id: frame.surface() for frame in batch.frames}
+        buffers.append(fake.make_buffer(frames, surfaces, batch.frames[0].pts_ns))
+    return buffers
+
+def new_engine(cameras):
+    frame_pool = FramePool(3)
+    dispatcher = InlineDispatcher(lambda record: True, on_release=lambda record: frame_pool.release(record['frame']))
+    source_states = launch_pipeline.build_source_states({f"cam{i}": f"rtsp://fake/{i}" for i in range(cameras)})
+    return FrameEngine(dispatcher, source_states, frame_pool, AlertSuppressor(launch_pipeline.ALERT_COOLDOWN),
+                       seek_class=launch_pipeline.SEEK_CLASS, confidence=launch_pipeline.CONFIDENCE_BIAS,
+                       class_labels=launch_pipeline.CLASS_LABELS, log=None,
+                       frame_clock=lambda frame: frame.pts_ns / 1e9)
+
+def timed(function, items):
+    start = time.perf_counter()
+    for item in items:
+        function(item)
+    return time.perf_counter() - start
+
+class CountingManager:
+    def __init__(self):
+        self.failures = 0
+
+    def on_source_failure(self, pad_index, reason):
+        self.failures += 1
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cameras", type=int, default=8, help="Cámaras y frames por batch")
+    parser.add_argument("--batches", type=int, default=2000)
+    parser.add_argument("--arrival-rate", type=float, default=0.2, help="Personas que entran por cámara por segundo")
+    parser.add_argument("--images", default=DEFAULT_IMAGES)
+    parser.add_argument("--calls", type=int, default=1000, help="Llamadas a los callbacks de configuración y del bus")
+    args = parser.parse_args()
+
+    width, height = launch_pipeline.STREAMMUX_WIDTH, launch_pipeline.STREAMMUX_HEIGHT
+    images = load_frames(args.images, width, height) or synthetic_frames(width, height)
+    scene = SyntheticScene(args.cameras, width, height, arrival_rate=args.arrival_rate)
+    batches = list(synthetic_batches(scene, images, args.batches / scene.fps, args.cameras))
+    buffers = fake_buffers(batches)
+    frames = sum(len(batch.frames) for batch in batches)
+    objects = sum(len(batch.detections) for batch in batches)
+    print(f"{len(buffers)} batches de {args.cameras} frames, {objects / frames:.1f} objetos por frame")
+
+    sink = fake.FakeAppSink()
+    engine = new_engine(args.cameras)
+    sink.connect("new-sample", launch_pipeline.on_new_sample, engine)
+    counted = sum(FRAMES.values().values())
+    seconds = timed(sink.push, buffers)
+    assert sum(FRAMES.values().values()) - counted == frames
+    queued = sum(value for (_camera, outcome), value in ALERTS.values().items() if outcome == "queued")
+
+    adapter_s = timed(launch_pipeline.batch_from_buffer, buffers)
+    engine_s = timed(new_engine(args.cameras).process, [launch_pipeline.batch_from_buffer(b) for b in buffers])
+    for name, total in (("on_new_sample", seconds), ("  batch_from_buffer", adapter_s), ("  FrameEngine.process", engine_s)):
+        print(f"{name:24s} {total / len(buffers) * 1e6:9.1f} us por batch {total / frames * 1e6:7.1f} us por frame")
+    print(f"Alertas encoladas: {queued}")
+
+    pad = fake.FakePad()
+    source_bin = fake.FakeBin()
+    child = fake.FakeElement("decodebin0")
+    message = fake.FakeMessage(Gst.MessageType.ELEMENT, structure=fake.FakeStructure("other"))
+    eos = fake.FakeMessage(Gst.MessageType.ELEMENT, structure=fake.FakeStructure("stream-eos", {'stream-id': 0}))
+    loop, manager = fake.FakeMainLoop(), CountingManager()
+    calls = range(args.calls)
+    for name, function in (
+            ("cb_newpad", lambda _i: launch_pipeline.cb_newpad(None, pad, source_bin)),
+            ("decodebin_child_added", lambda _i: launch_pipeline.decodebin_child_added(None, child, "decodebin0", None)),
+            ("bus_call", lambda _i: bus_call(None, message, loop)),
+            ("source_bus_call (EOS)", lambda _i: source_bus_call(None, eos, loop, manager))):
+        print(f"{name:24s} {timed(function, calls) / args.calls * 1e6:9.2f} us por llamada")
+    assert source_bin.get_static_pad("src").target is pad and manager.failures == args.calls
+
+if __name__ == "__main__":
+    main()
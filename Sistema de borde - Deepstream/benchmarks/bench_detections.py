@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark de la etapa de detecciones.
+
+Compara el recorrido original objeto por objeto de on_new_sample (filtro de clase y
+confianza, cv2.rectangle y cv2.putText por objeto) contra la etapa basada en arreglos
+de pipeline.detections (volcado filtrado a arreglo estructurado, agrupación por frame y
+dibujo con cv2.rectangle y cv2.putText por objeto). El volcado solo lee la caja de los
+objetos que pasan el filtro, de modo que sin dibujo la etapa con arreglos no debe ser
+más lenta que el recorrido original. Las variantes se miden alternadas durante
+``--rounds`` rondas y se reporta la mejor medición de cada una.
+
+Se ejecuta en CPU con detecciones sintéticas:
+
+    python3 benchmarks/bench_detections.py --cameras 5 --objects 60
+"""
+
+import argparse
+import os
+import sys
+import timeit
+from types import SimpleNamespace
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from pipeline.detections import collect_detections, group_by, draw_detections, UNTRACKED_OBJECT_ID
+
+SEEK_CLASS = 0
+CONFIDENCE_BIAS = 0.6
+
+def make_batch(cameras, objects, width, height, seed=0):
+    """
+    Genera un batch sintético: una lista de frames con objetos que imitan NvDsObjectMeta.
+    """
+    rng = np.random.default_rng(seed)
+    frames = []
+    for pad_index in range(cameras):
+        objs = []
+        for _ in range(objects):
+            w, h = rng.integers(20, 200), rng.integers(40, 400)
+            objs.append(SimpleNamespace(
+                class_id=int(rng.integers(0, 3)),
+                confidence=float(rng.random()),
+                object_id=UNTRACKED_OBJECT_ID,
+                obj_label="person",
+                rect_params=SimpleNamespace(
+                    left=float(rng.integers(0, width - w)),
+                    top=float(rng.integers(10, height - h)),
+                    width=float(w),
+                    height=float(h),
+                ),
+            ))
+        frames.append(SimpleNamespace(pad_index=pad_index, frame_num=1, batch_id=pad_index, objects=objs))
+    return frames
+
+def legacy_loop(frames, images):
+    """
+    Recorrido original de on_new_sample, un objeto a la vez.
+    """
+    for frame_meta in frames:
+        frame_rgb = images[frame_meta.batch_id]
+        for obj_meta in frame_meta.objects:
+            if obj_meta.class_id == SEEK_CLASS and obj_meta.confidence >= CONFIDENCE_BIAS:
+                rect_params = obj_meta.rect_params
+                top = int(rect_params.top)
+                left = int(rect_params.left)
+                width = int(rect_params.width)
+                height = int(rect_params.height)
+                cv2.rectangle(frame_rgb, (left, top), (left + width, top + height), (0, 0, 255), 2)
+                label_text = f"{obj_meta.obj_label} {obj_meta.confidence:.2f}"
+                cv2.putText(frame_rgb, label_text, (left, top - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 2)
+
+def array_stage(frames, images):
+    """
+    Etapa basada en arreglos usada por on_new_sample.
+    """
+    detections = collect_detections(((f.pad_index, f.frame_num, f.batch_id, f.objects) for f in frames),
+                                    SEEK_CLASS, CONFIDENCE_BIAS)
+    by_frame = group_by(detections, 'batch_id')
+    for batch_id, frame_detections in by_frame.items():
+        draw_detections(images[batch_id], frame_detections, ["person"])
+
+def array_stage_no_draw(frames, images):
+    detections = collect_detections(((f.pad_index, f.frame_num, f.batch_id, f.objects) for f in frames),
+                                    SEEK_CLASS, CONFIDENCE_BIAS)
+    group_by(detections, 'batch_id')
+
+def legacy_no_draw(frames, images):
+    for frame_meta in frames:
+        matches = []
+        for obj_meta in frame_meta.objects:
+            if obj_meta.class_id == SEEK_CLASS and obj_meta.confidence >= CONFIDENCE_BIAS:
+                rect_params = obj_meta.rect_params
+                matches.append((int(rect_params.left), int(rect_params.top), int(rect_params.width), int(rect_params.height)))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cameras", type=int, default=5)
+    parser.add_argument("--objects", type=int, default=60, help="Objetos por frame")
+    parser.add_argument("--width", type=int, default=1920)
+    parser.add_argument("--height", type=int, default=1080)
+    parser.add_argument("--repeat", type=int, default=50, help="Batches por medición")
+    parser.add_argument("--rounds", type=int, default=40, help="Mediciones alternadas por variante")
+    args = parser.parse_args()
+
+    frames = make_batch(args.cameras, args.objects, args.width, args.height)
+    images = [np.zeros((args.height, args.width, 3), dtype=np.uint8) for _ in range(args.cameras)]
+
+    variants = [("recorrido original", legacy_loop), ("etapa con arreglos", array_stage),
+                ("original sin dibujo", legacy_no_draw), ("arreglos sin dibujo", array_stage_no_draw)]
+    print(f"{args.cameras} cámaras x {args.objects} objetos, {args.width}x{args.height}, "
+          f"{args.rounds} x {args.repeat} repeticiones")
+    # Las variantes se alternan (en orden inverso cada otra ronda) para que la carga de la
+    # máquina y el estado de la caché las afecten por igual
+    best = {name: float("inf") for name, _fn in variants}
+    for round_index in range(args.rounds):
+        for name, fn in (variants if round_index % 2 == 0 else variants[::-1]):
+            seconds = timeit.timeit(lambda: fn(frames, images), number=args.repeat) / args.repeat
+            best[name] = min(best[name], seconds)
+    for name, _fn in variants:
+        print(f"{name:22s} {best[name] * 1e3:8.3f} ms por batch")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+"""
+Arnés del despachador de alertas (utils.dispatcher.AlertDispatcher).
+
+Los trabajadores codifican frames sintéticos en JPEG y los envían con
+utils.alert_transport al servidor local de benchmarks/stub_server.py, que responde con
+un RTT artificial. Para cada política de contrapresión (drop-oldest, drop-newest y
+coalesce) se ejecutan dos fases:
+
+- ráfaga: con los trabajadores ocupados en alertas que no terminan hasta que la ráfaga
+  acaba, se encolan alertas de varias cámaras en orden circular. Los contadores
+  encolados, descartados y coalescidos deben coincidir con un modelo independiente de
+  la política (y con lo que retornó cada ``submit``), cada registro debe pasar exactamente una vez por ``on_release`` y todos
+  los encolados deben llegar al servidor;
+- carga sostenida: las cámaras generan alertas a una tasa mayor que la que el servidor
+  lento puede atender; se reportan los contadores, la latencia y el tiempo de ``submit``.
+
+En ambas fases ninguna llamada a ``submit`` puede tardar más de ``--max-submit-ms``
+(el hilo de streaming nunca debe bloquearse). El proceso termina con código 1 si
+alguna verificación falla:
+
+    python3 benchmarks/bench_dispatcher.py --cameras 4 --queue 8 --burst 60 --latency 0.2
+"""
+
+import argparse
+import collections
+import itertools
+import os
+import sys
+import threading
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.alert_transport import AlertTransport, percentile
+from utils.dispatcher import (AlertDispatcher, POLICIES, POLICY_COALESCE, POLICY_DROP_NEWEST, OUTCOME_QUEUED,
+                              OUTCOME_COALESCED)
+from benchmarks.stub_server import StubServer
+
+def synthetic_frames(cameras, width, height, seed=0):
+    """
+    Un frame BGR con ruido y un rectángulo por cámara.
+    """
+    rng = np.random.default_rng(seed)
+    frames = []
+    for camera in range(cameras):
+        frame = rng.integers(0, 256, (height, width, 3), dtype=np.uint8)
+        cv2.rectangle(frame, (camera * 20, 40), (camera * 20 + 80, 200), (0, 0, 255), -1)
+        frames.append(frame)
+    return frames
+
+def expected_counts(policy, cameras, max_queue, busy=0):
+    """
+    Contadores que debe dejar una ráfaga de alertas de ``cameras`` con la cola vacía y
+    ``busy`` alertas ya en manos de los trabajadores (fuera de la cola).
+
+    Modelo independiente de la implementación: la cola es una lista de cámaras.
+
+    Returns:
+        tuple: ``(counts, pending)``, los contadores y las alertas que quedan en la cola.
+    """
+    queue = []
+    counts = {'queued': 0, 'dropped': 0, 'coalesced': 0}
+    for camera in cameras:
+        if policy == POLICY_COALESCE and camera in queue:
+            counts['coalesced'] += 1
+            continue
+        if len(queue) >= max_queue:
+            counts['dropped'] += 1
+            if policy == POLICY_DROP_NEWEST:
+                continue
+            queue.pop(0)
+        queue.append(camera)
+        counts['queued'] += 1
+    counts['queued'] += busy
+    return counts, len(queue)
+
+class Harness:
+    """
+    Despachador de una política con su manejador, el registro de ``on_release`` y los
+    resultados y tiempos de ``submit``.
+    """
+
+    def __init__(self, policy, args, server, transport, frames):
+        self.server = server
+        self.transport = transport
+        self.frames = frames
+        self.quality = args.quality
+        self.released = collections.Counter()
+        self.outcomes = collections.Counter()
+        self.submit_s = []
+        self.ids = itertools.count()
+        # Mientras el cerrojo está cerrado, los trabajadores no terminan sus alertas
+        self.hold = threading.Event()
+        self.hold.set()
+        self.busy = threading.Semaphore(0)
+        self.dispatcher = AlertDispatcher(self.handle, max_queue=args.queue, num_workers=args.workers,
+                                          policy=policy, name=f"bench-{policy}", on_release=self.release)
+
+    def handle(self, record):
+        self.busy.release()
+        self.hold.wait()
+        ok, jpeg = cv2.imencode(".jpg", record['frame'], [cv2.IMWRITE_JPEG_QUALITY, self.quality])
+        if not ok:
+            return False
+        response = self.transport.post(f"{self.server.url}/alert/{record['camera_id']}", jpeg.tobytes(),
+                                       lambda: {'Content-Type': 'image/jpeg'}, max_retries=1)
+        return response is not None
+
+    def release(self, record):
+        self.released[record['id']] += 1
+
+    def submit(self, camera):
+        record = {'id': next(self.ids), 'camera_id': camera, 'frame': self.frames[camera]}
+        start = time.perf_counter()
+        outcome = self.dispatcher.submit(record)
+        self.submit_s.append(time.perf_counter() - start)
+        self.outcomes[outcome] += 1
+
+    def check_releases(self):
+        """
+        Returns:
+            list: Problemas encontrados en ``on_release``.
+        """
+        problems = []
+        missing = len(self.submit_s) - len(self.released)
+        if missing:
+            problems.append(f"{missing} registros nunca pasaron por on_release")
+        repeated = sum(1 for count in self.released.values() if count > 1)
+        if repeated:
+            problems.append(f"{repeated} registros pasaron más de una vez por on_release")
+        return problems
+
+    def check_outcomes(self, stats):
+        """
+        Los resultados de ``submit`` deben coincidir con los contadores de encolados y
+        coalescidos (los descartados incluyen además los más antiguos, en drop-oldest).
+
+        Returns:
+            list: Problemas encontrados.
+        """
+        return [f"submit retornó {self.outcomes[name]} veces {name!r}, el contador {name} es {stats[name]}"
+                for name in (OUTCOME_QUEUED, OUTCOME_COALESCED) if self.outcomes[name] != stats[name]]
+
+def run_burst(policy, args, server, transport, frames):
+    """
+    Fase de ráfaga.
+
+    Returns:
+        tuple: ``(stats, expected, problems, submit_s)``.
+    """
+    harness = Harness(policy, args, server, transport, frames)
+    dispatcher = harness.dispatcher
+    dispatcher.start()
+    alerts_before = len(server.alerts)
+
+    # Ocupar a todos los trabajadores antes de la ráfaga para que la cola sea determinista
+    harness.hold.clear()
+    for worker in range(args.workers):
+        harness.submit(worker % args.cameras)
+    for _ in range(args.workers):
+        if not harness.busy.acquire(timeout=5):
+            dispatcher.stop(drain=False)
+            return dispatcher.stats(), {}, ["los trabajadores no tomaron las primeras alertas"], harness.submit_s
+
+    cameras = [i % args.cameras for i in range(args.burst)]
+    for camera in cameras:
+        harness.submit(camera)
+    pending = dispatcher.qsize()
+    harness.hold.set()
+    dispatcher.stop(drain=True, timeout=30)
+
+    stats = dispatcher.stats()
+    expected, expected_pending = expected_counts(policy, cameras, args.queue, busy=args.workers)
+    problems = harness.check_releases() + harness.check_outcomes(stats)
+    for name, value in expected.items():
+        if stats[name] != value:
+            problems.append(f"{name}: {stats[name]}, se esperaban {value}")
+    if pending != expected_pending:
+        problems.append(f"cola tras la ráfaga: {pending}, se esperaban {expected_pending}")
+    submitted = args.workers + len(cameras)
+    ended = stats['sent'] + stats['failed'] + stats['spooled'] + stats['dropped'] + stats['coalesced']
+    if ended != submitted:
+        problems.append(f"enviados + fallidos + guardados + descartados + coalescidos = {ended}, se encolaron {submitted}")
+    received = len(server.alerts) - alerts_before
+    if stats['failed'] or received != stats['sent']:
+        problems.append(f"el servidor recibió {received} alertas de {stats['sent']} enviadas ({stats['failed']} fallidas)")
+    return stats, expected, problems, harness.submit_s
+
+def run_load(policy, args, server, transport, frames):
+    """
+    Fase de carga sostenida: ``args.rate`` alertas por segundo repartidas entre las cámaras.
+
+    Returns:
+        tuple: ``(stats, problems, submit_s)``.
+    """
+    harness = Harness(policy, args, server, transport, frames)
+    dispatcher = harness.dispatcher
+    dispatcher.start()
+    period = 1.0 / args.rate
+    start = time.monotonic()
+    for i in range(int(args.rate * args.duration)):
+        delay = start + i * period - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        harness.submit(i % args.cameras)
+    dispatcher.stop(drain=True, timeout=60)
+    stats = dispatcher.stats()
+    problems = harness.check_releases() + harness.check_outcomes(stats)
+    ended = stats['sent'] + stats['failed'] + stats['spooled'] + stats['dropped'] + stats['coalesced']
+    if ended != len(harness.submit_s):
+        problems.append(f"enviados + fallidos + guardados + descartados + coalescidos = {ended}, se encolaron "
+                        f"{len(harness.submit_s)}")
+    return stats, problems, harness.submit_s
+
+def submit_problems(submit_s, max_submit_ms):
+    worst = max(submit_s) * 1e3 if submit_s else 0.0
+    return [f"submit tardó {worst:.2f} ms (máximo permitido {max_submit_ms:g} ms)"] if worst > max_submit_ms else []
+
+def report(policy, phase, stats, submit_s):
+    submit_s = sorted(submit_s)
+    print(f"{policy:12s} {phase:9s} {stats['queued']:7d} {stats['sent']:8d} {stats['dropped']:9d} "
+          f"{stats['coalesced']:9d} {stats['latency_avg'] * 1e3:8.0f} ms {percentile(submit_s, 0.99) * 1e6:8.0f} us "
+          f"{submit_s[-1] * 1e6 if submit_s else 0.0:8.0f} us")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--policies", nargs="+", choices=POLICIES, default=list(POLICIES))
+    parser.add_argument("--cameras", type=int, default=4)
+    parser.add_argument("--queue", type=int, default=8, help="Tamaño de la cola del despachador")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--burst", type=int, default=60, help="Alertas de la fase de ráfaga")
+    parser.add_argument("--rate", type=float, default=40.0, help="Alertas por segundo en la carga sostenida")
+    parser.add_argument("--duration", type=float, default=5.0, help="Segundos de carga sostenida")
+    parser.add_argument("--latency", type=float, default=0.2, help="RTT artificial del servidor en segundos")
+    parser.add_argument("--width", type=int, default=1280)
+    parser.add_argument("--height", type=int, default=720)
+    parser.add_argument("--quality", type=int, default=85)
+    parser.add_argument("--max-submit-ms", type=float, default=5.0)
+    args = parser.parse_args()
+
+    frames = synthetic_frames(args.cameras, args.width, args.height)
+    server = StubServer(latency=args.latency).start()
+    transport = AlertTransport(http2=False)
+    print(f"{args.cameras} cámaras, cola {args.queue}, {args.workers} trabajadores, RTT {args.latency * 1e3:.0f} ms, "
+          f"frames {args.width}x{args.height}\n")
+    print(f"{'política':12s} {'fase':9s} {'encol.':>7s} {'enviad.':>8s} {'descart.':>9s} {'coalesc.':>9s} "
+          f"{'lat. media':>11s} {'submit p99':>11s} {'submit máx':>11s}")
+    failures = []
+    try:
+        for policy in args.policies:
+            stats, expected, problems, submit_s = run_burst(policy, args, server, transport, frames)
+            problems += submit_problems(submit_s, args.max_submit_ms)
+            report(policy, "ráfaga", stats, submit_s)
+            if expected:
+                print(f"{'':12s} {'esperado':9s} {expected['queued']:7d} {'':>8s} {expected['dropped']:9d} "
+                      f"{expected['coalesced']:9d}")
+            failures += [f"{policy} (ráfaga): {problem}" for problem in problems]
+
+            stats, problems, submit_s = run_load(policy, args, server, transport, frames)
+            problems += submit_problems(submit_s, args.max_submit_ms)
+            report(policy, "carga", stats, submit_s)
+            failures += [f"{policy} (carga): {problem}" for problem in problems]
+    finally:
+        transport.close()
+        server.stop()
+
+    print()
+    if failures:
+        print("\n".join(failures))
+        sys.exit(1)
+    print("Todas las verificaciones pasaron")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Costo de contar frames en el hilo de streaming.
+
+Compara los conteos anteriores (common/FPS.py original, con un mutex global tomado en
+cada frame, y el de on_new_sample, con time.time() por frame y el cálculo y el log del
+FPS de cada cámara cada segundo) contra los contadores por hilo de common.metrics, con
+varios hilos contando a la vez, y mide cuánto tarda una lectura de /metrics.
+
+    python3 benchmarks/bench_metrics.py --threads 4 --cameras 8 --frames 200000
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+import urllib.request
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.metrics import MetricsRegistry, MetricsServer, RateMeter
+
+class LegacyFPS:
+    """
+    Conteo de common/FPS.py original: mutex global por frame.
+    """
+
+    mutex = threading.Lock()
+
+    def __init__(self):
+        self.frame_count = 0
+
+    def update_fps(self):
+        with LegacyFPS.mutex:
+            self.frame_count = self.frame_count + 1
+
+def legacy_on_new_sample(fps_data, camera_id, log):
+    """
+    Conteo de FPS que hacía on_new_sample en cada frame.
+    """
+    fps_data['frame_count'] += 1
+    current_time = time.time()
+    elapsed_time = current_time - fps_data['last_time']
+    if elapsed_time >= 1.0:
+        fps = fps_data['frame_count'] / elapsed_time
+        fps_data['fps'] = fps
+        log(f"Flujo {camera_id}: {fps:.2f} FPS")
+        fps_data['frame_count'] = 0
+        fps_data['last_time'] = current_time
+
+def run_threads(threads, target):
+    workers = [threading.Thread(target=target, args=(i,)) for i in range(threads)]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, default=4, help="Hilos que cuentan a la vez")
+    parser.add_argument("--cameras", type=int, default=8)
+    parser.add_argument("--frames", type=int, default=200000, help="Frames por hilo")
+    args = parser.parse_args()
+    total = args.threads * args.frames
+
+    legacy = [LegacyFPS() for _ in range(args.cameras)]
+
+    def legacy_worker(_index):
+        for i in range(args.frames):
+            legacy[i % args.cameras].update_fps()
+
+    log_lines = []
+    states = [[{'frame_count': 0, 'last_time': time.time(), 'fps': 0} for _ in range(args.cameras)]
+              for _ in range(args.threads)]
+
+    def sample_worker(index):
+        # Cada hilo con sus cámaras, como el hilo de streaming con su appsink
+        for i in range(args.frames):
+            legacy_on_new_sample(states[index][i % args.cameras], i % args.cameras, log_lines.append)
+
+    registry = MetricsRegistry()
+    frames = registry.counter("edge_frames_total", "Frames", ("camera",))
+    latency = registry.histogram("edge_alert_send_seconds", "Send latency", ("camera",))
+    labels = [(f"cam{i}",) for i in range(args.cameras)]
+
+    def counter_worker(_index):
+        for i in range(args.frames):
+            frames.inc(labels[i % args.cameras])
+
+    def histogram_worker(_index):
+        for i in range(args.frames):
+            latency.observe(labels[i % args.cameras], (i % 1000) / 1000)
+
+    for name, worker in (("mutex global (FPS.py)", legacy_worker), ("on_new_sample anterior", sample_worker),
+                         ("contador por hilo", counter_worker),
+                         ("histograma por hilo", histogram_worker)):
+        seconds = run_threads(args.threads, worker)
+        print(f"{name:24s} {seconds / total * 1e9:8.0f} ns por actualización ({args.threads} hilos)")
+
+    counted = sum(frames.values().values())
+    assert counted == total, (counted, total)
+
+    meter = RateMeter(frames, window=10.0)
+    registry.gauge("edge_camera_fps", "FPS", ("camera",), callback=meter.rates)
+    meter.sample(0.0)
+    frames.inc(labels[0], 250)
+    meter.sample(10.0)
+    assert meter.rates()[labels[0]] == 25.0
+
+    server = MetricsServer(registry, port=0).start()
+    try:
+        start = time.perf_counter()
+        scrapes = 50
+        for _ in range(scrapes):
+            with urllib.request.urlopen(server.url) as response:
+                body = response.read()
+        elapsed = (time.perf_counter() - start) / scrapes
+    finally:
+        server.stop()
+    lines = len(body.splitlines())
+    print(f"GET /metrics: {elapsed * 1e3:.2f} ms, {len(body)} bytes, {lines} líneas")
+
+if __name__ == "__main__":
+    main()
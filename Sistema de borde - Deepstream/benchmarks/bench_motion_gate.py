@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Fracción de frames filtrada por pipeline.motion.MotionGate, en CPU y con archivos de video.
+
+Reproduce la etapa previa a ``pgie`` fuera de GStreamer: cada frame de cada cámara se
+reduce a un proxy GRAY8 (como lo hace ``nvvideoconvert`` en la rama de movimiento), el
+proxy actualiza la compuerta y ``should_infer`` decide si el frame llega a la
+inferencia. Como en el pipeline, la decisión sobre un frame usa los proxies anteriores
+(``--lag``). Los frames salen de:
+
+- archivos de video (``--videos``, uno por cámara), decodificados con OpenCV;
+- sin videos, la escena sintética de bench_scheduling (personas dibujadas sobre JPEG de
+  Detections_jetson con ruido de sensor), que además permite medir el retardo entre la
+  aparición de cada persona y el primer frame enviado a la inferencia en que es visible.
+
+Reporta por cámara los frames ofrecidos, enviados y filtrados, las aperturas de la
+compuerta y el costo de ``update`` por frame; ``--csv`` escribe el puntaje y la decisión
+de cada frame para ajustar los umbrales:
+
+    python3 benchmarks/bench_motion_gate.py --videos pasillo.mp4 parqueadero.mp4 --csv /tmp/gate.csv
+    python3 benchmarks/bench_motion_gate.py --cameras 4 --seconds 300 --arrival-rate 0.01 --method difference
+"""
+
+import argparse
+import collections
+import csv
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from benchmarks.bench_scheduling import SceneRenderer, parse_polygon
+from pipeline.motion import MotionGate, METHOD_MOG2, METHOD_DIFFERENCE, gray_proxy, format_report
+from pipeline.replay import SyntheticScene, load_frames, synthetic_frames
+from pipeline.roi import CameraRois
+
+DEFAULT_IMAGES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..",
+                              "Datos experimentales", "Detections_jetson")
+
+class GateDriver:
+    """
+    Aplica la compuerta a los frames de una cámara con ``lag`` frames de retraso en los proxies.
+    """
+
+    def __init__(self, gate, pad_index, lag, proxy_size, writer=None):
+        self.gate = gate
+        self.pad_index = pad_index
+        self.proxy_size = proxy_size
+        self.writer = writer
+        self.pending = collections.deque()
+        self.lag = lag
+        self.update_s = 0.0
+        self.frame_num = 0
+
+    def offer(self, frame):
+        """
+        Returns:
+            bool: True si el frame se envía a la inferencia.
+        """
+        self.pending.append(gray_proxy(frame, *self.proxy_size))
+        score = None
+        while len(self.pending) > self.lag:
+            start = time.perf_counter()
+            score = self.gate.update(self.pad_index, self.pending.popleft())
+            self.update_s += time.perf_counter() - start
+        forwarded = self.gate.should_infer(self.pad_index)
+        if self.writer is not None:
+            self.writer.writerow((self.pad_index, self.frame_num, "" if score is None else f"{score:.5f}",
+                                  int(forwarded)))
+        self.frame_num += 1
+        return forwarded
+
+def run_videos(args, gate, writer):
+    captures = [cv2.VideoCapture(path) for path in args.videos]
+    drivers = []
+    for camera, path in enumerate(args.videos):
+        if not captures[camera].isOpened():
+            sys.exit(f"No fue posible abrir {path}")
+        gate.add(camera, os.path.basename(path))
+        drivers.append(GateDriver(gate, camera, args.lag, (args.proxy_width, args.proxy_height), writer))
+
+    active = list(range(len(captures)))
+    while active:
+        for camera in list(active):
+            ok, frame = captures[camera].read()
+            if not ok:
+                active.remove(camera)
+                continue
+            drivers[camera].offer(frame)
+    return drivers
+
+def run_scene(args, gate, writer):
+    images = load_frames(args.images, args.width, args.height) or synthetic_frames(args.width, args.height)
+    renderer = SceneRenderer(images, args.noise, seed=args.seed)
+    scene = SyntheticScene(args.cameras, args.width, args.height, args.fps, args.arrival_rate, args.dwell,
+                           clutter=0, seed=args.seed)
+    drivers = []
+    for camera in range(args.cameras):
+        gate.add(camera, camera)
+        drivers.append(GateDriver(gate, camera, args.lag, (args.proxy_width, args.proxy_height), writer))
+
+    first_seen, first_forwarded = {}, {}
+    people_frames = people_gated = 0
+    for frame_num in range(int(args.seconds * args.fps)):
+        detections = scene.step(frame_num)
+        bounds = np.searchsorted(detections['pad_index'], np.arange(args.cameras + 1))
+        for camera in range(args.cameras):
+            people = detections[bounds[camera]:bounds[camera + 1]]
+            object_ids = people['object_id'].tolist()
+            for object_id in object_ids:
+                first_seen.setdefault(object_id, frame_num)
+            forwarded = drivers[camera].offer(renderer.render(camera, people))
+            if object_ids:
+                people_frames += 1
+                people_gated += not forwarded
+            if forwarded:
+                for object_id in object_ids:
+                    first_forwarded.setdefault(object_id, frame_num)
+                # Lo que haría el motor con las detecciones del frame enviado
+                gate.observe(camera, detections=len(people))
+
+    delays = np.array([first_forwarded[object_id] - frame for object_id, frame in first_seen.items()
+                       if object_id in first_forwarded], dtype=np.float64) * 1000 / args.fps
+    missed = sum(object_id not in first_forwarded for object_id in first_seen)
+    summary = f"Personas: {len(first_seen)}, perdidas {missed}"
+    if len(delays):
+        summary += (f"; retardo hasta el primer frame enviado media {delays.mean():.0f} ms, "
+                    f"p95 {np.percentile(delays, 95):.0f} ms, máximo {delays.max():.0f} ms")
+    print(f"{summary}; frames con personas filtrados {people_gated} de {people_frames}")
+    return drivers
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--videos", nargs="+", help="Un archivo de video por cámara en lugar de la escena sintética")
+    parser.add_argument("--method", choices=(METHOD_MOG2, METHOD_DIFFERENCE), default=METHOD_MOG2)
+    parser.add_argument("--proxy-width", type=int, default=160)
+    parser.add_argument("--proxy-height", type=int, default=96)
+    parser.add_argument("--open-threshold", type=float, default=0.01)
+    parser.add_argument("--close-threshold", type=float, default=0.003)
+    parser.add_argument("--hold", type=int, default=75, help="Proxies quietos antes de cerrar la compuerta")
+    parser.add_argument("--heartbeat", type=int, default=250)
+    parser.add_argument("--lag", type=int, default=1, help="Frames de retraso de los proxies frente a la decisión")
+    parser.add_argument("--roi", help='Polígono aplicado a todas las cámaras, p. ej. "0,0.45 1,0.45 1,1 0,1"')
+    parser.add_argument("--csv", help="Archivo con cámara, frame, puntaje y decisión de cada frame")
+    parser.add_argument("--cameras", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=120.0)
+    parser.add_argument("--fps", type=float, default=25.0)
+    parser.add_argument("--arrival-rate", type=float, default=0.01, help="Personas que entran por cámara por segundo")
+    parser.add_argument("--dwell", type=float, default=8.0)
+    parser.add_argument("--noise", type=float, default=4.0, help="Desviación del ruido de sensor (niveles de gris)")
+    parser.add_argument("--images", default=DEFAULT_IMAGES)
+    parser.add_argument("--width", type=int, default=640)
+    parser.add_argument("--height", type=int, default=360)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    camera_ids = [os.path.basename(path) for path in args.videos] if args.videos else list(range(args.cameras))
+    rois = None
+    if args.roi:
+        # La máscara se dibuja al tamaño del proxy; el tamaño de referencia no importa
+        rois = CameraRois({camera_id: [parse_polygon(args.roi)] for camera_id in camera_ids},
+                          args.proxy_width, args.proxy_height)
+    gate = MotionGate(args.open_threshold, args.close_threshold, hold=args.hold, heartbeat=args.heartbeat,
+                      method=args.method, rois=rois)
+
+    output = open(args.csv, "w", newline="") if args.csv else None
+    writer = csv.writer(output) if output else None
+    if writer is not None:
+        writer.writerow(("camera", "frame", "score", "forwarded"))
+    start = time.perf_counter()
+    try:
+        drivers = run_videos(args, gate, writer) if args.videos else run_scene(args, gate, writer)
+    finally:
+        if output is not None:
+            output.close()
+    elapsed = time.perf_counter() - start
+
+    rows = gate.report()
+    offered = sum(row['offered'] for row in rows)
+    gated = sum(row['gated'] for row in rows)
+    update_s = sum(driver.update_s for driver in drivers)
+    print(format_report(rows))
+    print(f"Total ({args.method}, proxy {args.proxy_width}x{args.proxy_height}): {offered} frames ofrecidos, "
+          f"{gated} filtrados ({gated / max(offered, 1):.1%}); update {update_s / max(offered, 1) * 1e6:.0f} us "
+          f"por frame ({elapsed:.1f} s en total)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Benchmark del codificador de alertas.
+
+Compara bytes enviados y tiempo de CPU por alerta entre el formato original (JPEG a
+resolución completa en base64 dentro de JSON) y las variantes de utils.payload_encoder,
+usando las detecciones guardadas en 'Datos experimentales/Detections_jetson':
+
+    python3 benchmarks/bench_payload_encoder.py
+    python3 benchmarks/bench_payload_encoder.py --images /ruta/a/jpgs --limit 50
+"""
+
+import argparse
+import glob
+import os
+import sys
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.payload_encoder import PayloadEncoder
+
+DEFAULT_IMAGES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..",
+                              "Datos experimentales", "Detections_jetson")
+
+# (nombre, parámetros del codificador)
+MODES = [
+    ("original json jpeg q95", dict()),
+    ("json jpeg 1280", dict(max_width=1280, quality=80)),
+    ("multipart jpeg q95", dict(mode="multipart")),
+    ("multipart jpeg 1280 q80", dict(mode="multipart", max_width=1280, quality=80)),
+    ("multipart jpeg 1280 <=100KB", dict(mode="multipart", max_width=1280, target_bytes=100_000)),
+    ("multipart webp 1280 <=100KB", dict(mode="multipart", image_format="webp", max_width=1280, target_bytes=100_000)),
+    ("multipart jpeg 640 <=40KB", dict(mode="multipart", max_width=640, target_bytes=40_000)),
+    ("multipart webp 640 <=40KB", dict(mode="multipart", image_format="webp", max_width=640, target_bytes=40_000)),
+]
+
+FIELDS = {'camera_id': 0, 'datealert': 1734514853.0, 'client_id': 1}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--images", default=DEFAULT_IMAGES, help="Directorio con las imágenes de prueba")
+    parser.add_argument("--limit", type=int, default=None, help="Número máximo de imágenes")
+    args = parser.parse_args()
+
+    paths = sorted(glob.glob(os.path.join(args.images, "*.jpg")))[:args.limit]
+    frames = [cv2.imread(path) for path in paths]
+    frames = [frame for frame in frames if frame is not None]
+    if not frames:
+        sys.exit(f"No se encontraron imágenes en {args.images}")
+    print(f"{len(frames)} imágenes de {args.images}\n")
+
+    baseline = None
+    print(f"{'modo':32s} {'KB/alerta':>10s} {'vs orig':>8s} {'ms medio':>9s} {'ms p95':>8s}")
+    for name, params in MODES:
+        encoder = PayloadEncoder(**params)
+        sizes = []
+        times = []
+        for frame in frames:
+            _body, _content_type, info = encoder.build_body(FIELDS, frame)
+            sizes.append(info['body_bytes'])
+            times.append(info['encode_ms'])
+        mean_size = float(np.mean(sizes))
+        baseline = baseline or mean_size
+        print(f"{name:32s} {mean_size / 1024:10.1f} {mean_size / baseline:8.2f} "
+              f"{np.mean(times):9.2f} {np.percentile(times, 95):8.2f}")
+
+if __name__ == "__main__":
+    main()
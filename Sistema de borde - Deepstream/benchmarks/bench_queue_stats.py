@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Conteo de descartes y ajuste de profundidad de las colas con pérdidas, sin GStreamer.
+
+Simula una cola ``leaky=2`` (descarta el buffer más antiguo cuando está llena) con las
+mismas sondas que pipeline.queue_stats.QueueMonitor agrega en el pipeline, alimentada a
+25 FPS por un productor y vaciada por un consumidor que puede ser:
+
+- ``bursty``: procesa en ráfagas (un batch de 5 cada 200 ms); una cola más profunda
+  absorbe la ráfaga y los descartes desaparecen.
+- ``saturated``: más lento que el productor (un frame de cada 3); ninguna profundidad
+  evita los descartes y el ajuste no debe hacer crecer la cola sin límite.
+
+Verifica que entrada = salida + descartados + nivel y muestra los cambios de
+``max-size-buffers`` que haría QueueTuner:
+
+    python3 benchmarks/bench_queue_stats.py --consumer bursty --seconds 60
+"""
+
+import argparse
+import os
+import sys
+from collections import deque
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.metrics import MetricsRegistry
+from pipeline.queue_stats import QueueMonitor, QueueTuner, format_report
+
+Gst = SimpleNamespace(PadProbeReturn=SimpleNamespace(OK=0), PadProbeType=SimpleNamespace(BUFFER=1))
+
+class SimulatedPad:
+    def __init__(self):
+        self.probes = []
+
+    def add_probe(self, _mask, callback):
+        self.probes.append(callback)
+
+    def run_probes(self):
+        for callback in self.probes:
+            callback(self, None)
+
+class SimulatedQueue:
+    """
+    Cola de GStreamer con ``leaky=2``, limitada por número de buffers.
+    """
+
+    def __init__(self, max_size):
+        self.properties = {'max-size-buffers': max_size, 'leaky': 2}
+        self.buffers = deque()
+        self.pads = {'sink': SimulatedPad(), 'src': SimulatedPad()}
+
+    def get_property(self, name):
+        if name == "current-level-buffers":
+            return len(self.buffers)
+        return self.properties[name]
+
+    def set_property(self, name, value):
+        self.properties[name] = value
+
+    def get_static_pad(self, name):
+        return self.pads[name]
+
+    def push(self, buffer):
+        self.pads['sink'].run_probes()
+        self.buffers.append(buffer)
+        while len(self.buffers) > self.properties['max-size-buffers']:
+            self.buffers.popleft()
+
+    def pop(self):
+        if self.buffers:
+            self.buffers.popleft()
+            self.pads['src'].run_probes()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--consumer", choices=["bursty", "saturated"], default="bursty")
+    parser.add_argument("--seconds", type=int, default=60)
+    parser.add_argument("--fps", type=int, default=25)
+    parser.add_argument("--depth", type=int, default=2, help="max-size-buffers inicial")
+    parser.add_argument("--no-tuner", action="store_true", help="Solo contar, sin ajustar la profundidad")
+    args = parser.parse_args()
+
+    queue = SimulatedQueue(args.depth)
+    monitor = QueueMonitor(MetricsRegistry())
+    monitor.watch(Gst, queue, "queue1", camera_id="sim")
+    tuner = None if args.no_tuner else QueueTuner(monitor, max_depth=8, max_latency=0.5, shrink_after=5)
+
+    for second in range(args.seconds):
+        for frame in range(args.fps):
+            queue.push(frame)
+            if args.consumer == "bursty" and frame % 5 == 4:
+                for _ in range(5):
+                    queue.pop()
+            elif args.consumer == "saturated" and frame % 3 == 0:
+                queue.pop()
+        if tuner is not None:
+            tuner.adjust(1.0)
+
+    row = monitor.report()[0]
+    assert row['in'] == row['out'] + row['dropped'] + row['level'], row
+    print(format_report([row]))
+    print(f"FPS ofrecidos {row['in'] / args.seconds:.1f}, entregados {row['out'] / args.seconds:.1f}")
+
+if __name__ == "__main__":
+    main()
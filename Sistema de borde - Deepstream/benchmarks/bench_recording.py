@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Rendimiento reproducible de la ruta posterior a la inferencia a partir de una grabación.
+
+Reproduce una grabación de detecciones (pipeline.recording, activada en el pipeline con
+RECORDING_OUTPUT) a través de pipeline.engine.FrameEngine lo más rápido posible, de forma
+determinista: la supresión usa el PTS de cada frame como reloj y cada alerta se dibuja y
+codifica con utils.payload_encoder.PayloadEncoder en el mismo hilo, sin cola ni hilos
+trabajadores. Dos corridas sobre la misma grabación producen las mismas alertas (mismo
+resumen ``digest``) y el número de frames por segundo sirve para comparar commits:
+
+    python3 benchmarks/bench_recording.py replay out/detections.npz --repeat 5 --json
+
+Sin un equipo con DeepStream se puede generar una grabación con la escena sintética de
+pipeline.replay y los JPEG de Detections_jetson como miniaturas:
+
+    python3 benchmarks/bench_recording.py synthesize /tmp/detections.npz --cameras 40 --seconds 60
+"""
+
+import argparse
+import datetime
+import hashlib
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from pipeline.engine import FrameEngine
+from pipeline.frame_processing import FramePool
+from pipeline.recording import DetectionRecorder, Recording
+from pipeline.replay import (SyntheticScene, InlineDispatcher, ReplayDriver, load_frames, synthetic_frames,
+                             synthetic_batches)
+from pipeline.suppression import AlertSuppressor
+from utils.payload_encoder import PayloadEncoder
+
+DEFAULT_IMAGES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..",
+                              "Datos experimentales", "Detections_jetson")
+
+# Marca de tiempo fija de las alertas para que el cuerpo codificado no dependa del reloj
+REPLAY_TIME = datetime.datetime(2024, 1, 1)
+
+def synthesize(args):
+    frames = load_frames(args.images, args.width, args.height) or synthetic_frames(args.width, args.height)
+    scene = SyntheticScene(args.cameras, args.width, args.height, args.fps, args.arrival_rate, args.dwell,
+                           args.clutter, tracked=not args.untracked, seed=args.seed)
+    source_states = {pad_index: {'camera_id': pad_index} for pad_index in range(args.cameras)}
+    recorder = DetectionRecorder(args.output, args.width, args.height, thumbnail_every=args.thumbnail_every,
+                                 clock=lambda: 0)
+    for batch in synthetic_batches(scene, frames, args.seconds, args.batch_size):
+        recorder.record(batch, source_states)
+    print(f"Grabación escrita en {args.output}: {recorder.save()}")
+
+def replay_once(recording, batches, encoder, args):
+    """
+    Una corrida determinista sobre ``batches``.
+
+    Returns:
+        dict: Resumen de ReplayDriver más alertas, tiempo de codificación y digest.
+    """
+    digest = hashlib.sha256()
+    encode_seconds = [0.0]
+
+    def handle(record):
+        start = time.perf_counter()
+        body, _content_type, _info = encoder.build_body(
+            {'camera_id': record['camera_id'], 'datealert': record['timestamp'], 'client_id': 1},
+            record['frame'], record['detections'])
+        encode_seconds[0] += time.perf_counter() - start
+        digest.update(f"{record['camera_id']}:{record['frame_number']}:{len(body)};".encode())
+        return True
+
+    frame_pool = FramePool(3)
+    dispatcher = InlineDispatcher(handle, on_release=lambda record: frame_pool.release(record['frame']))
+    suppressor = AlertSuppressor(args.cooldown)
+    engine = FrameEngine(dispatcher, recording.source_states(), frame_pool, suppressor, seek_class=args.seek_class,
+                         confidence=args.confidence, log=None, now=lambda: REPLAY_TIME,
+                         frame_clock=lambda frame: frame.pts_ns / 1e9)
+    stats = ReplayDriver(engine, speed=0).run(batches)
+    stats['alerts'] = dispatcher.stats()['sent']
+    stats['suppressed'] = suppressor.stats()['suppressed']
+    stats['encode_s'] = encode_seconds[0]
+    stats['digest'] = digest.hexdigest()[:16]
+    return stats
+
+def replay(args):
+    start = time.perf_counter()
+    recording = Recording.load(args.recording)
+    width, height = recording.size
+    fallback = None
+    if not (recording.frames['thumbnail'] >= 0).any():
+        fallback = load_frames(args.images, width, height) or synthetic_frames(width, height)
+    surfaces, index = recording.surfaces(args.thumbnails, fallback)
+    batches = recording.batches(surfaces, index)
+    load_s = time.perf_counter() - start
+    encoder = PayloadEncoder(max_width=args.max_width, quality=80)
+
+    runs = [replay_once(recording, batches, encoder, args) for _ in range(args.repeat)]
+    digests = {run['digest'] for run in runs}
+    if len(digests) > 1:
+        sys.exit(f"La reproducción no es determinista: {sorted(digests)}")
+    best = max(runs, key=lambda run: run['fps'])
+    summary = {
+        'recording': os.path.basename(args.recording),
+        'frames': best['frames'],
+        'batches': best['batches'],
+        'cameras': len(recording.source_states()),
+        'alerts': best['alerts'],
+        'suppressed': best['suppressed'],
+        'digest': best['digest'],
+        'fps_best': round(best['fps'], 1),
+        'fps_median': round(float(np.median([run['fps'] for run in runs])), 1),
+        'encode_s': round(best['encode_s'], 3),
+        'elapsed_s': round(best['elapsed'], 3),
+        'batch_p99_ms': round(best['batch_p99_ms'], 3),
+    }
+    if args.json:
+        print(json.dumps(summary))
+        return
+    print(f"{args.recording}: {summary['frames']} frames en {summary['batches']} batches de {summary['cameras']} "
+          f"cámaras, {len(surfaces)} superficies de {width}x{height} (carga {load_s:.1f} s)")
+    print(f"Alertas {summary['alerts']}, suprimidas {summary['suppressed']}, digest {summary['digest']}")
+    print(f"{args.repeat} corridas: {summary['fps_best']:.0f} frames/s (mediana {summary['fps_median']:.0f}), "
+          f"codificación {summary['encode_s']:.2f} de {summary['elapsed_s']:.2f} s, "
+          f"batch p99 {summary['batch_p99_ms']:.2f} ms")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    replay_parser = commands.add_parser("replay", help="Reproducir una grabación lo más rápido posible")
+    replay_parser.add_argument("recording")
+    replay_parser.add_argument("--repeat", type=int, default=3)
+    replay_parser.add_argument("--thumbnails", type=int, default=16, help="Miniaturas usadas como superficies")
+    replay_parser.add_argument("--images", default=DEFAULT_IMAGES, help="Frames si la grabación no tiene miniaturas")
+    replay_parser.add_argument("--seek-class", type=int, default=0)
+    replay_parser.add_argument("--confidence", type=float, default=0.6)
+    replay_parser.add_argument("--cooldown", type=float, default=120.0)
+    replay_parser.add_argument("--max-width", type=int, default=640)
+    replay_parser.add_argument("--json", action="store_true", help="Una línea JSON con el resumen")
+    replay_parser.set_defaults(run=replay)
+
+    synth_parser = commands.add_parser("synthesize", help="Generar una grabación con la escena sintética")
+    synth_parser.add_argument("output")
+    synth_parser.add_argument("--cameras", type=int, default=40)
+    synth_parser.add_argument("--fps", type=float, default=25.0)
+    synth_parser.add_argument("--seconds", type=float, default=60.0)
+    synth_parser.add_argument("--batch-size", type=int, default=8)
+    synth_parser.add_argument("--images", default=DEFAULT_IMAGES)
+    synth_parser.add_argument("--width", type=int, default=1920)
+    synth_parser.add_argument("--height", type=int, default=1080)
+    synth_parser.add_argument("--arrival-rate", type=float, default=0.05)
+    synth_parser.add_argument("--dwell", type=float, default=8.0)
+    synth_parser.add_argument("--clutter", type=float, default=2.0)
+    synth_parser.add_argument("--untracked", action="store_true")
+    synth_parser.add_argument("--thumbnail-every", type=int, default=250)
+    synth_parser.add_argument("--seed", type=int, default=0)
+    synth_parser.set_defaults(run=synthesize)
+
+    args = parser.parse_args()
+    args.run(args)
+
+if __name__ == "__main__":
+    main()
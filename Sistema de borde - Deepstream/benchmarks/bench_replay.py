@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Prueba de carga de la ruta de alertas con cámaras sintéticas, sin GPU ni DeepStream.
+
+Genera las detecciones de muchas cámaras (personas que entran, cruzan y salen de la
+escena, más objetos de otra clase) con pipeline.replay.SyntheticScene, las agrupa con
+frames JPEG en batches como los del streammux y las reproduce a la velocidad de las
+cámaras a través del mismo pipeline.engine.FrameEngine, supresor, pool de frames y
+despachador que usa el pipeline. El despachador puede:
+
+- ``none``: solo liberar el frame.
+- ``encode``: codificar la alerta con utils.payload_encoder.PayloadEncoder.
+- ``post``: codificarla y enviarla al servidor local de benchmarks/stub_server.py.
+
+Reporta los FPS alcanzados, el tiempo por batch, el retraso respecto al tiempo real y
+el destino de las alertas. Con ``--speed 0`` reproduce lo más rápido posible y con
+``--profile`` muestra las funciones más costosas:
+
+    python3 benchmarks/bench_replay.py --cameras 200 --fps 25 --seconds 30 --handler post
+"""
+
+import argparse
+import cProfile
+import os
+import pstats
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from pipeline.engine import FrameEngine, ALERTS
+from pipeline.frame_processing import FramePool
+from pipeline.replay import SyntheticScene, ReplayDriver, load_frames, synthetic_frames, synthetic_batches
+from pipeline.suppression import AlertSuppressor
+from utils.alert_transport import AlertTransport
+from utils.dispatcher import AlertDispatcher, POLICIES, POLICY_COALESCE
+from utils.payload_encoder import PayloadEncoder
+from benchmarks.stub_server import StubServer
+
+DEFAULT_IMAGES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..",
+                              "Datos experimentales", "Detections_jetson")
+
+def make_handler(kind, encoder, transport=None, url=None):
+    def handle(record):
+        if kind == "none":
+            return True
+        body, content_type, _info = encoder.build_body(
+            {'camera_id': record['camera_id'], 'datealert': record['timestamp'], 'client_id': 1},
+            record['frame'], record['detections'])
+        if kind == "encode":
+            return True
+        return transport.post(url, body, lambda: {'Content-Type': content_type}, max_retries=1) is not None
+    return handle
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cameras", type=int, default=40)
+    parser.add_argument("--fps", type=float, default=25.0)
+    parser.add_argument("--seconds", type=float, default=30.0)
+    parser.add_argument("--batch-size", type=int, default=8, help="Frames por batch (tamaño del streammux)")
+    parser.add_argument("--speed", type=float, default=1.0, help="Velocidad de reproducción; 0 = lo más rápido posible")
+    parser.add_argument("--images", default=DEFAULT_IMAGES, help="Directorio con JPEGs; si no hay, frames sintéticos")
+    parser.add_argument("--width", type=int, default=1920)
+    parser.add_argument("--height", type=int, default=1080)
+    parser.add_argument("--arrival-rate", type=float, default=0.05, help="Personas que entran por cámara por segundo")
+    parser.add_argument("--dwell", type=float, default=8.0, help="Segundos medios de una persona en escena")
+    parser.add_argument("--clutter", type=float, default=2.0, help="Detecciones de otra clase por frame")
+    parser.add_argument("--untracked", action="store_true", help="Detecciones sin id del tracker")
+    parser.add_argument("--cooldown", type=float, default=120.0)
+    parser.add_argument("--handler", choices=["none", "encode", "post"], default="encode")
+    parser.add_argument("--latency", type=float, default=0.05, help="RTT artificial del servidor en segundos")
+    parser.add_argument("--max-width", type=int, default=640)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--queue", type=int, default=10)
+    parser.add_argument("--policy", choices=POLICIES, default=POLICY_COALESCE)
+    parser.add_argument("--profile", action="store_true", help="Perfilar el hilo que procesa los batches")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    frames = load_frames(args.images, args.width, args.height) or synthetic_frames(args.width, args.height)
+    scene = SyntheticScene(args.cameras, args.width, args.height, args.fps, args.arrival_rate, args.dwell,
+                           args.clutter, tracked=not args.untracked, seed=args.seed)
+    source_states = {pad_index: {'camera_id': f"sim{pad_index}", 'uri': None, 'last_frame_num': -1}
+                     for pad_index in range(args.cameras)}
+
+    server = transport = None
+    if args.handler == "post":
+        server = StubServer(latency=args.latency).start()
+        transport = AlertTransport(http2=False)
+    encoder = PayloadEncoder(max_width=args.max_width, quality=80)
+    frame_pool = FramePool(3)
+    suppressor = AlertSuppressor(args.cooldown)
+    dispatcher = AlertDispatcher(make_handler(args.handler, encoder, transport, server.url if server else None),
+                                 max_queue=args.queue, num_workers=args.workers, policy=args.policy,
+                                 on_release=lambda record: frame_pool.release(record['frame']))
+    engine = FrameEngine(dispatcher, source_states, frame_pool, suppressor, log=None)
+    driver = ReplayDriver(engine, speed=args.speed)
+
+    print(f"{args.cameras} cámaras x {args.fps:g} FPS ({args.cameras * args.fps:.0f} frames/s), batches de "
+          f"{args.batch_size}, {len(frames)} imágenes de {args.width}x{args.height}, despachador '{args.handler}'")
+    dispatcher.start()
+    profiler = cProfile.Profile() if args.profile else None
+    try:
+        if profiler is not None:
+            profiler.enable()
+        stats = driver.run(synthetic_batches(scene, frames, args.seconds, args.batch_size))
+        if profiler is not None:
+            profiler.disable()
+    finally:
+        dispatcher.stop()
+        if transport is not None:
+            transport.close()
+        if server is not None:
+            server.stop()
+
+    outcomes = {}
+    for (_camera, outcome), value in ALERTS.values().items():
+        outcomes[outcome] = outcomes.get(outcome, 0) + value
+    print(f"{stats['frames']} frames en {stats['elapsed']:.1f} s: {stats['fps']:.0f} frames/s "
+          f"({stats['fps'] / args.fps:.0f} cámaras a {args.fps:g} FPS), ocupado {stats['busy']:.0%}")
+    print(f"Batch: p50 {stats['batch_p50_ms']:.2f} ms, p99 {stats['batch_p99_ms']:.2f} ms, "
+          f"máx {stats['batch_max_ms']:.1f} ms; retraso p99 {stats['lag_p99'] * 1e3:.0f} ms, "
+          f"máx {stats['lag_max'] * 1e3:.0f} ms")
+    print("Alertas: " + ", ".join(f"{outcome} {value}" for outcome, value in sorted(outcomes.items())))
+    print(f"Despachador: {dispatcher.stats()}")
+    print(f"Supresión: {suppressor.stats()}; pool de frames: {frame_pool.allocated} buffers, "
+          f"{frame_pool.misses} faltantes")
+    if server is not None:
+        print(f"Servidor: {server.requests} solicitudes, {server.bytes_received / 1e6:.1f} MB")
+    if profiler is not None:
+        pstats.Stats(profiler).sort_stats("cumulative").print_stats(25)
+
+if __name__ == "__main__":
+    main()
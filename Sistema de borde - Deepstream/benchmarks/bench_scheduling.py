@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+Inferencias ahorradas por pipeline.scheduling.InferenceScheduler, sin GPU.
+
+Recorre frame a frame varias cámaras y aplica el scheduler como en el pipeline: la
+decisión ``should_infer`` de la sonda de cada fuente, ``update`` con el proxy GRAY8 de
+cada frame (como lo entrega la rama de movimiento) y, para los frames inferidos,
+``observe`` con las detecciones. Los frames salen de:
+
+- una escena sintética (por defecto): las personas de pipeline.replay.SyntheticScene
+  dibujadas como rectángulos sobre un JPEG de Detections_jetson fijo por cámara, con
+  ruido de sensor; el "detector" devuelve las personas visibles del frame inferido;
+- archivos de video (``--videos``, uno por cámara), decodificados con OpenCV; sin
+  detector, el intervalo depende solo del movimiento.
+
+Reporta por cámara los frames ofrecidos, inferidos y ahorrados, y con la escena
+sintética el retardo entre la aparición de cada persona y el primer frame inferido en
+que está visible (las personas nunca vistas cuentan como perdidas), y el costo de
+``update`` por frame y de ``observe`` por frame inferido:
+
+    python3 benchmarks/bench_scheduling.py --cameras 8 --seconds 120 --arrival-rate 0.02
+    python3 benchmarks/bench_scheduling.py --videos pasillo.mp4 entrada.mp4 --max-interval 4
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from pipeline.detections import filter_detections
+from pipeline.motion import gray_proxy
+from pipeline.replay import SyntheticScene, load_frames, synthetic_frames
+from pipeline.roi import CameraRois
+from pipeline.scheduling import InferenceScheduler, format_report
+
+DEFAULT_IMAGES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..",
+                              "Datos experimentales", "Detections_jetson")
+
+def parse_polygon(text):
+    """
+    ``"x,y x,y x,y ..."`` con coordenadas normalizadas.
+    """
+    return [[float(value) for value in point.split(",")] for point in text.split()]
+
+class Timings:
+    """
+    Tiempo acumulado en ``update`` y en ``observe``.
+    """
+
+    def __init__(self):
+        self.update_s = 0.0
+        self.observe_s = 0.0
+
+    def update(self, scheduler, camera, frame, proxy_size):
+        proxy = gray_proxy(frame, *proxy_size)
+        start = time.perf_counter()
+        scheduler.update(camera, proxy)
+        self.update_s += time.perf_counter() - start
+
+    def observe(self, scheduler, camera, detections=0):
+        start = time.perf_counter()
+        scheduler.observe(camera, detections)
+        self.observe_s += time.perf_counter() - start
+
+class SceneRenderer:
+    """
+    Dibuja las personas de la escena sobre el fondo de cada cámara.
+
+    El ruido de sensor se precalcula: cada frame parte de una de ``variants`` copias
+    ruidosas del fondo.
+    """
+
+    def __init__(self, backgrounds, noise, variants=8, seed=0):
+        self._rng = np.random.default_rng(seed)
+        self.backgrounds = []
+        for background in backgrounds:
+            copies = []
+            for _ in range(variants if noise else 1):
+                frame = background.copy()
+                if noise:
+                    shift = self._rng.normal(0, noise, frame.shape[:2])[..., None]
+                    frame[..., :3] = np.clip(frame[..., :3] + shift, 0, 255).astype(np.uint8)
+                copies.append(frame)
+            self.backgrounds.append(copies)
+
+    def render(self, camera, people):
+        copies = self.backgrounds[camera % len(self.backgrounds)]
+        frame = copies[self._rng.integers(len(copies))].copy()
+        for person in people:
+            left, top = int(person['left']), int(person['top'])
+            color = tuple(int(c) for c in np.random.default_rng(int(person['object_id'])).integers(0, 256, 3)) + (255,)
+            cv2.rectangle(frame, (left, top), (left + int(person['width']), top + int(person['height'])), color, -1)
+        return frame
+
+def run_scene(args, scheduler, rois):
+    images = load_frames(args.images, args.width, args.height) or synthetic_frames(args.width, args.height)
+    renderer = SceneRenderer(images, args.noise, seed=args.seed)
+    scene = SyntheticScene(args.cameras, args.width, args.height, args.fps, args.arrival_rate, args.dwell,
+                           clutter=0, seed=args.seed)
+    for camera in range(args.cameras):
+        scheduler.add(camera, camera)
+
+    first_seen, first_inferred = {}, {}
+    timings = Timings()
+    proxy_size = (args.proxy_width, args.proxy_height)
+    frames = int(args.seconds * args.fps)
+    for frame_num in range(frames):
+        detections = scene.step(frame_num)
+        bounds = np.searchsorted(detections['pad_index'], np.arange(args.cameras + 1))
+        for camera in range(args.cameras):
+            people = detections[bounds[camera]:bounds[camera + 1]]
+            for object_id in people['object_id'].tolist():
+                first_seen.setdefault(object_id, frame_num)
+            inferred = scheduler.should_infer(camera)
+            # La rama de movimiento recibe todos los frames, también los que no se infieren
+            timings.update(scheduler, camera, renderer.render(camera, people), proxy_size)
+            if not inferred:
+                continue
+            found = filter_detections(people, 0, args.confidence)
+            if rois is not None:
+                found = rois.filter(camera, found)
+            for object_id in people['object_id'].tolist():
+                first_inferred.setdefault(object_id, frame_num)
+            timings.observe(scheduler, camera, len(found))
+
+    delays = np.array([first_inferred[object_id] - frame for object_id, frame in first_seen.items()
+                       if object_id in first_inferred], dtype=np.float64) * 1000 / args.fps
+    missed = sum(object_id not in first_inferred for object_id in first_seen)
+    if len(delays):
+        print(f"Personas: {len(first_seen)}, perdidas {missed}; retardo hasta la primera inferencia "
+              f"media {delays.mean():.0f} ms, p95 {np.percentile(delays, 95):.0f} ms, máximo {delays.max():.0f} ms")
+    else:
+        print(f"Personas: {len(first_seen)}, perdidas {missed}")
+    return timings
+
+def run_videos(args, scheduler):
+    captures = [cv2.VideoCapture(path) for path in args.videos]
+    for camera, path in enumerate(args.videos):
+        if not captures[camera].isOpened():
+            sys.exit(f"No fue posible abrir {path}")
+        scheduler.add(camera, os.path.basename(path))
+
+    timings = Timings()
+    proxy_size = (args.proxy_width, args.proxy_height)
+    active = list(range(len(captures)))
+    while active:
+        for camera in list(active):
+            ok, frame = captures[camera].read()
+            if not ok:
+                active.remove(camera)
+                continue
+            inferred = scheduler.should_infer(camera)
+            timings.update(scheduler, camera, frame, proxy_size)
+            if inferred:
+                timings.observe(scheduler, camera)
+    return timings
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--videos", nargs="+", help="Un archivo de video por cámara en lugar de la escena sintética")
+    parser.add_argument("--cameras", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=120.0)
+    parser.add_argument("--fps", type=float, default=25.0)
+    parser.add_argument("--arrival-rate", type=float, default=0.02, help="Personas que entran por cámara por segundo")
+    parser.add_argument("--dwell", type=float, default=8.0)
+    parser.add_argument("--confidence", type=float, default=0.6)
+    parser.add_argument("--noise", type=float, default=4.0, help="Desviación del ruido de sensor (niveles de gris)")
+    parser.add_argument("--images", default=DEFAULT_IMAGES)
+    parser.add_argument("--width", type=int, default=960)
+    parser.add_argument("--height", type=int, default=540)
+    parser.add_argument("--proxy-width", type=int, default=160)
+    parser.add_argument("--proxy-height", type=int, default=96)
+    parser.add_argument("--max-interval", type=int, default=4)
+    parser.add_argument("--relax-after", type=int, default=50)
+    parser.add_argument("--motion-high", type=float, default=0.02)
+    parser.add_argument("--motion-low", type=float, default=0.005)
+    parser.add_argument("--roi", help='Polígono aplicado a todas las cámaras, p. ej. "0,0.45 1,0.45 1,1 0,1"')
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    cameras = len(args.videos) if args.videos else args.cameras
+    camera_ids = [os.path.basename(path) for path in args.videos] if args.videos else list(range(cameras))
+    rois = None
+    if args.roi:
+        rois = CameraRois({camera_id: [parse_polygon(args.roi)] for camera_id in camera_ids}, args.width, args.height)
+    scheduler = InferenceScheduler(max_interval=args.max_interval, motion_high=args.motion_high,
+                                   motion_low=args.motion_low, relax_after=args.relax_after, rois=rois)
+
+    start = time.perf_counter()
+    timings = run_videos(args, scheduler) if args.videos else run_scene(args, scheduler, rois)
+    elapsed = time.perf_counter() - start
+
+    rows = scheduler.report()
+    offered = sum(row['offered'] for row in rows)
+    inferred = sum(row['inferred'] for row in rows)
+    print(format_report(rows))
+    print(f"Total: {offered} frames ofrecidos, {inferred} inferidos, {offered - inferred} ahorrados "
+          f"({(offered - inferred) / max(offered, 1):.1%}); update {timings.update_s / max(offered, 1) * 1e6:.1f} us "
+          f"por frame, observe {timings.observe_s / max(inferred, 1) * 1e6:.1f} us por frame inferido "
+          f"({elapsed:.1f} s en total)")
+
+if __name__ == "__main__":
+    main()
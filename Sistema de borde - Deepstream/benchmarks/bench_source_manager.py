@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+"""
+Arnés de pipeline.source_manager: cámaras agregadas y retiradas en caliente y reconexión
+con backoff exponencial, sin GStreamer ni GPU.
+
+Instala los dobles de benchmarks/fake_deepstream.py y ejecuta ``SourceManager`` sobre un
+pipeline falso, con ``ConfigWatcher`` leyendo un archivo de cámaras temporal:
+
+- agrega y retira cámaras editando el archivo y disparando el sondeo del watcher, y
+  verifica que cada fuente quede enlazada a su pad ``sink_<n>`` del streammux, que los
+  pads liberados se reutilicen y que los elementos retirados salgan del pipeline;
+- fuerza un ERROR de una fuente y un ``stream-eos`` del streammux por
+  ``source_bus_call``, y sigue el calendario de reconexión mientras la fuente sigue
+  caída: cada espera debe ser ``RECONNECT_INITIAL_DELAY * 2 ** (n - 1)`` (con tope
+  ``RECONNECT_MAX_DELAY``) con un jitter de ±20 %;
+- verifica que al volver la fuente se enlace otra vez al mismo pad, que el primer
+  buffer reinicie el backoff y que retirar una cámara cancele su reconexión pendiente.
+
+Termina con código 1 si alguna verificación falla:
+
+    python3 benchmarks/bench_source_manager.py --attempts 9 --max-sources 4
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from benchmarks import fake_deepstream as fake
+
+Gst = fake.install()
+from gi.repository import GLib
+from pipeline.graph import STREAMMUX_NAME
+from pipeline.scheduling import InferenceScheduler
+from pipeline.source_manager import (SourceManager, ConfigWatcher, source_bus_call, RECONNECT_INITIAL_DELAY,
+                                     RECONNECT_MAX_DELAY)
+
+JITTER = (0.8, 1.2)
+
+class Harness:
+    """
+    Pipeline falso, manager, watcher y el archivo de cámaras que se edita.
+    """
+
+    def __init__(self, config_path, max_sources):
+        self.config_path = config_path
+        self.offline = set()
+        self.failures = []
+        self.pipeline = Gst.Pipeline()
+        self.streammux = Gst.ElementFactory.make("nvstreammux", STREAMMUX_NAME)
+        self.pipeline.add(self.streammux)
+        self.pipeline.set_state(Gst.State.PLAYING)
+        self.scheduler = InferenceScheduler()
+        self.manager = SourceManager(self.pipeline, self.streammux, {}, self.make_source_bin, max_sources,
+                                     scheduler=self.scheduler)
+        self.loop = GLib.MainLoop()
+
+    def make_source_bin(self, pad_index, uri):
+        # Una cámara caída no entrega su bin, como un uridecodebin que no se puede crear
+        if uri in self.offline:
+            return None
+        source_bin = fake.FakeBin(f"source-bin-{pad_index}")
+        source_bin.set_property("uri", uri)
+        return source_bin
+
+    def check(self, condition, message):
+        if not condition:
+            self.failures.append(message)
+        return condition
+
+    def write_config(self, cameras):
+        with open(self.config_path, "w") as f:
+            json.dump({'cameras': [{'id': camera_id, 'uri': uri} for camera_id, uri in cameras.items()]}, f)
+        # El watcher compara el mtime: forzar uno distinto aunque se escriba en el mismo instante
+        mtime = os.stat(self.config_path).st_mtime_ns + len(GLib.timeouts) * 1_000_000_000
+        os.utime(self.config_path, ns=(mtime, mtime))
+
+    def new_timeouts(self, since):
+        return GLib.timeouts[since:]
+
+    def pad_of(self, camera_id):
+        return self.manager.pad_index_of(camera_id)
+
+    def check_attached(self, camera_id, label):
+        """
+        La fuente de ``camera_id`` está en el pipeline, en PLAYING y enlazada a su pad.
+        """
+        pad_index = self.pad_of(camera_id)
+        if not self.check(pad_index is not None, f"{label}: la cámara {camera_id} no tiene pad"):
+            return None
+        children = self.pipeline.children
+        source_bin = children.get(f"source-bin-{pad_index}")
+        queue = children.get(f"queue_src_{pad_index}")
+        self.check(source_bin is not None and queue is not None,
+                   f"{label}: faltan los elementos de la cámara {camera_id} en el pipeline")
+        if source_bin is None or queue is None:
+            return pad_index
+        self.check(source_bin.get_property("uri") == self.manager.cameras()[camera_id],
+                   f"{label}: el bin de la cámara {camera_id} no tiene su URI")
+        self.check(source_bin.get_static_pad("src").peer is queue.get_static_pad("sink"),
+                   f"{label}: el bin de la cámara {camera_id} no está enlazado a su cola")
+        sinkpad = self.streammux.pads.get(f"sink_{pad_index}")
+        self.check(sinkpad is not None and queue.get_static_pad("src").peer is sinkpad,
+                   f"{label}: la cola de la cámara {camera_id} no está enlazada a sink_{pad_index}")
+        self.check(source_bin.state == Gst.State.PLAYING and queue.state == Gst.State.PLAYING,
+                   f"{label}: la fuente de la cámara {camera_id} no pasó a PLAYING")
+        self.check(any(mask == Gst.PadProbeType.BUFFER for mask, _callback, _args in queue.get_static_pad("sink").probes),
+                   f"{label}: la cola de la cámara {camera_id} no tiene la sonda del scheduler")
+        return pad_index
+
+    def check_detached(self, pad_index, label):
+        children = self.pipeline.children
+        self.check(f"source-bin-{pad_index}" not in children and f"queue_src_{pad_index}" not in children,
+                   f"{label}: los elementos del pad {pad_index} siguen en el pipeline")
+        self.check(f"sink_{pad_index}" not in self.streammux.pads,
+                   f"{label}: el pad sink_{pad_index} del streammux no se liberó")
+
+    def check_pipeline(self, label):
+        """
+        El pipeline solo tiene el streammux y los elementos de las fuentes conectadas.
+        """
+        expected = {STREAMMUX_NAME}
+        for pad_index, state in self.manager.source_states.items():
+            if state['reconnect_id'] is None:
+                expected |= {f"source-bin-{pad_index}", f"queue_src_{pad_index}"}
+        extra = set(self.pipeline.children) - expected
+        missing = expected - set(self.pipeline.children)
+        self.check(not extra and not missing, f"{label}: elementos sobrantes {sorted(extra)}, faltantes {sorted(missing)}")
+
+    def post_error(self, camera_id):
+        pad_index = self.pad_of(camera_id)
+        child = fake.FakeElement("uridecodebin0", parent=self.pipeline.children.get(f"source-bin-{pad_index}"))
+        message = fake.FakeMessage(Gst.MessageType.ERROR, src=child, error="Could not open resource for reading")
+        return source_bus_call(None, message, self.loop, self.manager)
+
+    def post_eos(self, camera_id):
+        structure = fake.FakeStructure("stream-eos", {'stream-id': self.pad_of(camera_id)})
+        message = fake.FakeMessage(Gst.MessageType.ELEMENT, src=self.streammux, structure=structure)
+        return source_bus_call(None, message, self.loop, self.manager)
+
+    def first_buffer(self, camera_id):
+        """
+        Dispara las sondas de un buffer en la salida de la cola de la cámara.
+        """
+        queue = self.pipeline.children[f"queue_src_{self.pad_of(camera_id)}"]
+        pad = queue.get_static_pad("src")
+        pad.probes = [(mask, callback, args) for mask, callback, args in pad.probes
+                      if callback(pad, None, *args) != Gst.PadProbeReturn.REMOVE]
+
+def expected_delay(attempt):
+    return min(RECONNECT_INITIAL_DELAY * 2 ** (attempt - 1), RECONNECT_MAX_DELAY)
+
+def check_reconnect(harness, camera_id, attempt, since, label):
+    """
+    Verifica que se haya programado exactamente una reconexión con la espera del intento.
+
+    Returns:
+        tuple: ``(interval, callback, args)`` del temporizador, o None.
+    """
+    timeouts = harness.new_timeouts(since)
+    if not harness.check(len(timeouts) == 1, f"{label}: {len(timeouts)} reconexiones programadas, se esperaba 1"):
+        return None
+    interval, callback, args = timeouts[0]
+    expected = expected_delay(attempt)
+    low, high = expected * JITTER[0], expected * JITTER[1]
+    harness.check(low - 1e-3 <= interval <= high + 1e-3,
+                  f"{label}: espera de {interval:.2f} s en el intento {attempt}, se esperaba entre "
+                  f"{low:.2f} y {high:.2f} s")
+    state = harness.manager.source_states[harness.pad_of(camera_id)]
+    harness.check(state['failures'] == attempt, f"{label}: failures={state['failures']}, se esperaba {attempt}")
+    harness.check(state['reconnect_id'] == len(GLib.timeouts), f"{label}: reconnect_id no apunta al temporizador")
+    print(f"  intento {attempt:2d}: espera {interval:6.2f} s (esperada {expected:5.1f} s ± 20 %)")
+    return timeouts[0]
+
+def run(args, config_path):
+    harness = Harness(config_path, args.max_sources)
+    manager = harness.manager
+
+    # Configuración inicial y watcher
+    cameras = {'entrada': "rtsp://10.0.0.1/101", 'pasillo': "rtsp://10.0.0.2/101"}
+    harness.write_config(cameras)
+    watcher = ConfigWatcher(config_path, manager, interval=args.poll_interval)
+    manager.apply(cameras)
+    watcher.start()
+    _interval, poll, poll_args = GLib.timeouts[-1]
+    for camera_id in cameras:
+        harness.check_attached(camera_id, "inicio")
+    harness.check_pipeline("inicio")
+
+    print("Cámaras en caliente")
+    cameras['bodega'] = "rtsp://10.0.0.3/101"
+    harness.write_config(cameras)
+    harness.check(poll(*poll_args) is True, "el sondeo del watcher debe repetirse")
+    pad_index = harness.check_attached('bodega', "agregar")
+    harness.check(pad_index == 2, f"agregar: bodega quedó en el pad {pad_index}, se esperaba el 2")
+    harness.check(harness.scheduler.report()[-1]['camera_id'] == 'bodega', "agregar: el scheduler no conoce la cámara")
+    print(f"  agregada bodega en el pad {pad_index}")
+
+    removed_pad = harness.pad_of('pasillo')
+    del cameras['pasillo']
+    harness.write_config(cameras)
+    poll(*poll_args)
+    harness.check(harness.pad_of('pasillo') is None, "retirar: pasillo sigue configurada")
+    harness.check_detached(removed_pad, "retirar")
+    harness.check(all(row['camera_id'] != 'pasillo' for row in harness.scheduler.report()),
+                  "retirar: el scheduler no olvidó la cámara")
+    print(f"  retirada pasillo del pad {removed_pad}")
+
+    cameras['patio'] = "rtsp://10.0.0.4/101"
+    harness.write_config(cameras)
+    poll(*poll_args)
+    pad_index = harness.check_attached('patio', "reutilizar pad")
+    harness.check(pad_index == removed_pad, f"reutilizar pad: patio quedó en el pad {pad_index}, "
+                                            f"se esperaba el {removed_pad}")
+    print(f"  agregada patio en el pad liberado {pad_index}")
+
+    cameras['bodega'] = "rtsp://10.0.0.3/102"
+    harness.write_config(cameras)
+    poll(*poll_args)
+    harness.check_attached('bodega', "cambio de URI")
+    print("  bodega reconectada con su URI nuevo")
+    harness.check_pipeline("tras los cambios")
+
+    print(f"Reconexión de entrada tras un ERROR (tope {RECONNECT_MAX_DELAY:g} s)")
+    pad_index = harness.pad_of('entrada')
+    harness.offline.add(cameras['entrada'])
+    since = len(GLib.timeouts)
+    harness.check(harness.post_error('entrada') is True, "error: source_bus_call no atendió el error de la fuente")
+    harness.check_detached(pad_index, "error")
+    timeout = check_reconnect(harness, 'entrada', 1, since, "error")
+    since = len(GLib.timeouts)
+    harness.post_error('entrada')
+    harness.check(len(GLib.timeouts) == since, "error repetido: se programó otra reconexión con una pendiente")
+
+    for attempt in range(2, args.attempts + 1):
+        if timeout is None:
+            break
+        _interval, callback, callback_args = timeout
+        since = len(GLib.timeouts)
+        harness.check(callback(*callback_args) is False, "el temporizador de reconexión no debe repetirse")
+        harness.check_detached(pad_index, f"intento {attempt - 1}")
+        timeout = check_reconnect(harness, 'entrada', attempt, since, f"intento {attempt}")
+
+    harness.offline.clear()
+    if timeout is not None:
+        _interval, callback, callback_args = timeout
+        since = len(GLib.timeouts)
+        callback(*callback_args)
+        harness.check(len(GLib.timeouts) == since, "recuperación: se programó otra reconexión")
+        harness.check(harness.check_attached('entrada', "recuperación") == pad_index,
+                      f"recuperación: entrada no volvió al pad {pad_index}")
+        state = manager.source_states[pad_index]
+        harness.check(state['failures'] == args.attempts, "recuperación: el backoff se reinició antes del primer buffer")
+        harness.first_buffer('entrada')
+        harness.check(state['failures'] == 0, "primer buffer: el backoff no se reinició")
+        print(f"  reconectada en el pad {pad_index}; el primer buffer reinicia el backoff")
+
+    print("Fin de flujo de patio (stream-eos) y retiro con la reconexión pendiente")
+    pad_index = harness.pad_of('patio')
+    since = len(GLib.timeouts)
+    harness.check(harness.post_eos('patio') is True, "eos: source_bus_call no atendió el stream-eos")
+    harness.check_detached(pad_index, "eos")
+    timeout = check_reconnect(harness, 'patio', 1, since, "eos")
+    reconnect_id = manager.source_states[pad_index]['reconnect_id']
+    del cameras['patio']
+    harness.write_config(cameras)
+    poll(*poll_args)
+    harness.check(reconnect_id in GLib.removed, "retiro: la reconexión pendiente no se canceló")
+    if timeout is not None:
+        _interval, callback, callback_args = timeout
+        callback(*callback_args)
+        harness.check(f"source-bin-{pad_index}" not in harness.pipeline.children,
+                      "retiro: un temporizador cancelado volvió a conectar la cámara")
+    harness.check_pipeline("tras el retiro")
+
+    print(f"Capacidad ({args.max_sources} pads)")
+    extra = 0
+    while len(manager.source_states) < args.max_sources:
+        extra += 1
+        harness.check(manager.add_source(f"extra-{extra}", f"rtsp://10.0.1.{extra}/101") is not None,
+                      "capacidad: no se pudo usar un pad libre")
+    harness.check(manager.add_source("sobrante", "rtsp://10.0.2.1/101") is None,
+                  "capacidad: se aceptó una cámara sin pads libres")
+    for camera_id in manager.cameras():
+        harness.check_attached(camera_id, "capacidad")
+    harness.check_pipeline("capacidad")
+    watcher.stop()
+    return harness.failures
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--attempts", type=int, default=9, help="Intentos de reconexión fallidos antes de recuperar")
+    parser.add_argument("--max-sources", type=int, default=4)
+    parser.add_argument("--poll-interval", type=int, default=5)
+    args = parser.parse_args()
+    if args.max_sources < 3:
+        parser.error("--max-sources debe ser al menos 3")
+
+    with tempfile.TemporaryDirectory() as directory:
+        failures = run(args, os.path.join(directory, "cameras.json"))
+    print()
+    if failures:
+        print("\n".join(failures))
+        sys.exit(1)
+    print("Todas las verificaciones pasaron")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Trazas de latencia por frame con eventos sintéticos.
+
+Simula el paso de los frames de varias cámaras por las etapas del pipeline (captura,
+decode, streammux, pgie, convert, appsink, decisión y, para una fracción de los frames,
+codificación y envío de la alerta) con duraciones aleatorias, los registra en un
+pipeline.tracing.FrameTracer y reporta:
+
+- el costo de registrar un evento (lo que agrega el trazado al hilo de streaming),
+- el tiempo de construir los spans y exportar la traza,
+- los percentiles por etapa, que deben coincidir con las duraciones simuladas.
+
+No requiere GPU ni GStreamer:
+
+    python3 benchmarks/bench_tracing.py --cameras 8 --frames 2000 --output /tmp/trace.json
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from pipeline.tracing import (FrameTracer, build_spans, stage_summary, format_summary, write_chrome_trace,
+                              STAGE_CAPTURE, STAGE_DECODE, STAGE_STREAMMUX, STAGE_PGIE, STAGE_CONVERT,
+                              STAGE_APPSINK, STAGE_DECISION, STAGE_ENCODE, STAGE_SEND)
+
+# Duración media simulada de cada etapa en ms
+STAGE_MS = {
+    STAGE_DECODE: 12.0,
+    STAGE_STREAMMUX: 8.0,
+    STAGE_PGIE: 25.0,
+    STAGE_CONVERT: 3.0,
+    STAGE_APPSINK: 2.0,
+    STAGE_DECISION: 0.5,
+    STAGE_ENCODE: 15.0,
+    STAGE_SEND: 60.0,
+}
+MARKED_STAGES = (STAGE_DECODE, STAGE_STREAMMUX, STAGE_PGIE, STAGE_CONVERT, STAGE_APPSINK, STAGE_DECISION)
+
+def simulate(tracer, cameras, frames, fps, alert_ratio, seed=0):
+    """
+    Registra los eventos de ``frames`` frames por cámara con tiempos sintéticos.
+
+    Returns:
+        int: Eventos registrados.
+    """
+    rng = np.random.default_rng(seed)
+    events = 0
+    base_ns = 1_700_000_000 * 10 ** 9
+    for frame_num in range(frames):
+        for pad_index in range(cameras):
+            now = base_ns + int(frame_num * 1e9 / fps) + pad_index * 1000
+            tracer.span(pad_index, frame_num, STAGE_CAPTURE, now, now)
+            events += 1
+            for stage in MARKED_STAGES:
+                now += int(rng.exponential(STAGE_MS[stage]) * 1e6)
+                tracer.mark(pad_index, frame_num, stage, pts_ns=frame_num * 40_000_000, now_ns=now)
+                events += 1
+            if rng.random() < alert_ratio:
+                # La espera en la cola del despachador no es una etapa: queda como hueco en la traza
+                now += int(rng.exponential(5.0) * 1e6)
+                timer = tracer.stage_timer(pad_index, frame_num)
+                for stage in (STAGE_ENCODE, STAGE_SEND):
+                    end = now + int(rng.exponential(STAGE_MS[stage]) * 1e6)
+                    timer(stage, now, end)
+                    now = end
+                    events += 1
+    return events
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cameras", type=int, default=8)
+    parser.add_argument("--frames", type=int, default=2000, help="Frames por cámara")
+    parser.add_argument("--fps", type=float, default=25.0)
+    parser.add_argument("--alert-ratio", type=float, default=0.02, help="Fracción de frames con alerta")
+    parser.add_argument("--capacity", type=int, default=16384, help="Eventos que guarda el tracer")
+    parser.add_argument("--output", default=None, help="Archivo de traza de Chrome a escribir")
+    args = parser.parse_args()
+
+    tracer = FrameTracer(args.capacity)
+    start = time.perf_counter()
+    events = simulate(tracer, args.cameras, args.frames, args.fps, args.alert_ratio)
+    record_s = time.perf_counter() - start
+
+    # Costo del registro solo, sin la generación de tiempos aleatorios
+    tracer.clear()
+    start = time.perf_counter()
+    for i in range(100000):
+        tracer.mark(i % args.cameras, i, STAGE_PGIE, now_ns=i)
+    mark_us = (time.perf_counter() - start) / 100000 * 1e6
+    tracer.clear()
+    simulate(tracer, args.cameras, args.frames, args.fps, args.alert_ratio)
+
+    start = time.perf_counter()
+    spans = build_spans(tracer.events())
+    build_ms = (time.perf_counter() - start) * 1e3
+    summary = stage_summary(spans)
+
+    print(f"{args.cameras} cámaras x {args.frames} frames: {events} eventos en {record_s:.2f} s, "
+          f"{len(spans)} spans retenidos (capacidad {args.capacity})")
+    print(f"Registro de un evento: {mark_us:.2f} us; construcción de los spans: {build_ms:.1f} ms")
+    if args.output:
+        start = time.perf_counter()
+        write_chrome_trace(args.output, spans)
+        print(f"Traza escrita en {args.output} ({os.path.getsize(args.output) / 1e6:.1f} MB, "
+              f"{(time.perf_counter() - start) * 1e3:.0f} ms)")
+    print(format_summary(summary))
+    print("Media simulada por etapa: " + ", ".join(f"{stage} {ms:g} ms" for stage, ms in STAGE_MS.items()))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,517 @@
+"""
+Dobles de pyds y de GStreamer para ejecutar los callbacks del pipeline sin DeepStream.
+
+``install`` registra en ``sys.modules`` un módulo ``pyds`` y un paquete ``gi`` (con
+``gi.repository.Gst`` y ``GLib``) de imitación, además de ``cuda`` (que importa
+common/platform_info.py), de modo que pipeline.launch_pipeline se pueda importar en
+cualquier equipo Linux sin GPU:
+
+    from benchmarks import fake_deepstream
+    fake_deepstream.install()
+    from pipeline import launch_pipeline
+
+El ``pyds`` falso reproduce lo que usan los callbacks: las listas enlazadas de
+``NvDsBatchMeta`` / ``NvDsFrameMeta`` / ``NvDsObjectMeta`` (con ``cast``),
+``gst_buffer_get_nvds_batch_meta`` y ``get_nvds_buf_surface``, que retorna el arreglo
+RGBA de NumPy asociado al buffer. ``FakeAppSink`` emite la señal ``new-sample`` con un
+buffer construido con ``make_buffer`` y retorna lo que retorne el callback, y los
+objetos ``FakeCaps``, ``FakePad``, ``FakeBin`` y ``FakeMessage`` alimentan a
+``cb_newpad``, ``decodebin_child_added`` y los manejadores del bus.
+
+Para pipeline.source_manager, ``Gst.ElementFactory.make`` crea ``FakeElement`` (salvo las
+fábricas listadas en ``ElementFactory.missing``), ``Gst.Pipeline`` agrega y retira
+elementos, los elementos cambian de estado y piden y liberan pads (``request_pad_simple``,
+``release_request_pad``), y los pads se enlazan y reciben eventos. ``GLib.timeouts``
+guarda los temporizadores registrados y ``GLib.removed`` los identificadores cancelados,
+para que el llamador los dispare o verifique a mano.
+"""
+
+import sys
+import types
+import weakref
+
+NVBUF_MEM_CUDA_UNIFIED = 3
+
+class GList:
+    """
+    Nodo de una lista enlazada de metadatos (``data`` y ``next``).
+    """
+
+    __slots__ = ('data', 'next')
+
+    def __init__(self, data, next=None):
+        self.data = data
+        self.next = next
+
+def glist(items):
+    """
+    Returns:
+        GList: Cabeza de una lista enlazada con ``items``, o None si está vacía.
+    """
+    head = None
+    for item in reversed(list(items)):
+        head = GList(item, head)
+    return head
+
+class _Meta:
+    @staticmethod
+    def cast(data):
+        return data
+
+class NvOSD_RectParams:
+    __slots__ = ('left', 'top', 'width', 'height')
+
+    def __init__(self, left, top, width, height):
+        self.left = left
+        self.top = top
+        self.width = width
+        self.height = height
+
+class NvDsObjectMeta(_Meta):
+    def __init__(self, class_id, confidence, left, top, width, height, object_id=0xFFFFFFFFFFFFFFFF, obj_label=""):
+        self.class_id = class_id
+        self.confidence = confidence
+        self.object_id = object_id
+        self.obj_label = obj_label
+        self.rect_params = NvOSD_RectParams(left, top, width, height)
+
+class NvDsFrameMeta(_Meta):
+    def __init__(self, pad_index, frame_num, batch_id, objects=(), buf_pts=0, ntp_timestamp=0):
+        self.pad_index = pad_index
+        self.source_id = pad_index
+        self.frame_num = frame_num
+        self.batch_id = batch_id
+        self.buf_pts = buf_pts
+        self.ntp_timestamp = ntp_timestamp
+        objects = list(objects)
+        self.num_obj_meta = len(objects)
+        self.obj_meta_list = glist(objects)
+
+class NvDsBatchMeta(_Meta):
+    def __init__(self, frames):
+        frames = list(frames)
+        self.num_frames_in_batch = len(frames)
+        self.frame_meta_list = glist(frames)
+
+class FakeBuffer:
+    """
+    Buffer con los metadatos de un batch y la superficie RGBA de cada frame.
+
+    Como en DeepStream, los callbacks lo identifican por ``hash(buffer)``.
+    """
+
+    def __init__(self, batch_meta, surfaces=None, pts=0):
+        self.batch_meta = batch_meta
+        self.surfaces = surfaces or {}
+        self.pts = pts
+        _buffers[hash(self)] = self
+
+_buffers = weakref.WeakValueDictionary()
+
+def make_buffer(frames, surfaces=None, pts=0):
+    """
+    Parameters:
+        frames (list): ``NvDsFrameMeta`` del batch.
+        surfaces (dict): Arreglo ``H x W x 4`` de cada ``batch_id``.
+        pts (int): PTS del buffer en nanosegundos.
+
+    Returns:
+        FakeBuffer: Buffer listo para ``FakeAppSink.push``.
+    """
+    return FakeBuffer(NvDsBatchMeta(frames), surfaces, pts)
+
+def gst_buffer_get_nvds_batch_meta(buffer_hash):
+    buffer = _buffers.get(buffer_hash)
+    return buffer.batch_meta if buffer is not None else None
+
+def get_nvds_buf_surface(buffer_hash, batch_id):
+    buffer = _buffers.get(buffer_hash)
+    if buffer is None or batch_id not in buffer.surfaces:
+        # pyds falla igual cuando el buffer no está mapeado en RGBA
+        raise RuntimeError(f"get_nvds_buf_surface: no surface for batch_id {batch_id}")
+    return buffer.surfaces[batch_id]
+
+def configure_source_for_ntp_sync(_element_hash):
+    pass
+
+class FlowReturn:
+    OK = 0
+    EOS = -3
+    ERROR = -5
+
+class PadProbeReturn:
+    DROP = 0
+    OK = 1
+    REMOVE = 2
+    PASS = 4
+
+class PadProbeType:
+    BUFFER = 16
+
+class PadDirection:
+    UNKNOWN = 0
+    SRC = 1
+    SINK = 2
+
+class MessageType:
+    EOS = 1
+    ERROR = 2
+    WARNING = 4
+    ELEMENT = 32768
+
+class State:
+    NULL = 1
+    READY = 2
+    PAUSED = 3
+    PLAYING = 4
+
+class StateChangeReturn:
+    FAILURE = 0
+    SUCCESS = 1
+    ASYNC = 2
+
+class PadLinkReturn:
+    OK = 0
+    REFUSED = -6
+
+class MapFlags:
+    READ = 1
+
+CLOCK_TIME_NONE = 2 ** 64 - 1
+
+class Event:
+    @staticmethod
+    def new_flush_stop(reset_time):
+        return ("flush-stop", reset_time)
+
+class FakeSample:
+    def __init__(self, buffer):
+        self._buffer = buffer
+
+    def get_buffer(self):
+        return self._buffer
+
+class FakeAppSink:
+    """
+    Appsink que entrega un buffer a la vez al callback conectado a ``new-sample``.
+    """
+
+    def __init__(self):
+        self._handlers = []
+        self._sample = None
+
+    def connect(self, signal, callback, *args):
+        if signal == "new-sample":
+            self._handlers.append((callback, args))
+        return len(self._handlers)
+
+    def emit(self, signal):
+        if signal != "pull-sample":
+            raise ValueError(f"Señal no soportada: {signal}")
+        sample, self._sample = self._sample, None
+        return sample
+
+    def push(self, buffer):
+        """
+        Entrega ``buffer`` como la muestra siguiente.
+
+        Returns:
+            El ``FlowReturn`` del último callback.
+        """
+        result = FlowReturn.OK
+        for callback, args in self._handlers:
+            self._sample = FakeSample(buffer)
+            result = callback(self, *args)
+        return result
+
+class FakeFeatures:
+    def __init__(self, features):
+        self._features = tuple(features)
+
+    def contains(self, feature):
+        return feature in self._features
+
+    def to_string(self):
+        return ", ".join(self._features)
+
+class FakeStructure:
+    def __init__(self, name, fields=None):
+        self._name = name
+        self._fields = dict(fields or {})
+
+    def get_name(self):
+        return self._name
+
+    def has_name(self, name):
+        return self._name == name
+
+    def get_uint(self, field):
+        value = self._fields.get(field)
+        return (value is not None, value or 0)
+
+class FakeCaps:
+    def __init__(self, name="video/x-raw", features=("memory:NVMM",)):
+        self._structure = FakeStructure(name)
+        self._features = FakeFeatures(features)
+
+    def get_structure(self, _index):
+        return self._structure
+
+    def get_features(self, _index):
+        return self._features
+
+class FakePad:
+    """
+    Pad con caps fijas y sondas registradas (que no se ejecutan solas).
+    """
+
+    def __init__(self, caps=None, name="pad", parent=None):
+        self.caps = caps or FakeCaps()
+        self.name = name
+        self.parent = parent
+        self.target = None
+        self.peer = None
+        self.probes = []
+        self.events = []
+
+    def get_name(self):
+        return self.name
+
+    def get_current_caps(self):
+        return self.caps
+
+    def set_target(self, pad):
+        self.target = pad
+        return True
+
+    def add_probe(self, mask, callback, *args):
+        self.probes.append((mask, callback, args))
+        return len(self.probes)
+
+    def link(self, sinkpad):
+        if self.peer is not None or sinkpad.peer is not None:
+            return PadLinkReturn.REFUSED
+        self.peer, sinkpad.peer = sinkpad, self
+        return PadLinkReturn.OK
+
+    def send_event(self, event):
+        self.events.append(event)
+        return True
+
+class FakeElement:
+    def __init__(self, name="element", properties=None, parent=None, factory=None):
+        self.name = name
+        self.parent = parent
+        self.factory = factory
+        self.properties = dict(properties or {})
+        self.handlers = []
+        self.pads = {}
+        self.released_pads = []
+        self.state = State.NULL
+
+    def get_name(self):
+        return self.name
+
+    def get_parent(self):
+        return self.parent
+
+    def connect(self, signal, callback, *args):
+        self.handlers.append((signal, callback, args))
+        return len(self.handlers)
+
+    def set_property(self, name, value):
+        self.properties[name] = value
+
+    def get_property(self, name):
+        return self.properties.get(name)
+
+    def find_property(self, name):
+        return name if name in self.properties else None
+
+    def get_static_pad(self, name):
+        if name not in self.pads:
+            self.pads[name] = FakePad(name=name, parent=self)
+        return self.pads[name]
+
+    def request_pad_simple(self, name):
+        if "%u" in name:
+            index = sum(1 for pad in self.pads if pad.startswith(name.split("%u")[0]))
+            name = name.replace("%u", str(index))
+        if name in self.pads:
+            # Como nvstreammux, un pad pedido dos veces no se entrega de nuevo
+            return None
+        return self.get_static_pad(name)
+
+    def release_request_pad(self, pad):
+        self.pads.pop(pad.get_name(), None)
+        if pad.peer is not None:
+            pad.peer.peer = None
+            pad.peer = None
+        self.released_pads.append(pad.get_name())
+
+    def set_state(self, state):
+        self.state = state
+        return StateChangeReturn.SUCCESS
+
+    def get_state(self, _timeout):
+        return StateChangeReturn.SUCCESS, self.state, State.NULL
+
+    def sync_state_with_parent(self):
+        if self.parent is not None:
+            self.state = self.parent.state
+        return True
+
+class FakeBin(FakeElement):
+    """
+    Bin de una fuente, con el ghost pad ``src``.
+    """
+
+    def __init__(self, name="source-bin-0"):
+        super().__init__(name)
+        self.pads['src'] = FakePad(name="src", parent=self)
+
+class FakePipeline(FakeBin):
+    """
+    Pipeline que guarda sus elementos por nombre.
+    """
+
+    def __init__(self, name="pipeline"):
+        super().__init__(name)
+        self.children = {}
+
+    def add(self, element):
+        if element.name in self.children:
+            raise ValueError(f"Ya hay un elemento llamado {element.name} en el pipeline")
+        self.children[element.name] = element
+        element.parent = self
+
+    def remove(self, element):
+        if self.children.get(element.name) is not element:
+            raise ValueError(f"{element.name} no está en el pipeline")
+        del self.children[element.name]
+        element.parent = None
+        # Al salir del pipeline sus pads quedan sin enlazar
+        for pad in element.pads.values():
+            if pad.peer is not None:
+                pad.peer.peer = None
+                pad.peer = None
+
+class ElementFactory:
+    """
+    ``Gst.ElementFactory``: toda fábrica existe salvo las de ``missing``.
+    """
+
+    missing = set()
+
+    @classmethod
+    def make(cls, factory, name):
+        if factory in cls.missing:
+            return None
+        return FakeElement(name, factory=factory)
+
+class Caps:
+    @staticmethod
+    def from_string(text):
+        return text
+
+class FakeMessage:
+    def __init__(self, type, src=None, error=None, debug="", structure=None):
+        self.type = type
+        self.src = src
+        self._error = error
+        self._debug = debug
+        self._structure = structure
+
+    def parse_error(self):
+        return self._error, self._debug
+
+    def parse_warning(self):
+        return self._error, self._debug
+
+    def get_structure(self):
+        return self._structure
+
+class FakeMainLoop:
+    def __init__(self):
+        self.quit_calls = 0
+
+    def run(self):
+        pass
+
+    def quit(self):
+        self.quit_calls += 1
+
+def _gst_module():
+    Gst = types.ModuleType("gi.repository.Gst")
+    for value in (FlowReturn, PadProbeReturn, PadProbeType, PadDirection, MessageType, State, StateChangeReturn,
+                  PadLinkReturn, MapFlags, Event, ElementFactory, Caps):
+        setattr(Gst, value.__name__, value)
+    Gst.init = lambda _args: None
+    Gst.CLOCK_TIME_NONE = CLOCK_TIME_NONE
+    Gst.Sample = FakeSample
+    Gst.Element = FakeElement
+    Gst.Bin = FakeBin
+    Gst.Pipeline = FakePipeline
+    Gst.Pad = FakePad
+    return Gst
+
+def _glib_module():
+    GLib = types.ModuleType("gi.repository.GLib")
+    timeouts = []
+    removed = set()
+
+    def timeout_add_seconds(interval, callback, *args):
+        timeouts.append((interval, callback, args))
+        return len(timeouts)
+
+    def source_remove(source_id):
+        removed.add(source_id)
+        return True
+
+    GLib.MainLoop = FakeMainLoop
+    GLib.timeout_add_seconds = timeout_add_seconds
+    GLib.timeout_add = lambda interval, callback, *args: timeout_add_seconds(interval / 1000, callback, *args)
+    GLib.source_remove = source_remove
+    GLib.timeouts = timeouts
+    GLib.removed = removed
+    return GLib
+
+def _pyds_module():
+    pyds = types.ModuleType("pyds")
+    for name in ('NvDsBatchMeta', 'NvDsFrameMeta', 'NvDsObjectMeta', 'NvOSD_RectParams', 'GList',
+                 'gst_buffer_get_nvds_batch_meta', 'get_nvds_buf_surface', 'configure_source_for_ntp_sync',
+                 'NVBUF_MEM_CUDA_UNIFIED'):
+        setattr(pyds, name, globals()[name])
+    return pyds
+
+def install():
+    """
+    Registra los módulos falsos ``pyds``, ``gi``, ``gi.repository`` (``Gst``, ``GLib``) y
+    ``cuda`` en ``sys.modules``. Debe llamarse antes de importar el pipeline.
+
+    Returns:
+        types.ModuleType: El módulo ``Gst`` falso.
+    """
+    Gst, GLib = _gst_module(), _glib_module()
+    gi = types.ModuleType("gi")
+    gi.require_version = lambda _namespace, _version: None
+    repository = types.ModuleType("gi.repository")
+    repository.Gst = Gst
+    repository.GLib = GLib
+    gi.repository = repository
+
+    cuda = types.ModuleType("cuda")
+    cuda.cuda = types.ModuleType("cuda.cuda")
+    cuda.cudart = types.ModuleType("cuda.cudart")
+
+    sys.modules.update({
+        'pyds': _pyds_module(),
+        'gi': gi,
+        'gi.repository': repository,
+        'gi.repository.Gst': Gst,
+        'gi.repository.GLib': GLib,
+        'cuda': cuda,
+        'cuda.cuda': cuda.cuda,
+        'cuda.cudart': cuda.cudart,
+    })
+    return Gst
@@ -0,0 +1,86 @@
+"""
+Servidor HTTP local que imita el servidor de inferencias para los benchmarks de envío.
+
+Acepta POST en cualquier ruta y registra las alertas recibidas. Se puede "caer" y
+"levantar" en caliente: mientras está caído responde 503 a todas las solicitudes, como
+un proxy sin enlace hacia el servidor real.
+"""
+
+import gzip
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class StubServer:
+    """
+    Parameters:
+        latency (float): Retardo artificial en segundos por solicitud (RTT del enlace).
+    """
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.up = True
+        self.requests = 0
+        self.rejected = 0
+        self.bytes_received = 0
+        self.alerts = []
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), self._handler_class())
+        self._httpd.daemon_threads = True
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self._httpd.server_address[1]}"
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def set_up(self, up):
+        self.up = up
+
+    def _record(self, path, headers, body):
+        with self._lock:
+            self.requests += 1
+            self.bytes_received += len(body)
+            if not self.up:
+                self.rejected += 1
+                return False
+            if headers.get('Content-Encoding') == 'gzip':
+                body = gzip.decompress(body)
+            if headers.get('Content-Type', '').startswith('application/json'):
+                payload = json.loads(body)
+                self.alerts.extend(payload['alerts'] if 'alerts' in payload else [payload])
+            else:
+                self.alerts.append({'path': path, 'bytes': len(body)})
+            return True
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+                if server.latency:
+                    time.sleep(server.latency)
+                ok = server._record(self.path, self.headers, body)
+                reply = b'{"status":"ok"}' if ok else b'{"status":"unavailable"}'
+                self.send_response(200 if ok else 503)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(reply)))
+                self.end_headers()
+                self.wfile.write(reply)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
@@ -15,53 +15,53 @@
 # limitations under the License.
 ################################################################################
 
+"""
+FPS counters of the NVIDIA sample apps, on top of ``common.metrics``.
+
+``GETFPS``/``PERF_DATA`` keep their interface, but frames are counted in a per-thread
+counter instead of under a global mutex, and the rate comes from the counter totals
+between two calls of ``get_fps``. New code should use ``common.metrics.RateMeter``.
+"""
+
 import time
-from threading import Lock
-start_time=time.time()
 
-fps_mutex = Lock()
+from common.metrics import Counter
 
 class GETFPS:
-    def __init__(self,stream_id):
-        global start_time
-        self.start_time=start_time
-        self.is_first=True
-        self.frame_count=0
-        self.stream_id=stream_id
+    def __init__(self, stream_id, counter=None):
+        self.stream_id = stream_id
+        self.counter = counter or Counter("fps_frames_total", "Frames per stream", ("stream",))
+        self.start_time = time.time()
+        self.last_total = 0
 
     def update_fps(self):
-        end_time = time.time()
-        if self.is_first:
-            self.start_time = end_time
-            self.is_first = False
-        else:
-            global fps_mutex
-            with fps_mutex:
-                self.frame_count = self.frame_count + 1
+        self.counter.inc((self.stream_id,))
 
     def get_fps(self):
         end_time = time.time()
-        with fps_mutex:
-            stream_fps = float(self.frame_count/(end_time - self.start_time))
-            self.frame_count = 0
+        total = self.counter.values().get((self.stream_id,), 0)
+        elapsed = end_time - self.start_time
+        stream_fps = (total - self.last_total) / elapsed if elapsed > 0 else 0.0
         self.start_time = end_time
+        self.last_total = total
         return round(stream_fps, 2)
 
     def print_data(self):
-        print('frame_count=',self.frame_count)
-        print('start_time=',self.start_time)
+        print('frame_count=', self.counter.values().get((self.stream_id,), 0) - self.last_total)
+        print('start_time=', self.start_time)
 
 class PERF_DATA:
     def __init__(self, num_streams=1):
         self.perf_dict = {}
         self.all_stream_fps = {}
+        counter = Counter("fps_frames_total", "Frames per stream", ("stream",))
         for i in range(num_streams):
-            self.all_stream_fps["stream{0}".format(i)]=GETFPS(i)
+            self.all_stream_fps["stream{0}".format(i)] = GETFPS(i, counter)
 
     def perf_print_callback(self):
-        self.perf_dict = {stream_index:stream.get_fps() for (stream_index, stream) in self.all_stream_fps.items()}
-        print ("\n**PERF: ", self.perf_dict, "\n")
+        self.perf_dict = {stream_index: stream.get_fps() for (stream_index, stream) in self.all_stream_fps.items()}
+        print("\n**PERF: ", self.perf_dict, "\n")
         return True
-    
+
     def update_fps(self, stream_index):
         self.all_stream_fps[stream_index].update_fps()
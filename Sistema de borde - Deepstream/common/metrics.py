@@ -0,0 +1,379 @@
+#!/usr/bin/env python3
+
+"""
+Metrics registry with a Prometheus ``/metrics`` endpoint.
+
+Counters and histograms are updated on the GStreamer streaming thread and on the
+dispatcher threads for every frame, so updates take no lock: each thread writes to its
+own shard (a plain dict reached through ``threading.local``) and readers add the shards
+up when the metrics are scraped. Gauges are either set directly or computed by a
+callback at scrape time (queue depths, rolling FPS).
+
+``RateMeter`` turns a counter into a rolling-window rate (frames per second per camera)
+from snapshots taken off the hot path, and ``MetricsServer`` serves the registry in the
+Prometheus text format from a daemon thread::
+
+    frames = REGISTRY.counter("edge_frames_total", "Frames processed", ("camera",))
+    frames.inc(("cam1",))
+    MetricsServer(REGISTRY, port=9101).start()
+
+Attributes:
+    REGISTRY (MetricsRegistry): Default registry shared by the modules of the edge system.
+    LATENCY_BUCKETS (tuple): Default histogram buckets, in seconds.
+"""
+
+import bisect
+import math
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+class _Shards:
+    """
+    One dict per writing thread; only the owner thread writes to its shard.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+        self._shards = []
+        self._lock = threading.Lock()
+
+    def get(self):
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard = self._local.shard = {}
+            with self._lock:
+                self._shards.append(shard)
+            return shard
+
+    def snapshot(self):
+        with self._lock:
+            shards = list(self._shards)
+        # dict.copy() es atómico con el GIL aunque el hilo dueño siga escribiendo
+        return [shard.copy() for shard in shards]
+
+class Counter:
+    """
+    Monotonic counter, optionally split by labels.
+
+    Args:
+        name (str): Metric name.
+        help (str): Description shown by ``/metrics``.
+        labelnames (tuple): Label names; values are passed to ``inc`` as a tuple in this order.
+        callback (callable): Optional function returning ``{labels: value}`` added to the
+            counted values, for totals kept elsewhere (e.g. by a pad probe).
+    """
+
+    type = "counter"
+
+    def __init__(self, name, help, labelnames=(), callback=None):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.callback = callback
+        self._shards = _Shards()
+
+    def inc(self, labels=(), amount=1):
+        shard = self._shards.get()
+        shard[labels] = shard.get(labels, 0) + amount
+
+    def values(self):
+        """
+        Returns:
+            dict: Total of every label combination, ``{labels: value}``.
+        """
+        totals = {}
+        for shard in self._shards.snapshot():
+            for labels, value in shard.items():
+                totals[labels] = totals.get(labels, 0) + value
+        if self.callback is not None:
+            for labels, value in self.callback().items():
+                totals[labels] = totals.get(labels, 0) + value
+        return totals
+
+    def samples(self):
+        return [(self.name, label_pairs(self, labels), value) for labels, value in self.values().items()]
+
+class Gauge:
+    """
+    Value that goes up and down, set directly or computed when scraped.
+
+    Args:
+        name (str): Metric name.
+        help (str): Description shown by ``/metrics``.
+        labelnames (tuple): Label names.
+        callback (callable): Optional function returning ``{labels: value}``, called at
+            scrape time; values set with ``set`` are reported as well.
+    """
+
+    type = "gauge"
+
+    def __init__(self, name, help, labelnames=(), callback=None):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.callback = callback
+        self._values = {}
+
+    def set(self, labels=(), value=0.0):
+        self._values[labels] = value
+
+    def remove(self, labels):
+        self._values.pop(labels, None)
+
+    def values(self):
+        values = dict(self._values)
+        if self.callback is not None:
+            values.update(self.callback())
+        return values
+
+    def samples(self):
+        return [(self.name, label_pairs(self, labels), value) for labels, value in self.values().items()]
+
+class Histogram:
+    """
+    Distribution of observed values in fixed buckets.
+
+    Args:
+        name (str): Metric name.
+        help (str): Description shown by ``/metrics``.
+        labelnames (tuple): Label names.
+        buckets (tuple): Increasing upper bounds; ``+Inf`` is added.
+    """
+
+    type = "histogram"
+
+    def __init__(self, name, help, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._shards = _Shards()
+
+    def observe(self, labels=(), value=0.0):
+        shard = self._shards.get()
+        entry = shard.get(labels)
+        if entry is None:
+            # [conteo por bucket (el último es +Inf), suma, conteo]
+            entry = shard[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        entry[0][bisect.bisect_left(self.buckets, value)] += 1
+        entry[1] += value
+        entry[2] += 1
+
+    def values(self):
+        """
+        Returns:
+            dict: ``{labels: (cumulative bucket counts, sum, count)}``.
+        """
+        totals = {}
+        for shard in self._shards.snapshot():
+            for labels, (counts, total, count) in shard.items():
+                merged = totals.setdefault(labels, [[0] * len(counts), 0.0, 0])
+                merged[0] = [a + b for a, b in zip(merged[0], counts)]
+                merged[1] += total
+                merged[2] += count
+        result = {}
+        for labels, (counts, total, count) in totals.items():
+            cumulative, running = [], 0
+            for value in counts:
+                running += value
+                cumulative.append(running)
+            result[labels] = (cumulative, total, count)
+        return result
+
+    def quantile(self, labels, q):
+        """
+        Approximate quantile ``q`` from the buckets (upper bound of the bucket that holds it),
+        or None without observations.
+        """
+        values = self.values().get(labels)
+        if values is None or values[2] == 0:
+            return None
+        cumulative, _total, count = values
+        index = bisect.bisect_left(cumulative, q * count)
+        return self.buckets[index] if index < len(self.buckets) else math.inf
+
+    def samples(self):
+        samples = []
+        bounds = [format_value(bound) for bound in self.buckets] + ["+Inf"]
+        for labels, (cumulative, total, count) in self.values().items():
+            pairs = label_pairs(self, labels)
+            for bound, value in zip(bounds, cumulative):
+                samples.append((f"{self.name}_bucket", pairs + [("le", bound)], value))
+            samples.append((f"{self.name}_sum", pairs, total))
+            samples.append((f"{self.name}_count", pairs, count))
+        return samples
+
+class RateMeter:
+    """
+    Rolling-window rate of a counter (e.g. frames per second of each camera).
+
+    ``sample`` stores the counter totals and must be called periodically off the hot
+    path (a GLib timeout); ``rates`` compares the newest and oldest snapshots in the
+    window.
+
+    Args:
+        counter (Counter): Counter whose rate is measured.
+        window (float): Seconds covered by the rate.
+        clock (callable): Monotonic time source in seconds.
+    """
+
+    def __init__(self, counter, window=10.0, clock=time.monotonic):
+        self.counter = counter
+        self.window = window
+        self.clock = clock
+        self._snapshots = deque()
+        self._lock = threading.Lock()
+
+    def sample(self, now=None):
+        now = self.clock() if now is None else now
+        totals = self.counter.values()
+        with self._lock:
+            self._snapshots.append((now, totals))
+            # Conservar una instantánea anterior a la ventana para cubrirla completa
+            while len(self._snapshots) > 2 and self._snapshots[1][0] <= now - self.window:
+                self._snapshots.popleft()
+        return True
+
+    def rates(self):
+        """
+        Returns:
+            dict: ``{labels: rate per second}``; labels first seen inside the window count
+            from zero.
+        """
+        with self._lock:
+            if len(self._snapshots) < 2:
+                return {}
+            (start, first), (end, last) = self._snapshots[0], self._snapshots[-1]
+        elapsed = end - start
+        if elapsed <= 0:
+            return {}
+        return {labels: (value - first.get(labels, 0)) / elapsed for labels, value in last.items()}
+
+class MetricsRegistry:
+    """
+    Collection of metrics rendered together by ``/metrics``.
+    """
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        """
+        Add a metric, or return the one already registered under its name (so modules
+        imported twice do not fail).
+        """
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                if type(existing) is not type(metric):
+                    raise ValueError(f"Metric {metric.name} already registered as a {existing.type}")
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name, help, labelnames=(), callback=None):
+        counter = self.register(Counter(name, help, labelnames))
+        if callback is not None:
+            counter.callback = callback
+        return counter
+
+    def gauge(self, name, help, labelnames=(), callback=None):
+        gauge = self.register(Gauge(name, help, labelnames))
+        if callback is not None:
+            gauge.callback = callback
+        return gauge
+
+    def histogram(self, name, help, labelnames=(), buckets=LATENCY_BUCKETS):
+        return self.register(Histogram(name, help, labelnames, buckets))
+
+    def get(self, name):
+        return self._metrics[name]
+
+    def render(self):
+        """
+        Returns:
+            str: Every metric in the Prometheus text exposition format (version 0.0.4).
+        """
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            for name, pairs, value in metric.samples():
+                label_text = ",".join(f'{key}="{escape_label(label)}"' for key, label in pairs)
+                lines.append(f"{name}{{{label_text}}} {format_value(value)}" if label_text else
+                             f"{name} {format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+def label_pairs(metric, labels):
+    return list(zip(metric.labelnames, labels))
+
+def escape_label(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def format_value(value):
+    if value == math.inf:
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value)) if abs(value) < 1e15 else repr(value)
+    return repr(value) if isinstance(value, float) else str(value)
+
+class MetricsServer:
+    """
+    HTTP server exposing ``registry`` at ``/metrics`` from a daemon thread.
+
+    Args:
+        registry (MetricsRegistry): Metrics to serve.
+        host (str): Address to bind; local only by default.
+        port (int): TCP port (0 picks a free one).
+    """
+
+    def __init__(self, registry, host="127.0.0.1", port=9101):
+        self.registry = registry
+        self._httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self._httpd.daemon_threads = True
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="metrics-server", daemon=True)
+
+    @property
+    def url(self):
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/metrics"
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def _handler_class(self):
+        registry = self.registry
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?", 1)[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = registry.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+REGISTRY = MetricsRegistry()
@@ -0,0 +1,22 @@
+#!/usr/bin/env python3
+
+"""
+Names of the stages a frame goes through, shared by the tracer (``pipeline.tracing``)
+and the code that times stages outside the pipeline (the alert sender in ``utils``).
+
+Attributes:
+    STAGES (tuple): Stage names in the order a frame goes through them.
+"""
+
+STAGE_CAPTURE = "capture"
+STAGE_DECODE = "decode"
+STAGE_STREAMMUX = "streammux"
+STAGE_PGIE = "pgie"
+STAGE_CONVERT = "convert"
+STAGE_APPSINK = "appsink"
+STAGE_DECISION = "decision"
+STAGE_ENCODE = "encode"
+STAGE_SEND = "send"
+
+STAGES = (STAGE_CAPTURE, STAGE_DECODE, STAGE_STREAMMUX, STAGE_PGIE, STAGE_CONVERT, STAGE_APPSINK,
+          STAGE_DECISION, STAGE_ENCODE, STAGE_SEND)
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+
+"""
+Array-based detection stage.
+
+The object metadata of a whole batch is drained once into a compact structured NumPy
+array (one row per object). Grouping per frame/camera, suppression and drawing then
+work on that array instead of on individual pyds objects.
+
+The drain reads ``class_id`` and ``confidence`` first and only builds rows for the
+objects that pass the class and confidence filter, packed straight into the row layout,
+so it reads the same pyds fields as the original per-object loop (plus ``object_id``)
+and costs no more (see ``benchmarks/bench_detections.py``).
+
+Attributes:
+    DETECTION_DTYPE (np.dtype): Row layout of the detection array.
+    UNTRACKED_OBJECT_ID (int): ``object_id`` DeepStream assigns when no tracker runs.
+"""
+
+import struct
+
+import cv2
+import numpy as np
+
+DETECTION_DTYPE = np.dtype([
+    ('class_id', np.int32),
+    ('confidence', np.float32),
+    ('left', np.float32),
+    ('top', np.float32),
+    ('width', np.float32),
+    ('height', np.float32),
+    ('pad_index', np.int32),
+    ('frame_num', np.int64),
+    ('batch_id', np.int32),
+    ('object_id', np.uint64),
+])
+
+UNTRACKED_OBJECT_ID = 0xFFFFFFFFFFFFFFFF
+
+BOX_COLOR = (0, 0, 255)
+LABEL_COLOR = (0, 255, 0)
+
+EMPTY_DETECTIONS = np.empty(0, dtype=DETECTION_DTYPE)
+
+# Una fila de DETECTION_DTYPE empaquetada; evita convertir una lista de tuplas con np.array
+_ROW = struct.Struct('<ifffffiqiQ')
+assert _ROW.size == DETECTION_DTYPE.itemsize
+
+def collect_detections(frames, seek_class, confidence_bias):
+    """
+    Drain the objects of ``seek_class`` with confidence of at least ``confidence_bias``
+    of a batch into a detection array.
+
+    Args:
+        frames (iterable): ``(pad_index, frame_num, batch_id, objects)`` per frame, where
+            ``objects`` yields items exposing ``class_id``, ``confidence``, ``object_id`` and
+            ``rect_params`` (``left``, ``top``, ``width``, ``height``).
+        seek_class (int): Class of the objects kept.
+        confidence_bias (float): Lowest confidence of the objects kept.
+
+    Returns:
+        np.ndarray: Read-only array of ``DETECTION_DTYPE`` in batch order.
+    """
+    rows = []
+    append = rows.append
+    pack = _ROW.pack
+    for pad_index, frame_num, batch_id, objects in frames:
+        for obj in objects:
+            # Clase y confianza primero: las cajas solo se leen para los objetos que pasan el filtro
+            if obj.class_id != seek_class:
+                continue
+            confidence = obj.confidence
+            if confidence < confidence_bias:
+                continue
+            rect = obj.rect_params
+            append(pack(seek_class, confidence, rect.left, rect.top, rect.width, rect.height,
+                        pad_index, frame_num, batch_id, obj.object_id))
+    if not rows:
+        return EMPTY_DETECTIONS
+    return np.frombuffer(b''.join(rows), dtype=DETECTION_DTYPE)
+
+def filter_detections(detections, seek_class, confidence_bias):
+    """
+    Keep the detections of ``seek_class`` with confidence of at least ``confidence_bias``.
+    """
+    mask = (detections['class_id'] == seek_class) & (detections['confidence'] >= confidence_bias)
+    return detections[mask]
+
+def group_by(detections, field):
+    """
+    Split a detection array by the value of ``field``.
+
+    Args:
+        detections (np.ndarray): Array of ``DETECTION_DTYPE``.
+        field (str): Column to group on, e.g. ``batch_id`` (per frame) or ``pad_index`` (per camera).
+
+    Returns:
+        dict: ``{value: sub-array}``; sub-arrays keep the original relative order.
+    """
+    if len(detections) == 0:
+        return {}
+    keys = detections[field].tolist()
+    groups = {}
+    start = 0
+    previous = keys[0]
+    # collect_detections deja las filas en orden de batch: casi siempre ya están agrupadas
+    for index, key in enumerate(keys):
+        if key != previous:
+            if key < previous:
+                return group_by(detections[np.argsort(detections[field], kind='stable')], field)
+            groups[previous] = detections[start:index]
+            start, previous = index, key
+    groups[previous] = detections[start:]
+    return groups
+
+def draw_detections(frame, detections, labels=None):
+    """
+    Draw the boxes and labels of ``detections`` on ``frame`` in place.
+
+    OpenCV has no batched text call, so every object costs one ``cv2.rectangle`` and one
+    ``cv2.putText``, as in the original loop; only frames that produce an alert are drawn.
+
+    Args:
+        frame (np.ndarray): BGR frame.
+        detections (np.ndarray): Detections of that frame.
+        labels (sequence): Class names indexed by ``class_id``.
+
+    Returns:
+        np.ndarray: ``frame``.
+    """
+    if len(detections) == 0:
+        return frame
+    for class_id, confidence, left, top, width, height, *_ in detections.tolist():
+        left, top = int(left), int(top)
+        cv2.rectangle(frame, (left, top), (left + int(width), top + int(height)), BOX_COLOR, 2)
+        label = labels[class_id] if labels is not None and class_id < len(labels) else str(class_id)
+        cv2.putText(frame, f"{label} {confidence:.2f}", (left, top - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, LABEL_COLOR, 2)
+    return frame
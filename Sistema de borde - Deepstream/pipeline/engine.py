@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+
+"""
+Per-batch frame processing, independent of pyds and GStreamer.
+
+The appsink callback of ``launch_pipeline`` only converts the DeepStream batch metadata
+into a ``FrameBatch`` (the frames of the batch plus a detection array of
+``pipeline.detections``) and hands it to ``FrameEngine.process``, which does the rest:
+per-camera frame counting, filtering the alert class, track-aware suppression, frame
+materialization and drawing, and queueing the alert record on the dispatcher.
+
+Frame pixels are reached through a callable per frame, so the surface is only mapped
+when an alert is emitted and any source of frames (the NvBufSurface of a batch, a
+decoded JPEG, a synthetic array) can feed the engine. ``pipeline.replay`` uses this to
+drive the engine with synthetic streams at many times the real camera count.
+
+Attributes:
+    FRAMES (Counter): Frames processed per camera.
+    FRAMES_LOST (Counter): Gaps in the ``frame_num`` sequence of each camera.
+    DETECTIONS (Counter): Detections of the alert class above the confidence threshold,
+        inside the camera ROI.
+    ALERTS (Counter): Alert decisions and deliveries per camera and outcome.
+"""
+
+import datetime
+
+from common.metrics import REGISTRY
+from pipeline.detections import filter_detections, group_by, draw_detections
+from pipeline.frame_processing import decide_alert, materialize_frame
+from pipeline.tracing import STAGE_APPSINK, STAGE_DECISION
+
+FRAMES = REGISTRY.counter("edge_frames_total", "Frames received at the appsink", ("camera",))
+FRAMES_LOST = REGISTRY.counter("edge_frames_lost_total",
+                               "Gaps in the frame_num sequence at the appsink (frames dropped after the streammux)",
+                               ("camera",))
+DETECTIONS = REGISTRY.counter("edge_detections_total", "Detections of the alert class above the confidence threshold "
+                              "inside the camera ROI", ("camera",))
+ALERTS = REGISTRY.counter("edge_alerts_total", "Alert decisions and deliveries by outcome "
+                          "(suppressed, queued, coalesced, dropped, sent, spooled for a later retry, failed)",
+                          ("camera", "outcome"))
+
+class SourceFrame:
+    """
+    One frame of a batch.
+
+    Attributes:
+        pad_index (int): Streammux pad of the camera.
+        frame_num (int): Frame number within the camera stream.
+        batch_id (int): Position of the frame in the batch; detections refer to it.
+        pts_ns (int): Presentation timestamp in nanoseconds.
+        surface (callable): Returns the ``H x W x 4`` RGBA frame, or None if it cannot be
+            mapped. Only called for frames that produce an alert.
+    """
+
+    __slots__ = ('pad_index', 'frame_num', 'batch_id', 'pts_ns', 'surface')
+
+    def __init__(self, pad_index, frame_num, batch_id, pts_ns, surface):
+        self.pad_index = pad_index
+        self.frame_num = frame_num
+        self.batch_id = batch_id
+        self.pts_ns = pts_ns
+        self.surface = surface
+
+class FrameBatch:
+    """
+    Frames of one batch and every object detected in them.
+
+    Attributes:
+        frames (list): ``SourceFrame`` of each frame, in batch order.
+        detections (np.ndarray): Array of ``DETECTION_DTYPE`` with the objects of all frames.
+    """
+
+    __slots__ = ('frames', 'detections')
+
+    def __init__(self, frames, detections):
+        self.frames = frames
+        self.detections = detections
+
+class FrameEngine:
+    """
+    Decide, for every frame of a batch, whether it produces an alert and queue it.
+
+    Args:
+        dispatcher (AlertDispatcher): Receives the alert records (``submit``).
+        source_states (dict): Per-source state keyed by pad index, with 'camera_id' and
+            'last_frame_num'; shared with the source manager, which adds and removes cameras.
+        frame_pool (FramePool): Reusable BGR buffers for the frames that produce alerts.
+        suppressor (AlertSuppressor): Track-aware alert suppression.
+        tracer (FrameTracer): Per-frame stage tracer, or None.
+        seek_class (int): Class that produces alerts.
+        confidence (float): Minimum confidence of an alerting detection.
+        class_labels (sequence): Class names drawn on the alert frame.
+        priority_min_detections (int): Detections in one frame that make its alert high priority.
+        log (callable): Receives a message for every alert and error; None disables it.
+        now (callable): Wall clock used for the alert timestamp.
+        recorder (DetectionRecorder): Records every batch before it is processed, or None
+            (see ``pipeline.recording``).
+        frame_clock (callable): ``f(frame)`` returning the time in seconds the suppressor
+            uses for the frame; None uses the suppressor's own clock (time of processing).
+            A replay passes the frame PTS to make suppression deterministic.
+        rois (CameraRois): Per-camera ROI; detections outside it are ignored (see
+            ``pipeline.roi``). None keeps every detection.
+        scheduler (InferenceScheduler): Receives every inferred frame and its detection
+            count to adapt the inference interval of the camera (see
+            ``pipeline.scheduling``), or None.
+        motion_gate (MotionGate): Kept open while the frames it forwards have detections
+            (see ``pipeline.motion``), or None.
+    """
+
+    def __init__(self, dispatcher, source_states, frame_pool, suppressor, tracer=None, seek_class=0, confidence=0.6,
+                 class_labels=("person",), priority_min_detections=3, log=print, now=datetime.datetime.now,
+                 recorder=None, frame_clock=None, rois=None, scheduler=None, motion_gate=None):
+        self.dispatcher = dispatcher
+        self.source_states = source_states
+        self.frame_pool = frame_pool
+        self.suppressor = suppressor
+        self.tracer = tracer
+        self.seek_class = seek_class
+        self.confidence = confidence
+        self.class_labels = class_labels
+        self.priority_min_detections = priority_min_detections
+        self.log = log
+        self.now = now
+        self.recorder = recorder
+        self.frame_clock = frame_clock
+        self.rois = rois
+        self.scheduler = scheduler
+        self.motion_gate = motion_gate
+
+    def process(self, batch):
+        """
+        Process every frame of ``batch``.
+
+        Returns:
+            bool: False if the surface of an alerting frame could not be mapped (the rest
+            of the batch is skipped), True otherwise.
+        """
+        tracer = self.tracer
+        if self.recorder is not None:
+            self.recorder.record(batch, self.source_states)
+        # Filtrar las personas de todo el batch de una vez y agruparlas por frame
+        detections_by_frame = group_by(filter_detections(batch.detections, self.seek_class, self.confidence),
+                                       'batch_id')
+        if tracer is not None:
+            sample_ns = tracer.clock()
+            for frame in batch.frames:
+                tracer.mark(frame.pad_index, frame.frame_num, STAGE_APPSINK, frame.pts_ns, sample_ns)
+
+        for frame in batch.frames:
+            frame_number = frame.frame_num
+            state = self.source_states.get(frame.pad_index)
+            if state is None:
+                # Frame en tránsito de una cámara que acaba de ser retirada
+                continue
+            camera_id = state['camera_id']
+            labels = (camera_id,)
+
+            # Contadores por hilo, sin lock; los FPS se calculan fuera del hilo de streaming
+            FRAMES.inc(labels)
+            # frame_num vuelve a empezar cuando la cámara se reconecta
+            if frame_number > state['last_frame_num'] + 1 and state['last_frame_num'] >= 0:
+                FRAMES_LOST.inc(labels, frame_number - state['last_frame_num'] - 1)
+            state['last_frame_num'] = frame_number
+
+            frame_detections = detections_by_frame.get(frame.batch_id)
+            if frame_detections is not None and self.rois is not None:
+                frame_detections = self.rois.filter(camera_id, frame_detections)
+                if len(frame_detections) == 0:
+                    frame_detections = None
+            if self.scheduler is not None:
+                self.scheduler.observe(frame.pad_index, 0 if frame_detections is None else len(frame_detections))
+            if self.motion_gate is not None and frame_detections is not None:
+                self.motion_gate.observe(frame.pad_index, detections=len(frame_detections))
+
+            # El frame solo se materializa si habrá alerta
+            if frame_detections is None:
+                if tracer is not None:
+                    tracer.mark(frame.pad_index, frame_number, STAGE_DECISION)
+                continue
+            DETECTIONS.inc(labels, len(frame_detections))
+
+            alert = decide_alert(frame_detections, camera_id, self.suppressor,
+                                 self.frame_clock(frame) if self.frame_clock is not None else None)
+            if tracer is not None:
+                tracer.mark(frame.pad_index, frame_number, STAGE_DECISION)
+            if not alert:
+                ALERTS.inc((camera_id, "suppressed"))
+                continue
+            if self.log is not None:
+                self.log(f"Persona(s) detectada(s) en la cámara {camera_id}, frame {frame_number} "
+                         f"({', '.join(self.suppressor.last_reasons)})")
+
+            # Convertir la superficie del frame a BGR en un buffer reutilizable
+            surface = frame.surface()
+            if surface is None:
+                if self.log is not None:
+                    self.log("Error: Surface is not accessible")
+                return False
+            frame_bgr = materialize_frame(surface, self.frame_pool, camera_id)
+            draw_detections(frame_bgr, frame_detections, self.class_labels)
+
+            # Encolar la detección; el guardado y el envío ocurren fuera del hilo de streaming
+            outcome = self.dispatcher.submit({
+                'camera_id': camera_id,
+                'frame_number': frame_number,
+                'timestamp': self.now().strftime("%Y%m%d_%H%M%S"),
+                'frame': frame_bgr,
+                'detections': frame_detections,
+                'priority': len(frame_detections) >= self.priority_min_detections,
+                'trace': (tracer.stage_timer(frame.pad_index, frame_number)
+                          if tracer is not None and tracer.traced(frame_number) else None)
+            })
+            # "queued", "coalesced" (reemplazó la alerta pendiente de la cámara) o "dropped"
+            ALERTS.inc((camera_id, outcome))
+        return True
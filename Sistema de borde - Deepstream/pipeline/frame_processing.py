@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+
+"""
+Per-frame decision and frame materialization, independent of pyds.
+
+``pipeline.engine`` walks the object metadata first and only touches the frame surface
+when an alert will actually be emitted. The functions here work on the detection arrays
+of ``pipeline.detections`` and on NumPy frames, so they can be exercised with synthetic
+metadata and frames.
+"""
+
+import threading
+
+import cv2
+import numpy as np
+
+def decide_alert(detections, camera_id, suppressor, now=None):
+    """
+    Decide whether a frame with ``detections`` must produce an alert.
+
+    Args:
+        detections (np.ndarray): Matching detections of the frame (see ``pipeline.detections``).
+        camera_id (int): Camera the frame belongs to.
+        suppressor (AlertSuppressor): Track-aware suppression (see ``pipeline.suppression``).
+        now (float): Frame time in seconds; defaults to the suppressor's clock.
+
+    Returns:
+        bool: True if the frame must be materialized and sent.
+    """
+    if len(detections) == 0:
+        return False
+    return suppressor.update(camera_id, detections, now)
+
+class FramePool:
+    """
+    Reusable BGR frame buffers, preallocated per camera.
+
+    A buffer is acquired by the streaming thread when a frame is materialized and
+    released by the dispatcher once the alert has been handled. If every buffer of a
+    camera is still in flight a temporary array is allocated instead (counted in
+    ``misses``) so the streaming thread never waits.
+
+    Args:
+        buffers_per_camera (int): Number of buffers kept for each camera.
+    """
+
+    def __init__(self, buffers_per_camera=3):
+        self.buffers_per_camera = buffers_per_camera
+        self._free = {}
+        self._owner = {}
+        self._lock = threading.Lock()
+        self.allocated = 0
+        self.misses = 0
+
+    def acquire(self, camera_id, shape):
+        """
+        Returns:
+            np.ndarray: An uninitialized ``uint8`` buffer of the given shape.
+        """
+        with self._lock:
+            free = self._free.get(camera_id)
+            if free is None:
+                free = self._free[camera_id] = [self._allocate(camera_id, shape) for _ in range(self.buffers_per_camera)]
+
+            for i, buffer in enumerate(free):
+                if buffer.shape == shape:
+                    return free.pop(i)
+
+            if free:
+                # La resolución de la cámara cambió: reemplazar un buffer libre por uno nuevo
+                stale = free.pop()
+                del self._owner[id(stale)]
+                return self._allocate(camera_id, shape)
+
+            self.misses += 1
+        return np.empty(shape, dtype=np.uint8)
+
+    def release(self, buffer):
+        """
+        Give a buffer back to its camera's pool. Buffers not owned by the pool are ignored.
+        """
+        with self._lock:
+            camera_id = self._owner.get(id(buffer))
+            if camera_id is not None:
+                self._free[camera_id].append(buffer)
+
+    def _allocate(self, camera_id, shape):
+        buffer = np.empty(shape, dtype=np.uint8)
+        self._owner[id(buffer)] = camera_id
+        self.allocated += 1
+        return buffer
+
+def materialize_frame(surface, pool, camera_id):
+    """
+    Convert an RGBA surface to a BGR frame stored in a pooled buffer.
+
+    The surface is read directly by ``cv2.cvtColor``; no intermediate RGBA copy is made.
+
+    Args:
+        surface (np.ndarray): ``H x W x 4`` RGBA frame (the mapped NvBufSurface).
+        pool (FramePool): Pool providing the destination buffer.
+        camera_id (int): Camera the frame belongs to.
+
+    Returns:
+        np.ndarray: ``H x W x 3`` BGR frame owned by ``pool``.
+    """
+    frame = pool.acquire(camera_id, (surface.shape[0], surface.shape[1], 3))
+    cv2.cvtColor(surface, cv2.COLOR_RGBA2BGR, dst=frame)
+    return frame
@@ -0,0 +1,405 @@
+#!/usr/bin/env python3
+
+"""
+Declarative description of the DeepStream pipeline.
+
+The element graph (which elements exist, their properties and how they are linked)
+is built as plain Python data by ``build_pipeline_spec`` and only turned into GStreamer
+objects by ``materialize``. Keeping both steps apart lets the same graph be built:
+
+- with the NVIDIA elements on a Jetson (``profile="deepstream"``), or
+- with CPU stand-ins (``profile="cpu"``): ``videotestsrc``/``filesrc`` sources,
+  ``compositor`` in place of ``nvstreammux`` and ``identity``/``videoconvert`` in place
+  of the inference, conversion and OSD elements. This build needs neither a GPU nor
+  ``pyds`` and is enough to check graph shape and batch sizing.
+
+Running ``python3 -m pipeline.graph --sources 5`` from the edge system directory builds
+the CPU variant and verifies it.
+
+Attributes:
+    PROFILE_DEEPSTREAM (str): Profile that uses the NVIDIA elements as-is.
+    PROFILE_CPU (str): Profile that replaces the NVIDIA elements with CPU stand-ins.
+    CPU_STANDINS (dict): Element factory substitutions applied by the CPU profile; a tuple
+        lists alternatives in order of preference.
+    MOTION_PROXY_CAPS (str): Caps of the low-resolution proxy of the motion branch.
+"""
+
+import argparse
+import sys
+
+PROFILE_DEEPSTREAM = "deepstream"
+PROFILE_CPU = "cpu"
+
+SOURCE_BIN_FACTORY = "source-bin"
+STREAMMUX_NAME = "Stream-muxer"
+PGIE_NAME = "primary-inference"
+APPSINK_NAME = "sink"
+QUEUE_NAMES = tuple(f"queue{i}" for i in range(1, 6))
+
+CPU_STANDINS = {
+    "nvstreammux": "compositor",
+    "nvinfer": "identity",
+    "nvinferserver": "identity",
+    # videoconvertscale (GStreamer >= 1.22) también escala, como nvvideoconvert
+    "nvvideoconvert": ("videoconvertscale", "videoconvert"),
+    "nvdsosd": "identity",
+}
+
+MOTION_PROXY_CAPS = "video/x-raw, format=GRAY8, width={width}, height={height}"
+
+class ElementSpec:
+    """
+    Description of a single pipeline element.
+
+    Args:
+        name (str): Unique element name inside the pipeline.
+        factory (str): GStreamer factory name (or ``SOURCE_BIN_FACTORY`` for source bins).
+        properties (dict): Properties to set on the element.
+    """
+
+    def __init__(self, name, factory, properties=None):
+        self.name = name
+        self.factory = factory
+        self.properties = dict(properties or {})
+
+    def __repr__(self):
+        return f"ElementSpec({self.name!r}, {self.factory!r}, {self.properties!r})"
+
+class PipelineSpec:
+    """
+    Ordered collection of elements and the links between them.
+    """
+
+    def __init__(self):
+        self.elements = {}
+        self.links = []
+        self.sources = {}
+        self.max_sources = 0
+
+    def add(self, name, factory, **properties):
+        """
+        Add an element to the spec.
+
+        Args:
+            name (str): Element name. Property names use ``_`` in place of ``-``.
+            factory (str): GStreamer factory name.
+
+        Returns:
+            ElementSpec: The added element.
+        """
+        if name in self.elements:
+            raise ValueError(f"Duplicated element name: {name}")
+        element = ElementSpec(name, factory, {key.replace("_", "-"): value for key, value in properties.items()})
+        self.elements[name] = element
+        return element
+
+    def link(self, src, dst, sink_pad=None):
+        """
+        Link the ``src`` pad of ``src`` to ``dst``. ``sink_pad`` names a request pad on ``dst``.
+        """
+        self.links.append((src, dst, sink_pad))
+
+    def chain(self, *names):
+        """
+        Link the given elements one after the other.
+        """
+        for src, dst in zip(names, names[1:]):
+            self.link(src, dst)
+
+    def get(self, name):
+        return self.elements[name]
+
+    def batch_sizes(self):
+        """
+        Returns:
+            dict: ``batch-size`` property of every element that sets one.
+        """
+        return {name: element.properties["batch-size"]
+                for name, element in self.elements.items() if "batch-size" in element.properties}
+
+    def describe(self):
+        """
+        Returns:
+            str: Human readable listing of elements and links.
+        """
+        lines = [f"{name} ({element.factory}) {element.properties}" for name, element in self.elements.items()]
+        lines += [f"{src} -> {dst}" + (f".{pad}" if pad else "") for src, dst, pad in self.links]
+        return "\n".join(lines)
+
+def build_pipeline_spec(sources, pgie_config_path, gie="nvinfer", width=1920, height=1080,
+                        batch_timeout_usec=33000, ts_from_rtsp=False, nvbuf_memory_type=None,
+                        max_sources=None, motion_proxy=None):
+    """
+    Build the spec of a single pipeline that batches every source through one inference engine.
+
+    Args:
+        sources (dict): Mapping of streammux pad index to source URI.
+        pgie_config_path (str): Path of the nvinfer/nvinferserver configuration file.
+        gie (str): Inference element factory, ``nvinfer`` or ``nvinferserver``.
+        width (int): Streammux output width.
+        height (int): Streammux output height.
+        batch_timeout_usec (int): Streammux batched-push-timeout.
+        ts_from_rtsp (bool): Attach the RTSP NTP timestamps instead of the system time.
+        nvbuf_memory_type (int): Memory type for dGPU platforms, None on Jetson.
+        max_sources (int): Sources the pipeline must be able to hold when cameras are
+            attached at runtime. Defaults to the number of initial sources.
+        motion_proxy (tuple): ``(width, height)`` of the proxy of the motion branch added
+            to every source (see ``add_source_spec``), or None for no motion branch.
+
+    Returns:
+        PipelineSpec: The pipeline description. Streammux and pgie batch sizes match the
+        number of sources (or ``max_sources`` if larger).
+    """
+    number_sources = max(len(sources), max_sources or 0)
+    if number_sources == 0:
+        raise ValueError("At least one source is needed to build the pipeline")
+
+    spec = PipelineSpec()
+    spec.max_sources = number_sources
+
+    streammux = spec.add(STREAMMUX_NAME, "nvstreammux", width=width, height=height,
+                         batch_size=number_sources, batched_push_timeout=batch_timeout_usec)
+    if ts_from_rtsp:
+        streammux.properties["attach-sys-ts"] = 0
+    if nvbuf_memory_type is not None:
+        streammux.properties["nvbuf-memory-type"] = nvbuf_memory_type
+
+    for pad_index, uri in sources.items():
+        add_source_spec(spec, pad_index, uri, motion_proxy)
+
+    spec.add(PGIE_NAME, gie, config_file_path=pgie_config_path, batch_size=number_sources)
+    convertor = spec.add("convertor_to_rgba", "nvvideoconvert")
+    if nvbuf_memory_type is not None:
+        convertor.properties["nvbuf-memory-type"] = nvbuf_memory_type
+    spec.add("filter_rgba", "capsfilter", caps="video/x-raw(memory:NVMM), format=RGBA")
+    spec.add("onscreendisplay", "nvdsosd", process_mode=0, display_text=True)
+    spec.add(APPSINK_NAME, "appsink", emit_signals=True, sync=False)
+
+    queues = QUEUE_NAMES
+    for queue in queues:
+        spec.add(queue, "queue", max_size_buffers=2, leaky=2, silent=True)
+
+    spec.chain(STREAMMUX_NAME, queues[0], PGIE_NAME, queues[1], "convertor_to_rgba", queues[2],
+               "filter_rgba", queues[3], "onscreendisplay", queues[4], APPSINK_NAME)
+    return spec
+
+def motion_branch_names(pad_index):
+    """
+    Returns:
+        tuple: Names of the tee and the motion branch elements of a source, in link order.
+    """
+    return (f"tee_src_{pad_index}", f"queue_motion_{pad_index}", f"motion_convert_{pad_index}",
+            f"motion_filter_{pad_index}", f"motion_sink_{pad_index}")
+
+def add_source_spec(spec, pad_index, uri, motion_proxy=None):
+    """
+    Add the source bin and source queue for one camera, linked to ``sink_<pad_index>`` of the streammux.
+
+    With ``motion_proxy`` (``(width, height)``, width a multiple of 4), a tee after the
+    source bin also feeds a motion branch: a one-buffer leaky queue, ``nvvideoconvert``
+    scaling to a GRAY8 proxy in system memory and an appsink (see ``pipeline.motion``).
+
+    Returns:
+        tuple: Names of the source bin and the source queue.
+    """
+    bin_name = f"source-bin-{pad_index}"
+    queue_name = f"queue_src_{pad_index}"
+    spec.add(bin_name, SOURCE_BIN_FACTORY, uri=uri)
+    spec.add(queue_name, "queue", max_size_buffers=10, leaky=2, silent=True)
+    if motion_proxy is None:
+        spec.link(bin_name, queue_name)
+    else:
+        tee, queue, convert, capsfilter, appsink = motion_branch_names(pad_index)
+        width, height = motion_proxy
+        spec.add(tee, "tee")
+        spec.add(queue, "queue", max_size_buffers=1, leaky=2, silent=True)
+        spec.add(convert, "nvvideoconvert")
+        spec.add(capsfilter, "capsfilter", caps=MOTION_PROXY_CAPS.format(width=width, height=height))
+        spec.add(appsink, "appsink", emit_signals=True, sync=False, max_buffers=1, drop=True)
+        spec.link(bin_name, tee)
+        spec.chain(tee, queue, convert, capsfilter, appsink)
+        spec.link(tee, queue_name)
+    spec.link(queue_name, STREAMMUX_NAME, sink_pad=f"sink_{pad_index}")
+    spec.sources[pad_index] = uri
+    return bin_name, queue_name
+
+def verify_spec(spec):
+    """
+    Check the invariants of a single multi-source pipeline.
+
+    Returns:
+        list: Description of every problem found; empty if the spec is consistent.
+    """
+    problems = []
+    number_sources = max(len(spec.sources), spec.max_sources)
+    for name, batch_size in spec.batch_sizes().items():
+        if batch_size != number_sources:
+            problems.append(f"{name} batch-size is {batch_size}, expected {number_sources}")
+
+    muxed = {pad for _, dst, pad in spec.links if dst == STREAMMUX_NAME}
+    for pad_index in spec.sources:
+        if f"sink_{pad_index}" not in muxed:
+            problems.append(f"source {pad_index} is not linked to {STREAMMUX_NAME}")
+    return problems
+
+def request_pad(element, pad_name):
+    """
+    Request a pad by name on both old and new GStreamer versions.
+    """
+    if hasattr(element, "request_pad_simple"):
+        return element.request_pad_simple(pad_name)
+    return element.get_request_pad(pad_name)
+
+def make_element(Gst, element_spec, profile=PROFILE_DEEPSTREAM):
+    """
+    Create and configure the GStreamer element of an ``ElementSpec``.
+
+    In the CPU profile the NVIDIA factories are replaced by their stand-ins and any
+    property the stand-in does not have is skipped.
+
+    Returns:
+        Gst.Element: The created element, or None if the factory is not available.
+    """
+    factories = (element_spec.factory,)
+    if profile == PROFILE_CPU:
+        factories = CPU_STANDINS.get(element_spec.factory, factories)
+        if isinstance(factories, str):
+            factories = (factories,)
+
+    element = None
+    for factory in factories:
+        element = Gst.ElementFactory.make(factory, element_spec.name)
+        if element:
+            break
+    if not element:
+        return None
+
+    for key, value in element_spec.properties.items():
+        if profile == PROFILE_CPU and element.find_property(key) is None:
+            continue
+        if key == "caps":
+            if profile == PROFILE_CPU:
+                value = value.replace("(memory:NVMM)", "")
+            value = Gst.Caps.from_string(value)
+        element.set_property(key, value)
+    return element
+
+def materialize(Gst, spec, source_bin_factory, profile=PROFILE_DEEPSTREAM):
+    """
+    Create the GStreamer pipeline described by ``spec``.
+
+    Args:
+        Gst (module): The ``gi.repository.Gst`` module, already initialized.
+        spec (PipelineSpec): Pipeline description.
+        source_bin_factory (callable): ``f(pad_index, uri)`` returning a source ``Gst.Bin``
+            with a ``src`` ghost pad.
+        profile (str): ``PROFILE_DEEPSTREAM`` or ``PROFILE_CPU``.
+
+    Returns:
+        tuple: ``(pipeline, elements)`` where ``elements`` maps element names to the
+        created elements. Elements that could not be created are logged by the caller.
+    """
+    pipeline = Gst.Pipeline()
+    elements = {}
+    for name, element_spec in spec.elements.items():
+        if element_spec.factory == SOURCE_BIN_FACTORY:
+            pad_index = int(name.rsplit("-", 1)[1])
+            element = source_bin_factory(pad_index, element_spec.properties["uri"])
+        else:
+            element = make_element(Gst, element_spec, profile)
+        if element is None:
+            raise RuntimeError(f"Unable to create {name} ({element_spec.factory})")
+        pipeline.add(element)
+        elements[name] = element
+
+    for src, dst, sink_pad in spec.links:
+        link_elements(elements[src], elements[dst], sink_pad)
+    return pipeline, elements
+
+def link_elements(src, dst, sink_pad=None):
+    """
+    Link ``src`` to ``dst``, using the ``sink_pad`` request pad on ``dst`` if given. A
+    ``src`` without a static ``src`` pad (a tee) gets a new ``src_%u`` request pad.
+    """
+    srcpad = src.get_static_pad("src") or request_pad(src, "src_%u")
+    sinkpad = dst.get_static_pad("sink") if sink_pad is None else request_pad(dst, sink_pad)
+    if not srcpad or not sinkpad or srcpad.link(sinkpad) != 0:
+        raise RuntimeError(f"Unable to link {src.get_name()} to {dst.get_name()} {sink_pad or ''}")
+
+def check_materialized(spec, elements):
+    """
+    Verify that every link of the spec exists between the created elements.
+
+    Returns:
+        list: Description of every missing link.
+    """
+    problems = []
+    for src, dst, sink_pad in spec.links:
+        # Un tee tiene un pad src_%u por enlace
+        peers = [pad.get_peer() for pad in elements[src].iterate_src_pads()]
+        peer = next((peer for peer in peers if peer is not None and peer.get_parent_element() is elements[dst]), None)
+        if peer is None:
+            problems.append(f"{src} is not linked to {dst}")
+        elif sink_pad and peer.get_name() != sink_pad:
+            problems.append(f"{src} is linked to {dst}.{peer.get_name()}, expected {sink_pad}")
+    return problems
+
+def create_cpu_source_bin(Gst, pad_index, uri):
+    """
+    Source bin for the CPU profile.
+
+    ``file://`` URIs are decoded with ``uridecodebin``; any other URI is replaced by a
+    live ``videotestsrc`` so RTSP cameras are not needed.
+    """
+    nbin = Gst.Bin.new(f"source-bin-{pad_index}")
+    ghost_pad = Gst.GhostPad.new_no_target("src", Gst.PadDirection.SRC)
+    nbin.add_pad(ghost_pad)
+
+    if uri.startswith("file://"):
+        decoder = Gst.ElementFactory.make("uridecodebin", f"uri-decode-bin-{pad_index}")
+        decoder.set_property("uri", uri)
+
+        def on_pad_added(_decodebin, pad):
+            caps = pad.get_current_caps() or pad.query_caps(None)
+            if caps.get_structure(0).get_name().startswith("video") and not ghost_pad.get_target():
+                ghost_pad.set_target(pad)
+
+        decoder.connect("pad-added", on_pad_added)
+        nbin.add(decoder)
+    else:
+        testsrc = Gst.ElementFactory.make("videotestsrc", f"test-src-{pad_index}")
+        testsrc.set_property("is-live", True)
+        testsrc.set_property("pattern", pad_index % 20)
+        nbin.add(testsrc)
+        ghost_pad.set_target(testsrc.get_static_pad("src"))
+    return nbin
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the pipeline with CPU stand-ins and verify its shape.")
+    parser.add_argument("--sources", type=int, default=5, help="Number of sources")
+    parser.add_argument("--uri", default="videotestsrc://", help="URI for every source (file:// or test)")
+    parser.add_argument("--motion", action="store_true", help="Add the motion branch to every source")
+    parser.add_argument("--verbose", action="store_true", help="Print the element graph")
+    args = parser.parse_args(argv)
+
+    import gi
+    gi.require_version("Gst", "1.0")
+    from gi.repository import Gst
+    Gst.init(None)
+
+    spec = build_pipeline_spec({i: args.uri for i in range(args.sources)}, "config.txt",
+                               motion_proxy=(160, 96) if args.motion else None)
+    if args.verbose:
+        print(spec.describe())
+
+    problems = verify_spec(spec)
+    _, elements = materialize(Gst, spec, lambda i, uri: create_cpu_source_bin(Gst, i, uri), PROFILE_CPU)
+    problems += check_materialized(spec, elements)
+
+    print(f"{len(spec.elements)} elements, {len(spec.links)} links, batch sizes: {spec.batch_sizes()}")
+    for problem in problems:
+        print(f"ERROR: {problem}")
+    return 1 if problems else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
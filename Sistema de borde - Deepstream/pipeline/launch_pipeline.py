@@ -17,22 +17,86 @@ Main functionalities include:
 
 Attributes:
     MUXER_BATCH_TIMEOUT_USEC (int): The timeout value for batch formation in the muxer element.
+    DISPATCHER_QUEUE_SIZE (int): Maximum number of detections waiting to be saved and sent.
+    DISPATCHER_WORKERS (int): Number of worker threads that save frames and send alerts.
+    DISPATCHER_POLICY (str): Backpressure policy applied when the dispatcher queue is full.
+    FRAME_POOL_SIZE (int): Preallocated BGR frame buffers per camera.
+    MAX_SOURCES (int): Streammux pads reserved for cameras attached at runtime; also the
+        inference batch size.
+    PRIORITY_MIN_DETECTIONS (int): Detections in one frame that make its alert high priority,
+        sent immediately instead of waiting for the next alert batch.
+    ALERT_COOLDOWN (float): Seconds before a person still in view is alerted again.
+    CLASS_COOLDOWNS (dict): Per-class overrides of ``ALERT_COOLDOWN``.
+    CAMERA_COOLDOWNS (dict): Per-camera overrides of ``ALERT_COOLDOWN``.
+    TRACE_OUTPUT (str): Chrome trace file with the per-frame stage latencies, rewritten
+        every ``TRACE_EXPORT_INTERVAL`` seconds and at shutdown; None (the default)
+        disables tracing. Set it only while diagnosing latency.
+    TRACE_CAPACITY (int): Stage events kept in memory by the tracer.
+    TRACE_SAMPLE_EVERY (int): Trace one frame out of this many per camera.
+    METRICS_HOST (str): Address of the Prometheus ``/metrics`` endpoint (local only).
+    METRICS_PORT (int): Port of the ``/metrics`` endpoint; None disables it.
+    FPS_WINDOW (float): Seconds covered by the rolling per-camera FPS.
+    FPS_LOG_INTERVAL (int): Seconds between log lines with the effective (appsink) and
+        offered (decoded) FPS of every camera.
+    ADAPTIVE_QUEUES (bool): Let ``QueueTuner`` grow the queues that drop frames and shrink
+        them back when the drops stop.
+    QUEUE_MAX_DEPTH (int): Largest ``max-size-buffers`` the tuner may set.
+    QUEUE_MAX_LATENCY (float): Seconds of buffering a tuned queue may add.
+    QUEUE_TUNE_INTERVAL (int): Seconds between tuner adjustments.
+    RECORDING_OUTPUT (str): File where the detections of every frame reaching the appsink
+        are recorded for offline replay (see ``pipeline.recording``), written at shutdown;
+        None disables recording.
+    RECORDING_MAX_FRAMES (int): Frames recorded before the recorder stops.
+    RECORDING_THUMBNAIL_EVERY (int): Store a JPEG thumbnail of one frame out of this many
+        per camera; 0 records detections only.
+    RECORDING_THUMBNAIL_WIDTH (int): Width of the recorded thumbnails.
+    ADAPTIVE_INFERENCE (bool): Let ``InferenceScheduler`` skip frames of the cameras whose
+        scene is static, ahead of the streammux (see ``pipeline.scheduling``).
+    INFERENCE_MAX_INTERVAL (int): Most consecutive frames a quiet camera skips; each camera
+        may lower it with ``max_interval`` in the configuration file.
+    INFERENCE_RELAX_AFTER (int): Quiet inferred frames before a camera skips one more frame.
+    MOTION_HIGH (float): Fraction of changed pixels that brings a camera back to full rate.
+    MOTION_LOW (float): Fraction of changed pixels below which a frame counts as quiet.
+    MOTION_GATE (bool): Keep the frames of each camera away from inference while its scene
+        is static, judged on a small GRAY8 proxy per source (see ``pipeline.motion``).
+    MOTION_PROXY_SIZE (tuple): ``(width, height)`` of the proxy; width a multiple of 4. The
+        motion branch is built when either ``MOTION_GATE`` or ``ADAPTIVE_INFERENCE`` is on.
+    MOTION_METHOD (str): Foreground measure, ``"mog2"`` or ``"difference"``.
+    MOTION_OPEN_THRESHOLD (float): Foreground fraction of the proxy that opens the gate.
+    MOTION_CLOSE_THRESHOLD (float): Foreground fraction below which a proxy counts as quiet.
+    MOTION_HOLD_FRAMES (int): Consecutive quiet proxies before the gate closes.
+    MOTION_HEARTBEAT (int): A closed gate still forwards one frame out of this many.
 """
 
 import sys
-from common.bus_call import bus_call
 from common.platform_info import PlatformInfo
 import pyds
 import gi
 
 gi.require_version("Gst", "1.0")
 from gi.repository import Gst, GLib
-import datetime
-import time
-import numpy as np
+import functools
 import cv2
 from get_rtsp import make_requests
-from utils import send_alert, should_send_alert
+from utils import (send_alert, alert_transport_stats, start_alert_forwarder, stop_alert_forwarder,
+                   start_alert_uploader, stop_alert_uploader)
+from utils.camera_config import load_camera_options
+from utils.dispatcher import AlertDispatcher, POLICY_COALESCE, delivery_outcome
+from common.metrics import REGISTRY, MetricsServer, RateMeter
+from pipeline.graph import (build_pipeline_spec, verify_spec, materialize, APPSINK_NAME, STREAMMUX_NAME, PGIE_NAME,
+                            QUEUE_NAMES)
+from pipeline.source_manager import SourceManager, ConfigWatcher, source_bus_call
+from pipeline.frame_processing import FramePool
+from pipeline.detections import collect_detections
+from pipeline.engine import FrameEngine, FrameBatch, SourceFrame, FRAMES, ALERTS
+from pipeline.motion import MotionGate, METHOD_MOG2, format_report as format_motion_report
+from pipeline.recording import DetectionRecorder
+from pipeline.roi import CameraRois
+from pipeline.scheduling import InferenceScheduler, format_report as format_schedule_report
+from pipeline.suppression import AlertSuppressor
+from pipeline.queue_stats import QueueMonitor, QueueTuner, format_report
+from pipeline.tracing import (FrameTracer, add_batch_probe, build_spans, stage_summary, format_summary,
+                              write_chrome_trace, STAGE_STREAMMUX, STAGE_PGIE, STAGE_CONVERT)
 
 from monitoring.logging_handler.logger import logger
 
@@ -43,28 +107,188 @@ GIE = "nvinfer"
 TS_FROM_RTSP = False
 CONFIDENCE_BIAS = 0.6
 SEEK_CLASS = 0
+CLASS_LABELS = ["person"]
 STREAMMUX_WIDTH = 1920
 STREAMMUX_HEIGHT = 1080
+DISPATCHER_QUEUE_SIZE = 10
+DISPATCHER_WORKERS = 2
+DISPATCHER_POLICY = POLICY_COALESCE
+FRAME_POOL_SIZE = 3
+MAX_SOURCES = 8
+PRIORITY_MIN_DETECTIONS = 3
+ALERT_COOLDOWN = 120.0
+CLASS_COOLDOWNS = {}
+CAMERA_COOLDOWNS = {}
+# Trazado apagado en operación; p. ej. "out/trace.json" para diagnosticar la latencia
+TRACE_OUTPUT = None
+TRACE_CAPACITY = 16384
+TRACE_SAMPLE_EVERY = 25
+TRACE_EXPORT_INTERVAL = 60
+METRICS_HOST = "127.0.0.1"
+METRICS_PORT = 9101
+FPS_WINDOW = 10.0
+FPS_LOG_INTERVAL = 30
+ADAPTIVE_QUEUES = False
+QUEUE_MAX_DEPTH = 8
+QUEUE_MAX_LATENCY = 0.25
+QUEUE_TUNE_INTERVAL = 10
+RECORDING_OUTPUT = None
+RECORDING_MAX_FRAMES = 500000
+RECORDING_THUMBNAIL_EVERY = 250
+RECORDING_THUMBNAIL_WIDTH = 480
+ADAPTIVE_INFERENCE = False
+INFERENCE_MAX_INTERVAL = 4
+INFERENCE_RELAX_AFTER = 50
+MOTION_HIGH = 0.02
+MOTION_LOW = 0.005
+MOTION_GATE = False
+MOTION_PROXY_SIZE = (160, 96)
+MOTION_METHOD = METHOD_MOG2
+MOTION_OPEN_THRESHOLD = 0.01
+MOTION_CLOSE_THRESHOLD = 0.003
+MOTION_HOLD_FRAMES = 75
+MOTION_HEARTBEAT = 250
+PGIE_CONFIG_FILE = "/opt/nvidia/deepstream/deepstream-7.0/sources/deepstream_python_apps/apps/GuardIA-Deepstream-v4/dstest1_pgie_config.txt"
+PGIE_INFERSERVER_CONFIG_FILE = "/opt/nvidia/deepstream/deepstream-7.0/sources/deepstream_python_apps/apps/GuardIA-Deepstream-v4/dstest1_pgie_inferserver_config.txt"
+
+def handle_detection(record):
+    """
+    Save the annotated frame of a detection and send its alert to the server.
+
+    This function runs on the dispatcher worker threads, never on the GStreamer
+    streaming thread, so slow disk or network I/O does not stall the pipeline.
 
-# Variable global para almacenar los FPS de cada cámara
-fps_streams = {}
+    Args:
+        record (dict): Detection record with 'camera_id', 'frame_number', 'timestamp' and 'frame'.
+
+    Returns:
+        str: Outcome of the delivery (see ``utils.dispatcher.OUTCOMES``): ``"sent"`` if the
+        alert was acknowledged by the server or queued in an alert batch, ``"spooled"`` if
+        it was kept in the alert spool to be forwarded later, ``"failed"`` otherwise.
+    """
+    image_path = f"out/frame_appsink_{record['frame_number']}_{record['timestamp']}.jpg"
+    cv2.imwrite(image_path, record['frame'])
+    logger.info(f"Frame guardado desde appsink como: {image_path}")
+
+    # Preparar y enviar alerta
+    result = {
+        'camera_id': record['camera_id'],
+        'timestamp': record['timestamp'],
+        'frame': record['frame'],
+        'detections': record.get('detections'),
+        'priority': record.get('priority', False),
+        'enqueued_at': record['enqueued_at'],
+        'trace': record.get('trace')
+    }
+    outcome = delivery_outcome(send_alert(result))
+    ALERTS.inc((record['camera_id'], outcome))
+    return outcome
+
+def iter_frame_meta(batch_meta):
+    """
+    Iterate over the frame metadata of a batch.
 
-def on_new_sample(sink):
+    Args:
+        batch_meta (pyds.NvDsBatchMeta): Metadata of the batch.
+
+    Yields:
+        pyds.NvDsFrameMeta: Each frame of the batch.
+    """
+    l_frame = batch_meta.frame_meta_list
+    while l_frame is not None:
+        try:
+            yield pyds.NvDsFrameMeta.cast(l_frame.data)
+            l_frame = l_frame.next
+        except StopIteration:
+            break
+
+def iter_object_meta(frame_meta):
+    """
+    Iterate over the object metadata of a frame.
+
+    Args:
+        frame_meta (pyds.NvDsFrameMeta): Metadata of the frame.
+
+    Yields:
+        pyds.NvDsObjectMeta: Each detected object.
+    """
+    l_obj = frame_meta.obj_meta_list
+    while l_obj is not None:
+        try:
+            yield pyds.NvDsObjectMeta.cast(l_obj.data)
+            l_obj = l_obj.next
+        except StopIteration:
+            break
+
+def trace_frames(buffer):
+    """
+    Frames of a batched buffer for the tracer: ``(pad_index, frame_num, pts_ns, ntp_ns)``.
+
+    The NTP timestamp is only the camera capture time when ``TS_FROM_RTSP`` is set;
+    otherwise streammux fills it with the arrival time and it is not reported.
+    """
+    batch_meta = pyds.gst_buffer_get_nvds_batch_meta(hash(buffer))
+    if batch_meta is None:
+        return
+    for frame_meta in iter_frame_meta(batch_meta):
+        yield (frame_meta.pad_index, frame_meta.frame_num, frame_meta.buf_pts,
+               frame_meta.ntp_timestamp if TS_FROM_RTSP else 0)
+
+def export_trace(tracer, source_states):
+    """
+    Write the spans held by ``tracer`` to ``TRACE_OUTPUT``.
+
+    Returns:
+        dict: Latency percentiles per stage (see ``pipeline.tracing.stage_summary``).
+    """
+    spans = build_spans(tracer.events())
+    camera_names = {pad_index: f"camera {state['camera_id']}" for pad_index, state in source_states.items()}
+    try:
+        write_chrome_trace(TRACE_OUTPUT, spans, camera_names)
+    except OSError as e:
+        logger.error(f"No fue posible escribir la traza {TRACE_OUTPUT}: {e}")
+    return stage_summary(spans)
+
+def batch_from_buffer(buffer):
+    """
+    Convert the DeepStream metadata of a batched buffer into a ``FrameBatch``.
+
+    The objects of the alert class above the confidence threshold are drained into one
+    detection array (the others are skipped without reading their boxes); the surface of
+    a frame is only mapped if the engine asks for it, while ``buffer`` is still held.
+
+    Args:
+        buffer (Gst.Buffer): Batched buffer pulled from the appsink.
+
+    Returns:
+        FrameBatch: Frames and detections of the batch.
+    """
+    batch_meta = pyds.gst_buffer_get_nvds_batch_meta(hash(buffer))
+    frames = list(iter_frame_meta(batch_meta))
+    detections = collect_detections(
+        ((frame_meta.pad_index, frame_meta.frame_num, frame_meta.batch_id, iter_object_meta(frame_meta))
+         for frame_meta in frames),
+        SEEK_CLASS, CONFIDENCE_BIAS)
+    return FrameBatch([SourceFrame(frame_meta.pad_index, frame_meta.frame_num, frame_meta.batch_id, frame_meta.buf_pts,
+                                   functools.partial(pyds.get_nvds_buf_surface, hash(buffer), frame_meta.batch_id))
+                       for frame_meta in frames], detections)
+
+def on_new_sample(sink, engine):
     """
     Callback function to process a new sample from the GStreamer sink.
 
-    This function is called whenever a new buffer is pulled from the sink. It processes the 
-    buffer to check for detected objects and extracts frames. If a person is detected, it saves 
-    the frame as an image and sends an alert.
+    This function is called whenever a new buffer is pulled from the sink. It converts the 
+    batch metadata into a ``FrameBatch`` and lets the frame engine decide which frames 
+    produce alerts; only those are extracted into pooled buffers and enqueued so the 
+    dispatcher saves the frame and sends the alert.
 
     Args:
         sink (Gst.Element): The sink element from which the sample is pulled.
+        engine (FrameEngine): Per-frame processing (see ``pipeline.engine``).
 
     Returns:
         Gst.FlowReturn: Status of the sample processing (OK or ERROR).
     """
-    global fps_streams  # Para modificar la variable global
-
     sample = sink.emit("pull-sample")
     if not sample:
         return Gst.FlowReturn.ERROR
@@ -75,118 +299,8 @@ def on_new_sample(sink):
         return Gst.FlowReturn.ERROR
 
     try:
-        # Obtener metadatos del batch
-        batch_meta = pyds.gst_buffer_get_nvds_batch_meta(hash(buffer))
-        l_frame = batch_meta.frame_meta_list
-
-        while l_frame is not None:
-            try:
-                frame_meta = pyds.NvDsFrameMeta.cast(l_frame.data)
-            except StopIteration:
-                break
-
-            frame_number = frame_meta.frame_num
-            camera_id = frame_meta.pad_index
-
-            # Actualizar contador de frames y tiempo para el cálculo de FPS
-            if camera_id not in fps_streams:
-                # Inicializar datos para el nuevo flujo
-                fps_streams[camera_id] = {
-                    'frame_count': 0,
-                    'start_time': time.time(),
-                    'last_time': time.time(),
-                    'fps': 0
-                }
-
-            fps_data = fps_streams[camera_id]
-            fps_data['frame_count'] += 1
-            current_time = time.time()
-            elapsed_time = current_time - fps_data['last_time']
-
-            # Calcular FPS cada segundo
-            if elapsed_time >= 1.0:
-                fps = fps_data['frame_count'] / elapsed_time
-                fps_data['fps'] = fps
-                logger.info(f"Flujo {camera_id}: {fps:.2f} FPS")
-                # Reiniciar contador y tiempo
-                fps_data['frame_count'] = 0
-                fps_data['last_time'] = current_time
-
-            # Obtener la superficie del buffer (frame)
-            surface = pyds.get_nvds_buf_surface(hash(buffer), frame_meta.batch_id)
-            if surface is None:
-                logger.error("Error: Surface is not accessible")
-                return Gst.FlowReturn.ERROR
-
-            # Convertir la superficie a un array de NumPy (RGBA)
-            frame_array = np.array(surface, copy=True, order='C')
-            frame_rgb = cv2.cvtColor(frame_array, cv2.COLOR_RGBA2BGR)
-
-            # Indicador para saber si se detectó una persona
-            person_detected = False
-
-            # Iterar sobre los objetos detectados en el frame
-            l_obj = frame_meta.obj_meta_list
-            while l_obj is not None:
-                try:
-                    obj_meta = pyds.NvDsObjectMeta.cast(l_obj.data)
-                except StopIteration:
-                    break
-
-                # Si se detecta una persona
-                if obj_meta.class_id == SEEK_CLASS and obj_meta.confidence >= CONFIDENCE_BIAS:
-                    person_detected = True  # Se detectó al menos una persona
-
-                    # Obtener las coordenadas de la caja
-                    rect_params = obj_meta.rect_params
-                    top = int(rect_params.top)
-                    left = int(rect_params.left)
-                    width = int(rect_params.width)
-                    height = int(rect_params.height)
-
-                    # Dibujar la caja en el frame
-                    cv2.rectangle(frame_rgb, (left, top), (left + width, top + height), (0, 0, 255), 2)
-
-                    # Obtener la etiqueta del objeto directamente
-                    obj_label = obj_meta.obj_label
-                    confidence = obj_meta.confidence
-                    label_text = f"{obj_label} {confidence:.2f}"
-
-                    # Poner la etiqueta en el frame
-                    cv2.putText(frame_rgb, label_text, (left, top - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 2)
-
-                try:
-                    l_obj = l_obj.next
-                except StopIteration:
-                    break
-
-            # Después de procesar todos los objetos, verificar si se detectó alguna persona
-            if person_detected:
-                if should_send_alert(camera_id):
-                    logger.info(f"Persona(s) detectada(s) en la cámara {camera_id}, frame {frame_number}")
-
-                    # Guardar la imagen
-                    timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-                    image_path = f"out/frame_appsink_{frame_number}_{timestamp}.jpg"
-                    cv2.imwrite(image_path, frame_rgb)
-                    logger.info(f"Frame guardado desde appsink como: {image_path}")
-
-                    # Preparar y enviar alerta
-                    result = {
-                        'camera_id': camera_id,
-                        'timestamp': timestamp,
-                        'frame': frame_rgb
-                    }
-                    # print(result)
-                    send_alert(result)
-                else:
-                    logger.info(f"Alarma en cámara {camera_id} no enviada. No han pasado 2 minutos desde el último envío.")
-
-            try:
-                l_frame = l_frame.next
-            except StopIteration:
-                break
-
+        if not engine.process(batch_from_buffer(buffer)):
+            return Gst.FlowReturn.ERROR
     except RuntimeError as e:
         logger.error(f"Error al extraer la superficie del buffer: {e}")
 
@@ -212,10 +326,10 @@ def cb_newpad(decodebin, decoder_src_pad, data):
     features = caps.get_features(0)
 
     # Check if the new pad is for video (not audio)
-    logger.info("gstname=", gstname)
+    logger.info(f"gstname={gstname}")
     if gstname.find("video") != -1:
         # Link the decodebin pad only if it uses NVIDIA decoder plugin
-        logger.info("features=", caps.get_features(0).to_string())
+        logger.info(f"features={features.to_string()}")
         if features.contains("memory:NVMM"):
             # Get the source bin ghost pad
             bin_ghost_pad = source_bin.get_static_pad("src")
@@ -234,7 +348,7 @@ def decodebin_child_added(child_proxy, Object, name, user_data):
         name (str): The name of the child element.
         user_data (Any): User data passed to the callback.
     """
-    logger.info("Decodebin child added:", name, "\n")
+    logger.info(f"Decodebin child added: {name}")
     if name.find("decodebin") != -1:
         Object.connect("child-added", decodebin_child_added, user_data)
 
@@ -280,191 +394,209 @@ def create_source_bin(index, uri):
         return None
     return nbin
 
-def launch_pipeline(camera_codes):
+def register_pipeline_metrics(dispatcher, frame_pool):
     """
-    Main function for setting up and running the GStreamer pipeline.
+    Register the gauges computed at scrape time from the running pipeline.
 
-    This function initializes GStreamer, creates the pipeline, configures elements, and starts 
-    processing RTSP streams.
+    Returns:
+        tuple: Rolling effective (appsink) and offered (decoded, see
+        ``pipeline.queue_stats``) FPS of every camera, to be sampled once per second.
+    """
+    fps_meter = RateMeter(FRAMES, window=FPS_WINDOW)
+    offered_meter = RateMeter(REGISTRY.get("edge_source_frames_total"), window=FPS_WINDOW)
+    REGISTRY.gauge("edge_camera_fps", f"Frames per second at the appsink over the last {FPS_WINDOW:g} s",
+                   ("camera",), callback=fps_meter.rates)
+    REGISTRY.gauge("edge_camera_offered_fps", f"Decoded frames per second offered to the streammux over the last "
+                   f"{FPS_WINDOW:g} s", ("camera",), callback=offered_meter.rates)
+    REGISTRY.gauge("edge_dispatcher_queue_depth", "Alerts waiting for a dispatcher thread",
+                   callback=lambda: {(): dispatcher.qsize()})
+    REGISTRY.gauge("edge_frame_pool_misses", "Alert frames that found every pooled buffer in use",
+                   callback=lambda: {(): frame_pool.misses})
+    return fps_meter, offered_meter
+
+def start_metrics_server():
+    """
+    Serve the metrics registry at ``/metrics`` on ``METRICS_HOST:METRICS_PORT``.
+
+    Returns:
+        MetricsServer: The running server, or None if disabled or the port is taken.
+    """
+    if METRICS_PORT is None:
+        return None
+    try:
+        server = MetricsServer(REGISTRY, METRICS_HOST, METRICS_PORT).start()
+    except OSError as e:
+        logger.error(f"No fue posible abrir el endpoint de métricas en el puerto {METRICS_PORT}: {e}")
+        return None
+    logger.info(f"Métricas disponibles en {server.url}")
+    return server
+
+def on_metrics_tick(fps_meters, source_states, ticks, queue_tuner=None):
+    """
+    GLib timeout run once per second: sample the FPS counters, every
+    ``FPS_LOG_INTERVAL`` seconds log the effective and offered FPS of all cameras in one
+    line and, if given, run ``queue_tuner`` every ``QUEUE_TUNE_INTERVAL`` seconds.
+    """
+    fps_meter, offered_meter = fps_meters
+    fps_meter.sample()
+    offered_meter.sample()
+    ticks[0] += 1
+    if ticks[0] % FPS_LOG_INTERVAL == 0:
+        rates, offered = fps_meter.rates(), offered_meter.rates()
+        cameras = [state['camera_id'] for state in source_states.values()]
+        logger.info("FPS efectivos/ofrecidos: " + ", ".join(
+            f"{camera_id} {rates.get((camera_id,), 0.0):.1f}/{offered.get((camera_id,), 0.0):.1f}"
+            for camera_id in cameras))
+    if queue_tuner is not None and ticks[0] % QUEUE_TUNE_INTERVAL == 0:
+        queue_tuner.adjust(QUEUE_TUNE_INTERVAL)
+    return True  # Repetir el timeout de GLib
+
+def build_source_states(camera_codes):
+    """
+    Assign a streammux pad index to every camera.
 
     Args:
-        camera_codes (dict): A dictionary of input URIs to process.
+        camera_codes (dict): Mapping of camera id to source URI.
+
+    Returns:
+        dict: Per-source state keyed by pad index, holding the camera id, its URI and
+        the last frame number seen at the appsink.
+    """
+    source_states = {}
+    for pad_index, (camera_id, uri) in enumerate(camera_codes.items()):
+        source_states[pad_index] = {
+            'camera_id': camera_id,
+            'uri': uri,
+            'last_frame_num': -1
+        }
+    return source_states
+
+def launch_pipeline(camera_codes, config_path=None):
     """
-    number_sources = len(list(camera_codes.values()))
+    Main function for setting up and running the GStreamer pipeline.
+
+    This function initializes GStreamer, creates a single pipeline that batches every 
+    camera through one streammux and one inference engine, and starts processing the 
+    RTSP streams. Failed cameras are reconnected individually, and if a camera 
+    configuration file is given, cameras added to or removed from it are attached to or 
+    detached from the running pipeline.
 
-    cameras = camera_codes
+    Args:
+        camera_codes (dict): A dictionary of camera ids to input URIs to process.
+        config_path (str): Camera configuration file to watch for changes, or None. Its
+            per-camera ROI and ``max_interval`` options are read once at startup.
+    """
+    source_states = build_source_states(camera_codes)
+    number_sources = len(source_states)
 
     platform_info = PlatformInfo()
     Gst.init(None)
 
-    logger.info("Creating Pipeline \n ")
-    pipeline = Gst.Pipeline()
-
-    if not pipeline:
-        logger.error(" Unable to create Pipeline \n")
-    logger.info("Creating streammux \n ")
-
-    # Create nvstreammux instance to form batches from one or more sources.
-    streammux = Gst.ElementFactory.make("nvstreammux", "Stream-muxer")
-    if not streammux:
-        logger.error(" Unable to create NvStreamMux \n")
-
-    pipeline.add(streammux)
-    for i, uri_name in cameras.items():
-        logger.info("Creating source_bin ", i, " \n ")
-        source_bin = create_source_bin(i, uri_name)
-        if not source_bin:
-            logger.error("Unable to create source bin \n")
-            continue  # Continue with next source if failed
-
-        # Add a queue for each source
-        queue_src = Gst.ElementFactory.make("queue", f"queue_src_{i}")
-        if not queue_src:
-            logger.error(f"Unable to create queue for source {i} \n")
-            continue
-
-        # Configure queue properties
-        queue_src.set_property("max-size-buffers", 10)
-        queue_src.set_property("leaky", 2)
-        queue_src.set_property("silent", True)
-
-        # Add elements to the pipeline
-        pipeline.add(source_bin)
-        pipeline.add(queue_src)
-
-        # Link source_bin -> queue_src
-        srcpad = source_bin.get_static_pad("src")
-        sinkpad = queue_src.get_static_pad("sink")
-        if srcpad and sinkpad:
-            srcpad.link(sinkpad)
-        else:
-            logger.error(f"Unable to link source_bin to queue_src for source {i} \n")
-            continue
-
-        # Link queue_src -> streammux
-        sinkpad = streammux.get_request_pad(f"sink_{i}")
-        srcpad = queue_src.get_static_pad("src")
-        if srcpad and sinkpad:
-            srcpad.link(sinkpad)
-        else:
-            logger.error(f"Unable to link queue_src to streammux for source {i} \n")
-            continue
-
-    print("Creating Pgie \n ")
-    if GIE == "nvinfer":
-        pgie = Gst.ElementFactory.make("nvinfer", "primary-inference")
-    else:
-        pgie = Gst.ElementFactory.make("nvinferserver", "primary-inference")
-    if not pgie:
-        logger.error(" Unable to create pgie \n")
-
-    logger.info("Creating nvvidconv_to_rgba \n")
-    nvvidconv_to_rgba = Gst.ElementFactory.make("nvvideoconvert", "convertor_to_rgba")
-    if not nvvidconv_to_rgba:
-        logger.error("Error al crear nvvideoconvert para RGBA\n")
-
-    # Create caps filter for RGBA conversion
-    caps_rgba = Gst.ElementFactory.make("capsfilter", "filter_rgba")
-    if not caps_rgba:
-        logger.error("Error al crear capsfilter para RGBA\n")
-    caps_rgba.set_property("caps", Gst.Caps.from_string("video/x-raw(memory:NVMM), format=RGBA"))
-
-    logger.info("Creating nvosd \n ")
-    nvosd = Gst.ElementFactory.make("nvdsosd", "onscreendisplay")
-    if not nvosd:
-        logger.error(" Unable to create nvosd \n")
-    nvosd.set_property("process-mode", 0)  # 0 for CPU, 1 for GPU
-    nvosd.set_property("display-text", True)
-
-    # Set streammux properties
-    streammux.set_property("width", STREAMMUX_WIDTH)
-    streammux.set_property("height", STREAMMUX_HEIGHT)
-    streammux.set_property("batch-size", number_sources)
-    streammux.set_property("batched-push-timeout", MUXER_BATCH_TIMEOUT_USEC)
-
-    if TS_FROM_RTSP:
-        streammux.set_property("attach-sys-ts", 0)
-
-    # Set the configuration file for PGIE
-    if GIE == "nvinfer":
-        pgie.set_property("config-file-path", "/opt/nvidia/deepstream/deepstream-7.0/sources/deepstream_python_apps/apps/GuardIA-Deepstream-v4/dstest1_pgie_config.txt")
-    else:
-        pgie.set_property("config-file-path", "/opt/nvidia/deepstream/deepstream-7.0/sources/deepstream_python_apps/apps/GuardIA-Deepstream-v4/dstest1_pgie_inferserver_config.txt")
-
-    pgie_batch_size = pgie.get_property("batch-size")
-    if pgie_batch_size != number_sources:
-        logger.error(
-            "WARNING: Overriding infer-config batch-size",
-            pgie_batch_size,
-            " with number of sources ",
-            number_sources,
-            " \n",
-        )
-        pgie.set_property("batch-size", number_sources)
-
-    appsink = Gst.ElementFactory.make("appsink", "sink")
-    if not appsink:
-        logger.error("Unable to create appsink\n")
-
-    appsink.set_property("emit-signals", True)
-    appsink.set_property("sync", False)
-    appsink.connect("new-sample", on_new_sample)
-
+    nvbuf_memory_type = None
     if not platform_info.is_integrated_gpu():
         logger.info("Configurando nvbuf-memory-type para dGPU")
-        mem_type = int(pyds.NVBUF_MEM_CUDA_UNIFIED)
-        # Set memory type in nvstreammux
-        streammux.set_property("nvbuf-memory-type", mem_type)
-        # Set memory type in nvvideoconvert
-        nvvidconv_to_rgba.set_property("nvbuf-memory-type", mem_type)
-
-    # Create intermediate queue elements
-    queue1 = Gst.ElementFactory.make("queue", "queue1")
-    queue2 = Gst.ElementFactory.make("queue", "queue2")
-    queue3 = Gst.ElementFactory.make("queue", "queue3")
-    queue4 = Gst.ElementFactory.make("queue", "queue4")
-    queue5 = Gst.ElementFactory.make("queue", "queue5")
-
-    if not queue1 or not queue2 or not queue3 or not queue4 or not queue5:
-        logger.error("Unable to create one or more queue elements \n")
-
-    # Configure queue properties
-    for queue in [queue1, queue2, queue3, queue4, queue5]:
-        queue.set_property("max-size-buffers", 2)
-        queue.set_property("leaky", 2)  # Discards old buffers
-        queue.set_property("silent", True)
-
-    # Add elements to the pipeline
-    pipeline.add(pgie)
-    pipeline.add(nvvidconv_to_rgba)
-    pipeline.add(caps_rgba)
-    pipeline.add(nvosd)
-    pipeline.add(appsink)
-    pipeline.add(queue1)
-    pipeline.add(queue2)
-    pipeline.add(queue3)
-    pipeline.add(queue4)
-    pipeline.add(queue5)
-
-    # Link elements with intermediate queues
-    streammux.link(queue1)
-    queue1.link(pgie)
-    pgie.link(queue2)
-    queue2.link(nvvidconv_to_rgba)
-    nvvidconv_to_rgba.link(queue3)
-    queue3.link(caps_rgba)
-    caps_rgba.link(queue4)
-    queue4.link(nvosd)
-    nvosd.link(queue5)
-    queue5.link(appsink)
+        nvbuf_memory_type = int(pyds.NVBUF_MEM_CUDA_UNIFIED)
+
+    logger.info(f"Creating Pipeline for {number_sources} sources \n ")
+    spec = build_pipeline_spec(
+        {pad_index: state['uri'] for pad_index, state in source_states.items()},
+        PGIE_CONFIG_FILE if GIE == "nvinfer" else PGIE_INFERSERVER_CONFIG_FILE,
+        gie=GIE,
+        width=STREAMMUX_WIDTH,
+        height=STREAMMUX_HEIGHT,
+        batch_timeout_usec=MUXER_BATCH_TIMEOUT_USEC,
+        ts_from_rtsp=TS_FROM_RTSP,
+        nvbuf_memory_type=nvbuf_memory_type,
+        max_sources=MAX_SOURCES,
+        motion_proxy=MOTION_PROXY_SIZE if MOTION_GATE or ADAPTIVE_INFERENCE else None,
+    )
+    for problem in verify_spec(spec):
+        logger.error(f"Pipeline spec: {problem}")
+
+    pipeline, elements = materialize(Gst, spec, create_source_bin)
+    logger.info(f"Streammux and pgie batch sizes: {spec.batch_sizes()}")
+
+    tracer = None
+    if TRACE_OUTPUT:
+        tracer = FrameTracer(TRACE_CAPACITY, TRACE_SAMPLE_EVERY)
+        for name, stage in ((STREAMMUX_NAME, STAGE_STREAMMUX), (PGIE_NAME, STAGE_PGIE), ("filter_rgba", STAGE_CONVERT)):
+            add_batch_probe(Gst, elements[name].get_static_pad("src"), tracer, stage, trace_frames)
+
+    queue_monitor = QueueMonitor()
+    for name in QUEUE_NAMES:
+        queue_monitor.watch(Gst, elements[name], name)
+    queue_tuner = None
+    if ADAPTIVE_QUEUES:
+        queue_tuner = QueueTuner(queue_monitor, max_depth=QUEUE_MAX_DEPTH, max_latency=QUEUE_MAX_LATENCY,
+                                 log=logger.info)
+
+    camera_options = load_camera_options(config_path) if config_path else {}
+    rois = None
+    if any('roi' in options for options in camera_options.values()):
+        rois = CameraRois({camera_id: options['roi'] for camera_id, options in camera_options.items()
+                           if 'roi' in options}, STREAMMUX_WIDTH, STREAMMUX_HEIGHT)
+    scheduler = None
+    if ADAPTIVE_INFERENCE:
+        scheduler = InferenceScheduler(max_interval=INFERENCE_MAX_INTERVAL, motion_high=MOTION_HIGH,
+                                       motion_low=MOTION_LOW, relax_after=INFERENCE_RELAX_AFTER,
+                                       camera_max_intervals={camera_id: options['max_interval'] for camera_id, options
+                                                             in camera_options.items() if 'max_interval' in options},
+                                       rois=rois)
+    motion_gate = None
+    if MOTION_GATE:
+        motion_gate = MotionGate(MOTION_OPEN_THRESHOLD, MOTION_CLOSE_THRESHOLD, hold=MOTION_HOLD_FRAMES,
+                                 heartbeat=MOTION_HEARTBEAT, method=MOTION_METHOD, rois=rois)
+
+    streammux = elements[STREAMMUX_NAME]
+    if streammux.find_property("drop-pipeline-eos") is not None:
+        # Mantener el pipeline vivo aunque todas las cámaras terminen; se reconectan por separado
+        streammux.set_property("drop-pipeline-eos", True)
+    source_manager = SourceManager(pipeline, streammux, source_states, create_source_bin, spec.max_sources, elements,
+                                   tracer=tracer, queue_monitor=queue_monitor, scheduler=scheduler,
+                                   motion_gate=motion_gate, motion_proxy=MOTION_PROXY_SIZE)
+    config_watcher = ConfigWatcher(config_path, source_manager) if config_path else None
+
+    frame_pool = FramePool(FRAME_POOL_SIZE)
+    suppressor = AlertSuppressor(ALERT_COOLDOWN, class_cooldowns=CLASS_COOLDOWNS, camera_cooldowns=CAMERA_COOLDOWNS)
+    dispatcher = AlertDispatcher(
+        handle_detection,
+        max_queue=DISPATCHER_QUEUE_SIZE,
+        num_workers=DISPATCHER_WORKERS,
+        policy=DISPATCHER_POLICY,
+        on_release=lambda record: frame_pool.release(record['frame']),
+    )
+    recorder = None
+    if RECORDING_OUTPUT:
+        recorder = DetectionRecorder(RECORDING_OUTPUT, STREAMMUX_WIDTH, STREAMMUX_HEIGHT,
+                                     thumbnail_every=RECORDING_THUMBNAIL_EVERY,
+                                     thumbnail_width=RECORDING_THUMBNAIL_WIDTH, max_frames=RECORDING_MAX_FRAMES)
+    engine = FrameEngine(dispatcher, source_states, frame_pool, suppressor, tracer, seek_class=SEEK_CLASS,
+                         confidence=CONFIDENCE_BIAS, class_labels=CLASS_LABELS,
+                         priority_min_detections=PRIORITY_MIN_DETECTIONS, log=logger.info, recorder=recorder,
+                         rois=rois, scheduler=scheduler, motion_gate=motion_gate)
+    elements[APPSINK_NAME].connect("new-sample", on_new_sample, engine)
+    fps_meters = register_pipeline_metrics(dispatcher, frame_pool)
+    metrics_server = start_metrics_server()
+    GLib.timeout_add_seconds(1, on_metrics_tick, fps_meters, source_states, [0], queue_tuner)
+    if tracer is not None:
+        def on_trace_export():
+            export_trace(tracer, source_states)
+            return True  # Repetir el timeout de GLib
+
+        GLib.timeout_add_seconds(TRACE_EXPORT_INTERVAL, on_trace_export)
 
     # Create an event loop and feed gstreamer bus messages to it
     loop = GLib.MainLoop()
     bus = pipeline.get_bus()
     bus.add_signal_watch()
-    bus.connect("message", bus_call, loop)
+    bus.connect("message", source_bus_call, loop, source_manager)
     # Start playback and listen to events
     logger.info("Starting pipeline \n")
+    start_alert_forwarder()
+    start_alert_uploader()
+    dispatcher.start()
+    if config_watcher:
+        config_watcher.start()
     pipeline.set_state(Gst.State.PLAYING)
     try:
         loop.run()
@@ -476,7 +608,28 @@ def launch_pipeline(camera_codes):
         logger.error(f"Interrupción de teclado, finalizando pipeline.")
     finally:
         # Cleanup
+        if config_watcher:
+            config_watcher.stop()
         pipeline.set_state(Gst.State.NULL)
+        dispatcher.stop()
+        logger.info(f"Supresión de alertas: {suppressor.stats()}")
+        logger.info(f"Envío agrupado de alertas: {stop_alert_uploader()}")
+        logger.info(f"Cola de alertas: {stop_alert_forwarder()}")
+        logger.info(f"Transporte de alertas: {alert_transport_stats()}")
+        logger.info(f"Colas del pipeline:\n{format_report(queue_monitor.report())}")
+        if motion_gate is not None:
+            logger.info(f"Filtro de movimiento:\n{format_motion_report(motion_gate.report())}")
+        if scheduler is not None:
+            logger.info(f"Inferencias por cámara:\n{format_schedule_report(scheduler.report())}")
+        if metrics_server is not None:
+            metrics_server.stop()
+        if recorder is not None:
+            try:
+                logger.info(f"Detecciones grabadas en {RECORDING_OUTPUT}: {recorder.save()}")
+            except OSError as e:
+                logger.error(f"No fue posible escribir la grabación {RECORDING_OUTPUT}: {e}")
+        if tracer is not None:
+            logger.info(f"Latencia por etapa ({TRACE_OUTPUT}):\n{format_summary(export_trace(tracer, source_states))}")
 
 if __name__ == '__main__':
     # camera_codes = make_requests()
@@ -0,0 +1,344 @@
+#!/usr/bin/env python3
+
+"""
+Motion measurement on low-resolution proxies and the motion gate ahead of inference.
+
+At sites where nobody shows up for hours, ``MotionGate`` keeps the frames of a camera
+away from the streammux (and so from ``pgie``) while its scene is static. Each source
+gets a second branch (see ``pipeline.graph.add_source_spec``): a tee after the source
+bin feeds ``nvvideoconvert``, which scales the decoded frame to a small GRAY8 proxy in
+system memory, and an appsink whose callback (``connect_motion_sink``) hands the proxy
+to the gate, which scores its foreground. A pad probe on the sink pad of the source queue
+(``pipeline.scheduling.add_gate_probe``) drops the frames of a closed gate.
+
+The gate opens when the foreground fraction of a proxy reaches ``open_threshold`` and
+closes after ``hold`` consecutive proxies below ``close_threshold`` (hysteresis); the
+frames it forwards that still have detections keep it open. A closed gate forwards one
+frame out of ``heartbeat`` so that a person standing still is checked again. The
+proxies travel on their own branch, so the decision for a frame uses the proxies
+scored so far, typically up to the previous frame.
+
+``update`` (motion appsink), ``observe`` (engine appsink) and ``should_infer`` (pad probe
+of the source queue) run on different streaming threads; the gate state is only touched
+under the gate lock. The foreground of a proxy is measured outside the lock, so a slow
+MOG2 update does not hold back the probes of the other sources.
+
+The foreground is measured either by frame differencing (``FrameDifference``) or by
+MOG2 background subtraction (``BackgroundSubtractor``), which adapts to lighting changes
+and swaying vegetation at the cost of more CPU: at 160 x 96, tens of microseconds per
+frame for the difference and a few hundred for MOG2 (see
+``benchmarks/bench_motion_gate.py``).
+
+The same branch feeds ``pipeline.scheduling.InferenceScheduler``, which takes its motion
+score from the proxies (``motion_score``) rather than from the full-resolution frames.
+"""
+
+import threading
+
+import cv2
+import numpy as np
+
+from common.metrics import REGISTRY
+
+METHOD_DIFFERENCE = "difference"
+METHOD_MOG2 = "mog2"
+
+def gray_proxy(frame, width, height):
+    """
+    GRAY8 proxy of a BGR (or BGRA) frame, as ``nvvideoconvert`` produces it in the pipeline.
+    """
+    code = cv2.COLOR_BGRA2GRAY if frame.shape[2] == 4 else cv2.COLOR_BGR2GRAY
+    return cv2.resize(cv2.cvtColor(frame, code), (width, height), interpolation=cv2.INTER_AREA)
+
+def foreground_fraction(foreground, mask=None):
+    """
+    Fraction of the pixels (inside ``mask``) set in the boolean ``foreground``.
+    """
+    if mask is None:
+        return float(np.count_nonzero(foreground)) / foreground.size
+    area = np.count_nonzero(mask)
+    return float(np.count_nonzero(foreground & mask)) / area if area else 0.0
+
+def motion_score(previous, current, mask=None, pixel_threshold=20):
+    """
+    Fraction of the pixels (inside ``mask``) that changed by more than ``pixel_threshold``.
+    """
+    return foreground_fraction(np.abs(current - previous) > pixel_threshold, mask)
+
+class FrameDifference:
+    """
+    Foreground as the pixels that changed since the previous proxy.
+    """
+
+    def __init__(self, pixel_threshold=20):
+        self.pixel_threshold = pixel_threshold
+        self._previous = None
+
+    def score(self, proxy, mask=None):
+        current = proxy.astype(np.int16)
+        previous, self._previous = self._previous, current
+        if previous is None or previous.shape != current.shape:
+            return 0.0
+        return motion_score(previous, current, mask, self.pixel_threshold)
+
+class BackgroundSubtractor:
+    """
+    Foreground from an adaptive MOG2 background model; isolated pixels are removed with
+    a morphological opening.
+    """
+
+    def __init__(self, history=500, var_threshold=16.0):
+        self._model = cv2.createBackgroundSubtractorMOG2(history, var_threshold, detectShadows=False)
+        self._kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (3, 3))
+
+    def score(self, proxy, mask=None):
+        foreground = cv2.morphologyEx(self._model.apply(proxy), cv2.MORPH_OPEN, self._kernel)
+        return foreground_fraction(foreground > 0, mask)
+
+class GateState:
+    """
+    Gate state and totals of one source.
+
+    Attributes:
+        open (bool): Frames are forwarded to inference.
+        offered (int): Frames that reached the gate.
+        forwarded (int): Frames let through (heartbeats included).
+        gated (int): Frames dropped.
+        openings (int): Times the gate opened.
+        score (float): Foreground fraction of the last proxy.
+    """
+
+    __slots__ = ('pad_index', 'camera_id', 'detector', 'mask', 'open', 'quiet', 'offered', 'forwarded', 'gated',
+                 'openings', 'score', 'since_forward')
+
+    def __init__(self, pad_index, camera_id, detector):
+        self.pad_index = pad_index
+        self.camera_id = camera_id
+        self.detector = detector
+        self.mask = None
+        # Abierta al inicio: los primeros frames confirman la conexión y alimentan el modelo de fondo
+        self.open = True
+        self.quiet = 0
+        self.offered = 0
+        self.forwarded = 0
+        self.gated = 0
+        self.openings = 0
+        self.score = 0.0
+        self.since_forward = 0
+
+class MotionGate:
+    """
+    Forward the frames of each source to inference only while its scene moves.
+
+    Args:
+        open_threshold (float): Foreground fraction that opens the gate.
+        close_threshold (float): Foreground fraction below which a proxy counts as quiet.
+        hold (int): Consecutive quiet proxies before the gate closes.
+        heartbeat (int): A closed gate forwards one frame out of this many; 0 forwards none.
+        method (str): ``METHOD_MOG2`` or ``METHOD_DIFFERENCE``.
+        history (int): Proxies remembered by the MOG2 model.
+        var_threshold (float): MOG2 variance threshold.
+        pixel_threshold (int): Change of a proxy pixel that counts as motion (difference).
+        rois (CameraRois): ROI of each camera; motion outside it is ignored.
+        registry (MetricsRegistry): Registry where the totals are exposed.
+    """
+
+    def __init__(self, open_threshold=0.01, close_threshold=0.003, hold=75, heartbeat=250, method=METHOD_MOG2,
+                 history=500, var_threshold=16.0, pixel_threshold=20, rois=None, registry=REGISTRY):
+        if method not in (METHOD_MOG2, METHOD_DIFFERENCE):
+            raise ValueError(f"Unknown motion method: {method}")
+        self.open_threshold = open_threshold
+        self.close_threshold = close_threshold
+        self.hold = hold
+        self.heartbeat = heartbeat
+        self.method = method
+        self.history = history
+        self.var_threshold = var_threshold
+        self.pixel_threshold = pixel_threshold
+        self.rois = rois
+        self._states = {}
+        self._lock = threading.Lock()
+
+        registry.counter("edge_motion_gated_total", "Frames of each camera kept from inference by the motion gate",
+                         ("camera",), callback=lambda: self._totals('gated'))
+        registry.gauge("edge_motion_gate_open", "1 while the motion gate of each camera forwards its frames",
+                       ("camera",), callback=lambda: self._totals('open'))
+
+    def new_detector(self):
+        if self.method == METHOD_MOG2:
+            return BackgroundSubtractor(self.history, self.var_threshold)
+        return FrameDifference(self.pixel_threshold)
+
+    def add(self, pad_index, camera_id):
+        """
+        Start gating a source; a reconnected source keeps its totals but learns its
+        background again.
+
+        Returns:
+            GateState: The state of the source.
+        """
+        with self._lock:
+            state = self._states.get(pad_index)
+            if state is None or state.camera_id != camera_id:
+                state = self._states[pad_index] = GateState(pad_index, camera_id, self.new_detector())
+            else:
+                state.detector = self.new_detector()
+                state.mask = None
+                state.open, state.quiet = True, 0
+            return state
+
+    def forget(self, pad_index):
+        with self._lock:
+            self._states.pop(pad_index, None)
+
+    def update(self, pad_index, proxy):
+        """
+        Score a proxy of a source and open or close its gate.
+
+        Args:
+            pad_index (int): Source of the proxy.
+            proxy (np.ndarray): ``H x W`` uint8 gray frame.
+
+        Returns:
+            float: Foreground fraction of the proxy (inside the ROI).
+        """
+        with self._lock:
+            state = self._states.get(pad_index)
+            if state is None:
+                return 0.0
+            if state.mask is None and self.rois is not None:
+                state.mask = self.rois.mask(state.camera_id, proxy.shape[1], proxy.shape[0])
+            detector, mask = state.detector, state.mask
+        # Solo el appsink de esta fuente usa su detector
+        score = detector.score(proxy, mask)
+        with self._lock:
+            # La fuente pudo reconectarse (detector nuevo) mientras se medía el proxy
+            if self._states.get(pad_index) is not state or state.detector is not detector:
+                return score
+            state.score = score
+            is_open, state.quiet = self.next_state(state.open, score, state.quiet, self.open_threshold,
+                                                   self.close_threshold, self.hold)
+            if is_open and not state.open:
+                state.openings += 1
+            state.open = is_open
+        return score
+
+    def observe(self, pad_index, detections=0):
+        """
+        A forwarded frame reached the appsink; detections in it keep the gate open.
+        """
+        if detections <= 0:
+            return
+        with self._lock:
+            state = self._states.get(pad_index)
+            if state is not None:
+                state.quiet = 0
+                if not state.open:
+                    state.open = True
+                    state.openings += 1
+
+    def should_infer(self, pad_index):
+        """
+        Gate decision for the next frame of a source (called by the pad probe).
+
+        Returns:
+            bool: True if the frame must go on to inference.
+        """
+        with self._lock:
+            state = self._states.get(pad_index)
+            if state is None:
+                return True
+            state.offered += 1
+            if state.open or (self.heartbeat and state.since_forward + 1 >= self.heartbeat):
+                state.forwarded += 1
+                state.since_forward = 0
+                return True
+            state.gated += 1
+            state.since_forward += 1
+            return False
+
+    @staticmethod
+    def next_state(is_open, score, quiet, open_threshold, close_threshold, hold):
+        """
+        Gate state after one proxy.
+
+        Args:
+            is_open (bool): Current state.
+            score (float): Foreground fraction of the proxy.
+            quiet (int): Consecutive quiet proxies before this one.
+
+        Returns:
+            tuple: ``(is_open, quiet)`` after the proxy.
+        """
+        if score >= open_threshold:
+            return True, 0
+        if score >= close_threshold:
+            # Entre ambos umbrales se mantiene el estado
+            return is_open, 0
+        quiet += 1
+        return (is_open and quiet < hold), quiet
+
+    def report(self):
+        """
+        Returns:
+            list: One dict per source with the gate state, frames offered, forwarded and
+            gated, the fraction of frames gated and the number of openings.
+        """
+        with self._lock:
+            return [{
+                'camera_id': state.camera_id,
+                'open': state.open,
+                'offered': state.offered,
+                'forwarded': state.forwarded,
+                'gated': state.gated,
+                'gated_ratio': state.gated / state.offered if state.offered else 0.0,
+                'openings': state.openings,
+                'score': state.score,
+            } for state in sorted(self._states.values(), key=lambda state: state.pad_index)]
+
+    def _totals(self, attribute):
+        with self._lock:
+            return {(state.camera_id,): int(getattr(state, attribute)) for state in self._states.values()}
+
+def format_report(rows):
+    """
+    One line per camera, for the logs.
+    """
+    return "\n".join(f"cámara {row['camera_id']}: {'abierta' if row['open'] else 'cerrada'} "
+                     f"ofrecidos={row['offered']} enviados={row['forwarded']} filtrados={row['gated']} "
+                     f"({row['gated_ratio']:.1%}) aperturas={row['openings']}" for row in rows)
+
+def connect_motion_sink(Gst, appsink, pad_index, consumers):
+    """
+    Feed the GRAY8 proxies of source ``pad_index`` from its motion appsink to ``consumers``.
+
+    Args:
+        Gst (module): The ``gi.repository.Gst`` module.
+        appsink (Gst.Element): Appsink of the motion branch of the source.
+        pad_index (int): Streammux pad of the source.
+        consumers (sequence): Objects with ``update(pad_index, proxy)`` (``MotionGate``,
+            ``InferenceScheduler``); the proxy is only valid during the call.
+    """
+    consumers = tuple(consumers)
+
+    def on_proxy(sink):
+        sample = sink.emit("pull-sample")
+        if sample is None:
+            return Gst.FlowReturn.OK
+        buffer = sample.get_buffer()
+        structure = sample.get_caps().get_structure(0)
+        width, height = structure.get_value("width"), structure.get_value("height")
+        ok, map_info = buffer.map(Gst.MapFlags.READ)
+        if not ok:
+            return Gst.FlowReturn.OK
+        try:
+            # GRAY8 con filas alineadas a 4 bytes
+            stride = (width + 3) & ~3
+            proxy = np.ndarray((height, stride), dtype=np.uint8, buffer=map_info.data)[:, :width]
+            for consumer in consumers:
+                consumer.update(pad_index, proxy)
+        finally:
+            buffer.unmap(map_info)
+        return Gst.FlowReturn.OK
+
+    return appsink.connect("new-sample", on_proxy)
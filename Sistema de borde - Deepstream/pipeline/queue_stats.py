@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+
+"""
+Drop accounting for the leaky queues of the pipeline.
+
+Every queue of the pipeline is ``leaky=2`` (drop the oldest buffer when full) and
+``silent=True``, so frames are discarded without any record. ``QueueMonitor`` adds two
+pad probes per queue: the sink probe counts the buffers that arrive and, reading the
+queue level before the buffer is queued, the arrivals that find the queue full
+(overruns); with ``leaky=2`` each overrun drops exactly one buffer. The src probe counts
+the buffers that leave. On the source queues the arrivals are also the frames each
+camera offers after decoding, which ``launch_pipeline`` compares with the frames that
+reach the appsink to report offered versus effective FPS.
+
+Totals are plain integers written only by the thread of each probe and exposed through
+the metrics registry at scrape time. Queues detached at runtime keep their totals, and
+a camera attached again under the same queue name continues them.
+
+``QueueTuner`` optionally adapts ``max-size-buffers``: a queue that keeps dropping
+grows while the latency its depth adds stays within a budget, and a queue without drops
+for a while shrinks back. The decision (``QueueTuner.next_depth``) is a pure function
+of the observed drops and rates, so it can be exercised without GStreamer.
+
+Attributes:
+    LEAKY_DOWNSTREAM (int): ``leaky`` value of queues that drop their oldest buffer.
+"""
+
+import threading
+
+from common.metrics import REGISTRY
+
+LEAKY_DOWNSTREAM = 2
+
+class QueueState:
+    """
+    Buffer totals of one queue.
+
+    Attributes:
+        buffers_in (int): Buffers that reached the sink pad.
+        buffers_out (int): Buffers pushed out of the src pad.
+        overruns (int): Arrivals that found the queue full.
+        dropped (int): Buffers discarded by the queue (overruns of a leaky queue).
+        max_size (int): ``max-size-buffers`` of the queue.
+        peak_level (int): Highest level an arrival found since it was last reset.
+        camera_id: Camera of a source queue, or None.
+    """
+
+    __slots__ = ('name', 'element', 'max_size', 'leaky', 'camera_id', 'buffers_in', 'buffers_out', 'overruns',
+                 'dropped', 'flushed', 'peak_level')
+
+    def __init__(self, name, element, max_size, leaky, camera_id=None):
+        self.name = name
+        self.element = element
+        self.max_size = max_size
+        self.leaky = leaky
+        self.camera_id = camera_id
+        self.buffers_in = 0
+        self.buffers_out = 0
+        self.overruns = 0
+        self.dropped = 0
+        self.flushed = 0
+        self.peak_level = 0
+
+    def level(self):
+        """
+        Buffers currently held, read from the queue (0 once detached).
+        """
+        if self.element is None:
+            return 0
+        return self.element.get_property("current-level-buffers")
+
+class QueueMonitor:
+    """
+    Pad-probe accounting of buffers in, out, overruns and drops for each queue.
+
+    Args:
+        registry (MetricsRegistry): Registry where the totals are exposed.
+    """
+
+    def __init__(self, registry=REGISTRY):
+        self._queues = {}
+        self._lock = threading.Lock()
+        def per_queue(attribute):
+            return lambda: self._totals(attribute)
+
+        registry.counter("edge_queue_buffers_in_total", "Buffers that arrived at each queue", ("queue",),
+                         callback=per_queue('buffers_in'))
+        registry.counter("edge_queue_buffers_out_total", "Buffers pushed out of each queue", ("queue",),
+                         callback=per_queue('buffers_out'))
+        registry.counter("edge_queue_overruns_total", "Arrivals that found each queue full", ("queue",),
+                         callback=per_queue('overruns'))
+        registry.counter("edge_queue_dropped_total", "Buffers discarded by each leaky queue", ("queue",),
+                         callback=per_queue('dropped'))
+        registry.gauge("edge_queue_level", "Buffers currently held by each queue", ("queue",),
+                       callback=lambda: {(name,): level for name, level in self.levels().items()})
+        registry.gauge("edge_queue_max_size", "max-size-buffers of each queue", ("queue",),
+                       callback=lambda: self._totals('max_size'))
+        registry.counter("edge_source_frames_total", "Decoded frames offered by each camera to the streammux",
+                         ("camera",), callback=self.offered)
+
+    def watch(self, Gst, queue, name, camera_id=None):
+        """
+        Add the accounting probes to ``queue``.
+
+        Args:
+            Gst (module): The ``gi.repository.Gst`` module.
+            queue (Gst.Element): The queue element.
+            name (str): Name used in the metrics (the element name).
+            camera_id: Camera of a source queue; its arrivals count as offered frames.
+
+        Returns:
+            QueueState: The totals of the queue.
+        """
+        with self._lock:
+            state = self._queues.get(name)
+            if state is None:
+                state = self._queues[name] = QueueState(name, queue, queue.get_property("max-size-buffers"),
+                                                        int(queue.get_property("leaky")), camera_id)
+            else:
+                # Cámara reconectada: los totales continúan con el nuevo elemento
+                state.element = queue
+                state.camera_id = camera_id
+                state.max_size = queue.get_property("max-size-buffers")
+
+        def on_arrival(_pad, info):
+            state.buffers_in += 1
+            # El nivel se lee antes de que la cola reciba el buffer
+            level = queue.get_property("current-level-buffers")
+            if level > state.peak_level:
+                state.peak_level = level
+            if state.max_size and level >= state.max_size:
+                state.overruns += 1
+                if state.leaky == LEAKY_DOWNSTREAM:
+                    state.dropped += 1
+            return Gst.PadProbeReturn.OK
+
+        def on_departure(_pad, info):
+            state.buffers_out += 1
+            return Gst.PadProbeReturn.OK
+
+        queue.get_static_pad("sink").add_probe(Gst.PadProbeType.BUFFER, on_arrival)
+        queue.get_static_pad("src").add_probe(Gst.PadProbeType.BUFFER, on_departure)
+        return state
+
+    def unwatch(self, name):
+        """
+        Forget the element of a detached queue, keeping its totals. Buffers still held are
+        counted as flushed.
+        """
+        with self._lock:
+            state = self._queues.get(name)
+            if state is None or state.element is None:
+                return
+            state.flushed += state.level()
+            state.element = None
+
+    def set_max_size(self, name, max_size):
+        """
+        Change ``max-size-buffers`` of a watched queue.
+        """
+        state = self._queues[name]
+        if state.element is not None:
+            state.element.set_property("max-size-buffers", max_size)
+        state.max_size = max_size
+
+    def states(self):
+        with self._lock:
+            return dict(self._queues)
+
+    def levels(self):
+        return {name: state.level() for name, state in self.states().items()}
+
+    def offered(self):
+        """
+        Returns:
+            dict: Frames offered by each camera, ``{(camera_id,): frames}``.
+        """
+        offered = {}
+        for state in self.states().values():
+            if state.camera_id is not None:
+                offered[(state.camera_id,)] = offered.get((state.camera_id,), 0) + state.buffers_in
+        return offered
+
+    def report(self):
+        """
+        Returns:
+            list: One dict per queue with its totals, current level and drop ratio.
+        """
+        rows = []
+        for name, state in sorted(self.states().items()):
+            rows.append({
+                'queue': name,
+                'camera_id': state.camera_id,
+                'in': state.buffers_in,
+                'out': state.buffers_out,
+                'overruns': state.overruns,
+                'dropped': state.dropped,
+                'flushed': state.flushed,
+                'level': state.level(),
+                'max_size': state.max_size,
+                'drop_ratio': state.dropped / state.buffers_in if state.buffers_in else 0.0,
+            })
+        return rows
+
+    def _totals(self, attribute):
+        return {(name,): getattr(state, attribute) for name, state in self.states().items()}
+
+def format_report(rows):
+    """
+    One line per queue, for the logs.
+    """
+    lines = []
+    for row in rows:
+        camera = f" (cámara {row['camera_id']})" if row['camera_id'] is not None else ""
+        lines.append(f"{row['queue']}{camera}: entrada={row['in']} salida={row['out']} descartados={row['dropped']} "
+                     f"({row['drop_ratio']:.1%}) desbordes={row['overruns']} nivel={row['level']}/{row['max_size']}")
+    return "\n".join(lines)
+
+class QueueTuner:
+    """
+    Adapt ``max-size-buffers`` of the watched queues to the drops observed.
+
+    Every ``adjust`` compares the totals with the previous call. A queue that dropped
+    more than ``grow_ratio`` of its arrivals grows by one buffer, unless the latency its
+    depth adds (depth over the rate buffers leave it) would exceed ``max_latency``; a
+    queue without drops for ``shrink_after`` calls shrinks by one, down to its initial
+    depth or ``min_depth``, as long as its last buffer slot was never used meanwhile.
+
+    A deeper queue only absorbs bursts: if the element after it is simply slower than
+    the frames arriving, drops continue at the same ratio. When growing a queue does not
+    cut its drop ratio by at least 10 % the growth is undone and the queue is left alone
+    for ``shrink_after`` calls.
+
+    Args:
+        monitor (QueueMonitor): Monitor of the queues to tune.
+        min_depth (int): Smallest depth; by default the configured depth of each queue.
+        max_depth (int): Largest depth.
+        max_latency (float): Seconds of buffering a queue may add at its output rate.
+        grow_ratio (float): Drop ratio above which a queue grows.
+        shrink_after (int): Calls without drops before a queue shrinks.
+        log (callable): Receives a message for every change.
+    """
+
+    def __init__(self, monitor, min_depth=None, max_depth=8, max_latency=0.25, grow_ratio=0.01, shrink_after=10,
+                 log=print):
+        self.monitor = monitor
+        self.min_depth = min_depth
+        self.max_depth = max_depth
+        self.max_latency = max_latency
+        self.grow_ratio = grow_ratio
+        self.shrink_after = shrink_after
+        self.log = log
+        self._previous = {}
+        self._quiet = {}
+        self._initial = {}
+        self._grown_at = {}
+        self._hold = {}
+
+    @staticmethod
+    def next_depth(depth, dropped, arrived, out_rate, quiet, peak_level, min_depth, max_depth, max_latency,
+                   grow_ratio, shrink_after):
+        """
+        Depth of a queue for the next interval.
+
+        Args:
+            depth (int): Current ``max-size-buffers``.
+            dropped (int): Buffers dropped during the interval.
+            arrived (int): Buffers that arrived during the interval.
+            out_rate (float): Buffers per second that left the queue during the interval.
+            quiet (int): Consecutive intervals without drops, including this one.
+            peak_level (int): Highest level found by an arrival during the interval.
+
+        Returns:
+            int: The new depth (equal to ``depth`` if unchanged).
+        """
+        if arrived and dropped / arrived > grow_ratio and depth < max_depth:
+            # Un buffer más agrega 1 / out_rate segundos de espera a cada frame
+            if out_rate > 0 and (depth + 1) / out_rate <= max_latency:
+                return depth + 1
+            return depth
+        if dropped == 0 and quiet >= shrink_after and peak_level < depth - 1 and depth > min_depth:
+            return depth - 1
+        return depth
+
+    def adjust(self, elapsed):
+        """
+        Re-evaluate every queue after ``elapsed`` seconds.
+
+        Returns:
+            dict: ``{queue: new depth}`` of the queues that changed.
+        """
+        changes = {}
+        for name, state in self.monitor.states().items():
+            if state.element is None:
+                continue
+            totals = (state.buffers_in, state.buffers_out, state.dropped)
+            previous = self._previous.get(name, totals)
+            self._previous[name] = totals
+            self._initial.setdefault(name, state.max_size)
+            arrived, departed, dropped = (now - before for now, before in zip(totals, previous))
+            self._quiet[name] = 0 if dropped else self._quiet.get(name, 0) + 1
+            ratio = dropped / arrived if arrived else 0.0
+            peak_level, state.peak_level = state.peak_level, 0
+
+            min_depth = self.min_depth if self.min_depth is not None else self._initial[name]
+            grown_at = self._grown_at.pop(name, None)
+            if grown_at is not None and ratio > 0.9 * grown_at:
+                # Crecer no redujo los descartes: la etapa siguiente está saturada
+                depth = state.max_size - 1
+                self._hold[name] = self.shrink_after
+            elif self._hold.get(name):
+                self._hold[name] -= 1
+                depth = state.max_size
+            else:
+                out_rate = departed / elapsed if elapsed > 0 else 0.0
+                depth = self.next_depth(state.max_size, dropped, arrived, out_rate, self._quiet[name], peak_level,
+                                        min_depth, self.max_depth, self.max_latency, self.grow_ratio, self.shrink_after)
+                if depth > state.max_size:
+                    self._grown_at[name] = ratio
+            if depth != state.max_size:
+                self.log(f"Cola {name}: max-size-buffers {state.max_size} -> {depth} "
+                         f"({dropped} descartados de {arrived} en {elapsed:.0f} s)")
+                self.monitor.set_max_size(name, depth)
+                self._quiet[name] = 0
+                changes[name] = depth
+        return changes
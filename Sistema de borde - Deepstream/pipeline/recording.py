@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+
+"""
+Recording of the per-frame detections that reach the appsink, and their replay.
+
+A recording is a single ``.npz`` file with NumPy structured arrays:
+
+- ``frames``: one row per frame (``FRAME_DTYPE``) in appsink order, with the batch it
+  arrived in, its pad, frame number, PTS, appsink time and the slice of ``detections``
+  holding its objects (the frame index);
+- ``detections``: every object of every frame (``pipeline.detections.DETECTION_DTYPE``),
+  unfiltered, so a replay can change the alert class or threshold;
+- ``thumbnails`` / ``thumbnail_offsets``: optional JPEG thumbnails of some frames,
+  concatenated, referenced by ``frames['thumbnail']``;
+- ``metadata``: JSON with the format version, frame size and camera of each pad.
+
+``DetectionRecorder`` is fed by ``FrameEngine`` on the streaming thread and only appends
+the arrays of each batch; the file is written when ``save`` is called. ``Recording``
+rebuilds the ``FrameBatch`` sequence, with the thumbnails scaled back to the frame size
+as surfaces, so the same batches can be replayed through the engine as many times as
+needed (see ``benchmarks/bench_recording.py``).
+
+Attributes:
+    RECORDING_VERSION (int): Version written to the metadata.
+    FRAME_DTYPE (np.dtype): Row layout of the frame index.
+    NO_THUMBNAIL (int): ``thumbnail`` of frames recorded without one.
+"""
+
+import json
+import os
+import threading
+import time
+
+import cv2
+import numpy as np
+
+from pipeline.detections import DETECTION_DTYPE
+from pipeline.engine import FrameBatch, SourceFrame
+
+RECORDING_VERSION = 1
+
+FRAME_DTYPE = np.dtype([
+    ('batch', np.int64),
+    ('pad_index', np.int32),
+    ('frame_num', np.int64),
+    ('batch_id', np.int32),
+    ('pts_ns', np.int64),
+    ('sample_ns', np.int64),
+    ('first', np.int64),
+    ('count', np.int32),
+    ('thumbnail', np.int32),
+])
+
+NO_THUMBNAIL = -1
+
+class DetectionRecorder:
+    """
+    Accumulate the frames and detections of the batches processed by the engine.
+
+    Args:
+        path (str): File written by ``save``.
+        width (int): Frame width, stored so the replay restores the frame size.
+        height (int): Frame height.
+        thumbnail_every (int): Store a thumbnail of one frame out of this many per camera
+            (by frame number); 0 disables thumbnails.
+        thumbnail_width (int): Width of the thumbnails.
+        thumbnail_quality (int): JPEG quality of the thumbnails.
+        max_frames (int): Frames recorded before the recorder stops; None for no limit.
+        clock (callable): Time of arrival of each batch, in nanoseconds.
+    """
+
+    def __init__(self, path, width, height, thumbnail_every=0, thumbnail_width=480, thumbnail_quality=80,
+                 max_frames=None, clock=time.time_ns):
+        self.path = path
+        self.width = width
+        self.height = height
+        self.thumbnail_every = thumbnail_every
+        self.thumbnail_width = thumbnail_width
+        self.thumbnail_quality = thumbnail_quality
+        self.max_frames = max_frames
+        self.clock = clock
+        self.cameras = {}
+        self.skipped = 0
+        self._frames = []
+        self._detections = []
+        self._thumbnails = []
+        self._recorded = 0
+        self._detection_rows = 0
+        self._batches = 0
+        self._lock = threading.Lock()
+
+    def record(self, batch, source_states):
+        """
+        Append a batch.
+
+        Args:
+            batch (FrameBatch): The batch, before it is processed.
+            source_states (dict): Per-source state keyed by pad index, for the camera ids.
+        """
+        if self.max_frames is not None and self._recorded >= self.max_frames:
+            self.skipped += len(batch.frames)
+            return
+        sample_ns = self.clock()
+        detections = batch.detections
+        # Las detecciones de cada frame son contiguas y en el orden del batch
+        batch_ids, starts, counts = np.unique(detections['batch_id'], return_index=True, return_counts=True)
+        spans = {int(batch_id): (int(start), int(count)) for batch_id, start, count in zip(batch_ids, starts, counts)}
+
+        rows = []
+        thumbnails = []
+        with self._lock:
+            for frame in batch.frames:
+                state = source_states.get(frame.pad_index)
+                if state is not None:
+                    self.cameras[frame.pad_index] = state['camera_id']
+                start, count = spans.get(frame.batch_id, (0, 0))
+                thumbnail = NO_THUMBNAIL
+                if self.thumbnail_every and frame.frame_num % self.thumbnail_every == 0:
+                    data = self._thumbnail(frame)
+                    if data is not None:
+                        thumbnail = len(self._thumbnails) + len(thumbnails)
+                        thumbnails.append(data)
+                rows.append((self._batches, frame.pad_index, frame.frame_num, frame.batch_id, frame.pts_ns, sample_ns,
+                             self._detection_rows + start, count, thumbnail))
+            self._frames.append(np.array(rows, dtype=FRAME_DTYPE))
+            self._detections.append(detections.copy())
+            self._thumbnails.extend(thumbnails)
+            self._recorded += len(rows)
+            self._detection_rows += len(detections)
+            self._batches += 1
+
+    def _thumbnail(self, frame):
+        surface = frame.surface()
+        if surface is None:
+            return None
+        scale = self.thumbnail_width / surface.shape[1]
+        small = cv2.resize(surface, (self.thumbnail_width, max(int(surface.shape[0] * scale), 1)),
+                           interpolation=cv2.INTER_AREA)
+        ok, data = cv2.imencode(".jpg", cv2.cvtColor(small, cv2.COLOR_RGBA2BGR),
+                                [cv2.IMWRITE_JPEG_QUALITY, self.thumbnail_quality])
+        return data.tobytes() if ok else None
+
+    def save(self, path=None):
+        """
+        Write everything recorded so far (the recording keeps growing afterwards).
+
+        The file is written next to its destination and renamed, so a reader never sees a
+        partial file.
+
+        Returns:
+            dict: Frames, detections and thumbnails written and the file size in bytes.
+        """
+        path = path or self.path
+        with self._lock:
+            frames = np.concatenate(self._frames) if self._frames else np.empty(0, dtype=FRAME_DTYPE)
+            detections = (np.concatenate(self._detections) if self._detections else
+                          np.empty(0, dtype=DETECTION_DTYPE))
+            thumbnails = list(self._thumbnails)
+            cameras = dict(self.cameras)
+        offsets = np.zeros(len(thumbnails) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(data) for data in thumbnails])
+        metadata = {
+            'version': RECORDING_VERSION,
+            'width': self.width,
+            'height': self.height,
+            'cameras': {str(pad_index): camera_id for pad_index, camera_id in cameras.items()},
+            'skipped_frames': self.skipped,
+        }
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        partial = path + ".partial.npz"
+        np.savez_compressed(partial, frames=frames, detections=detections,
+                            thumbnails=np.frombuffer(b"".join(thumbnails), dtype=np.uint8),
+                            thumbnail_offsets=offsets, metadata=np.array(json.dumps(metadata)))
+        os.replace(partial, path)
+        return {'frames': len(frames), 'detections': len(detections), 'thumbnails': len(thumbnails),
+                'bytes': os.path.getsize(path)}
+
+class Recording:
+    """
+    A recording loaded from disk.
+
+    Attributes:
+        frames (np.ndarray): Frame index (``FRAME_DTYPE``).
+        detections (np.ndarray): Objects of all frames (``DETECTION_DTYPE``).
+        metadata (dict): Version, frame size and ``cameras`` (``{pad_index: camera_id}``).
+    """
+
+    def __init__(self, frames, detections, thumbnails, thumbnail_offsets, metadata):
+        self.frames = frames
+        self.detections = detections
+        self.thumbnails = thumbnails
+        self.thumbnail_offsets = thumbnail_offsets
+        self.metadata = metadata
+        self.cameras = {int(pad_index): camera_id for pad_index, camera_id in metadata.get('cameras', {}).items()}
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            metadata = json.loads(str(data['metadata']))
+            if metadata.get('version') != RECORDING_VERSION:
+                raise ValueError(f"Unsupported recording version {metadata.get('version')} in {path}")
+            return cls(data['frames'], data['detections'], data['thumbnails'], data['thumbnail_offsets'], metadata)
+
+    @property
+    def size(self):
+        return self.metadata['width'], self.metadata['height']
+
+    def source_states(self):
+        """
+        Returns:
+            dict: Fresh per-source state for the engine, one entry per recorded pad.
+        """
+        pads = set(self.cameras) | set(np.unique(self.frames['pad_index']).tolist())
+        return {pad_index: {'camera_id': self.cameras.get(pad_index, pad_index), 'uri': None, 'last_frame_num': -1}
+                for pad_index in sorted(pads)}
+
+    def thumbnail(self, index):
+        """
+        Returns:
+            np.ndarray: Decoded BGR thumbnail ``index``.
+        """
+        start, end = self.thumbnail_offsets[index], self.thumbnail_offsets[index + 1]
+        return cv2.imdecode(self.thumbnails[start:end], cv2.IMREAD_COLOR)
+
+    def surfaces(self, limit=16, fallback=None):
+        """
+        Full-size RGBA surfaces for every frame, built from at most ``limit`` thumbnails.
+
+        Each frame uses the latest loaded thumbnail of its camera at or before it, or
+        else one of the loaded thumbnails; without thumbnails, ``fallback`` frames are
+        cycled per camera.
+
+        Args:
+            limit (int): Thumbnails decoded and scaled to the frame size (memory bound).
+            fallback (list): RGBA frames used when the recording has no thumbnails.
+
+        Returns:
+            tuple: ``(surfaces, index)``: the list of RGBA frames and, per frame row, the
+            position of its surface in that list.
+        """
+        frames = self.frames
+        width, height = self.size
+        rows = np.flatnonzero(frames['thumbnail'] != NO_THUMBNAIL)
+        if len(rows) == 0:
+            if not fallback:
+                raise ValueError("The recording has no thumbnails and no fallback frames were given")
+            return fallback, (frames['pad_index'] + frames['frame_num']) % len(fallback)
+
+        rows = np.unique(rows[np.linspace(0, len(rows) - 1, min(limit, len(rows))).astype(np.int64)])
+        surfaces = [cv2.cvtColor(cv2.resize(self.thumbnail(frames['thumbnail'][row]), (width, height)),
+                                 cv2.COLOR_BGR2RGBA) for row in rows]
+        index = frames['pad_index'] % len(surfaces)
+        for pad_index in np.unique(frames['pad_index']):
+            own = np.flatnonzero(frames['pad_index'][rows] == pad_index)
+            if len(own) == 0:
+                continue
+            camera_rows = np.flatnonzero(frames['pad_index'] == pad_index)
+            latest = np.searchsorted(rows[own], camera_rows, side='right') - 1
+            # Los frames anteriores al primer thumbnail de la cámara usan ese primero
+            index[camera_rows] = own[np.maximum(latest, 0)]
+        return surfaces, index
+
+    def batches(self, surfaces, index):
+        """
+        Rebuild the batches in appsink order.
+
+        Args:
+            surfaces (list): RGBA frames (see ``surfaces``).
+            index (np.ndarray): Surface of each frame row.
+
+        Returns:
+            list: ``FrameBatch`` of every recorded batch.
+        """
+        frames = self.frames
+        if len(frames) == 0:
+            return []
+        bounds = np.concatenate([[0], np.flatnonzero(np.diff(frames['batch'])) + 1, [len(frames)]])
+        batches = []
+        for start, end in zip(bounds[:-1].tolist(), bounds[1:].tolist()):
+            rows = frames[start:end]
+            # Los frames sin detecciones apuntan al inicio de las del batch
+            first = int(rows['first'].min())
+            last = int((rows['first'] + rows['count']).max())
+            batches.append(FrameBatch(
+                [SourceFrame(int(row['pad_index']), int(row['frame_num']), int(row['batch_id']), int(row['pts_ns']),
+                             lambda surface=surfaces[surface_index]: surface)
+                 for row, surface_index in zip(rows, index[start:end].tolist())],
+                self.detections[first:last]))
+        return batches
@@ -0,0 +1,324 @@
+#!/usr/bin/env python3
+
+"""
+Replay of detection streams through the frame engine, without DeepStream.
+
+``SyntheticScene`` produces the detections a tracker would report for many cameras
+(people entering, crossing and leaving the view, plus objects of other classes), and
+``synthetic_batches`` groups them with JPEG or synthetic RGBA frames into the
+``FrameBatch`` structure the appsink adapter builds, one frame per camera per tick, in
+batches of the streammux batch size. ``ReplayDriver`` feeds any iterable of batches to a
+``FrameEngine`` at the pace of their timestamps (or as fast as possible) and measures
+the time spent per batch and how far the engine falls behind real time, so the alert
+path can be load-tested at many times the real camera count on a machine without GPU.
+
+``InlineDispatcher`` handles each alert on the caller's thread instead of queueing it;
+with it, and the frame PTS as the suppressor clock, a replay of a recording
+(``pipeline.recording``) produces the same alerts every time.
+"""
+
+import glob
+import os
+import time
+
+import cv2
+import numpy as np
+
+from pipeline.detections import DETECTION_DTYPE, UNTRACKED_OBJECT_ID
+from pipeline.engine import FrameBatch, SourceFrame
+
+def load_frames(directory, width, height, limit=16):
+    """
+    Decode the JPEGs of ``directory`` into RGBA frames of the streammux size.
+
+    Args:
+        directory (str): Directory with ``*.jpg`` files.
+        width (int): Frame width.
+        height (int): Frame height.
+        limit (int): Maximum number of images to load.
+
+    Returns:
+        list: ``height x width x 4`` uint8 arrays (empty if no image could be read).
+    """
+    frames = []
+    for path in sorted(glob.glob(os.path.join(directory, "*.jpg")))[:limit]:
+        image = cv2.imread(path)
+        if image is None:
+            continue
+        frames.append(cv2.cvtColor(cv2.resize(image, (width, height)), cv2.COLOR_BGR2RGBA))
+    return frames
+
+def synthetic_frames(width, height, count=4, seed=0):
+    """
+    Blocky random RGBA frames, used when no JPEG is available.
+    """
+    rng = np.random.default_rng(seed)
+    frames = []
+    for _ in range(count):
+        blocks = rng.integers(0, 256, (max(height // 16, 1), max(width // 16, 1), 4), dtype=np.uint8)
+        frame = cv2.resize(blocks, (width, height), interpolation=cv2.INTER_NEAREST)
+        frame[..., 3] = 255
+        frames.append(frame)
+    return frames
+
+class SyntheticScene:
+    """
+    People crossing the view of every camera, as reported by the tracker.
+
+    People arrive at each camera as a Poisson process, walk in a straight line and leave
+    after a random dwell time or when they exit the frame. Every frame also carries some
+    detections of another class, which the engine must filter out.
+
+    Args:
+        cameras (int): Number of cameras.
+        width (int): Frame width.
+        height (int): Frame height.
+        fps (float): Frames per second of every camera.
+        arrival_rate (float): People entering the view of a camera per second.
+        dwell (float): Mean seconds a person stays in view.
+        clutter (float): Mean detections of ``clutter_class`` per frame.
+        clutter_class (int): Class of the clutter detections.
+        tracked (bool): Report tracker ids; otherwise ``UNTRACKED_OBJECT_ID``.
+        seed (int): Seed of the random generator.
+    """
+
+    def __init__(self, cameras, width=1920, height=1080, fps=25.0, arrival_rate=0.05, dwell=8.0, clutter=2.0,
+                 clutter_class=2, tracked=True, seed=0):
+        self.cameras = cameras
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.arrival_rate = arrival_rate
+        self.dwell = dwell
+        self.clutter = clutter
+        self.clutter_class = clutter_class
+        self.tracked = tracked
+        self._rng = np.random.default_rng(seed)
+        self._next_id = 0
+        # Una fila por persona en escena: cámara, id, posición, velocidad, tamaño, confianza, frames restantes
+        self._camera = np.empty(0, dtype=np.int32)
+        self._object_id = np.empty(0, dtype=np.uint64)
+        self._position = np.empty((0, 2), dtype=np.float32)
+        self._velocity = np.empty((0, 2), dtype=np.float32)
+        self._size = np.empty((0, 2), dtype=np.float32)
+        self._confidence = np.empty(0, dtype=np.float32)
+        self._remaining = np.empty(0, dtype=np.int64)
+
+    def in_view(self):
+        """
+        Returns:
+            int: People currently in view over all cameras.
+        """
+        return len(self._camera)
+
+    def step(self, frame_num):
+        """
+        Advance every camera by one frame.
+
+        Args:
+            frame_num (int): Frame number stored in the detections.
+
+        Returns:
+            np.ndarray: Detections of all cameras (``DETECTION_DTYPE``, ``pad_index`` is
+            the camera and ``batch_id`` is not set), ordered by camera.
+        """
+        rng = self._rng
+        self._position += self._velocity
+        self._remaining -= 1
+        inside = ((self._remaining > 0) & (self._position[:, 0] > -self._size[:, 0]) &
+                  (self._position[:, 0] < self.width) & (self._position[:, 1] < self.height))
+        self._keep(inside)
+
+        arrivals = rng.poisson(self.arrival_rate / self.fps, self.cameras)
+        count = int(arrivals.sum())
+        if count:
+            height = rng.uniform(0.2, 0.5, count) * self.height
+            size = np.stack([height * 0.4, height], axis=1)
+            # Entran por un costado y cruzan a paso de peatón (~1/8 del ancho por segundo)
+            from_left = rng.random(count) < 0.5
+            x = np.where(from_left, -size[:, 0] * 0.5, self.width - size[:, 0] * 0.5)
+            y = rng.uniform(0.2, 0.9, count) * self.height - size[:, 1] * 0.5
+            speed = rng.uniform(0.5, 1.5, count) * self.width / 8 / self.fps
+            velocity = np.stack([np.where(from_left, speed, -speed), rng.normal(0, 0.5, count)], axis=1)
+            self._camera = np.concatenate([self._camera, np.repeat(np.arange(self.cameras, dtype=np.int32), arrivals)])
+            self._object_id = np.concatenate([self._object_id,
+                                              np.arange(self._next_id, self._next_id + count, dtype=np.uint64)])
+            self._next_id += count
+            self._position = np.concatenate([self._position, np.stack([x, y], axis=1).astype(np.float32)])
+            self._velocity = np.concatenate([self._velocity, velocity.astype(np.float32)])
+            self._size = np.concatenate([self._size, size.astype(np.float32)])
+            self._confidence = np.concatenate([self._confidence, rng.uniform(0.55, 0.95, count).astype(np.float32)])
+            self._remaining = np.concatenate([self._remaining,
+                                              np.maximum(rng.exponential(self.dwell * self.fps, count), 1).astype(np.int64)])
+
+        clutter = rng.poisson(self.clutter, self.cameras)
+        people = len(self._camera)
+        detections = np.empty(people + int(clutter.sum()), dtype=DETECTION_DTYPE)
+        persons = detections[:people]
+        persons['class_id'] = 0
+        persons['confidence'] = np.clip(self._confidence + rng.normal(0, 0.05, people), 0, 1)
+        persons['left'] = self._position[:, 0]
+        persons['top'] = self._position[:, 1]
+        persons['width'] = self._size[:, 0]
+        persons['height'] = self._size[:, 1]
+        persons['pad_index'] = self._camera
+        persons['object_id'] = self._object_id if self.tracked else UNTRACKED_OBJECT_ID
+
+        others = detections[people:]
+        others['class_id'] = self.clutter_class
+        others['confidence'] = rng.uniform(0.3, 0.9, len(others))
+        others['left'] = rng.uniform(0, self.width * 0.9, len(others))
+        others['top'] = rng.uniform(0, self.height * 0.9, len(others))
+        others['width'] = self.width * 0.08
+        others['height'] = self.height * 0.08
+        others['pad_index'] = np.repeat(np.arange(self.cameras, dtype=np.int32), clutter)
+        others['object_id'] = UNTRACKED_OBJECT_ID
+
+        detections['frame_num'] = frame_num
+        detections['batch_id'] = -1
+        return detections[np.argsort(detections['pad_index'], kind='stable')]
+
+    def _keep(self, mask):
+        self._camera = self._camera[mask]
+        self._object_id = self._object_id[mask]
+        self._position = self._position[mask]
+        self._velocity = self._velocity[mask]
+        self._size = self._size[mask]
+        self._confidence = self._confidence[mask]
+        self._remaining = self._remaining[mask]
+
+def synthetic_batches(scene, frames, seconds, batch_size):
+    """
+    Batches of ``scene`` for ``seconds`` of video, one frame of every camera per tick.
+
+    Args:
+        scene (SyntheticScene): Source of the detections.
+        frames (list): RGBA frames; each camera cycles through them.
+        seconds (float): Duration of the replay.
+        batch_size (int): Frames per batch (the streammux batch size).
+
+    Yields:
+        FrameBatch: Batches in the order the appsink would receive them.
+    """
+    for frame_num in range(int(seconds * scene.fps)):
+        detections = scene.step(frame_num)
+        pts_ns = int(frame_num * 1e9 / scene.fps)
+        bounds = np.searchsorted(detections['pad_index'], np.arange(0, scene.cameras + batch_size, batch_size))
+        for index, first in enumerate(range(0, scene.cameras, batch_size)):
+            batch_detections = detections[bounds[index]:bounds[index + 1]]
+            batch_detections['batch_id'] = batch_detections['pad_index'] - first
+            yield FrameBatch([SourceFrame(pad_index, frame_num, pad_index - first, pts_ns,
+                                          lambda image=frames[(pad_index + frame_num) % len(frames)]: image)
+                              for pad_index in range(first, min(first + batch_size, scene.cameras))],
+                             batch_detections)
+
+class InlineDispatcher:
+    """
+    Drop-in for ``AlertDispatcher`` that handles every record immediately on the caller's
+    thread: nothing is queued, coalesced or dropped, so the outcome does not depend on
+    thread timing.
+
+    Args:
+        handler (callable): Processes a record; returns True if the alert was delivered.
+        on_release (callable): Receives each record once handled.
+    """
+
+    def __init__(self, handler, on_release=None):
+        self._handler = handler
+        self._on_release = on_release
+        self._counters = {'queued': 0, 'sent': 0, 'failed': 0}
+
+    def submit(self, record):
+        record['enqueued_at'] = time.monotonic()
+        self._counters['queued'] += 1
+        try:
+            delivered = self._handler(record)
+        finally:
+            if self._on_release is not None:
+                self._on_release(record)
+        self._counters['sent' if delivered else 'failed'] += 1
+        return "queued"
+
+    def qsize(self):
+        return 0
+
+    def stats(self):
+        return dict(self._counters)
+
+class ReplayDriver:
+    """
+    Feed batches to a frame engine at the pace of their timestamps.
+
+    A batch is due ``(pts - first pts) / speed`` seconds after the replay starts; the
+    driver sleeps until then, and if the engine is behind it records the lag and goes on
+    without sleeping, as a live pipeline would (there the leaky queues drop frames).
+
+    Args:
+        engine (FrameEngine): Engine that processes the batches.
+        speed (float): Playback speed relative to the timestamps; 0 replays as fast as
+            possible.
+        clock (callable): Monotonic time in seconds.
+        sleep (callable): Sleeps the given seconds.
+    """
+
+    def __init__(self, engine, speed=1.0, clock=time.perf_counter, sleep=time.sleep):
+        self.engine = engine
+        self.speed = speed
+        self.clock = clock
+        self.sleep = sleep
+        self.batch_seconds = []
+        self.lags = []
+        self.frames = 0
+        self.errors = 0
+        self.elapsed = 0.0
+
+    def run(self, batches):
+        """
+        Replay ``batches``.
+
+        Returns:
+            dict: Summary of the replay (see ``stats``).
+        """
+        clock = self.clock
+        start = clock()
+        first_pts = None
+        for batch in batches:
+            if self.speed > 0 and batch.frames:
+                pts_ns = batch.frames[0].pts_ns
+                if first_pts is None:
+                    first_pts = pts_ns
+                lag = clock() - (start + (pts_ns - first_pts) / 1e9 / self.speed)
+                if lag < 0:
+                    self.sleep(-lag)
+                    lag = 0.0
+                self.lags.append(lag)
+            begin = clock()
+            if not self.engine.process(batch):
+                self.errors += 1
+            self.batch_seconds.append(clock() - begin)
+            self.frames += len(batch.frames)
+        self.elapsed = clock() - start
+        return self.stats()
+
+    def stats(self):
+        """
+        Returns:
+            dict: Batches and frames replayed, frames per second achieved, processing time
+            per batch (p50/p99/max, ms), lag behind the timestamps (p99/max, s) and the
+            fraction of time the engine was busy.
+        """
+        batch_ms = np.array(self.batch_seconds) * 1e3
+        lags = np.array(self.lags) if self.lags else np.zeros(1)
+        return {
+            'batches': len(self.batch_seconds),
+            'frames': self.frames,
+            'errors': self.errors,
+            'elapsed': self.elapsed,
+            'fps': self.frames / self.elapsed if self.elapsed > 0 else 0.0,
+            'batch_p50_ms': float(np.percentile(batch_ms, 50)) if len(batch_ms) else 0.0,
+            'batch_p99_ms': float(np.percentile(batch_ms, 99)) if len(batch_ms) else 0.0,
+            'batch_max_ms': float(batch_ms.max()) if len(batch_ms) else 0.0,
+            'lag_p99': float(np.percentile(lags, 99)),
+            'lag_max': float(lags.max()),
+            'busy': batch_ms.sum() / 1e3 / self.elapsed if self.elapsed > 0 else 0.0,
+        }
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+
+"""
+Per-camera regions of interest.
+
+A camera may define one or more polygons, in coordinates normalized to the frame size
+(``0..1``), so the same configuration works at any streammux resolution. A detection
+counts only if its foot point (bottom center of the box, where a person stands) lies
+inside one of them; cameras without polygons keep every detection. The polygons can
+also be rasterized into a mask of any size, used to restrict the motion score of the
+inference scheduler (see ``pipeline.scheduling``) to the same area.
+"""
+
+import cv2
+import numpy as np
+
+def points_in_polygon(points, polygon):
+    """
+    Even-odd ray casting test of many points against one polygon.
+
+    Args:
+        points (np.ndarray): ``N x 2`` array of ``(x, y)``.
+        polygon (np.ndarray): ``M x 2`` array of vertices.
+
+    Returns:
+        np.ndarray: Boolean array of length ``N``.
+    """
+    x, y = points[:, 0:1], points[:, 1:2]
+    x1, y1 = polygon[:, 0], polygon[:, 1]
+    x2, y2 = np.roll(x1, -1), np.roll(y1, -1)
+    # Cada columna es una arista; se cuentan los cruces del rayo horizontal hacia la derecha
+    crosses = (y1 > y) != (y2 > y)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        x_at_y = x1 + (y - y1) * (x2 - x1) / (y2 - y1)
+    return np.count_nonzero(crosses & (x < x_at_y), axis=1) % 2 == 1
+
+class CameraRois:
+    """
+    ROI polygons of every camera.
+
+    Args:
+        polygons (dict): ``{camera_id: [polygon, ...]}``, each polygon a list of
+            normalized ``[x, y]`` vertices.
+        width (int): Frame width the detections refer to.
+        height (int): Frame height.
+    """
+
+    def __init__(self, polygons, width, height):
+        self.width = width
+        self.height = height
+        self._normalized = {}
+        self._polygons = {}
+        for camera_id, camera_polygons in (polygons or {}).items():
+            self.set(camera_id, camera_polygons)
+
+    def set(self, camera_id, polygons):
+        """
+        Replace the polygons of a camera; an empty list removes its ROI.
+        """
+        polygons = [np.asarray(polygon, dtype=np.float32).reshape(-1, 2) for polygon in polygons or []]
+        for polygon in polygons:
+            if len(polygon) < 3:
+                raise ValueError(f"ROI polygon of camera {camera_id} needs at least 3 vertices")
+        if not polygons:
+            self._normalized.pop(camera_id, None)
+            self._polygons.pop(camera_id, None)
+            return
+        self._normalized[camera_id] = polygons
+        self._polygons[camera_id] = [polygon * (self.width, self.height) for polygon in polygons]
+
+    def has_roi(self, camera_id):
+        return camera_id in self._polygons
+
+    def filter(self, camera_id, detections):
+        """
+        Keep the detections whose foot point lies inside the ROI of ``camera_id``.
+
+        Returns:
+            np.ndarray: ``detections`` itself if the camera has no ROI, else the subset.
+        """
+        polygons = self._polygons.get(camera_id)
+        if polygons is None or len(detections) == 0:
+            return detections
+        feet = np.stack([detections['left'] + detections['width'] / 2, detections['top'] + detections['height']], axis=1)
+        inside = np.zeros(len(detections), dtype=bool)
+        for polygon in polygons:
+            inside |= points_in_polygon(feet, polygon)
+        return detections[inside]
+
+    def mask(self, camera_id, width, height):
+        """
+        Returns:
+            np.ndarray: ``height x width`` boolean mask of the ROI, or None if the camera
+            has no ROI.
+        """
+        polygons = self._normalized.get(camera_id)
+        if polygons is None:
+            return None
+        mask = np.zeros((height, width), dtype=np.uint8)
+        cv2.fillPoly(mask, [np.round(polygon * (width, height)).astype(np.int32) for polygon in polygons], 1)
+        return mask.astype(bool)
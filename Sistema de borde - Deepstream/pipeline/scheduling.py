@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+
+"""
+Per-camera adaptive inference interval.
+
+``nvinfer`` runs on every frame of every camera (``interval=0``), and its ``interval``
+property applies to whole batches, so it cannot slow down only the cameras that watch
+a static scene. ``InferenceScheduler`` does it per camera instead: a pad probe on the
+sink pad of each source queue, ahead of the streammux, lets one frame through and drops
+the next ``interval`` ones. The same probe applies the motion gate of
+``pipeline.motion`` first, when it is enabled. Dropped frames never reach the
+streammux, so they cost no inference, conversion or appsink work, and the streammux
+``frame_num`` stays gap-free.
+
+The interval follows the activity of the camera, measured on the frames that were
+inferred:
+
+- detections of the alert class (inside the camera ROI, see ``pipeline.roi``) or a motion
+  score above ``motion_high`` bring the camera back to ``min_interval`` at once;
+- after ``relax_after`` inferred frames with a motion score below ``motion_low`` and no
+  detections, the interval grows by one, up to ``max_interval`` (or the camera's own
+  limit). Scores between both thresholds hold the interval (hysteresis).
+
+The motion score is the fraction of pixels of the GRAY8 proxy of the source, inside the
+ROI, that changed by more than ``pixel_threshold`` since the proxy of the previous
+inferred frame (see ``pipeline.motion.motion_score``). The proxies come from the motion
+branch of the source (``pipeline.motion.connect_motion_sink`` calls ``update``), so the
+full-resolution frame is never mapped for it; ``observe`` only compares the last proxy
+received with the one kept at the previous inferred frame. The interval
+decision (``InferenceScheduler.next_interval``) is a pure function, so the policy can be
+exercised on CPU (see ``benchmarks/bench_scheduling.py``).
+
+``should_infer`` (pad probe of the source), ``update`` (motion appsink) and ``observe``
+(engine appsink) run on different streaming threads; the state of the sources is only
+touched under the scheduler lock.
+
+Frames skipped here are not counted by the source queues, so the offered FPS reported
+by ``pipeline.queue_stats`` are the frames left after scheduling; the skipped frames are
+exposed as ``edge_inference_skipped_total``.
+"""
+
+import threading
+
+import numpy as np
+
+from common.metrics import REGISTRY
+from pipeline.motion import motion_score
+
+class CameraSchedule:
+    """
+    Scheduling state and totals of one source.
+
+    Attributes:
+        interval (int): Frames dropped after each inferred frame.
+        offered (int): Frames that reached the gate.
+        inferred (int): Frames let through to inference.
+        skipped (int): Frames dropped (inferences saved).
+        score (float): Motion score of the last inferred frame.
+        latest (np.ndarray): Last proxy received from the motion branch (``int16``).
+        previous (np.ndarray): Proxy of the previous inferred frame.
+    """
+
+    __slots__ = ('pad_index', 'camera_id', 'interval', 'max_interval', 'countdown', 'quiet', 'offered', 'inferred',
+                 'skipped', 'score', 'latest', 'previous', 'mask')
+
+    def __init__(self, pad_index, camera_id, interval, max_interval, mask=None):
+        self.pad_index = pad_index
+        self.camera_id = camera_id
+        self.interval = interval
+        self.max_interval = max_interval
+        self.countdown = 0
+        self.quiet = 0
+        self.offered = 0
+        self.inferred = 0
+        self.skipped = 0
+        self.score = 0.0
+        self.latest = None
+        self.previous = None
+        self.mask = mask
+
+class InferenceScheduler:
+    """
+    Choose how many frames of each camera skip inference, from its recent activity.
+
+    Args:
+        min_interval (int): Interval of an active camera (0 infers every frame).
+        max_interval (int): Largest interval of a quiet camera.
+        motion_high (float): Motion score that makes a camera active.
+        motion_low (float): Motion score below which a frame counts as quiet.
+        relax_after (int): Consecutive quiet inferred frames before the interval grows.
+        pixel_threshold (int): Change of a proxy pixel that counts as motion.
+        camera_max_intervals (dict): ``{camera_id: max interval}`` overrides; 0 keeps a
+            camera at full rate.
+        rois (CameraRois): ROI of each camera; motion outside it is ignored.
+        registry (MetricsRegistry): Registry where the totals are exposed.
+    """
+
+    def __init__(self, min_interval=0, max_interval=4, motion_high=0.02, motion_low=0.005, relax_after=50,
+                 pixel_threshold=20, camera_max_intervals=None, rois=None, registry=REGISTRY):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.motion_high = motion_high
+        self.motion_low = motion_low
+        self.relax_after = relax_after
+        self.pixel_threshold = pixel_threshold
+        self.camera_max_intervals = dict(camera_max_intervals or {})
+        self.rois = rois
+        self._schedules = {}
+        self._lock = threading.Lock()
+
+        registry.counter("edge_inference_skipped_total", "Frames of each camera dropped before the streammux by the "
+                         "inference scheduler", ("camera",), callback=lambda: self._totals('skipped'))
+        registry.gauge("edge_inference_interval", "Frames each camera skips after every inferred frame", ("camera",),
+                       callback=lambda: self._totals('interval'))
+
+    def add(self, pad_index, camera_id):
+        """
+        Start scheduling a source; a reconnected source keeps its totals.
+
+        Returns:
+            CameraSchedule: The state of the source.
+        """
+        with self._lock:
+            schedule = self._schedules.get(pad_index)
+            if schedule is None or schedule.camera_id != camera_id:
+                max_interval = self.camera_max_intervals.get(camera_id, self.max_interval)
+                schedule = self._schedules[pad_index] = CameraSchedule(pad_index, camera_id,
+                                                                       min(self.min_interval, max_interval),
+                                                                       max_interval)
+            # La resolución del proxy se conoce con el primer proxy; la máscara se crea entonces
+            schedule.latest = None
+            schedule.previous = None
+            schedule.mask = None
+            return schedule
+
+    def forget(self, pad_index):
+        with self._lock:
+            self._schedules.pop(pad_index, None)
+
+    def should_infer(self, pad_index):
+        """
+        Gate decision for the next frame of a source (called by the pad probe).
+
+        Returns:
+            bool: True if the frame must go on to inference.
+        """
+        with self._lock:
+            schedule = self._schedules.get(pad_index)
+            if schedule is None:
+                return True
+            schedule.offered += 1
+            if schedule.countdown > 0:
+                schedule.countdown -= 1
+                schedule.skipped += 1
+                return False
+            schedule.countdown = schedule.interval
+            schedule.inferred += 1
+            return True
+
+    def update(self, pad_index, proxy):
+        """
+        Keep the last proxy of a source for the motion score of its next inferred frame.
+
+        Args:
+            pad_index (int): Source of the proxy.
+            proxy (np.ndarray): ``H x W`` uint8 gray frame; it is copied, so it may be a view
+                of a buffer that is unmapped afterwards.
+        """
+        current = proxy.astype(np.int16)
+        with self._lock:
+            schedule = self._schedules.get(pad_index)
+            if schedule is not None:
+                schedule.latest = current
+
+    def observe(self, pad_index, detections=0):
+        """
+        Update the interval of a source with an inferred frame.
+
+        Args:
+            pad_index (int): Source of the frame.
+            detections (int): Detections of the alert class that count (inside the ROI).
+
+        Returns:
+            int: The interval of the source after this frame.
+        """
+        with self._lock:
+            schedule = self._schedules.get(pad_index)
+            if schedule is None:
+                return self.min_interval
+            score = 0.0
+            proxy = schedule.latest
+            # Sin proxy nuevo desde el frame inferido anterior no hay movimiento que medir
+            if proxy is not None and proxy is not schedule.previous:
+                if schedule.previous is not None and schedule.previous.shape == proxy.shape:
+                    if schedule.mask is None and self.rois is not None:
+                        schedule.mask = self.rois.mask(schedule.camera_id, proxy.shape[1], proxy.shape[0])
+                    score = motion_score(schedule.previous, proxy, schedule.mask, self.pixel_threshold)
+                schedule.previous = proxy
+            schedule.score = score
+
+            active = detections > 0 or score >= self.motion_high
+            if active or score >= self.motion_low:
+                schedule.quiet = 0
+            else:
+                schedule.quiet += 1
+            interval = self.next_interval(schedule.interval, active, schedule.quiet, self.min_interval,
+                                          schedule.max_interval, self.relax_after)
+            if interval > schedule.interval:
+                schedule.quiet = 0
+            elif interval < schedule.interval:
+                # La actividad no espera a que termine el intervalo en curso
+                schedule.countdown = min(schedule.countdown, interval)
+            schedule.interval = interval
+            return interval
+
+    @staticmethod
+    def next_interval(interval, active, quiet, min_interval, max_interval, relax_after):
+        """
+        Interval of a source after an inferred frame.
+
+        Args:
+            interval (int): Current interval.
+            active (bool): The frame had detections or a motion score above ``motion_high``.
+            quiet (int): Consecutive quiet inferred frames, including this one.
+
+        Returns:
+            int: The new interval.
+        """
+        if active:
+            return min(min_interval, max_interval)
+        if quiet >= relax_after and interval < max_interval:
+            return interval + 1
+        return interval
+
+    def report(self):
+        """
+        Returns:
+            list: One dict per source with its interval, frames offered, inferred and
+            skipped, and the fraction of inferences saved.
+        """
+        with self._lock:
+            schedules = sorted(self._schedules.values(), key=lambda schedule: schedule.pad_index)
+        return [{
+            'camera_id': schedule.camera_id,
+            'interval': schedule.interval,
+            'offered': schedule.offered,
+            'inferred': schedule.inferred,
+            'skipped': schedule.skipped,
+            'saved_ratio': schedule.skipped / schedule.offered if schedule.offered else 0.0,
+            'score': schedule.score,
+        } for schedule in schedules]
+
+    def _totals(self, attribute):
+        with self._lock:
+            schedules = list(self._schedules.values())
+        return {(schedule.camera_id,): getattr(schedule, attribute) for schedule in schedules}
+
+def format_report(rows):
+    """
+    One line per camera, for the logs.
+    """
+    return "\n".join(f"cámara {row['camera_id']}: intervalo={row['interval']} ofrecidos={row['offered']} "
+                     f"inferidos={row['inferred']} ahorrados={row['skipped']} ({row['saved_ratio']:.1%})"
+                     for row in rows)
+
+def add_gate_probe(Gst, pad, pad_index, gates):
+    """
+    Drop the frames of source ``pad_index`` that any of ``gates`` holds back.
+
+    Args:
+        Gst (module): The ``gi.repository.Gst`` module.
+        pad (Gst.Pad): Sink pad of the source queue, ahead of the streammux.
+        pad_index (int): Streammux pad of the source.
+        gates (sequence): Objects with ``should_infer(pad_index)`` (``MotionGate``,
+            ``InferenceScheduler``), asked in order; a gate is only asked about the
+            frames the previous ones let through.
+    """
+    gates = tuple(gates)
+
+    def on_buffer(_pad, info):
+        for gate in gates:
+            if not gate.should_infer(pad_index):
+                return Gst.PadProbeReturn.DROP
+        return Gst.PadProbeReturn.OK
+
+    return pad.add_probe(Gst.PadProbeType.BUFFER, on_buffer)
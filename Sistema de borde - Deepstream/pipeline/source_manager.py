@@ -0,0 +1,349 @@
+#!/usr/bin/env python3
+
+"""
+Runtime management of the pipeline sources.
+
+Cameras can be attached to and detached from a running pipeline without tearing it
+down. Every source owns a streammux request pad (``sink_<pad_index>``), a source bin,
+a source queue and, with the motion gate or the scheduler, a tee and a motion branch (see
+``pipeline.graph.add_source_spec``). When a source fails (an ERROR posted by its ``uridecodebin``) or
+ends (a ``stream-eos`` message from ``nvstreammux``), only that source is torn down and
+it is reconnected after an exponential backoff, so the other cameras keep running.
+
+The set of cameras can be changed at runtime by editing the camera configuration file
+(see ``utils.camera_config``); ``ConfigWatcher`` polls it and applies the differences.
+
+Attributes:
+    RECONNECT_INITIAL_DELAY (float): Seconds before the first reconnection attempt.
+    RECONNECT_MAX_DELAY (float): Upper bound of the reconnection backoff in seconds.
+    CONFIG_POLL_INTERVAL (int): Seconds between checks of the camera configuration file.
+"""
+
+import os
+import random
+import re
+
+import gi
+
+gi.require_version("Gst", "1.0")
+from gi.repository import Gst, GLib
+
+from common.bus_call import bus_call
+from pipeline.graph import (PipelineSpec, SOURCE_BIN_FACTORY, add_source_spec, link_elements, make_element,
+                            motion_branch_names)
+from pipeline.motion import connect_motion_sink
+from pipeline.scheduling import add_gate_probe
+from pipeline.tracing import add_source_probe
+from utils.camera_config import load_cameras
+from monitoring.logging_handler.logger import logger
+
+RECONNECT_INITIAL_DELAY = 1.0
+RECONNECT_MAX_DELAY = 60.0
+CONFIG_POLL_INTERVAL = 5
+
+SOURCE_BIN_PATTERN = re.compile(r"^source-bin-(\d+)$")
+
+class SourceManager:
+    """
+    Attach, detach and reconnect sources of a running pipeline.
+
+    Args:
+        pipeline (Gst.Pipeline): The running pipeline.
+        streammux (Gst.Element): The streammux every source is linked to.
+        source_states (dict): Per-source state keyed by pad index, shared with the frame engine.
+        source_bin_factory (callable): ``f(pad_index, uri)`` returning a source bin.
+        max_sources (int): Number of streammux pads (and batch size) available.
+        elements (dict): Elements already created for the initial sources, by name.
+        tracer (FrameTracer): If given, every source marks the end of its decode stage
+            (see ``pipeline.tracing``).
+        queue_monitor (QueueMonitor): If given, counts the frames each source queue
+            receives and drops (see ``pipeline.queue_stats``).
+        scheduler (InferenceScheduler): If given, drops the frames of each source that
+            skip inference, ahead of its queue (see ``pipeline.scheduling``).
+        motion_gate (MotionGate): If given, drops the frames of each source while its
+            scene is static, ahead of its queue and the scheduler (see ``pipeline.motion``).
+        motion_proxy (tuple): ``(width, height)`` of the motion branch of the sources
+            attached at runtime; required with ``motion_gate`` or ``scheduler``, which
+            both score the proxies of that branch.
+    """
+
+    def __init__(self, pipeline, streammux, source_states, source_bin_factory, max_sources, elements=None,
+                 tracer=None, queue_monitor=None, scheduler=None, motion_gate=None, motion_proxy=None):
+        self.pipeline = pipeline
+        self.streammux = streammux
+        self.source_states = source_states
+        self.source_bin_factory = source_bin_factory
+        self.max_sources = max_sources
+        self.tracer = tracer
+        self.queue_monitor = queue_monitor
+        self.scheduler = scheduler
+        self.motion_gate = motion_gate
+        self.motion_proxy = motion_proxy if motion_gate is not None or scheduler is not None else None
+        self._sources = {}
+
+        elements = elements or {}
+        for pad_index, state in source_states.items():
+            state.setdefault('failures', 0)
+            state.setdefault('reconnect_id', None)
+            source_bin = elements.get(f"source-bin-{pad_index}")
+            queue_src = elements.get(f"queue_src_{pad_index}")
+            if source_bin is not None and queue_src is not None:
+                branch = tuple(elements[name] for name in motion_branch_names(pad_index) if name in elements)
+                self._sources[pad_index] = (source_bin, queue_src, branch)
+                self._instrument(pad_index, queue_src)
+
+    def cameras(self):
+        """
+        Returns:
+            dict: Currently configured cameras as {camera id: URI}.
+        """
+        return {state['camera_id']: state['uri'] for state in self.source_states.values()}
+
+    def add_source(self, camera_id, uri):
+        """
+        Attach a new camera to the running pipeline.
+
+        Returns:
+            int: The streammux pad index assigned to the camera, or None if every pad is in use.
+        """
+        pad_index = next((i for i in range(self.max_sources) if i not in self.source_states), None)
+        if pad_index is None:
+            logger.error(f"No hay pads libres en el streammux para la cámara {camera_id} (máximo {self.max_sources}).")
+            return None
+
+        self.source_states[pad_index] = {
+            'camera_id': camera_id,
+            'uri': uri,
+            'last_frame_num': -1,
+            'failures': 0,
+            'reconnect_id': None
+        }
+        if not self._attach(pad_index):
+            self._schedule_reconnect(pad_index)
+        logger.info(f"Cámara {camera_id} agregada en el pad {pad_index}.")
+        return pad_index
+
+    def remove_source(self, camera_id):
+        """
+        Detach a camera from the running pipeline and forget it.
+
+        Returns:
+            bool: True if the camera was attached.
+        """
+        pad_index = self.pad_index_of(camera_id)
+        if pad_index is None:
+            return False
+        state = self.source_states.pop(pad_index)
+        if state['reconnect_id'] is not None:
+            GLib.source_remove(state['reconnect_id'])
+        self._detach(pad_index)
+        for gate in (self.motion_gate, self.scheduler):
+            if gate is not None:
+                gate.forget(pad_index)
+        logger.info(f"Cámara {camera_id} retirada del pad {pad_index}.")
+        return True
+
+    def pad_index_of(self, camera_id):
+        for pad_index, state in self.source_states.items():
+            if state['camera_id'] == camera_id:
+                return pad_index
+        return None
+
+    def on_source_failure(self, pad_index, reason):
+        """
+        Tear down a failed source and schedule its reconnection with exponential backoff.
+        """
+        state = self.source_states.get(pad_index)
+        if state is None or state['reconnect_id'] is not None:
+            return
+        logger.error(f"Cámara {state['camera_id']} (pad {pad_index}) desconectada: {reason}")
+        self._detach(pad_index)
+        self._schedule_reconnect(pad_index)
+
+    def _schedule_reconnect(self, pad_index):
+        state = self.source_states[pad_index]
+        state['failures'] += 1
+        delay = min(RECONNECT_INITIAL_DELAY * 2 ** (state['failures'] - 1), RECONNECT_MAX_DELAY)
+        # Jitter para que varias cámaras caídas a la vez no reconecten al mismo tiempo
+        delay *= random.uniform(0.8, 1.2)
+        logger.info(f"Reconectando cámara {state['camera_id']} en {delay:.1f} s (intento {state['failures']}).")
+        state['reconnect_id'] = GLib.timeout_add(int(delay * 1000), self._reconnect, pad_index)
+
+    def _reconnect(self, pad_index):
+        state = self.source_states.get(pad_index)
+        if state is None:
+            return False
+        state['reconnect_id'] = None
+        if not self._attach(pad_index):
+            self._schedule_reconnect(pad_index)
+        return False  # No repetir el timeout de GLib
+
+    def _attach(self, pad_index):
+        state = self.source_states[pad_index]
+        spec = PipelineSpec()
+        bin_name, queue_name = add_source_spec(spec, pad_index, state['uri'], self.motion_proxy)
+        created = {name: self.source_bin_factory(pad_index, state['uri']) if element_spec.factory == SOURCE_BIN_FACTORY
+                   else make_element(Gst, element_spec) for name, element_spec in spec.elements.items()}
+        if any(element is None for element in created.values()):
+            logger.error(f"No fue posible crear la fuente de la cámara {state['camera_id']}.")
+            return False
+
+        for element in created.values():
+            self.pipeline.add(element)
+        queue_src = created[queue_name]
+        self._sources[pad_index] = (created[bin_name], queue_src,
+                                    tuple(created[name] for name in motion_branch_names(pad_index) if name in created))
+        try:
+            for src, dst, sink_pad in spec.links:
+                link_elements(created[src], created.get(dst, self.streammux), sink_pad)
+        except RuntimeError:
+            logger.error(f"No fue posible enlazar la cámara {state['camera_id']} al streammux.")
+            self._detach(pad_index)
+            return False
+
+        self._instrument(pad_index, queue_src)
+        # La fuente al final, cuando todo lo que alimenta ya está en marcha
+        for element in reversed(list(created.values())):
+            element.sync_state_with_parent()
+        return True
+
+    def _detach(self, pad_index):
+        elements = self._sources.pop(pad_index, None)
+        if elements is None:
+            return
+        source_bin, queue_src, branch = elements
+        if self.queue_monitor is not None:
+            self.queue_monitor.unwatch(queue_src.get_name())
+        for element in (source_bin, queue_src) + branch:
+            if element.set_state(Gst.State.NULL) == Gst.StateChangeReturn.ASYNC:
+                element.get_state(Gst.CLOCK_TIME_NONE)
+
+        sinkpad = self.streammux.get_static_pad(f"sink_{pad_index}")
+        if sinkpad is not None:
+            sinkpad.send_event(Gst.Event.new_flush_stop(False))
+            self.streammux.release_request_pad(sinkpad)
+        for element in (source_bin, queue_src) + branch:
+            self.pipeline.remove(element)
+
+    def _instrument(self, pad_index, queue_src):
+        self._watch_first_buffer(pad_index, queue_src)
+        gates = [gate for gate in (self.motion_gate, self.scheduler) if gate is not None]
+        if gates:
+            # Antes de la cola: los frames descartados no ocupan la cola ni el streammux
+            state = self.source_states.get(pad_index)
+            for gate in gates:
+                gate.add(pad_index, state['camera_id'] if state else None)
+            add_gate_probe(Gst, queue_src.get_static_pad("sink"), pad_index, gates)
+            branch = self._sources[pad_index][2]
+            if branch:
+                connect_motion_sink(Gst, branch[-1], pad_index, gates)
+        if self.tracer is not None:
+            # Después de la cola con pérdidas, para que la cuenta de buffers coincida con el frame_num del streammux
+            add_source_probe(Gst, queue_src.get_static_pad("src"), self.tracer, pad_index)
+        if self.queue_monitor is not None:
+            state = self.source_states.get(pad_index)
+            self.queue_monitor.watch(Gst, queue_src, queue_src.get_name(), state['camera_id'] if state else None)
+
+    def _watch_first_buffer(self, pad_index, queue_src):
+        # Sonda de un solo disparo: el primer buffer confirma la conexión y reinicia el backoff
+        def on_first_buffer(pad, info):
+            state = self.source_states.get(pad_index)
+            if state is not None and state['failures']:
+                logger.info(f"Cámara {state['camera_id']} reconectada.")
+                state['failures'] = 0
+            return Gst.PadProbeReturn.REMOVE
+
+        queue_src.get_static_pad("src").add_probe(Gst.PadProbeType.BUFFER, on_first_buffer)
+
+    def apply(self, cameras):
+        """
+        Reconcile the attached sources with the given camera list.
+
+        New cameras are attached, missing ones detached and cameras whose URI changed
+        are re-attached.
+        """
+        current = self.cameras()
+        for camera_id, uri in current.items():
+            if cameras.get(camera_id) != uri:
+                self.remove_source(camera_id)
+        for camera_id, uri in cameras.items():
+            if current.get(camera_id) != uri:
+                self.add_source(camera_id, uri)
+
+def source_index_of(element):
+    """
+    Return the pad index of the source bin that contains ``element``, or None.
+    """
+    while element is not None:
+        match = SOURCE_BIN_PATTERN.match(element.get_name() or "")
+        if match:
+            return int(match.group(1))
+        element = element.get_parent()
+    return None
+
+def source_bus_call(bus, message, loop, manager):
+    """
+    Bus handler that reconnects failed sources instead of stopping the whole pipeline.
+
+    Errors posted by elements inside a source bin and per-stream EOS messages from the
+    streammux are routed to ``manager``; every other message goes to ``bus_call``.
+    """
+    t = message.type
+    if t == Gst.MessageType.ERROR:
+        pad_index = source_index_of(message.src)
+        if pad_index is not None:
+            err, _debug = message.parse_error()
+            manager.on_source_failure(pad_index, err)
+            return True
+    elif t == Gst.MessageType.ELEMENT:
+        struct = message.get_structure()
+        if struct is not None and struct.has_name("stream-eos"):
+            parsed, pad_index = struct.get_uint("stream-id")
+            if parsed:
+                manager.on_source_failure(pad_index, "end of stream")
+            return True
+    return bus_call(bus, message, loop)
+
+class ConfigWatcher:
+    """
+    Poll the camera configuration file and apply its changes to a ``SourceManager``.
+
+    Args:
+        config_path (str): Camera configuration file (YAML or JSON).
+        manager (SourceManager): Manager of the running pipeline.
+        interval (int): Seconds between checks.
+    """
+
+    def __init__(self, config_path, manager, interval=CONFIG_POLL_INTERVAL):
+        self.config_path = config_path
+        self.manager = manager
+        self.interval = interval
+        self._mtime = self._current_mtime()
+        self._timeout_id = None
+
+    def start(self):
+        self._timeout_id = GLib.timeout_add_seconds(self.interval, self._poll)
+
+    def stop(self):
+        if self._timeout_id is not None:
+            GLib.source_remove(self._timeout_id)
+            self._timeout_id = None
+
+    def _current_mtime(self):
+        try:
+            return os.stat(self.config_path).st_mtime
+        except OSError:
+            return None
+
+    def _poll(self):
+        mtime = self._current_mtime()
+        if mtime is not None and mtime != self._mtime:
+            self._mtime = mtime
+            try:
+                cameras = load_cameras(self.config_path)
+            except Exception as e:
+                logger.error(f"Configuración de cámaras inválida, se conserva la actual: {e}")
+            else:
+                logger.info(f"Configuración de cámaras modificada: {self.config_path}")
+                self.manager.apply(cameras)
+        return True
@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+
+"""
+Event-level alert suppression.
+
+The old rate limiter (``utils.should_send_alert``, now only a baseline in
+``benchmarks/bench_alert_suppression.py``) kept one timestamp per camera, so a
+person standing still produced an alert every few seconds while a second person entering
+inside the window was dropped. ``AlertSuppressor`` keeps lightweight tracks of the boxes
+seen on each camera and only lets a frame through when it shows something new:
+
+- a new track (a person not seen before), once it has been seen in ``min_hits`` frames;
+- optionally, a track that moved away from where it was alerted (IoU below ``change_iou``);
+- a track still present after its cooldown expired (periodic reminder).
+
+Tracks are associated by the ``nvtracker`` object id when the pipeline has a tracker and
+by greedy IoU matching otherwise. Tracks not seen for ``max_track_age`` seconds are
+evicted, and each camera keeps at most ``max_tracks`` of them, so memory stays bounded.
+
+Attributes:
+    UNTRACKED_OBJECT_ID (int): ``object_id`` of detections without a tracker id.
+    REASON_NEW, REASON_CHANGE, REASON_COOLDOWN (str): Why an alert was let through.
+"""
+
+import time
+
+import numpy as np
+
+from pipeline.detections import UNTRACKED_OBJECT_ID
+
+REASON_NEW = "new-track"
+REASON_CHANGE = "change"
+REASON_COOLDOWN = "cooldown"
+
+class Track:
+    """
+    A box followed over consecutive frames of one camera.
+
+    Attributes:
+        box (np.ndarray): Last ``[x1, y1, x2, y2]`` box.
+        class_id (int): Detected class.
+        object_id (int): Tracker id, or ``UNTRACKED_OBJECT_ID``.
+        hits (int): Frames in which the track was matched.
+        last_seen (float): Time of the last match.
+        alerted_at (float): Time of the last alert that included the track, or None.
+        alerted_box (np.ndarray): Box at the time of that alert.
+    """
+
+    __slots__ = ('box', 'class_id', 'object_id', 'hits', 'last_seen', 'alerted_at', 'alerted_box')
+
+    def __init__(self, box, class_id, object_id, now):
+        self.box = box
+        self.class_id = class_id
+        self.object_id = object_id
+        self.hits = 1
+        self.last_seen = now
+        self.alerted_at = None
+        self.alerted_box = None
+
+def detection_boxes(detections):
+    """
+    Returns:
+        np.ndarray: ``N x 4`` float array of ``[x1, y1, x2, y2]`` boxes.
+    """
+    left = detections['left'].astype(np.float32)
+    top = detections['top'].astype(np.float32)
+    return np.stack([left, top, left + detections['width'], top + detections['height']], axis=1)
+
+def iou_matrix(a, b):
+    """
+    Pairwise intersection over union of two sets of ``[x1, y1, x2, y2]`` boxes.
+
+    Returns:
+        np.ndarray: ``len(a) x len(b)`` matrix.
+    """
+    x1 = np.maximum(a[:, None, 0], b[None, :, 0])
+    y1 = np.maximum(a[:, None, 1], b[None, :, 1])
+    x2 = np.minimum(a[:, None, 2], b[None, :, 2])
+    y2 = np.minimum(a[:, None, 3], b[None, :, 3])
+    intersection = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    union = area_a[:, None] + area_b[None, :] - intersection
+    return np.where(union > 0, intersection / np.maximum(union, 1e-9), 0.0)
+
+def greedy_match(iou, threshold):
+    """
+    Match rows to columns by decreasing IoU.
+
+    Returns:
+        list: ``(row, column)`` pairs with IoU of at least ``threshold``.
+    """
+    pairs = []
+    if iou.size == 0:
+        return pairs
+    rows, cols = np.nonzero(iou >= threshold)
+    order = np.argsort(-iou[rows, cols], kind='stable')
+    used_rows = set()
+    used_cols = set()
+    for row, col in zip(rows[order].tolist(), cols[order].tolist()):
+        if row in used_rows or col in used_cols:
+            continue
+        used_rows.add(row)
+        used_cols.add(col)
+        pairs.append((row, col))
+    return pairs
+
+class AlertSuppressor:
+    """
+    Decides per frame whether detections deserve an alert.
+
+    Args:
+        cooldown (float): Seconds before a track that is still present is alerted again.
+        class_cooldowns (dict): ``{class_id: seconds}`` overrides of ``cooldown``.
+        camera_cooldowns (dict): ``{camera_id: seconds}`` overrides; they take precedence
+            over the class overrides.
+        min_interval (float): Minimum seconds between two alerts of the same camera. Tracks
+            that arrive inside the interval are alerted on the next frame after it.
+        iou_threshold (float): Minimum IoU to associate a detection with a track.
+        change_iou (float): A track whose box has IoU below this with the box of its last
+            alert counts as a significant change. 0 disables change alerts.
+        min_hits (int): Frames a new track must be seen before it can trigger an alert;
+            filters single-frame false positives.
+        max_track_age (float): Seconds a track survives without being matched.
+        max_tracks (int): Tracks kept per camera; the least recently seen are evicted.
+    """
+
+    def __init__(self, cooldown=120.0, class_cooldowns=None, camera_cooldowns=None, min_interval=1.0,
+                 iou_threshold=0.3, change_iou=0.0, min_hits=2, max_track_age=5.0, max_tracks=64):
+        self.cooldown = cooldown
+        self.class_cooldowns = dict(class_cooldowns or {})
+        self.camera_cooldowns = dict(camera_cooldowns or {})
+        self.min_interval = min_interval
+        self.iou_threshold = iou_threshold
+        self.change_iou = change_iou
+        self.min_hits = min_hits
+        self.max_track_age = max_track_age
+        self.max_tracks = max_tracks
+
+        self._tracks = {}
+        self._last_alert = {}
+        self._counters = {
+            'frames': 0, 'alerts': 0, 'suppressed': 0, 'evicted': 0,
+            REASON_NEW: 0, REASON_CHANGE: 0, REASON_COOLDOWN: 0,
+        }
+        self.last_reasons = []
+
+    def cooldown_for(self, camera_id, class_id):
+        if camera_id in self.camera_cooldowns:
+            return self.camera_cooldowns[camera_id]
+        return self.class_cooldowns.get(class_id, self.cooldown)
+
+    def update(self, camera_id, detections, now=None):
+        """
+        Associate the detections of a frame with the camera's tracks and decide on an alert.
+
+        Args:
+            camera_id (int): Camera the frame belongs to.
+            detections (np.ndarray): Detections of the frame (``pipeline.detections`` layout).
+            now (float): Frame time in seconds; defaults to ``time.monotonic()``.
+
+        Returns:
+            bool: True if the frame must produce an alert. The reasons are left in
+            ``last_reasons``.
+        """
+        now = time.monotonic() if now is None else now
+        tracks = self._tracks.setdefault(camera_id, [])
+        self._counters['frames'] += 1
+
+        # Los tracks vencidos salen antes de emparejar: una persona nueva en el mismo lugar es un track nuevo
+        self._evict(camera_id, tracks, now)
+        matched = self._associate(tracks, detections, now)
+
+        reasons = []
+        for track in matched:
+            if track.hits < self.min_hits:
+                continue
+            if track.alerted_at is None:
+                reasons.append(REASON_NEW)
+            elif now - track.alerted_at >= self.cooldown_for(camera_id, track.class_id):
+                reasons.append(REASON_COOLDOWN)
+            elif self.change_iou and iou_matrix(track.box[None], track.alerted_box[None])[0, 0] < self.change_iou:
+                reasons.append(REASON_CHANGE)
+
+        if reasons and now - self._last_alert.get(camera_id, -np.inf) < self.min_interval:
+            reasons = []
+
+        self.last_reasons = sorted(set(reasons))
+        if not reasons:
+            if len(detections):
+                self._counters['suppressed'] += 1
+            return False
+
+        # Todos los tracks visibles quedan cubiertos por esta alerta
+        for track in matched:
+            if track.hits >= self.min_hits:
+                track.alerted_at = now
+                track.alerted_box = track.box
+        self._last_alert[camera_id] = now
+        self._counters['alerts'] += 1
+        for reason in self.last_reasons:
+            self._counters[reason] += 1
+        return True
+
+    def forget(self, camera_id):
+        """
+        Drop the state of a camera (e.g. when it is detached from the pipeline).
+        """
+        self._tracks.pop(camera_id, None)
+        self._last_alert.pop(camera_id, None)
+
+    def stats(self):
+        """
+        Returns:
+            dict: Frames seen, alerts sent and suppressed, alerts per reason, evicted tracks
+            and tracks currently alive.
+        """
+        stats = dict(self._counters)
+        stats['tracks'] = sum(len(tracks) for tracks in self._tracks.values())
+        return stats
+
+    def _associate(self, tracks, detections, now):
+        if len(detections) == 0:
+            return []
+        boxes = detection_boxes(detections)
+        class_ids = detections['class_id'].tolist()
+        object_ids = detections['object_id'].tolist()
+        matched = [None] * len(detections)
+
+        # Con nvtracker el id del objeto identifica el track directamente
+        by_object_id = {track.object_id: track for track in tracks if track.object_id != UNTRACKED_OBJECT_ID}
+        for i, object_id in enumerate(object_ids):
+            if object_id != UNTRACKED_OBJECT_ID and object_id in by_object_id:
+                matched[i] = by_object_id[object_id]
+
+        # Sin id, emparejar por IoU con los tracks restantes de la misma clase
+        free_tracks = [track for track in tracks if track not in matched]
+        pending = [i for i in range(len(detections)) if matched[i] is None]
+        if free_tracks and pending:
+            iou = iou_matrix(np.stack([track.box for track in free_tracks]), boxes[pending])
+            same_class = np.array([[track.class_id == class_ids[i] for i in pending] for track in free_tracks])
+            for row, col in greedy_match(np.where(same_class, iou, 0.0), self.iou_threshold):
+                matched[pending[col]] = free_tracks[row]
+
+        for i, track in enumerate(matched):
+            if track is None:
+                track = Track(boxes[i], class_ids[i], object_ids[i], now)
+                tracks.append(track)
+                matched[i] = track
+            else:
+                track.box = boxes[i]
+                track.hits += 1
+                track.last_seen = now
+                if object_ids[i] != UNTRACKED_OBJECT_ID:
+                    track.object_id = object_ids[i]
+        return matched
+
+    def _evict(self, camera_id, tracks, now):
+        alive = [track for track in tracks if now - track.last_seen <= self.max_track_age]
+        if len(alive) > self.max_tracks:
+            alive.sort(key=lambda track: track.last_seen, reverse=True)
+            del alive[self.max_tracks:]
+        evicted = len(tracks) - len(alive)
+        if evicted:
+            self._counters['evicted'] += evicted
+            tracks[:] = alive
@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+
+"""
+Per-frame latency tracing, from capture to alert acknowledgement.
+
+Every stage a frame goes through records an event keyed by ``(pad_index, frame_num)``
+in a fixed-size ring buffer, so tracing a pipeline that runs for days uses bounded
+memory and only the most recent events are kept. Recording is a tuple store into a
+preallocated list, cheap enough to run on the GStreamer streaming thread.
+
+Most stages only know when a frame *leaves* them (a pad probe after the element, the
+appsink callback, the end of the alert decision): they record a mark and the stage is
+taken to start where the previous stage of the same frame ended. Stages timed on their
+own (image encoding and the HTTP request on the dispatcher threads) record both ends.
+``build_spans`` turns the events into spans; ``chrome_trace`` exports them in the Chrome
+trace event format (opened by ``chrome://tracing`` and https://ui.perfetto.dev, one
+process per camera and one row per stage) and ``stage_summary`` gives the latency
+percentiles of every stage and of the whole path, to see which stage eats the budget.
+
+Timestamps are ``time.time_ns()`` so the RTSP NTP capture time that streammux attaches
+(``frame_meta.ntp_timestamp``) can be recorded as the ``capture`` stage and the decode
+stage starts at the camera. Buffer PTS are kept with each event to check the
+association of frames before and after the streammux.
+
+The stage names live in ``common.trace_stages`` so that ``utils`` can time its stages
+without depending on the pipeline; they are re-exported here.
+
+Attributes:
+    EVENT_DTYPE (np.dtype): Row layout of the events returned by ``FrameTracer.events``.
+    SPAN_DTYPE (np.dtype): Row layout of the spans returned by ``build_spans``.
+    NO_TIME (int): Start time of a mark (unknown until the spans are built) and PTS of an
+        event without one.
+"""
+
+import itertools
+import json
+import threading
+import time
+
+import numpy as np
+
+from common.trace_stages import (STAGE_CAPTURE, STAGE_DECODE, STAGE_STREAMMUX, STAGE_PGIE, STAGE_CONVERT,
+                                 STAGE_APPSINK, STAGE_DECISION, STAGE_ENCODE, STAGE_SEND, STAGES)
+
+STAGE_INDEX = {stage: i for i, stage in enumerate(STAGES)}
+
+NO_TIME = -1
+
+# GStreamer marca los buffers sin PTS con GST_CLOCK_TIME_NONE
+CLOCK_TIME_NONE = 2 ** 64 - 1
+
+EVENT_DTYPE = np.dtype([
+    ('pad_index', np.int32),
+    ('frame_num', np.int64),
+    ('stage', np.uint8),
+    ('start_ns', np.int64),
+    ('end_ns', np.int64),
+    ('pts_ns', np.int64),
+])
+
+# Un span es un evento con el inicio resuelto
+SPAN_DTYPE = EVENT_DTYPE
+
+class FrameTracer:
+    """
+    Bounded ring buffer of per-frame stage events.
+
+    Args:
+        capacity (int): Events kept; older ones are overwritten.
+        sample_every (int): Trace only frames whose ``frame_num`` is a multiple of this
+            value (1 traces every frame).
+        clock (callable): Time source in nanoseconds.
+    """
+
+    def __init__(self, capacity=16384, sample_every=1, clock=time.time_ns):
+        if capacity < 1 or sample_every < 1:
+            raise ValueError("capacity and sample_every must be positive")
+        self.capacity = capacity
+        self.sample_every = sample_every
+        self.clock = clock
+        self._events = [None] * capacity
+        self._written = 0
+        self._lock = threading.Lock()
+
+    def traced(self, frame_num):
+        """
+        Returns:
+            bool: True if the frame is sampled.
+        """
+        return frame_num % self.sample_every == 0
+
+    def mark(self, pad_index, frame_num, stage, pts_ns=NO_TIME, now_ns=None):
+        """
+        Record that a frame left ``stage``; the stage started when the previous one ended.
+        """
+        if frame_num % self.sample_every:
+            return
+        end_ns = self.clock() if now_ns is None else now_ns
+        self._store((pad_index, frame_num, STAGE_INDEX[stage], NO_TIME, end_ns, pts_ns))
+
+    def span(self, pad_index, frame_num, stage, start_ns, end_ns, pts_ns=NO_TIME):
+        """
+        Record a stage whose start and end were both measured.
+        """
+        if frame_num % self.sample_every:
+            return
+        self._store((pad_index, frame_num, STAGE_INDEX[stage], start_ns, end_ns, pts_ns))
+
+    def stage_timer(self, pad_index, frame_num):
+        """
+        Callable ``f(stage, start_ns, end_ns)`` that records spans of one frame, for code
+        that does not know the frame key (e.g. the alert sender).
+        """
+        def record(stage, start_ns, end_ns):
+            self.span(pad_index, frame_num, stage, start_ns, end_ns)
+        return record
+
+    def events(self):
+        """
+        Returns:
+            np.ndarray: The events currently held, oldest first, as ``EVENT_DTYPE``.
+        """
+        with self._lock:
+            written = self._written
+            events = list(self._events)
+        if written > self.capacity:
+            start = written % self.capacity
+            events = events[start:] + events[:start]
+        events = [event for event in events if event is not None]
+        return np.array(events, dtype=EVENT_DTYPE) if events else np.empty(0, dtype=EVENT_DTYPE)
+
+    def clear(self):
+        with self._lock:
+            self._events = [None] * self.capacity
+            self._written = 0
+
+    def _store(self, event):
+        with self._lock:
+            self._events[self._written % self.capacity] = event
+            self._written += 1
+
+def build_spans(events):
+    """
+    Turn stage events into spans.
+
+    Events of the same frame are ordered by stage; a mark starts where the previous stage
+    of its frame ended. Marks without a previous stage (the frame's earlier events were
+    overwritten, or the first traced stage has no start) are dropped.
+
+    Args:
+        events (np.ndarray): Events as ``EVENT_DTYPE`` (see ``FrameTracer.events``).
+
+    Returns:
+        np.ndarray: Spans as ``SPAN_DTYPE``, grouped by frame in stage order.
+    """
+    if len(events) == 0:
+        return np.empty(0, dtype=SPAN_DTYPE)
+    order = np.lexsort((events['end_ns'], events['stage'], events['frame_num'], events['pad_index']))
+    events = events[order]
+
+    start = events['start_ns'].copy()
+    same_frame = np.zeros(len(events), dtype=bool)
+    same_frame[1:] = (events['pad_index'][1:] == events['pad_index'][:-1]) & \
+                     (events['frame_num'][1:] == events['frame_num'][:-1])
+    previous_end = np.empty(len(events), dtype=np.int64)
+    previous_end[0] = NO_TIME
+    previous_end[1:] = events['end_ns'][:-1]
+    marks = start == NO_TIME
+    start[marks] = np.where(same_frame[marks], previous_end[marks], NO_TIME)
+
+    # La captura es un instante (el timestamp NTP de la cámara): solo sirve como inicio del decode
+    keep = (start != NO_TIME) & (events['stage'] != STAGE_INDEX[STAGE_CAPTURE])
+    spans = np.empty(int(keep.sum()), dtype=SPAN_DTYPE)
+    for name in ('pad_index', 'frame_num', 'stage', 'end_ns', 'pts_ns'):
+        spans[name] = events[name][keep]
+    spans['start_ns'] = start[keep]
+    return spans
+
+def chrome_trace(spans, camera_names=None):
+    """
+    Spans in the Chrome trace event format.
+
+    Each camera is a process and each stage a thread, so the frames of one camera line
+    up stage by stage. Times are microseconds since the first span.
+
+    Args:
+        spans (np.ndarray): Spans as ``SPAN_DTYPE``.
+        camera_names (dict): Optional display name of each pad index.
+
+    Returns:
+        dict: ``{"traceEvents": [...], "displayTimeUnit": "ms"}``, ready for ``json.dump``.
+    """
+    camera_names = camera_names or {}
+    trace_events = []
+    origin = int(spans['start_ns'].min()) if len(spans) else 0
+
+    for pad_index in np.unique(spans['pad_index']).tolist():
+        trace_events.append({'name': "process_name", 'ph': "M", 'pid': pad_index,
+                             'args': {'name': camera_names.get(pad_index, f"camera {pad_index}")}})
+        for stage_index, stage in enumerate(STAGES):
+            trace_events.append({'name': "thread_name", 'ph': "M", 'pid': pad_index, 'tid': stage_index,
+                                 'args': {'name': stage}})
+
+    for pad_index, frame_num, stage, start_ns, end_ns, pts_ns in spans.tolist():
+        event = {
+            'name': STAGES[stage],
+            'cat': "frame",
+            'ph': "X",
+            'pid': pad_index,
+            'tid': stage,
+            'ts': (start_ns - origin) / 1e3,
+            'dur': (end_ns - start_ns) / 1e3,
+            'args': {'frame_num': frame_num},
+        }
+        if pts_ns != NO_TIME:
+            event['args']['pts_ns'] = pts_ns
+        trace_events.append(event)
+    return {'traceEvents': trace_events, 'displayTimeUnit': "ms"}
+
+def write_chrome_trace(path, spans, camera_names=None):
+    with open(path, "w") as f:
+        json.dump(chrome_trace(spans, camera_names), f)
+
+def stage_summary(spans, quantiles=(0.5, 0.9, 0.99)):
+    """
+    Latency percentiles of each stage and of the whole traced path of a frame.
+
+    Returns:
+        dict: ``{stage: {'count', 'p50_ms', 'p90_ms', 'p99_ms', 'max_ms'}}`` for every stage
+        with spans, plus 'total' (first start to last end of each frame).
+    """
+    def describe(durations_ns):
+        durations = durations_ns / 1e6
+        values = np.quantile(durations, quantiles)
+        stats = {'count': len(durations)}
+        stats.update({f"p{round(q * 100)}_ms": float(value) for q, value in zip(quantiles, values)})
+        stats['max_ms'] = float(durations.max())
+        return stats
+
+    summary = {}
+    if len(spans) == 0:
+        return summary
+    durations = spans['end_ns'] - spans['start_ns']
+    for stage_index in np.unique(spans['stage']).tolist():
+        summary[STAGES[stage_index]] = describe(durations[spans['stage'] == stage_index])
+
+    # Spans agrupados por frame (build_spans los ordena así): inicio y fin de cada grupo
+    boundaries = np.flatnonzero((spans['pad_index'][1:] != spans['pad_index'][:-1]) |
+                                (spans['frame_num'][1:] != spans['frame_num'][:-1])) + 1
+    first = np.concatenate(([0], boundaries))
+    summary['total'] = describe(np.maximum.reduceat(spans['end_ns'], first) -
+                                np.minimum.reduceat(spans['start_ns'], first))
+    return summary
+
+def format_summary(summary):
+    """
+    One line per stage, for the logs.
+    """
+    lines = []
+    for stage, stats in summary.items():
+        lines.append(f"{stage:10s} n={stats['count']:6d} p50={stats['p50_ms']:8.2f} ms "
+                     f"p90={stats['p90_ms']:8.2f} ms p99={stats['p99_ms']:8.2f} ms max={stats['max_ms']:8.2f} ms")
+    return "\n".join(lines)
+
+def buffer_pts(buffer):
+    """
+    PTS of a ``Gst.Buffer`` in nanoseconds, or ``NO_TIME``.
+    """
+    pts = buffer.pts
+    return NO_TIME if pts == CLOCK_TIME_NONE else pts
+
+def add_source_probe(Gst, pad, tracer, pad_index, stage=STAGE_DECODE):
+    """
+    Mark ``stage`` for every buffer of one source crossing ``pad``.
+
+    Before the streammux buffers have no frame metadata; the frame number is the count of
+    buffers that crossed the pad, which matches the ``frame_num`` the streammux assigns
+    as long as the pad is placed after any element that drops buffers.
+
+    Returns:
+        int: The probe id.
+    """
+    frame_numbers = itertools.count()
+
+    def on_buffer(_pad, info):
+        buffer = info.get_buffer()
+        if buffer is not None:
+            tracer.mark(pad_index, next(frame_numbers), stage, buffer_pts(buffer))
+        return Gst.PadProbeReturn.OK
+
+    return pad.add_probe(Gst.PadProbeType.BUFFER, on_buffer)
+
+def add_batch_probe(Gst, pad, tracer, stage, frames_of_buffer):
+    """
+    Mark ``stage`` for every frame of the batched buffers crossing ``pad``.
+
+    Args:
+        Gst (module): The ``gi.repository.Gst`` module.
+        pad (Gst.Pad): Pad after the stage (e.g. the src pad of the pgie).
+        tracer (FrameTracer): Tracer receiving the marks.
+        stage (str): Stage that ends at ``pad``.
+        frames_of_buffer (callable): ``f(buffer)`` yielding ``(pad_index, frame_num,
+            pts_ns, ntp_ns)`` for each frame of the batch (read from the batch metadata by
+            the caller, so this module does not depend on pyds). ``ntp_ns`` is 0 when the
+            capture time is unknown.
+
+    Returns:
+        int: The probe id.
+    """
+    record_capture = stage == STAGE_STREAMMUX
+
+    def on_buffer(_pad, info):
+        buffer = info.get_buffer()
+        if buffer is None:
+            return Gst.PadProbeReturn.OK
+        now_ns = tracer.clock()
+        for pad_index, frame_num, pts_ns, ntp_ns in frames_of_buffer(buffer):
+            if record_capture and ntp_ns:
+                tracer.span(pad_index, frame_num, STAGE_CAPTURE, ntp_ns, ntp_ns, pts_ns)
+            tracer.mark(pad_index, frame_num, stage, pts_ns, now_ns)
+        return Gst.PadProbeReturn.OK
+
+    return pad.add_probe(Gst.PadProbeType.BUFFER, on_buffer)
@@ -0,0 +1,377 @@
+"""
+Cola persistente de alertas (store-and-forward).
+
+Cada alerta se guarda en una base SQLite en modo WAL antes de enviarse y solo se marca
+como confirmada cuando el servidor responde con éxito. Si el enlace está caído las
+alertas permanecen en disco y un hilo de reenvío las despacha en orden de llegada cuando
+el servidor vuelve a responder, opcionalmente agrupando varias alertas por solicitud.
+
+El tamaño de la cola se limita por bytes y por antigüedad: cuando se supera alguno de los
+límites se descartan primero las alertas pendientes más antiguas.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+
+from monitoring.logging_handler.logger import logger
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS alerts (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    created_at REAL NOT NULL,
+    camera_id INTEGER,
+    content_type TEXT NOT NULL,
+    body BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    acked_at REAL
+);
+CREATE INDEX IF NOT EXISTS alerts_pending ON alerts (id) WHERE acked_at IS NULL;
+"""
+
+JSON_CONTENT_TYPE = "application/json"
+
+
+class SpooledAlert:
+    """
+    Alerta leída de la cola.
+
+    Parameters:
+        alert_id (int): Identificador (orden de llegada).
+        created_at (float): Instante (epoch) en que se guardó.
+        camera_id (int): Cámara de origen.
+        content_type (str): Content-Type del cuerpo.
+        body (bytes): Cuerpo de la solicitud tal como se generó.
+        attempts (int): Intentos de envío realizados, incluyendo el actual.
+    """
+
+    __slots__ = ('alert_id', 'created_at', 'camera_id', 'content_type', 'body', 'attempts')
+
+    def __init__(self, alert_id, created_at, camera_id, content_type, body, attempts):
+        self.alert_id = alert_id
+        self.created_at = created_at
+        self.camera_id = camera_id
+        self.content_type = content_type
+        self.body = bytes(body)
+        self.attempts = attempts
+
+
+class AlertSpool:
+    """
+    Cola de alertas en disco, segura para varios hilos.
+
+    Las alertas en envío se reservan en memoria (``claim``) para que el hilo que acaba de
+    generar una alerta y el hilo de reenvío no la manden dos veces.
+
+    Parameters:
+        path (str): Ruta de la base SQLite.
+        max_bytes (int): Tamaño máximo de las alertas pendientes; se descartan las más antiguas.
+        max_age (float): Antigüedad máxima en segundos de una alerta pendiente.
+        synchronous (str): Modo ``PRAGMA synchronous``; 'FULL' sobrevive a cortes de energía
+            a costa de un fsync por alerta, 'NORMAL' solo a caídas del proceso.
+    """
+
+    def __init__(self, path, max_bytes=512 * 1024 * 1024, max_age=7 * 24 * 3600, synchronous="FULL"):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.path = path
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._in_flight = set()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(f"PRAGMA synchronous={synchronous}")
+        self._db.executescript(SCHEMA)
+
+        self._counters = {'appended': 0, 'acked': 0, 'evicted_age': 0, 'evicted_size': 0}
+        pending = self.pending_count()
+        if pending:
+            logger.info(f"Cola de alertas {path}: {pending} alertas pendientes de una ejecución anterior.")
+
+    def append(self, camera_id, body, content_type=JSON_CONTENT_TYPE):
+        """
+        Guarda una alerta antes de enviarla.
+
+        Returns:
+            int: Identificador de la alerta.
+        """
+        with self._lock:
+            cursor = self._db.execute(
+                "INSERT INTO alerts (created_at, camera_id, content_type, body, size) VALUES (?, ?, ?, ?, ?)",
+                (time.time(), camera_id, content_type, sqlite3.Binary(body), len(body)),
+            )
+            self._counters['appended'] += 1
+            self._evict_size()
+            return cursor.lastrowid
+
+    def claim(self, alert_id):
+        """
+        Reserva una alerta recién guardada para enviarla de inmediato.
+
+        La reserva solo se concede si no hay alertas pendientes más antiguas esperando
+        reenvío; en ese caso la alerta debe esperar su turno en el hilo de reenvío.
+
+        Returns:
+            bool: True si la alerta quedó reservada para el llamador.
+        """
+        with self._lock:
+            older = self._db.execute(
+                "SELECT id FROM alerts WHERE acked_at IS NULL AND id < ? ORDER BY id LIMIT ?",
+                (alert_id, len(self._in_flight) + 1),
+            ).fetchall()
+            if any(row[0] not in self._in_flight for row in older):
+                return False
+            self._in_flight.add(alert_id)
+            self._db.execute("UPDATE alerts SET attempts = attempts + 1 WHERE id = ?", (alert_id,))
+            return True
+
+    def claim_batch(self, limit, max_bytes=None):
+        """
+        Reserva las alertas pendientes más antiguas que no están en envío.
+
+        Parameters:
+            limit (int): Número máximo de alertas.
+            max_bytes (int): Tamaño máximo acumulado; siempre se retorna al menos una alerta.
+
+        Returns:
+            list: ``SpooledAlert`` en orden de llegada.
+        """
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT id, created_at, camera_id, content_type, body, attempts FROM alerts "
+                "WHERE acked_at IS NULL ORDER BY id LIMIT ?",
+                (limit + len(self._in_flight),),
+            ).fetchall()
+
+            alerts = []
+            total = 0
+            for row in rows:
+                if row[0] in self._in_flight:
+                    continue
+                if alerts and (len(alerts) >= limit or (max_bytes and total + len(row[4]) > max_bytes)):
+                    break
+                alerts.append(SpooledAlert(row[0], row[1], row[2], row[3], row[4], row[5] + 1))
+                total += len(row[4])
+
+            ids = [alert.alert_id for alert in alerts]
+            self._in_flight.update(ids)
+            self._db.executemany("UPDATE alerts SET attempts = attempts + 1 WHERE id = ?", [(i,) for i in ids])
+            return alerts
+
+    def ack(self, alert_ids):
+        """
+        Marca alertas como confirmadas por el servidor y libera su reserva.
+        """
+        with self._lock:
+            now = time.time()
+            self._db.executemany("UPDATE alerts SET acked_at = ? WHERE id = ?", [(now, i) for i in alert_ids])
+            self._in_flight.difference_update(alert_ids)
+            self._counters['acked'] += len(alert_ids)
+
+    def release(self, alert_ids):
+        """
+        Libera la reserva de alertas que no se pudieron enviar; quedan pendientes.
+        """
+        with self._lock:
+            self._in_flight.difference_update(alert_ids)
+
+    def evict(self):
+        """
+        Borra las alertas confirmadas y descarta las pendientes que superan los límites
+        de antigüedad y tamaño.
+
+        Returns:
+            int: Número de alertas pendientes descartadas.
+        """
+        with self._lock:
+            self._db.execute("DELETE FROM alerts WHERE acked_at IS NOT NULL")
+            evicted = 0
+            if self.max_age:
+                expired = [row[0] for row in self._db.execute(
+                    "SELECT id FROM alerts WHERE acked_at IS NULL AND created_at < ?",
+                    (time.time() - self.max_age,),
+                ) if row[0] not in self._in_flight]
+                self._delete(expired)
+                self._counters['evicted_age'] += len(expired)
+                evicted += len(expired)
+            evicted += self._evict_size()
+        if evicted:
+            logger.info(f"Cola de alertas: {evicted} alertas pendientes descartadas por antigüedad o tamaño.")
+        return evicted
+
+    def pending_count(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM alerts WHERE acked_at IS NULL").fetchone()[0]
+
+    def stats(self):
+        """
+        Retorna los contadores de la cola.
+
+        Returns:
+            dict: Alertas guardadas, confirmadas y descartadas, y las pendientes con su
+            tamaño total y la antigüedad en segundos de la más antigua.
+        """
+        with self._lock:
+            pending, pending_bytes, oldest = self._db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0), MIN(created_at) FROM alerts WHERE acked_at IS NULL"
+            ).fetchone()
+            stats = dict(self._counters)
+            stats['in_flight'] = len(self._in_flight)
+        stats['pending'] = pending
+        stats['pending_bytes'] = pending_bytes
+        stats['oldest_age'] = time.time() - oldest if oldest is not None else 0.0
+        return stats
+
+    def close(self):
+        with self._lock:
+            self._db.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            self._db.close()
+
+    def _evict_size(self):
+        if not self.max_bytes:
+            return 0
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM alerts WHERE acked_at IS NULL").fetchone()[0]
+        if total <= self.max_bytes:
+            return 0
+
+        doomed = []
+        for alert_id, size in self._db.execute("SELECT id, size FROM alerts WHERE acked_at IS NULL ORDER BY id"):
+            if total <= self.max_bytes:
+                break
+            if alert_id in self._in_flight:
+                continue
+            doomed.append(alert_id)
+            total -= size
+        self._delete(doomed)
+        self._counters['evicted_size'] += len(doomed)
+        return len(doomed)
+
+    def _delete(self, alert_ids):
+        self._db.executemany("DELETE FROM alerts WHERE id = ?", [(i,) for i in alert_ids])
+
+
+class SpoolForwarder:
+    """
+    Hilo que reenvía en orden las alertas pendientes de la cola.
+
+    Mientras haya alertas pendientes las envía sin pausa; al primer fallo se detiene (el
+    enlace probablemente está caído) y espera con retroceso exponencial antes de volver a
+    intentar, a partir de la misma alerta.
+
+    Parameters:
+        spool (AlertSpool): Cola de alertas.
+        send_one (callable): ``f(SpooledAlert) -> bool``; envía una alerta.
+        send_batch (callable): ``f(list[SpooledAlert]) -> bool``; envía varias alertas JSON en
+            una sola solicitud. None desactiva el envío agrupado.
+        batch_size (int): Alertas máximas por solicitud agrupada.
+        batch_max_bytes (int): Tamaño máximo de una solicitud agrupada.
+        interval (float): Segundos entre revisiones de la cola cuando no hay fallos.
+        max_interval (float): Espera máxima tras fallos consecutivos.
+    """
+
+    def __init__(self, spool, send_one, send_batch=None, batch_size=20, batch_max_bytes=8 * 1024 * 1024,
+                 interval=5.0, max_interval=60.0):
+        self.spool = spool
+        self.send_one = send_one
+        self.send_batch = send_batch
+        self.batch_size = batch_size if send_batch else 1
+        self.batch_max_bytes = batch_max_bytes
+        self.interval = interval
+        self.max_interval = max_interval
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._counters = {'replayed': 0, 'batches': 0, 'failures': 0}
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="alert-spool-forwarder", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def wake(self):
+        """
+        Solicita revisar la cola sin esperar al siguiente intervalo.
+        """
+        self._wake.set()
+
+    def stats(self):
+        return dict(self._counters)
+
+    def flush(self):
+        """
+        Envía alertas pendientes hasta vaciar la cola o encontrar un fallo.
+
+        Returns:
+            bool: True si la cola quedó vacía, False si un envío falló.
+        """
+        while not self._stop.is_set():
+            alerts = self.spool.claim_batch(self.batch_size, self.batch_max_bytes)
+            if not alerts:
+                return True
+            if not self._send(alerts):
+                self._counters['failures'] += 1
+                return False
+        return False
+
+    def _send(self, alerts):
+        if len(alerts) > 1 and all(alert.content_type == JSON_CONTENT_TYPE for alert in alerts):
+            try:
+                ok = self.send_batch(alerts)
+            except Exception as e:
+                logger.error(f"Error reenviando {len(alerts)} alertas de la cola: {e}")
+                ok = False
+            if ok:
+                self.spool.ack([alert.alert_id for alert in alerts])
+                self._counters['replayed'] += len(alerts)
+                self._counters['batches'] += 1
+                return True
+            self.spool.release([alert.alert_id for alert in alerts])
+            return False
+
+        # Uno por uno, en orden; al primer fallo se liberan las restantes
+        for i, alert in enumerate(alerts):
+            try:
+                ok = self.send_one(alert)
+            except Exception as e:
+                logger.error(f"Error reenviando la alerta {alert.alert_id} de la cola: {e}")
+                ok = False
+            if not ok:
+                self.spool.release([a.alert_id for a in alerts[i:]])
+                return False
+            self.spool.ack([alert.alert_id])
+            self._counters['replayed'] += 1
+        return True
+
+    def _run(self):
+        delay = self.interval
+        while not self._stop.is_set():
+            self._wake.wait(delay)
+            self._wake.clear()
+            if self._stop.is_set():
+                break
+            self.spool.evict()
+            if self.flush():
+                delay = self.interval
+            else:
+                delay = min(self.max_interval, delay * 2)
+                logger.info(f"Reenvío de alertas fallido; siguiente intento en {delay:.0f} s. "
+                            f"Pendientes: {self.spool.pending_count()}")
+
+
+def json_batch_body(alerts):
+    """
+    Une los cuerpos JSON de varias alertas en ``{"alerts": [...]}`` sin volver a
+    decodificarlos.
+    """
+    return b'{"alerts":[' + b",".join(alert.body for alert in alerts) + b"]}"
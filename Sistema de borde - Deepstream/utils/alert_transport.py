@@ -0,0 +1,137 @@
+from monitoring.logging_handler.logger import logger
+from collections import deque
+import importlib.util
+import random
+import threading
+import time
+import httpx
+
+# HTTP/2 solo está disponible si el paquete opcional 'h2' está instalado (pip install httpx[http2])
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+class AlertTransport:
+    """
+    Cliente HTTP persistente para el envío de alertas.
+
+    Mantiene un único httpx.Client compartido por todos los hilos del despachador, de modo
+    que las conexiones TCP/TLS se reutilizan (keep-alive) en lugar de abrirse una por alerta.
+    Los reintentos usan espera exponencial con jitter y se registra la latencia de cada
+    solicitud para reportar percentiles.
+
+    Parameters:
+        http2 (bool): Usar HTTP/2 si el paquete 'h2' está disponible.
+        timeout (float): Tiempo máximo en segundos por solicitud.
+        max_connections (int): Conexiones simultáneas máximas del pool.
+        max_keepalive (int): Conexiones ociosas que se mantienen abiertas.
+        keepalive_expiry (float): Segundos que una conexión ociosa permanece abierta.
+        backoff_base (float): Espera base en segundos entre reintentos.
+        backoff_max (float): Espera máxima en segundos entre reintentos.
+        latency_window (int): Número de solicitudes recientes usadas para los percentiles.
+        verify (bool | str): Verificación TLS, o ruta a un bundle de CA.
+    """
+
+    def __init__(self, http2=True, timeout=10.0, max_connections=4, max_keepalive=4, keepalive_expiry=120.0,
+                 backoff_base=0.5, backoff_max=8.0, latency_window=512, verify=True):
+        if http2 and not HTTP2_AVAILABLE:
+            logger.info("Paquete 'h2' no disponible, se usará HTTP/1.1 con keep-alive.")
+            http2 = False
+
+        self.http2 = http2
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.client = httpx.Client(
+            http2=http2,
+            timeout=timeout,
+            verify=verify,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive,
+                keepalive_expiry=keepalive_expiry,
+            ),
+        )
+
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=latency_window)
+        self._counters = {'requests': 0, 'ok': 0, 'errors': 0, 'retries': 0}
+
+    def post(self, url, content, headers_factory, max_retries=3, backoff_base=None, label=""):
+        """
+        Envía una solicitud POST con reintentos.
+
+        Parameters:
+            url (str): URL de destino.
+            content (str | bytes): Cuerpo de la solicitud.
+            headers_factory (callable): Función que retorna los headers; se invoca en cada
+                intento para que un token renovado se use en el reintento.
+            max_retries (int): Número máximo de intentos.
+            backoff_base (float): Espera base para esta solicitud; por defecto la del transporte.
+            label (str): Texto que identifica la alerta en los logs.
+
+        Returns:
+            httpx.Response: La respuesta exitosa (código 2xx), o None si se agotaron los intentos.
+        """
+        for attempt in range(max_retries):
+            if attempt:
+                with self._lock:
+                    self._counters['retries'] += 1
+                time.sleep(self.backoff_delay(attempt, backoff_base))
+
+            start = time.perf_counter()
+            try:
+                response = self.client.post(url, headers=headers_factory(), content=content)
+            except httpx.HTTPError as e:
+                self._record(time.perf_counter() - start, False)
+                logger.error(f"Error sending alert {label} (attempt {attempt + 1}): {e}")
+                continue
+
+            ok = response.is_success
+            self._record(time.perf_counter() - start, ok)
+            if ok:
+                return response
+            logger.error(f"Failed to send alert {label}. Status code: {response.status_code}, Response: {response.text}")
+        return None
+
+    def backoff_delay(self, attempt, backoff_base=None):
+        """
+        Espera exponencial con jitter para el intento ``attempt`` (1 = primer reintento).
+
+        El tope se duplica en cada intento hasta ``backoff_max`` y la espera se elige al azar
+        entre la mitad del tope y el tope, para que varios hilos no reintenten a la vez.
+        """
+        base = self.backoff_base if backoff_base is None else backoff_base
+        cap = min(self.backoff_max, base * 2 ** (attempt - 1))
+        return random.uniform(cap / 2, cap)
+
+    def stats(self):
+        """
+        Retorna los contadores y percentiles de latencia (en milisegundos) de las solicitudes recientes.
+
+        Returns:
+            dict: Contadores de solicitudes y llaves 'p50_ms', 'p90_ms', 'p99_ms' y 'max_ms'.
+        """
+        with self._lock:
+            stats = dict(self._counters)
+            latencies = sorted(self._latencies)
+        stats['http2'] = self.http2
+        for name, q in (('p50_ms', 0.50), ('p90_ms', 0.90), ('p99_ms', 0.99)):
+            stats[name] = percentile(latencies, q) * 1e3 if latencies else None
+        stats['max_ms'] = latencies[-1] * 1e3 if latencies else None
+        return stats
+
+    def close(self):
+        self.client.close()
+
+    def _record(self, latency, ok):
+        with self._lock:
+            self._latencies.append(latency)
+            self._counters['requests'] += 1
+            self._counters['ok' if ok else 'errors'] += 1
+
+def percentile(sorted_values, q):
+    """
+    Percentil por interpolación lineal sobre una lista ya ordenada.
+    """
+    position = (len(sorted_values) - 1) * q
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
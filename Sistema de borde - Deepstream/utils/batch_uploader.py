@@ -0,0 +1,200 @@
+"""
+Envío agrupado de alertas.
+
+Cada detección generaba su propia solicitud POST. ``BatchUploader`` acumula las alertas de
+todas las cámaras durante una ventana configurable (o hasta N alertas o M bytes) y las
+envía en una sola solicitud comprimida. Las alertas de alta prioridad no esperan la
+ventana: se envían de inmediato de forma individual.
+
+Se registran el tamaño de cada lote y la latencia de extremo a extremo de cada alerta
+(desde que se encoló en el despachador hasta que el servidor confirmó el lote), para
+ajustar el compromiso entre latencia y ancho de banda en cada sitio.
+"""
+
+import gzip
+import threading
+import time
+from collections import deque
+
+from monitoring.logging_handler.logger import logger
+from utils.alert_spool import json_batch_body
+from utils.alert_transport import percentile
+
+
+class BatchItem:
+    """
+    Alerta ya codificada a la espera de un lote.
+
+    Parameters:
+        body (bytes): Cuerpo JSON de la alerta.
+        camera_id (int): Cámara de origen.
+        enqueued_at (float): Instante (``time.monotonic``) de la detección, para la latencia.
+        alert_id (int): Identificador en la cola persistente, o None si no está activa.
+    """
+
+    __slots__ = ('body', 'camera_id', 'enqueued_at', 'alert_id')
+
+    def __init__(self, body, camera_id, enqueued_at, alert_id=None):
+        self.body = body
+        self.camera_id = camera_id
+        self.enqueued_at = enqueued_at
+        self.alert_id = alert_id
+
+
+class BatchUploader:
+    """
+    Acumula alertas y las envía en lotes desde un hilo propio.
+
+    Parameters:
+        send_batch (callable): ``f(body, item_count, compressed) -> bool``; envía un lote.
+        window (float): Segundos máximos que una alerta espera a que se complete su lote.
+        max_alerts (int): Alertas por lote; al alcanzarlo el lote se envía sin esperar.
+        max_bytes (int): Bytes (sin comprimir) por lote; al alcanzarlo el lote se envía.
+        compress (bool): Comprimir el lote con gzip.
+        on_result (callable): ``f(items, ok)`` invocado tras cada envío, por ejemplo para
+            confirmar o liberar las alertas en la cola persistente.
+        metrics_window (int): Número de lotes y alertas recientes usados para los percentiles.
+    """
+
+    def __init__(self, send_batch, window=2.0, max_alerts=20, max_bytes=4 * 1024 * 1024, compress=True,
+                 on_result=None, metrics_window=512):
+        self.send_batch = send_batch
+        self.window = window
+        self.max_alerts = max_alerts
+        self.max_bytes = max_bytes
+        self.compress = compress
+        self.on_result = on_result
+
+        self._items = []
+        self._bytes = 0
+        self._cond = threading.Condition()
+        self._running = False
+        self._thread = None
+
+        self._batch_sizes = deque(maxlen=metrics_window)
+        self._latencies = deque(maxlen=metrics_window)
+        self._counters = {'batches': 0, 'alerts': 0, 'single': 0, 'failed_batches': 0, 'raw_bytes': 0, 'sent_bytes': 0}
+
+    def start(self):
+        with self._cond:
+            if self._running:
+                return
+            self._running = True
+        self._thread = threading.Thread(target=self._run, name="alert-batch-uploader", daemon=True)
+        self._thread.start()
+        logger.info(f"Envío agrupado de alertas: ventana {self.window} s, hasta {self.max_alerts} alertas "
+                    f"o {self.max_bytes // 1024} KB por lote")
+
+    def stop(self, timeout=None):
+        """
+        Envía el lote en curso y detiene el hilo.
+        """
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def submit(self, item):
+        """
+        Agrega una alerta al lote en curso sin bloquear.
+
+        Returns:
+            bool: True si la alerta fue aceptada, False si el cargador está detenido.
+        """
+        with self._cond:
+            if not self._running:
+                return False
+            self._items.append(item)
+            self._bytes += len(item.body)
+            if len(self._items) == 1 or self._full():
+                self._cond.notify()
+        return True
+
+    def record_single(self, enqueued_at):
+        """
+        Registra la latencia de una alerta de alta prioridad enviada fuera de los lotes.
+        """
+        with self._cond:
+            self._counters['single'] += 1
+            self._latencies.append(time.monotonic() - enqueued_at)
+
+    def stats(self):
+        """
+        Returns:
+            dict: Contadores de lotes, alertas agrupadas e individuales y bytes (sin comprimir
+            y enviados), tamaño de lote promedio y máximo, y percentiles de la latencia de
+            extremo a extremo en ms.
+        """
+        with self._cond:
+            stats = dict(self._counters)
+            sizes = list(self._batch_sizes)
+            latencies = sorted(self._latencies)
+            stats['waiting'] = len(self._items)
+        stats['batch_avg'] = sum(sizes) / len(sizes) if sizes else 0.0
+        stats['batch_max'] = max(sizes) if sizes else 0
+        for name, q in (('latency_p50_ms', 0.50), ('latency_p90_ms', 0.90), ('latency_p99_ms', 0.99)):
+            stats[name] = percentile(latencies, q) * 1e3 if latencies else None
+        return stats
+
+    def _full(self):
+        return len(self._items) >= self.max_alerts or self._bytes >= self.max_bytes
+
+    def _take(self):
+        # Toma alertas del lote en curso respetando ambos límites; el resto queda para el siguiente
+        count = 0
+        size = 0
+        for item in self._items:
+            if count and (count >= self.max_alerts or size + len(item.body) > self.max_bytes):
+                break
+            count += 1
+            size += len(item.body)
+        batch = self._items[:count]
+        del self._items[:count]
+        self._bytes -= size
+        return batch
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._running and not self._items:
+                    self._cond.wait()
+                if not self._items:
+                    return
+                # Esperar a que venza la ventana de la alerta más antigua o se llene el lote
+                deadline = self._items[0].enqueued_at + self.window
+                while self._running and not self._full():
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                batch = self._take()
+            self._send(batch)
+
+    def _send(self, batch):
+        raw = json_batch_body(batch)
+        body = gzip.compress(raw, compresslevel=6) if self.compress else raw
+        try:
+            ok = self.send_batch(body, len(batch), self.compress)
+        except Exception as e:
+            logger.error(f"Error enviando un lote de {len(batch)} alertas: {e}")
+            ok = False
+
+        now = time.monotonic()
+        with self._cond:
+            if ok:
+                self._counters['batches'] += 1
+                self._counters['alerts'] += len(batch)
+                self._counters['raw_bytes'] += len(raw)
+                self._counters['sent_bytes'] += len(body)
+                self._batch_sizes.append(len(batch))
+                self._latencies.extend(now - item.enqueued_at for item in batch)
+            else:
+                self._counters['failed_batches'] += 1
+
+        if self.on_result is not None:
+            try:
+                self.on_result(batch, ok)
+            except Exception as e:
+                logger.error(f"Error procesando el resultado de un lote de alertas: {e}")
@@ -0,0 +1,245 @@
+"""
+Despachador asíncrono de alertas.
+
+El callback del appsink corre en el hilo de streaming de GStreamer, por lo que
+cualquier operación lenta (escritura del JPEG, POST al servidor, reintentos)
+detiene todas las cámaras del pipeline. Este módulo desacopla ese trabajo: el
+callback solo encola un registro liviano de la detección y un grupo acotado de
+hilos trabajadores se encarga de procesarlo.
+
+La cola es acotada y, cuando se llena, se aplica una política de contrapresión:
+
+- ``drop-oldest``: descarta el registro más antiguo para hacer espacio.
+- ``drop-newest``: descarta el registro entrante.
+- ``coalesce``: si ya hay un registro pendiente de la misma cámara, lo
+  reemplaza por el nuevo (conserva su posición en la cola). Si no lo hay y la
+  cola está llena, descarta el más antiguo.
+"""
+
+import threading
+import time
+from collections import deque
+
+from monitoring.logging_handler.logger import logger
+
+POLICY_DROP_OLDEST = "drop-oldest"
+POLICY_DROP_NEWEST = "drop-newest"
+POLICY_COALESCE = "coalesce"
+POLICIES = (POLICY_DROP_OLDEST, POLICY_DROP_NEWEST, POLICY_COALESCE)
+
+OUTCOME_QUEUED = "queued"
+OUTCOME_COALESCED = "coalesced"
+OUTCOME_DROPPED = "dropped"
+OUTCOME_SENT = "sent"
+OUTCOME_FAILED = "failed"
+OUTCOME_SPOOLED = "spooled"
+OUTCOMES = (OUTCOME_SENT, OUTCOME_FAILED, OUTCOME_SPOOLED)
+
+def delivery_outcome(result):
+    """
+    Resultado de una entrega según lo que retornó el manejador: uno de ``OUTCOMES`` o,
+    para un booleano, ``OUTCOME_SENT`` si es verdadero y ``OUTCOME_FAILED`` si es falso.
+    """
+    if isinstance(result, str) and result in OUTCOMES:
+        return result
+    return OUTCOME_SENT if result else OUTCOME_FAILED
+
+
+class AlertDispatcher:
+    """
+    Cola acotada de registros de detección atendida por un grupo de hilos.
+
+    Parameters:
+        handler (callable): Función que procesa un registro. Debe retornar un valor
+            verdadero si la alerta se entregó y falso en caso contrario, o uno de
+            ``OUTCOMES`` (``OUTCOME_SPOOLED`` si quedó guardada para reenviarse después).
+        max_queue (int): Número máximo de registros pendientes.
+        num_workers (int): Número de hilos trabajadores.
+        policy (str): Política de contrapresión (ver ``POLICIES``).
+        name (str): Prefijo para el nombre de los hilos.
+        on_release (callable): Función opcional que recibe cada registro cuando sale del
+            despachador, ya sea procesado o descartado. Permite devolver recursos asociados
+            al registro (por ejemplo, el buffer del frame).
+    """
+
+    def __init__(self, handler, max_queue=16, num_workers=2, policy=POLICY_COALESCE, name="alert-dispatcher",
+                 on_release=None):
+        if policy not in POLICIES:
+            raise ValueError(f"Política de contrapresión desconocida: {policy}")
+        if max_queue < 1 or num_workers < 1:
+            raise ValueError("max_queue y num_workers deben ser mayores que cero")
+
+        self._handler = handler
+        self._max_queue = max_queue
+        self._num_workers = num_workers
+        self._policy = policy
+        self._name = name
+        self._on_release = on_release
+
+        # Cada elemento de la cola es una lista mutable [camera_id, registro]
+        # para poder reemplazar el registro en sitio al coalescer.
+        self._queue = deque()
+        self._pending_by_camera = {}
+        self._cond = threading.Condition()
+        self._workers = []
+        self._running = False
+
+        self._counters = {
+            'queued': 0,
+            'sent': 0,
+            'failed': 0,
+            'spooled': 0,
+            'dropped': 0,
+            'coalesced': 0,
+        }
+        self._latency_total = 0.0
+        self._latency_max = 0.0
+        self._latency_count = 0
+
+    def start(self):
+        """
+        Inicia los hilos trabajadores.
+        """
+        with self._cond:
+            if self._running:
+                return
+            self._running = True
+        for i in range(self._num_workers):
+            worker = threading.Thread(target=self._worker, name=f"{self._name}-{i}", daemon=True)
+            worker.start()
+            self._workers.append(worker)
+        logger.info(f"Despachador de alertas iniciado con {self._num_workers} hilos (cola={self._max_queue}, política={self._policy})")
+
+    def stop(self, drain=True, timeout=None):
+        """
+        Detiene los hilos trabajadores.
+
+        Parameters:
+            drain (bool): Si es True, procesa los registros pendientes antes de detenerse.
+            timeout (float): Tiempo máximo de espera por cada hilo.
+        """
+        discarded = []
+        with self._cond:
+            if not drain:
+                self._counters['dropped'] += len(self._queue)
+                discarded = [slot[1] for slot in self._queue]
+                self._queue.clear()
+                self._pending_by_camera.clear()
+            self._running = False
+            self._cond.notify_all()
+        for record in discarded:
+            self._release(record)
+        for worker in self._workers:
+            worker.join(timeout)
+        self._workers = []
+        logger.info(f"Despachador de alertas detenido: {self.stats()}")
+
+    def submit(self, record):
+        """
+        Encola un registro de detección sin bloquear al llamador.
+
+        Parameters:
+            record (dict): Registro con al menos la llave 'camera_id'.
+
+        Returns:
+            str: ``OUTCOME_QUEUED`` si el registro quedó en la cola, ``OUTCOME_COALESCED`` si
+            reemplazó al registro pendiente de su cámara y ``OUTCOME_DROPPED`` si fue
+            descartado.
+        """
+        camera_id = record.get('camera_id')
+        record['enqueued_at'] = time.monotonic()
+        discarded = None
+        outcome = OUTCOME_QUEUED
+
+        with self._cond:
+            if not self._running:
+                self._counters['dropped'] += 1
+                discarded, outcome = record, OUTCOME_DROPPED
+            elif self._policy == POLICY_COALESCE and camera_id in self._pending_by_camera:
+                slot = self._pending_by_camera[camera_id]
+                # Conservar el instante de encolado original para medir la latencia real
+                record['enqueued_at'] = slot[1]['enqueued_at']
+                discarded = slot[1]
+                slot[1] = record
+                self._counters['coalesced'] += 1
+                outcome = OUTCOME_COALESCED
+            elif len(self._queue) >= self._max_queue and self._policy == POLICY_DROP_NEWEST:
+                self._counters['dropped'] += 1
+                discarded, outcome = record, OUTCOME_DROPPED
+            else:
+                if len(self._queue) >= self._max_queue:
+                    oldest = self._queue.popleft()
+                    self._forget(oldest)
+                    self._counters['dropped'] += 1
+                    discarded = oldest[1]
+
+                slot = [camera_id, record]
+                self._queue.append(slot)
+                if self._policy == POLICY_COALESCE:
+                    self._pending_by_camera[camera_id] = slot
+                self._counters['queued'] += 1
+                self._cond.notify()
+
+        if discarded is not None:
+            self._release(discarded)
+        return outcome
+
+    def qsize(self):
+        """
+        Retorna el número de registros pendientes.
+        """
+        with self._cond:
+            return len(self._queue)
+
+    def stats(self):
+        """
+        Retorna una copia de los contadores del despachador.
+
+        Returns:
+            dict: Contadores de encolados, enviados, fallidos, guardados para reenvío,
+            descartados y coalescidos, la profundidad actual de la cola y la latencia
+            (encolado a fin de procesamiento) promedio y máxima en segundos.
+        """
+        with self._cond:
+            stats = dict(self._counters)
+            stats['pending'] = len(self._queue)
+            stats['latency_avg'] = self._latency_total / self._latency_count if self._latency_count else 0.0
+            stats['latency_max'] = self._latency_max
+        return stats
+
+    def _release(self, record):
+        if self._on_release is not None:
+            try:
+                self._on_release(record)
+            except Exception as e:
+                logger.error(f"Error liberando el registro de la cámara {record.get('camera_id')}: {e}")
+
+    def _forget(self, slot):
+        if self._pending_by_camera.get(slot[0]) is slot:
+            del self._pending_by_camera[slot[0]]
+
+    def _worker(self):
+        while True:
+            with self._cond:
+                while self._running and not self._queue:
+                    self._cond.wait()
+                if not self._queue:
+                    return
+                slot = self._queue.popleft()
+                self._forget(slot)
+            record = slot[1]
+
+            try:
+                outcome = delivery_outcome(self._handler(record))
+            except Exception as e:
+                logger.error(f"Error procesando la alerta de la cámara {record.get('camera_id')}: {e}")
+                outcome = OUTCOME_FAILED
+            self._release(record)
+
+            latency = time.monotonic() - record['enqueued_at']
+            with self._cond:
+                self._counters[outcome] += 1
+                self._latency_total += latency
+                self._latency_count += 1
+                if latency > self._latency_max:
+                    self._latency_max = latency
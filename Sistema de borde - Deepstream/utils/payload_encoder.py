@@ -0,0 +1,200 @@
+from monitoring.logging_handler.logger import logger
+import base64
+import json
+import time
+import uuid
+import cv2
+import numpy as np
+
+FORMAT_JPEG = "jpeg"
+FORMAT_WEBP = "webp"
+
+MODE_JSON = "json"
+MODE_MULTIPART = "multipart"
+
+# Escalera de calidades probadas, de mayor a menor, cuando hay un presupuesto de bytes
+DEFAULT_QUALITY_LADDER = (90, 80, 70, 60, 50, 40, 30, 20)
+
+class PayloadEncoder:
+    """
+    Codifica el frame de una alerta ajustándose al ancho de banda disponible.
+
+    Permite reducir la resolución, recortar a la región de las detecciones, elegir la
+    calidad para no superar un presupuesto de bytes, usar WebP y enviar la imagen como
+    binario en multipart en lugar de base64 dentro de un JSON (que agrega ~33 %).
+
+    Parameters:
+        image_format (str): 'jpeg' o 'webp'.
+        max_width (int): Ancho máximo de la imagen enviada; None conserva la resolución.
+        crop_to_detections (bool): Recortar a la unión de las cajas detectadas.
+        crop_margin (float): Margen alrededor del recorte, como fracción del tamaño de la región.
+        quality (int): Calidad fija cuando no hay presupuesto de bytes.
+        target_bytes (int): Presupuesto de bytes de la imagen codificada; None lo desactiva.
+        quality_ladder (tuple): Calidades a probar cuando hay presupuesto.
+        mode (str): 'json' (imagen en base64) o 'multipart' (imagen binaria).
+    """
+
+    def __init__(self, image_format=FORMAT_JPEG, max_width=None, crop_to_detections=False, crop_margin=0.15,
+                 quality=95, target_bytes=None, quality_ladder=DEFAULT_QUALITY_LADDER, mode=MODE_JSON):
+        if image_format not in (FORMAT_JPEG, FORMAT_WEBP):
+            raise ValueError(f"Formato de imagen no soportado: {image_format}")
+        if mode not in (MODE_JSON, MODE_MULTIPART):
+            raise ValueError(f"Modo de envío no soportado: {mode}")
+
+        self.image_format = image_format
+        self.max_width = max_width
+        self.crop_to_detections = crop_to_detections
+        self.crop_margin = crop_margin
+        self.quality = quality
+        self.target_bytes = target_bytes
+        self.quality_ladder = tuple(sorted(quality_ladder, reverse=True))
+        self.mode = mode
+
+    def prepare_image(self, frame, detections=None):
+        """
+        Aplica el recorte y el cambio de resolución configurados.
+
+        Parameters:
+            frame (np.ndarray): Frame BGR.
+            detections (np.ndarray): Detecciones del frame (columnas 'left', 'top', 'width', 'height').
+
+        Returns:
+            np.ndarray: Imagen a codificar.
+        """
+        image = frame
+        if self.crop_to_detections and detections is not None and len(detections):
+            image = image[crop_region(detections, frame.shape, self.crop_margin)]
+
+        if self.max_width and image.shape[1] > self.max_width:
+            height = max(1, round(image.shape[0] * self.max_width / image.shape[1]))
+            image = cv2.resize(image, (self.max_width, height), interpolation=cv2.INTER_AREA)
+        return image
+
+    def encode_image(self, frame, detections=None):
+        """
+        Codifica la imagen de la alerta.
+
+        Returns:
+            tuple: (bytes de la imagen, información con formato, calidad, tamaño en bytes,
+            dimensiones y tiempo de codificación en ms).
+        """
+        start = time.perf_counter()
+        image = self.prepare_image(frame, detections)
+
+        if self.target_bytes is None:
+            quality = self.quality
+            data = self._encode(image, quality)
+        else:
+            quality, data = self._encode_within_budget(image)
+
+        info = {
+            'format': self.image_format,
+            'quality': quality,
+            'width': image.shape[1],
+            'height': image.shape[0],
+            'image_bytes': len(data),
+            'encode_ms': (time.perf_counter() - start) * 1e3,
+        }
+        return data, info
+
+    def build_body(self, fields, frame, detections=None):
+        """
+        Construye el cuerpo de la solicitud de la alerta.
+
+        Parameters:
+            fields (dict): Campos de la alerta (camera_id, datealert, client_id).
+            frame (np.ndarray): Frame BGR anotado.
+            detections (np.ndarray): Detecciones del frame, usadas para el recorte.
+
+        Returns:
+            tuple: (cuerpo en bytes, Content-Type, información de la codificación incluyendo
+            'body_bytes').
+        """
+        data, info = self.encode_image(frame, detections)
+        if self.mode == MODE_JSON:
+            payload = dict(fields)
+            payload['image_data'] = base64.b64encode(data).decode('utf-8')
+            body = json.dumps(payload).encode('utf-8')
+            content_type = 'application/json'
+        else:
+            body, content_type = multipart_body(fields, 'image', f"alert.{self.extension}", self.mime_type, data)
+        info['body_bytes'] = len(body)
+        return body, content_type, info
+
+    @property
+    def extension(self):
+        return "jpg" if self.image_format == FORMAT_JPEG else "webp"
+
+    @property
+    def mime_type(self):
+        return "image/jpeg" if self.image_format == FORMAT_JPEG else "image/webp"
+
+    def _encode(self, image, quality):
+        if self.image_format == FORMAT_JPEG:
+            params = [cv2.IMWRITE_JPEG_QUALITY, int(quality)]
+        else:
+            params = [cv2.IMWRITE_WEBP_QUALITY, int(quality)]
+        ok, buffer = cv2.imencode(f".{self.extension}", image, params)
+        if not ok:
+            raise RuntimeError(f"No fue posible codificar la imagen en {self.image_format}")
+        return buffer.tobytes()
+
+    def _encode_within_budget(self, image):
+        # Búsqueda binaria sobre la escalera: la calidad más alta que cabe en el presupuesto
+        ladder = self.quality_ladder
+        low, high = 0, len(ladder) - 1
+        best = None
+        while low <= high:
+            middle = (low + high) // 2
+            data = self._encode(image, ladder[middle])
+            if len(data) <= self.target_bytes:
+                best = (ladder[middle], data)
+                high = middle - 1
+            else:
+                low = middle + 1
+
+        if best is None:
+            # Ni la calidad más baja cabe: enviar la más pequeña posible
+            quality = ladder[-1]
+            data = self._encode(image, quality)
+            logger.info(f"La imagen de la alerta ({len(data)} bytes) excede el presupuesto de {self.target_bytes} bytes.")
+            return quality, data
+        return best
+
+def crop_region(detections, shape, margin):
+    """
+    Región (como tupla de slices) que contiene todas las cajas más un margen.
+    """
+    height, width = shape[:2]
+    left = float(np.min(detections['left']))
+    top = float(np.min(detections['top']))
+    right = float(np.max(detections['left'] + detections['width']))
+    bottom = float(np.max(detections['top'] + detections['height']))
+    pad_x = (right - left) * margin
+    pad_y = (bottom - top) * margin
+    x0 = max(0, int(left - pad_x))
+    y0 = max(0, int(top - pad_y))
+    x1 = min(width, int(right + pad_x) + 1)
+    y1 = min(height, int(bottom + pad_y) + 1)
+    return slice(y0, y1), slice(x0, x1)
+
+def multipart_body(fields, file_field, filename, mime_type, data):
+    """
+    Cuerpo multipart/form-data con campos de texto y un archivo binario.
+
+    Returns:
+        tuple: (cuerpo en bytes, Content-Type con el boundary).
+    """
+    boundary = uuid.uuid4().hex
+    parts = []
+    for name, value in fields.items():
+        parts.append(
+            f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode('utf-8')
+        )
+    parts.append(
+        f'--{boundary}\r\nContent-Disposition: form-data; name="{file_field}"; filename="{filename}"\r\n'
+        f'Content-Type: {mime_type}\r\n\r\n'.encode('utf-8')
+    )
+    parts.append(data)
+    parts.append(f'\r\n--{boundary}--\r\n'.encode('utf-8'))
+    return b"".join(parts), f"multipart/form-data; boundary={boundary}"
@@ -1,10 +1,15 @@
 from monitoring.logging_handler.logger import logger
-import base64
 import os
-import httpx
-import json
 from utils.token_manager import TokenManager
-import cv2
+from utils.alert_transport import AlertTransport
+from utils.payload_encoder import PayloadEncoder
+from utils.alert_spool import AlertSpool, SpoolForwarder, json_batch_body, JSON_CONTENT_TYPE
+from utils.batch_uploader import BatchUploader, BatchItem
+from utils.dispatcher import OUTCOME_SENT, OUTCOME_FAILED, OUTCOME_SPOOLED
+from common.metrics import REGISTRY
+from common.trace_stages import STAGE_ENCODE, STAGE_SEND
+import threading
+import gzip
 from dotenv import load_dotenv
 import time
 import datetime
@@ -15,83 +20,304 @@ load_dotenv()
 # Inicializa el administrador de tokens que se encargará de la autenticación
 token_manager = TokenManager()
 
-last_sent_times = {}
+# Cliente HTTP compartido; se crea al enviar la primera alerta
+alert_transport = None
+alert_transport_lock = threading.Lock()
+
+# Cola persistente de alertas y su hilo de reenvío; se crean con start_alert_forwarder
+alert_spool = None
+alert_forwarder = None
+
+# Envío agrupado de alertas; se crea con start_alert_uploader si URL_INFERENCE_BATCH está definida
+alert_uploader = None
+
+def env_int(name):
+    value = os.getenv(name)
+    return int(value) if value else None
+
+ALERT_ENCODE_SECONDS = REGISTRY.histogram("edge_alert_encode_seconds", "Time to encode the alert image and body",
+                                          ("camera",))
+ALERT_SEND_SECONDS = REGISTRY.histogram("edge_alert_send_seconds",
+                                        "Time from the first HTTP attempt to the server ack of an alert", ("camera",))
+
+# Codificador de la imagen de las alertas. Por defecto conserva el comportamiento original
+# (JPEG a resolución completa en base64 dentro de un JSON); se ajusta con variables de entorno.
+payload_encoder = PayloadEncoder(
+    image_format=os.getenv("ALERT_IMAGE_FORMAT", "jpeg"),
+    max_width=env_int("ALERT_MAX_WIDTH"),
+    crop_to_detections=os.getenv("ALERT_CROP_TO_DETECTIONS", "0") == "1",
+    target_bytes=env_int("ALERT_TARGET_BYTES"),
+    mode=os.getenv("ALERT_UPLOAD_MODE", "json"),
+)
 
 def prepare_data(result):
     """
-    Prepara los datos de la inferencia para ser enviados al servidor en formato JSON.
+    Prepara los datos de la inferencia para ser enviados al servidor.
+
+    El formato depende de ``payload_encoder``: JSON con la imagen en Base64 (por defecto)
+    o multipart con la imagen binaria.
     
     Parameters:
-        result (dict): Resultado de la inferencia, que incluye 'camera_id', 'timestamp' y 'frame'.
+        result (dict): Resultado de la inferencia, que incluye 'camera_id', 'timestamp', 'frame'
+            y opcionalmente 'detections' (usadas para recortar la imagen).
     
     Returns:
-        str: Datos formateados en JSON listos para el envío al servidor.
+        tuple: (cuerpo en bytes, Content-Type, información de la codificación con el tamaño
+        en bytes y el tiempo de codificación).
     """
-    # Codificar la imagen en formato JPEG y luego en Base64
-    _, buffer = cv2.imencode('.jpg', result['frame'])
-    image_base64 = base64.b64encode(buffer).decode('utf-8') 
     logger.info(f"Timestamp: {result['timestamp']}")
     timstamp = custom_date_to_epoch(result['timestamp'])
     logger.info(f"Timestamp convertido: {timstamp}")
     # Estructura de datos para el envío
-    data = {
+    fields = {
         'camera_id': result['camera_id'],
         'datealert': timstamp,
         'client_id': 1,
-        'image_data': image_base64
     }
-    return json.dumps(data)
+    body, content_type, info = payload_encoder.build_body(fields, result['frame'], result.get('detections'))
+    logger.info(f"Alerta codificada: {info['body_bytes']} bytes ({info['format']} q={info['quality']}, "
+                f"{info['width']}x{info['height']}, {info['encode_ms']:.1f} ms)")
+    return body, content_type, info
+
+def get_alert_transport():
+    """
+    Retorna el cliente HTTP compartido para el envío de alertas, creándolo la primera vez.
+
+    Returns:
+        AlertTransport: Cliente con conexiones persistentes reutilizado por todos los envíos.
+    """
+    global alert_transport
+    with alert_transport_lock:
+        if alert_transport is None:
+            alert_transport = AlertTransport(http2=os.getenv("ALERT_HTTP2", "1") == "1")
+    return alert_transport
+
+def alert_transport_stats():
+    """
+    Retorna las estadísticas del cliente HTTP de alertas, o None si aún no se ha creado.
+    """
+    with alert_transport_lock:
+        transport = alert_transport
+    return transport.stats() if transport is not None else None
+
+def alert_headers(content_type='application/json'):
+    """
+    Headers de autenticación para el servidor de inferencias.
+    """
+    return {
+        'Authorization': f'Bearer {token_manager.get_access_token()}',  # Incluir el token de acceso en los headers
+        'Content-Type': content_type  # Tipo de contenido del cuerpo (JSON o multipart)
+    }
 
 def send_alert(result, max_retries=3, delay=0.5):
     """
-    Envía una alerta al servidor con los datos de la inferencia en formato JSON.
+    Envía una alerta al servidor con los datos de la inferencia.
+
+    La solicitud usa el cliente HTTP compartido (conexiones keep-alive) y reintenta con
+    espera exponencial con jitter. Si la cola persistente está activa, la alerta se guarda
+    en disco antes de enviarla: si el envío falla, o si hay alertas más antiguas esperando,
+    queda pendiente y el hilo de reenvío la despacha en orden cuando el servidor responda.
+
+    Si el envío agrupado está activo, las alertas JSON sin prioridad se entregan a
+    ``alert_uploader`` y viajan en el siguiente lote; las de alta prioridad se envían de
+    inmediato.
     
     Parameters:
-        result (dict): Resultado de la inferencia.
+        result (dict): Resultado de la inferencia. Las llaves opcionales 'priority' y
+            'enqueued_at' (instante de la detección) controlan el envío agrupado; 'trace',
+            si está, recibe la duración de la codificación y del envío hasta la confirmación
+            del servidor (ver ``pipeline.tracing`` y ``common.trace_stages``).
         max_retries (int): Número máximo de reintentos en caso de fallo al enviar la alerta.
-        delay (int): Tiempo en segundos entre reintentos en caso de fallo.
-    """
-    headers = {
-        'Authorization': f'Bearer {token_manager.get_access_token()}',  # Incluir el token de acceso en los headers
-        'Content-Type': 'application/json'  # Especificar que el contenido es JSON
-    }
+        delay (float): Espera base en segundos entre reintentos; se duplica en cada intento.
 
-    payload = prepare_data(result)  # Preparar el JSON a enviar
+    Returns:
+        str: ``OUTCOME_SENT`` si el servidor confirmó la alerta o si quedó en un lote,
+        ``OUTCOME_SPOOLED`` si quedó en la cola persistente para el hilo de reenvío y
+        ``OUTCOME_FAILED`` si se perdió (ver ``utils.dispatcher``).
+    """
     url_alert = os.getenv("URL_INFERENCE")  # Obtener la URL del servidor de inferencias desde las variables de entorno
     if not url_alert:
         logger.error("URL_INFERENCE is not defined or is None.")
-        return
+        return OUTCOME_FAILED
+
+    trace = result.get('trace')
+    encode_start = time.time_ns()
+    payload, content_type, _info = prepare_data(result)  # Preparar el cuerpo a enviar
+    encode_end = time.time_ns()
+    ALERT_ENCODE_SECONDS.observe((result['camera_id'],), (encode_end - encode_start) / 1e9)
+    if trace is not None:
+        trace(STAGE_ENCODE, encode_start, encode_end)
+
+    spool = alert_spool
+    alert_id = None
+    if spool is not None:
+        alert_id = spool.append(result['camera_id'], payload, content_type)
+        if not spool.claim(alert_id):
+            logger.info(f"Alert for camera {result['camera_id']} spooled behind pending alerts.")
+            alert_forwarder.wake()
+            return OUTCOME_SPOOLED
+
+    uploader = alert_uploader
+    enqueued_at = result.get('enqueued_at', time.monotonic())
+    if uploader is not None and not result.get('priority') and content_type == JSON_CONTENT_TYPE:
+        if uploader.submit(BatchItem(payload, result['camera_id'], enqueued_at, alert_id)):
+            return OUTCOME_SENT
 
     logger.info(f"Attempting to send alert for camera {result['camera_id']} to the server at {url_alert}.")
 
-    attempt = 0
-
-    while attempt < max_retries:
-        try:
-            # Realizar la solicitud POST al servidor
-            response = httpx.post(url_alert, headers=headers, data=payload)
-            
-            if response.status_code == 200:
-                logger.info(f"Alert for camera {result['camera_id']} sent successfully to {url_alert}. Status code: {response.status_code}. Server Response: {response.text}")
-                return  # Si la solicitud fue exitosa, salir del bucle
-            else:
-                logger.error(f"Failed to send alert for camera {result['camera_id']}. Status code: {response.status_code}, Response: {response.text}")
-        except Exception as e:
-            logger.error(f"Error sending alert for camera {result['camera_id']} (attempt {attempt + 1}): {str(e)}")
-
-        attempt += 1
-        time.sleep(delay)  # Esperar antes de reintentar
-
-def should_send_alert(payload_id):
-    """
-    Verifica si han pasado al menos 2 minutos desde el último envío del payload con el mismo ID.
-    """
-    current_time = time.time()
-    if payload_id in last_sent_times:
-        if current_time - last_sent_times[payload_id] < 5:
-            return False
-    last_sent_times[payload_id] = current_time
-    return True
+    send_start = time.time_ns()
+    response = get_alert_transport().post(url_alert, payload, lambda: alert_headers(content_type), max_retries=max_retries,
+                                          backoff_base=delay, label=f"for camera {result['camera_id']}")
+    if response is not None:
+        send_end = time.time_ns()
+        ALERT_SEND_SECONDS.observe((result['camera_id'],), (send_end - send_start) / 1e9)
+        if trace is not None:
+            trace(STAGE_SEND, send_start, send_end)
+    if response is None:
+        if spool is not None:
+            spool.release([alert_id])
+            alert_forwarder.wake()
+            return OUTCOME_SPOOLED
+        return OUTCOME_FAILED
+
+    if spool is not None:
+        spool.ack([alert_id])
+    if uploader is not None:
+        uploader.record_single(enqueued_at)
+    logger.info(f"Alert for camera {result['camera_id']} sent successfully to {url_alert}. Status code: {response.status_code}. Server Response: {response.text}")
+    return OUTCOME_SENT
+
+def send_spooled_alert(alert):
+    """
+    Reenvía una alerta de la cola persistente con el cuerpo con que se guardó.
+    """
+    response = get_alert_transport().post(os.getenv("URL_INFERENCE"), alert.body,
+                                          lambda: alert_headers(alert.content_type), max_retries=1,
+                                          label=f"{alert.alert_id} for camera {alert.camera_id} (spooled)")
+    return response is not None
+
+def send_alert_batch(body, count, compressed=True):
+    """
+    Envía un lote de alertas JSON (``{"alerts": [...]}``) a URL_INFERENCE_BATCH.
+
+    Parameters:
+        body (bytes): Cuerpo del lote, comprimido con gzip si ``compressed``.
+        count (int): Número de alertas del lote, para los logs.
+        compressed (bool): Si el cuerpo está comprimido con gzip.
+
+    Returns:
+        bool: True si el servidor confirmó el lote.
+    """
+    def headers():
+        headers = alert_headers()
+        if compressed:
+            headers['Content-Encoding'] = 'gzip'
+        return headers
+
+    response = get_alert_transport().post(os.getenv("URL_INFERENCE_BATCH"), body, headers, max_retries=1,
+                                          label=f"batch of {count}")
+    return response is not None
+
+def send_spooled_batch(alerts):
+    """
+    Reenvía varias alertas JSON de la cola en una sola solicitud comprimida.
+    """
+    return send_alert_batch(gzip.compress(json_batch_body(alerts), compresslevel=6), len(alerts))
+
+def on_batch_result(items, ok):
+    """
+    Confirma en la cola persistente las alertas de un lote enviado, o las deja pendientes
+    para el hilo de reenvío si el lote falló.
+    """
+    spool = alert_spool
+    alert_ids = [item.alert_id for item in items if item.alert_id is not None]
+    if spool is None or not alert_ids:
+        if not ok:
+            logger.error(f"Lote de {len(items)} alertas perdido: la cola persistente no está activa.")
+        return
+    if ok:
+        spool.ack(alert_ids)
+    else:
+        spool.release(alert_ids)
+        alert_forwarder.wake()
+
+def start_alert_forwarder():
+    """
+    Abre la cola persistente de alertas e inicia el hilo de reenvío.
+
+    La ruta se toma de ALERT_SPOOL_PATH (por defecto 'spool/alerts.db'); una ruta vacía
+    desactiva la cola y las alertas fallidas se pierden como antes. Si URL_INFERENCE_BATCH
+    está definida, las alertas pendientes se reenvían agrupadas.
+    """
+    global alert_spool, alert_forwarder
+    path = os.getenv("ALERT_SPOOL_PATH", "spool/alerts.db")
+    if not path or alert_spool is not None:
+        return
+    alert_spool = AlertSpool(
+        path,
+        max_bytes=(env_int("ALERT_SPOOL_MAX_MB") or 512) * 1024 * 1024,
+        max_age=(env_int("ALERT_SPOOL_MAX_AGE_H") or 168) * 3600,
+    )
+    alert_forwarder = SpoolForwarder(
+        alert_spool,
+        send_spooled_alert,
+        send_batch=send_spooled_batch if os.getenv("URL_INFERENCE_BATCH") else None,
+        batch_size=env_int("ALERT_SPOOL_BATCH_SIZE") or 20,
+    )
+    alert_forwarder.start()
+    alert_forwarder.wake()
+
+def stop_alert_forwarder():
+    """
+    Detiene el hilo de reenvío y cierra la cola persistente.
+
+    Returns:
+        dict: Estadísticas de la cola y del reenvío, o None si la cola no estaba activa.
+    """
+    global alert_spool, alert_forwarder
+    if alert_spool is None:
+        return None
+    alert_forwarder.stop()
+    stats = alert_spool.stats()
+    stats.update(alert_forwarder.stats())
+    alert_spool.close()
+    alert_spool = alert_forwarder = None
+    return stats
+
+def start_alert_uploader():
+    """
+    Inicia el envío agrupado de alertas si URL_INFERENCE_BATCH está definida.
+
+    La ventana se toma de ALERT_BATCH_WINDOW_MS (por defecto 2000 ms; 0 lo desactiva) y los
+    límites por lote de ALERT_BATCH_MAX_ALERTS y ALERT_BATCH_MAX_KB.
+    """
+    global alert_uploader
+    window_ms = env_int("ALERT_BATCH_WINDOW_MS")
+    window_ms = 2000 if window_ms is None else window_ms
+    if not os.getenv("URL_INFERENCE_BATCH") or window_ms <= 0 or alert_uploader is not None:
+        return
+    alert_uploader = BatchUploader(
+        send_alert_batch,
+        window=window_ms / 1000,
+        max_alerts=env_int("ALERT_BATCH_MAX_ALERTS") or 20,
+        max_bytes=(env_int("ALERT_BATCH_MAX_KB") or 4096) * 1024,
+        on_result=on_batch_result,
+    )
+    alert_uploader.start()
+
+def stop_alert_uploader():
+    """
+    Envía el lote en curso y detiene el envío agrupado.
+
+    Returns:
+        dict: Métricas de lotes y latencia, o None si el envío agrupado no estaba activo.
+    """
+    global alert_uploader
+    if alert_uploader is None:
+        return None
+    uploader, alert_uploader = alert_uploader, None
+    uploader.stop()
+    return uploader.stats()
 
 def custom_date_to_epoch(date_str):
     """
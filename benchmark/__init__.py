@@ -0,0 +1,12 @@
+"""
+Benchmark unificado de los modelos de detección.
+
+Reemplaza los scripts por modelo de 'Plots y datos - Jetson TensorRT' y 'Plots y datos -
+Jetson Pythorch': una sola CLI recorre una matriz de modelos x backends x precisión x
+tamaño de batch x tamaño de imagen en un mismo proceso y escribe los resultados en un
+único archivo estructurado.
+
+    python3 -m benchmark run --matrix benchmark/matrices/jetson_tensorrt.yaml
+    python3 -m benchmark run --matrix benchmark/matrices/cpu_smoke.yaml
+    python3 -m benchmark summary --kind val
+"""
@@ -0,0 +1,173 @@
+"""
+Backends de inferencia del benchmark.
+
+Todos exponen la misma interfaz:
+
+- ``load(case)``: carga los pesos (el tiempo se mide aparte como arranque en frío).
+- ``predict(images, imgsz)``: infiere un batch y retorna un arreglo ``N x 3`` con los
+  tiempos por imagen en ms de preproceso, inferencia y postproceso.
+- ``validate(data, case)``: métricas de exactitud sobre el split de prueba, o None si el
+  backend no las soporta.
+
+PyTorch (.pt) y TensorRT (.engine) corren con ultralytics. Los modelos ONNX corren con
+ONNX Runtime o con el módulo dnn de OpenCV, que sirven como sustitutos en CPU.
+"""
+
+import time
+
+import cv2
+import numpy as np
+
+from benchmark.matrix import BACKEND_PYTORCH, BACKEND_TENSORRT, BACKEND_ONNXRUNTIME, BACKEND_OPENCV
+
+CONF_THRESHOLD = 0.25
+IOU_THRESHOLD = 0.45
+
+class UltralyticsBackend:
+    """
+    Modelos .pt y .engine a través de ``ultralytics.YOLO``.
+    """
+
+    def __init__(self):
+        self.model = None
+        self.case = None
+
+    def load(self, case):
+        from ultralytics import YOLO
+
+        self.case = case
+        self.model = YOLO(case.weights, task="detect")
+
+    def predict(self, images, imgsz):
+        half = self.case.precision == "fp16" and self.case.backend == BACKEND_PYTORCH
+        # Con stream=True los Results se generan uno a uno y se descartan tras leer sus tiempos
+        results = self.model.predict(source=images, imgsz=imgsz, device=self.case.device, half=half,
+                                     batch=len(images), save=False, verbose=False, stream=True)
+        timings = np.empty((len(images), 3))
+        count = 0
+        for count, r in enumerate(results, 1):
+            timings[count - 1] = (r.speed['preprocess'], r.speed['inference'], r.speed['postprocess'])
+        return timings[:count]
+
+    def validate(self, data, case):
+        half = case.precision == "fp16" and case.backend == BACKEND_PYTORCH
+        results = self.model.val(data=data, split="test", imgsz=case.imgsz, batch=case.batch, device=case.device,
+                                 half=half, verbose=False, plots=False)
+        box = results.box
+        metrics = {
+            'precision': float(box.mp),
+            'recall': float(box.mr),
+            'map_50': float(box.map50),
+            'map_50_95': float(box.map),
+        }
+        # Métricas por clase, necesarias para elegir modelo según la clase persona
+        names = results.names
+        metrics['per_class'] = {
+            names[int(c)]: {
+                'precision': float(box.p[i]),
+                'recall': float(box.r[i]),
+                'map_50': float(box.ap50[i]),
+                'map_50_95': float(box.ap[i]),
+            }
+            for i, c in enumerate(box.ap_class_index)
+        }
+        return metrics
+
+class OnnxBackend:
+    """
+    Modelos ONNX con salida YOLO (``N x (4 + clases) x anclas``).
+
+    Implementa el preproceso (letterbox, NCHW, escala a [0, 1]) y el postproceso (umbral de
+    confianza y NMS) para medir las tres etapas igual que ultralytics.
+
+    Parameters:
+        runtime (str): 'onnxruntime' u 'opencv'.
+    """
+
+    def __init__(self, runtime):
+        self.runtime = runtime
+        self.session = None
+        self.net = None
+        self.case = None
+
+    def load(self, case):
+        self.case = case
+        if self.runtime == BACKEND_ONNXRUNTIME:
+            import onnxruntime
+
+            providers = ["CPUExecutionProvider"]
+            if case.device != "cpu":
+                providers.insert(0, "CUDAExecutionProvider")
+            self.session = onnxruntime.InferenceSession(case.weights, providers=providers)
+            self.input_name = self.session.get_inputs()[0].name
+        else:
+            self.net = cv2.dnn.readNetFromONNX(case.weights)
+
+    def predict(self, images, imgsz):
+        start = time.perf_counter()
+        dtype = np.float16 if self.case.precision == "fp16" and self.runtime == BACKEND_ONNXRUNTIME else np.float32
+        blob = np.stack([letterbox(image, imgsz) for image in images]).astype(dtype) / 255.0
+        blob = np.ascontiguousarray(blob.transpose(0, 3, 1, 2))
+        preprocess = time.perf_counter()
+
+        if self.session is not None:
+            output = self.session.run(None, {self.input_name: blob})[0]
+        else:
+            self.net.setInput(blob)
+            output = self.net.forward()
+        inference = time.perf_counter()
+
+        for prediction in output:
+            postprocess_yolo(prediction)
+        end = time.perf_counter()
+
+        n = len(images)
+        per_image = [(preprocess - start) * 1e3 / n, (inference - preprocess) * 1e3 / n, (end - inference) * 1e3 / n]
+        return np.tile(per_image, (n, 1))
+
+    def validate(self, data, case):
+        return None
+
+def letterbox(image, imgsz):
+    """
+    Redimensiona conservando la relación de aspecto y rellena hasta ``imgsz x imgsz``.
+    """
+    height, width = image.shape[:2]
+    scale = imgsz / max(height, width)
+    resized = cv2.resize(image, (round(width * scale), round(height * scale)), interpolation=cv2.INTER_LINEAR)
+    canvas = np.full((imgsz, imgsz, 3), 114, dtype=np.uint8)
+    top = (imgsz - resized.shape[0]) // 2
+    left = (imgsz - resized.shape[1]) // 2
+    canvas[top:top + resized.shape[0], left:left + resized.shape[1]] = resized[..., ::-1]
+    return canvas
+
+def postprocess_yolo(prediction, conf_threshold=CONF_THRESHOLD, iou_threshold=IOU_THRESHOLD):
+    """
+    Filtra y suprime las cajas de una salida YOLO ``(4 + clases) x anclas``.
+
+    Returns:
+        np.ndarray: Filas ``[x1, y1, x2, y2, confianza, clase]`` de las detecciones.
+    """
+    prediction = prediction.T
+    scores = prediction[:, 4:]
+    class_ids = scores.argmax(axis=1)
+    confidences = scores[np.arange(len(scores)), class_ids]
+    keep = confidences >= conf_threshold
+    if not keep.any():
+        return np.empty((0, 6), dtype=np.float32)
+    boxes = prediction[keep, :4]
+    xyxy = np.concatenate([boxes[:, :2] - boxes[:, 2:] / 2, boxes[:, :2] + boxes[:, 2:] / 2], axis=1)
+    xywh = np.concatenate([xyxy[:, :2], boxes[:, 2:]], axis=1)
+    indices = cv2.dnn.NMSBoxes(xywh.tolist(), confidences[keep].tolist(), conf_threshold, iou_threshold)
+    indices = np.asarray(indices, dtype=np.int64).reshape(-1)
+    return np.concatenate([xyxy[indices], confidences[keep][indices, None], class_ids[keep][indices, None]], axis=1)
+
+def get_backend(name):
+    """
+    Retorna una instancia del backend ``name`` (ver ``benchmark.matrix.BACKENDS``).
+    """
+    if name in (BACKEND_PYTORCH, BACKEND_TENSORRT):
+        return UltralyticsBackend()
+    if name in (BACKEND_ONNXRUNTIME, BACKEND_OPENCV):
+        return OnnxBackend(name)
+    raise ValueError(f"Backend desconocido: {name}")
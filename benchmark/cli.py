@@ -0,0 +1,210 @@
+"""
+Línea de comandos del benchmark.
+
+    python3 -m benchmark run --matrix benchmark/matrices/jetson_tensorrt.yaml
+    python3 -m benchmark run --models tiny --backends opencv --source synthetic:32 \\
+        --weights opencv=/tmp/tiny.onnx --device cpu --batch 1 4 --imgsz 320 640
+    python3 -m benchmark throughput --matrix benchmark/matrices/jetson_tensorrt.yaml --cameras 5
+    python3 -m benchmark throughput --matrix benchmark/matrices/cpu_smoke.yaml --camera-fps 10
+    python3 -m benchmark import-legacy "Plots y datos - Jetson TensorRT" "Plots y datos - Jetson Pythorch"
+    python3 -m benchmark summary --kind val
+    python3 -m benchmark report
+    python3 -m benchmark select --cameras 5 --fps 15 --min-map 0.72 --min-recall 0.95
+"""
+
+import argparse
+import sys
+
+from benchmark.dataset import ImageSet
+from benchmark.legacy import import_legacy
+from benchmark.matrix import load_matrix, expand_matrix
+from benchmark.query import ACCURACY_COLUMNS, DEFAULT_GROUP, SPEED_COLUMNS, aggregate, format_table, load_table
+from benchmark.report import build_report
+from benchmark.runner import run_matrix
+from benchmark.selector import Target, format_candidates, pgie_settings, select, update_pgie_config
+from benchmark.store import ResultStore, run_metadata
+from benchmark.throughput import SWEEP_BATCH_SIZES, run_sweep, format_summaries
+
+DEFAULT_OUTPUT = "Datos experimentales/benchmark/results.jsonl"
+DEFAULT_REPORT_DIR = "Datos experimentales/benchmark/report"
+DEFAULT_PGIE_CONFIG = "Sistema de borde - Deepstream/models/dstest1_pgie_config.txt"
+
+def parse_weights(values):
+    if not values:
+        return None
+    weights = {}
+    for value in values:
+        backend, _, template = value.partition("=")
+        weights[backend] = template
+    return weights
+
+def add_matrix_arguments(parser):
+    parser.add_argument("--matrix", help="Archivo YAML/JSON con la matriz de casos")
+    parser.add_argument("--models", nargs="+")
+    parser.add_argument("--backends", nargs="+")
+    parser.add_argument("--precisions", nargs="+")
+    parser.add_argument("--batch", nargs="+", type=int)
+    parser.add_argument("--imgsz", nargs="+", type=int)
+    parser.add_argument("--weights", nargs="+", metavar="BACKEND=PLANTILLA",
+                        help="Plantilla de ruta por backend, con {model} y {precision}")
+    parser.add_argument("--source", help="Directorio de imágenes o synthetic:N[:WxH]")
+    parser.add_argument("--data", help="YAML del dataset para la validación")
+    parser.add_argument("--device")
+    parser.add_argument("--limit", type=int, help="Número máximo de imágenes")
+    parser.add_argument("--no-cache", dest="cache", action="store_const", const=False,
+                        help="Leer las imágenes del disco en cada batch en lugar de cargarlas en memoria")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="Archivo de resultados (.jsonl)")
+
+def matrix_from_args(args):
+    return load_matrix(args.matrix, {
+        'models': args.models,
+        'backends': args.backends,
+        'precisions': args.precisions,
+        'batch': args.batch,
+        'imgsz': args.imgsz,
+        'weights': parse_weights(args.weights),
+        'source': args.source,
+        'data': args.data,
+        'device': args.device,
+        'limit': args.limit,
+        'cache': args.cache,
+        'runs': getattr(args, 'runs', None),
+        'warmup': getattr(args, 'warmup', None),
+        'tasks': getattr(args, 'tasks', None),
+    })
+
+def command_run(args):
+    matrix = matrix_from_args(args)
+    cases = expand_matrix(matrix)
+    if not cases:
+        sys.exit("La matriz no tiene casos.")
+    if not matrix['source']:
+        sys.exit("Falta la fuente de imágenes (--source o 'source' en la matriz).")
+
+    dataset = ImageSet(matrix['source'], limit=matrix['limit'], cache=matrix['cache'])
+    print(f"{len(cases)} casos sobre {len(dataset)} imágenes de {matrix['source']}")
+    run_matrix(cases, dataset, ResultStore(args.output, run_metadata(matrix['name'])), runs=matrix['runs'], tasks=matrix['tasks'],
+               data=matrix['data'], matrix_name=matrix['name'], warmup=matrix['warmup'])
+
+def command_throughput(args):
+    matrix = matrix_from_args(args)
+    # El barrido reemplaza los batches de la matriz, salvo que se den con --batch
+    sizes = set(args.batch or SWEEP_BATCH_SIZES)
+    if args.cameras:
+        sizes.add(args.cameras)
+    matrix['batch'] = sorted(sizes)
+    cases = expand_matrix(matrix)
+    if not cases:
+        sys.exit("La matriz no tiene casos.")
+    if not matrix['source']:
+        sys.exit("Falta la fuente de imágenes (--source o 'source' en la matriz).")
+
+    dataset = ImageSet(matrix['source'], limit=max(matrix['batch']), cache=True)
+    print(f"Barrido de batch {matrix['batch']} sobre {len(cases)} casos, cámaras a {args.camera_fps:g} FPS")
+    store = ResultStore(args.output, run_metadata(matrix['name']))
+    summaries = run_sweep(cases, dataset, store, camera_fps=args.camera_fps, warmup=matrix['warmup'],
+                          min_batches=args.min_batches, min_seconds=args.min_seconds, matrix_name=matrix['name'])
+    print(format_summaries(summaries))
+
+def command_import_legacy(args):
+    store = ResultStore(args.output, run_metadata("legacy"))
+    total = import_legacy(store, args.roots)
+    print(f"{total} resultados históricos importados en {args.output}")
+
+def command_summary(args):
+    columns = SPEED_COLUMNS if args.kind == "predict" else ACCURACY_COLUMNS
+    table = load_table(args.inputs or [DEFAULT_OUTPUT], kind=args.kind)
+    summary = aggregate(table, by=args.by, values=columns)
+    shown = list(args.by) + ['count'] + [f"{column}.{stat}" for column in columns for stat in ("mean", "std")]
+    print(format_table(summary, [column for column in shown if column in summary]))
+
+def command_report(args):
+    counts = build_report(args.inputs or [DEFAULT_OUTPUT], args.output_dir, force=args.force)
+    print(f"Reporte en {args.output_dir}: {counts['rendered']} generados, {counts['unchanged']} sin cambios"
+          + (f", {counts['skipped']} gráficas omitidas" if counts['skipped'] else ""))
+
+def command_select(args):
+    target = Target(args.cameras, args.fps, min_map=args.min_map, min_recall=args.min_recall, class_name=args.class_name,
+                    metric=args.metric, max_interval=args.max_interval, headroom=args.headroom)
+    best, front, evaluated = select(args.inputs or [DEFAULT_OUTPUT], target, backends=args.backends or None)
+    print(f"Objetivo: {target.cameras} cámaras a {target.fps:g} FPS ({target.required_images_per_s():.0f} img/s), "
+          f"{target.metric} >= {target.min_map}, recall >= {target.min_recall} ({target.class_name})")
+    if args.all:
+        print(format_candidates(evaluated, target))
+        print()
+    if best is None:
+        sys.exit("Ninguna configuración cumple el objetivo.")
+
+    print("Frontera de Pareto (latencia del batch frente a precisión):")
+    print(format_candidates(front, target))
+    settings = pgie_settings(best, target)
+    print(f"\nRecomendado: {best['model']} {best['backend']} {best['precision']} con {best['imgsz']} px, "
+          f"batch {target.cameras}, interval {best['interval']}")
+    print("Propiedades de [property] en dstest1_pgie_config.txt:")
+    for key, value in settings.items():
+        print(f"  {key}={value}")
+    if 'model-engine-file' not in settings:
+        print(f"  (model-engine-file: motor TensorRT de {best['model']} {best['precision']} exportado con batch >= {target.cameras})")
+    if args.write:
+        with open(args.pgie_config, "r") as f:
+            text = f.read()
+        with open(args.write, "w") as f:
+            f.write(update_pgie_config(text, settings))
+        print(f"Configuración escrita en {args.write}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python3 -m benchmark", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run = subparsers.add_parser("run", help="Ejecuta una matriz de casos de inferencia y validación")
+    add_matrix_arguments(run)
+    run.add_argument("--runs", type=int, help="Pasadas de inferencia por caso")
+    run.add_argument("--warmup", type=int, help="Batches de calentamiento descartados en cada pasada (por defecto 3)")
+    run.add_argument("--tasks", nargs="+", choices=["predict", "val"])
+    run.set_defaults(func=command_run)
+
+    throughput = subparsers.add_parser("throughput", help="Barrido de tamaños de batch: imágenes/s, codo y cámaras por dispositivo")
+    add_matrix_arguments(throughput)
+    throughput.add_argument("--cameras", type=int, help="Número de cámaras del sitio; se agrega como batch al barrido")
+    throughput.add_argument("--camera-fps", type=float, default=25.0, help="FPS de cada cámara (por defecto 25)")
+    throughput.add_argument("--warmup", type=int, help="Llamadas de calentamiento por batch (por defecto 3)")
+    throughput.add_argument("--min-batches", type=int, default=20, help="Llamadas mínimas medidas por batch")
+    throughput.add_argument("--min-seconds", type=float, default=2.0, help="Tiempo mínimo de medición por batch")
+    throughput.set_defaults(func=command_throughput)
+
+    legacy = subparsers.add_parser("import-legacy", help="Importa los resultados JSON históricos de 'Plots y datos'")
+    legacy.add_argument("roots", nargs="+", help="Directorios donde buscar evaluation_*_results*.json")
+    legacy.add_argument("--output", default=DEFAULT_OUTPUT, help="Archivo de resultados (.jsonl)")
+    legacy.set_defaults(func=command_import_legacy)
+
+    summary = subparsers.add_parser("summary", help="Promedios por modelo, backend y precisión de los resultados guardados")
+    summary.add_argument("inputs", nargs="*", help=f"Archivos de resultados (por defecto {DEFAULT_OUTPUT})")
+    summary.add_argument("--kind", choices=["predict", "val"], default="predict")
+    summary.add_argument("--by", nargs="+", default=list(DEFAULT_GROUP), help="Columnas de agrupación")
+    summary.set_defaults(func=command_summary)
+
+    report = subparsers.add_parser("report", help="Gráficas y tabla resumen a partir de los resultados guardados")
+    report.add_argument("inputs", nargs="*", help=f"Archivos de resultados (por defecto {DEFAULT_OUTPUT})")
+    report.add_argument("--output-dir", default=DEFAULT_REPORT_DIR)
+    report.add_argument("--force", action="store_true", help="Regenerar todo aunque los datos no hayan cambiado")
+    report.set_defaults(func=command_report)
+
+    selector = subparsers.add_parser("select", help="Elige modelo, precisión y batch para un objetivo de cámaras y FPS")
+    selector.add_argument("inputs", nargs="*", help=f"Archivos de resultados (por defecto {DEFAULT_OUTPUT})")
+    selector.add_argument("--cameras", type=int, required=True, help="Cámaras por dispositivo")
+    selector.add_argument("--fps", type=float, required=True, help="FPS a procesar por cámara")
+    selector.add_argument("--min-map", type=float, default=0.0, help="mAP mínimo (fracción)")
+    selector.add_argument("--min-recall", type=float, default=0.0, help="Recall mínimo (fracción)")
+    selector.add_argument("--class", dest="class_name", default="person", help="Clase de interés (por defecto person)")
+    selector.add_argument("--metric", choices=["map_50_95", "map_50"], default="map_50_95")
+    selector.add_argument("--max-interval", type=int, default=0, help="Máximo 'interval' de nvinfer aceptado")
+    selector.add_argument("--headroom", type=float, default=1.0, help="Margen de capacidad (1.2 = 20 %%)")
+    selector.add_argument("--backends", nargs="+", default=["tensorrt"], help="Backends desplegables considerados")
+    selector.add_argument("--all", action="store_true", help="Mostrar todos los candidatos y por qué no cumplen")
+    selector.add_argument("--pgie-config", default=DEFAULT_PGIE_CONFIG, help="Configuración de nvinfer de base")
+    selector.add_argument("--write", metavar="ARCHIVO", help="Escribir la configuración de nvinfer con los cambios")
+    selector.set_defaults(func=command_select)
+
+    args = parser.parse_args(argv)
+    args.func(args)
@@ -0,0 +1,95 @@
+"""
+Imágenes de prueba del benchmark.
+
+Por defecto las imágenes se leen una sola vez y se reutilizan en todos los casos de la
+matriz. Para conjuntos grandes (``cache=False``) se leen del disco batch a batch, de modo
+que la memoria no crece con el tamaño del conjunto. Con la fuente ``synthetic:N[:WxH]``
+se generan N imágenes aleatorias, para probar el benchmark sin el dataset.
+"""
+
+import glob
+import itertools
+import os
+
+import cv2
+import numpy as np
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp")
+
+class ImageSet:
+    """
+    Conjunto de imágenes BGR.
+
+    Parameters:
+        source (str): Directorio de imágenes o ``synthetic:N[:WxH]``.
+        limit (int): Número máximo de imágenes.
+        seed (int): Semilla de las imágenes sintéticas.
+        cache (bool): Mantener las imágenes en memoria; si es False se leen del disco en
+            cada pasada. Las imágenes sintéticas se generan por batch con una semilla fija.
+    """
+
+    def __init__(self, source, limit=None, seed=0, cache=True):
+        self.source = source
+        self.seed = seed
+        self.cache = cache
+        self.images = None
+        if source.startswith("synthetic"):
+            self.count, self.size = parse_synthetic(source)
+            self.paths = None
+        else:
+            self.paths = sorted(path for path in glob.glob(os.path.join(source, "*"))
+                                if path.lower().endswith(IMAGE_EXTENSIONS))
+            self.count = len(self.paths)
+        if limit is not None:
+            self.count = min(self.count, limit)
+            if self.paths is not None:
+                self.paths = self.paths[:limit]
+        if self.count == 0:
+            raise ValueError(f"No se encontraron imágenes en {source}")
+        if cache:
+            self.images = list(self._iter_images())
+
+    def __len__(self):
+        return self.count
+
+    def head(self, n):
+        """
+        Las primeras ``n`` imágenes.
+        """
+        return list(itertools.islice(self._iter(), n))
+
+    def batches(self, batch_size):
+        """
+        Recorre las imágenes en listas de ``batch_size``; la última puede ser más corta.
+        """
+        iterator = self._iter()
+        while True:
+            batch = list(itertools.islice(iterator, batch_size))
+            if not batch:
+                return
+            yield batch
+
+    def _iter(self):
+        return iter(self.images) if self.images is not None else self._iter_images()
+
+    def _iter_images(self):
+        if self.paths is None:
+            rng = np.random.default_rng(self.seed)
+            width, height = self.size
+            for _ in range(self.count):
+                yield rng.integers(0, 256, (height, width, 3), dtype=np.uint8)
+        else:
+            for path in self.paths:
+                image = cv2.imread(path)
+                if image is not None:
+                    yield image
+
+def parse_synthetic(source):
+    """
+    Número de imágenes y tamaño ``(ancho, alto)`` de la fuente ``synthetic:N[:WxH]``
+    (por defecto 16 imágenes de 1920x1080).
+    """
+    parts = source.split(":")
+    count = int(parts[1]) if len(parts) > 1 else 16
+    width, height = (int(v) for v in parts[2].split("x")) if len(parts) > 2 else (1920, 1080)
+    return count, (width, height)
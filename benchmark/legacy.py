@@ -0,0 +1,96 @@
+"""
+Importación de los resultados históricos.
+
+Los scripts anteriores guardaban cada modelo en listas JSON
+``<modelo>/results/evaluation_{predict,val}_results[_fp16|_fp32].json`` con una entrada
+``{"model_name": "yolov8n_tensorrt_fp16", "results": {...}}`` por pasada. ``import_legacy``
+convierte cada entrada en un resultado del almacén (``kind`` 'predict' o 'val', batch 1,
+imagen de 640) marcado con 'legacy' y el archivo de origen, de modo que las consultas y los
+reportes cubren las corridas nuevas y las históricas por igual. Importar dos veces el
+mismo archivo no duplica sus resultados.
+
+    python3 -m benchmark import-legacy "Plots y datos - Jetson TensorRT" "Plots y datos - Jetson Pythorch"
+"""
+
+import glob
+import json
+import os
+import re
+
+# Los archivos históricos usan 'pythorch' para los modelos de PyTorch
+LEGACY_BACKENDS = {'pythorch': "pytorch", 'pytorch': "pytorch", 'tensorrt': "tensorrt"}
+LEGACY_FILE = re.compile(r"evaluation_(predict|val)_results(?:_(fp16|fp32))?\.json$")
+
+def parse_model_name(model_name):
+    """
+    Separa un nombre histórico ('yolov8n_tensorrt_fp16', 'yolov9t_pythorch').
+
+    Returns:
+        tuple: (modelo, backend, precisión); la precisión por defecto es 'fp32'.
+
+    Raises:
+        ValueError: Si el nombre no tiene el formato esperado.
+    """
+    parts = model_name.split("_")
+    if len(parts) < 2 or parts[1] not in LEGACY_BACKENDS:
+        raise ValueError(f"Nombre de modelo histórico no reconocido: {model_name}")
+    precision = parts[2] if len(parts) > 2 else "fp32"
+    return parts[0], LEGACY_BACKENDS[parts[1]], precision
+
+def find_legacy_files(roots):
+    """
+    Archivos de resultados históricos bajo los directorios ``roots``, ordenados.
+    """
+    paths = []
+    for root in roots:
+        for path in glob.glob(os.path.join(root, "**", "evaluation_*_results*.json"), recursive=True):
+            if LEGACY_FILE.search(os.path.basename(path)):
+                paths.append(path)
+    return sorted(paths)
+
+def legacy_records(path, relative_to="."):
+    """
+    Resultados del almacén a partir de un archivo histórico.
+    """
+    kind, _ = LEGACY_FILE.search(os.path.basename(path)).groups()
+    source = os.path.relpath(path, relative_to)
+    with open(path, "r") as f:
+        entries = json.load(f)
+
+    records = []
+    for run, entry in enumerate(entries):
+        model, backend, precision = parse_model_name(entry['model_name'])
+        records.append({
+            'model': model,
+            'backend': backend,
+            'precision': precision,
+            'batch': 1,
+            'imgsz': 640,
+            'device': "0",
+            'matrix': "legacy",
+            'kind': kind,
+            'run': run,
+            'legacy': True,
+            'source_file': source,
+            'results': dict(entry['results']),
+        })
+    return records
+
+def import_legacy(store, roots, relative_to=".", log=print):
+    """
+    Importa los archivos históricos que aún no están en ``store``.
+
+    Returns:
+        int: Resultados importados.
+    """
+    imported_files = {record.get('source_file') for record in store.records() if record.get('legacy')}
+    total = 0
+    for path in find_legacy_files(roots):
+        source = os.path.relpath(path, relative_to)
+        if source in imported_files:
+            continue
+        records = legacy_records(path, relative_to)
+        store.extend(records)
+        total += len(records)
+        log(f"{source}: {len(records)} resultados")
+    return total
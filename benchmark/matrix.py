@@ -0,0 +1,146 @@
+"""
+Matriz de casos del benchmark.
+
+Un archivo de matriz (YAML o JSON) lista modelos, backends, precisiones, tamaños de batch
+y de imagen, y las plantillas de ruta de los pesos por backend. ``expand_matrix`` genera
+el producto cartesiano como una lista de ``Case``.
+"""
+
+import itertools
+import json
+import os
+
+import yaml
+
+BACKEND_PYTORCH = "pytorch"
+BACKEND_TENSORRT = "tensorrt"
+BACKEND_ONNXRUNTIME = "onnxruntime"
+BACKEND_OPENCV = "opencv"
+BACKENDS = (BACKEND_PYTORCH, BACKEND_TENSORRT, BACKEND_ONNXRUNTIME, BACKEND_OPENCV)
+
+PRECISIONS = ("fp32", "fp16")
+
+TASK_PREDICT = "predict"
+TASK_VAL = "val"
+
+DEFAULTS = {
+    'name': "benchmark",
+    'source': None,
+    'data': None,
+    'device': "0",
+    'runs': 1,
+    'warmup': 3,
+    'models': [],
+    'backends': [BACKEND_PYTORCH],
+    'precisions': ["fp32"],
+    'batch': [1],
+    'imgsz': [640],
+    'weights': {},
+    'tasks': [TASK_PREDICT],
+    'limit': None,
+    'cache': True,
+}
+
+class Case:
+    """
+    Una combinación de la matriz.
+
+    Parameters:
+        model (str): Nombre del modelo, p. ej. 'yolov8n'.
+        backend (str): Uno de ``BACKENDS``.
+        precision (str): 'fp32' o 'fp16'.
+        batch (int): Imágenes por llamada de inferencia.
+        imgsz (int): Lado de la imagen de entrada del modelo.
+        weights (str): Ruta de los pesos (.pt, .engine u .onnx).
+        device (str): Dispositivo ('0', 'cpu', ...).
+    """
+
+    def __init__(self, model, backend, precision, batch, imgsz, weights, device):
+        self.model = model
+        self.backend = backend
+        self.precision = precision
+        self.batch = batch
+        self.imgsz = imgsz
+        self.weights = weights
+        self.device = str(device)
+
+    @property
+    def label(self):
+        return f"{self.model}_{self.backend}_{self.precision}_b{self.batch}_{self.imgsz}"
+
+    @property
+    def weights_key(self):
+        # Casos con los mismos pesos comparten el modelo cargado
+        return (self.backend, self.weights, self.precision, self.device)
+
+    def describe(self):
+        """
+        Retorna los campos que identifican el caso en cada resultado.
+        """
+        return {
+            'model': self.model,
+            'backend': self.backend,
+            'precision': self.precision,
+            'batch': self.batch,
+            'imgsz': self.imgsz,
+            'device': self.device,
+            'weights': self.weights,
+        }
+
+def load_matrix(path=None, overrides=None):
+    """
+    Lee un archivo de matriz y aplica los valores dados en la línea de comandos.
+
+    Parameters:
+        path (str): Ruta del archivo YAML o JSON; None usa solo ``overrides``.
+        overrides (dict): Llaves de la matriz con valores no nulos que reemplazan las del archivo.
+
+    Returns:
+        dict: Matriz completa con los valores por defecto.
+    """
+    matrix = dict(DEFAULTS)
+    if path:
+        with open(path, "r") as f:
+            loaded = json.load(f) if path.endswith(".json") else yaml.safe_load(f)
+        matrix.update(loaded or {})
+        # Las rutas relativas de la matriz se resuelven respecto al archivo
+        base = os.path.dirname(os.path.abspath(path))
+        for key in ('source', 'data'):
+            if matrix[key] and not matrix[key].startswith("synthetic") and not os.path.isabs(matrix[key]):
+                matrix[key] = os.path.join(base, matrix[key])
+        matrix['weights'] = {
+            backend: template if os.path.isabs(template) else os.path.normpath(os.path.join(base, template))
+            for backend, template in (matrix['weights'] or {}).items()
+        }
+    for key, value in (overrides or {}).items():
+        if value is not None:
+            matrix[key] = value
+    return matrix
+
+def expand_matrix(matrix):
+    """
+    Genera los casos de la matriz.
+
+    Returns:
+        list: ``Case`` ordenados por pesos, de modo que cada modelo se carga una sola vez.
+
+    Raises:
+        ValueError: Si un backend o precisión no es válido o falta la plantilla de pesos.
+    """
+    cases = []
+    for backend in matrix['backends']:
+        if backend not in BACKENDS:
+            raise ValueError(f"Backend desconocido: {backend} (opciones: {', '.join(BACKENDS)})")
+        if backend not in matrix['weights']:
+            raise ValueError(f"La matriz no define la ruta de pesos para el backend '{backend}'")
+
+    for precision in matrix['precisions']:
+        if precision not in PRECISIONS:
+            raise ValueError(f"Precisión desconocida: {precision}")
+
+    for model, backend, precision, batch, imgsz in itertools.product(
+            matrix['models'], matrix['backends'], matrix['precisions'], matrix['batch'], matrix['imgsz']):
+        weights = matrix['weights'][backend].format(model=model, precision=precision, batch=batch, imgsz=imgsz)
+        cases.append(Case(model, backend, precision, int(batch), int(imgsz), weights, matrix['device']))
+    cases.sort(key=lambda case: case.weights_key)
+    return cases
@@ -0,0 +1,103 @@
+"""
+Medición de memoria durante el benchmark.
+
+``MemoryMonitor`` muestrea la memoria residente (RSS) del proceso en un hilo y registra el
+pico durante un bloque ``with``. La memoria de GPU se toma de PyTorch (pico del asignador
+de CUDA) y, si está disponible, de NVML; en Jetson la memoria es compartida con la CPU,
+por lo que el RSS ya incluye buena parte de ella.
+"""
+
+import threading
+
+MB = 1024 * 1024
+
+def current_rss():
+    """
+    Memoria residente actual del proceso en bytes (Linux), o None si no se puede leer.
+    """
+    try:
+        with open("/proc/self/status", "r") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+def _torch_cuda():
+    try:
+        import torch
+    except ImportError:
+        return None
+    return torch if torch.cuda.is_available() else None
+
+def _nvml_used():
+    try:
+        import pynvml
+    except ImportError:
+        return None
+    try:
+        pynvml.nvmlInit()
+        handle = pynvml.nvmlDeviceGetHandleByIndex(0)
+        return pynvml.nvmlDeviceGetMemoryInfo(handle).used
+    except Exception:
+        return None
+
+class MemoryMonitor:
+    """
+    Pico de memoria durante un bloque ``with``.
+
+    Parameters:
+        interval (float): Segundos entre muestras del RSS.
+    """
+
+    def __init__(self, interval=0.05):
+        self.interval = interval
+        self.rss_start = None
+        self.rss_peak = None
+        self.gpu_peak = None
+        self.gpu_used = None
+        self._stop = threading.Event()
+        self._thread = None
+        self._torch = None
+
+    def __enter__(self):
+        self.rss_start = self.rss_peak = current_rss()
+        self._torch = _torch_cuda()
+        if self._torch is not None:
+            self._torch.cuda.reset_peak_memory_stats()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._sample, name="benchmark-memory", daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self._update(current_rss())
+        if self._torch is not None:
+            self.gpu_peak = self._torch.cuda.max_memory_allocated()
+        self.gpu_used = _nvml_used()
+        return False
+
+    def results(self):
+        """
+        Returns:
+            dict: 'rss_start_mb', 'rss_peak_mb', 'gpu_peak_mb' (asignador de PyTorch) y
+            'gpu_used_mb' (NVML); None donde no hay medición.
+        """
+        to_mb = lambda value: value / MB if value is not None else None
+        return {
+            'rss_start_mb': to_mb(self.rss_start),
+            'rss_peak_mb': to_mb(self.rss_peak),
+            'gpu_peak_mb': to_mb(self.gpu_peak),
+            'gpu_used_mb': to_mb(self.gpu_used),
+        }
+
+    def _update(self, rss):
+        if rss is not None and (self.rss_peak is None or rss > self.rss_peak):
+            self.rss_peak = rss
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            self._update(current_rss())
@@ -0,0 +1,179 @@
+"""
+Consultas vectorizadas sobre los resultados del benchmark.
+
+``load_table`` aplana los resultados de uno o varios archivos en columnas de NumPy (una
+fila por resultado, llaves anidadas unidas con '.': 'results.avg_inf_speed') y
+``aggregate`` agrupa las filas y calcula media, desviación, mínimo, máximo y conteo de
+cualquier columna numérica para todos los grupos a la vez, sin recorrer los modelos en
+Python.
+
+    table = load_table("Datos experimentales/benchmark/results.jsonl", kind="val")
+    summary = aggregate(table, by=("model", "backend", "precision"), values=("results.map_50_95",))
+"""
+
+import numpy as np
+
+from benchmark.store import ResultStore
+
+DEFAULT_GROUP = ("model", "backend", "precision", "batch", "imgsz")
+
+SPEED_COLUMNS = ("results.avg_preprocess_speed", "results.avg_inf_speed", "results.avg_postprocess_speed")
+ACCURACY_COLUMNS = ("results.precision", "results.recall", "results.map_50", "results.map_50_95")
+
+def flatten(record, prefix=""):
+    """
+    Aplana un diccionario anidado; las listas se conservan como un único valor.
+    """
+    flat = {}
+    for key, value in record.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten(value, name + "."))
+        else:
+            flat[name] = value
+    return flat
+
+def to_table(records, columns=None):
+    """
+    Columnas de NumPy a partir de una lista de resultados.
+
+    Parameters:
+        records (iterable): Resultados (diccionarios).
+        columns (sequence): Columnas a conservar; por defecto todas las escalares.
+
+    Returns:
+        dict: ``{columna: np.ndarray}``. Las columnas numéricas son ``float64`` con NaN
+        donde el resultado no tiene el campo; las demás son arreglos de objetos con None.
+    """
+    rows = [flatten(record) for record in records]
+    if columns is None:
+        names = {}
+        for row in rows:
+            for name, value in row.items():
+                if not isinstance(value, list):
+                    names.setdefault(name, None)
+        columns = list(names)
+
+    table = {}
+    for name in columns:
+        values = [row.get(name) for row in rows]
+        numeric = all(value is None or (isinstance(value, (int, float)) and not isinstance(value, bool))
+                      for value in values)
+        if numeric and any(value is not None for value in values):
+            table[name] = np.array([np.nan if value is None else value for value in values], dtype=np.float64)
+        else:
+            column = np.empty(len(values), dtype=object)
+            column[:] = values
+            table[name] = column
+    return table
+
+def load_table(paths, kind=None, columns=None):
+    """
+    Lee uno o varios archivos de resultados como una tabla.
+
+    Parameters:
+        paths (str | sequence): Archivos .jsonl.
+        kind (str): Solo resultados de este tipo.
+        columns (sequence): Columnas a conservar.
+    """
+    if isinstance(paths, str):
+        paths = [paths]
+    records = [record for path in paths for record in ResultStore(path, meta={}).records(kind)]
+    return to_table(records, columns)
+
+def select(table, **conditions):
+    """
+    Filas cuyas columnas son iguales a los valores dados (o están en ellos, si es una lista).
+    """
+    size = len(next(iter(table.values()))) if table else 0
+    mask = np.ones(size, dtype=bool)
+    for name, value in conditions.items():
+        column = table[name]
+        if isinstance(value, (list, tuple, set)):
+            mask &= np.isin(column, list(value))
+        else:
+            mask &= column == value
+    return {name: column[mask] for name, column in table.items()}
+
+def aggregate(table, by=DEFAULT_GROUP, values=SPEED_COLUMNS):
+    """
+    Estadísticas de las columnas ``values`` por cada combinación de las columnas ``by``.
+
+    Returns:
+        dict: Columnas ``by`` con una fila por grupo (ordenadas), 'count' y, por cada
+        columna de ``values``, '<columna>.mean', '.std' (muestral), '.min' y '.max'
+        ignorando NaN.
+    """
+    by = [name for name in by if name in table]
+    size = len(next(iter(table.values()))) if table else 0
+    if size == 0:
+        return {}
+
+    # Índice de grupo de cada fila a partir de las llaves combinadas, con los grupos ordenados
+    index = {}
+    rows = zip(*(_key_values(table[name]) for name in by)) if by else [()] * size
+    codes = np.fromiter((index.setdefault(key, len(index)) for key in rows), dtype=np.int64, count=size)
+    groups = len(index)
+    keys = list(index)
+    order = sorted(range(groups), key=lambda group: _sort_key(keys[group]))
+    rank = np.empty(groups, dtype=np.int64)
+    rank[order] = np.arange(groups)
+    inverse = rank[codes]
+    first = np.empty(groups, dtype=np.int64)
+    first[inverse[::-1]] = np.arange(size)[::-1]
+
+    result = {name: table[name][first] for name in by}
+    result['count'] = np.bincount(inverse, minlength=groups)
+    for name in values:
+        column = table.get(name)
+        if column is None or column.dtype != np.float64:
+            continue
+        valid = ~np.isnan(column)
+        filled = np.where(valid, column, 0.0)
+        n = np.bincount(inverse, weights=valid, minlength=groups)
+        total = np.bincount(inverse, weights=filled, minlength=groups)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = total / n
+            squares = np.bincount(inverse, weights=np.where(valid, (column - mean[inverse]) ** 2, 0.0), minlength=groups)
+            std = np.sqrt(squares / (n - 1))
+        minimum = np.full(groups, np.inf)
+        maximum = np.full(groups, -np.inf)
+        np.minimum.at(minimum, inverse[valid], column[valid])
+        np.maximum.at(maximum, inverse[valid], column[valid])
+        result[f"{name}.mean"] = mean
+        result[f"{name}.std"] = np.where(n > 1, std, 0.0)
+        result[f"{name}.min"] = np.where(n > 0, minimum, np.nan)
+        result[f"{name}.max"] = np.where(n > 0, maximum, np.nan)
+    return result
+
+def _key_values(column):
+    # NaN no es igual a sí mismo: como llave de grupo se usa None
+    if column.dtype == np.float64:
+        return [None if value != value else value for value in column.tolist()]
+    return column.tolist()
+
+def _sort_key(key):
+    # None al final y números antes que textos, para ordenar llaves de tipos mezclados
+    return tuple((value is None, isinstance(value, str), value if value is not None else 0) for value in key)
+
+def format_table(table, columns=None, precision=4):
+    """
+    Texto con una fila por grupo, para mostrar en la consola.
+    """
+    columns = list(columns or table.keys())
+    if not columns or not len(table[columns[0]]):
+        return "(sin resultados)"
+
+    def cells_of(column):
+        values = column.tolist()
+        # Columnas enteras guardadas como float (batch, imgsz) se muestran sin decimales
+        if column.dtype == np.float64 and all(value.is_integer() for value in values):
+            return [str(int(value)) for value in values]
+        return [f"{value:.{precision}f}" if isinstance(value, float) else str(value) for value in values]
+
+    cells = [cells_of(table[name]) for name in columns]
+    widths = [max(len(name), *(len(value) for value in column)) for name, column in zip(columns, cells)]
+    lines = ["  ".join(name.ljust(width) for name, width in zip(columns, widths))]
+    for row in zip(*cells):
+        lines.append("  ".join(value.ljust(width) for value, width in zip(row, widths)))
+    return "\n".join(lines)
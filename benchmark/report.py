@@ -0,0 +1,384 @@
+"""
+Reporte comparativo a partir de los resultados guardados.
+
+Reemplaza los scripts ``make_evaluation_{speed,val}_plots_*`` (un script por tamaño y
+precisión, con los valores escritos a mano). Lee todos los archivos de resultados, promedia
+las pasadas de cada modelo, backend, precisión, batch y tamaño de imagen, y genera:
+
+- la grilla de gráficas de tiempos (preproceso, inferencia, postproceso) y de métricas
+  (precision, recall, mAP@0.5, mAP@0.5:0.95) por tamaño de modelo (n/t, s, m) y
+  configuración, con barras de error de una desviación estándar entre pasadas;
+- la gráfica de Pareto de latencia total frente a mAP@0.5:0.95 de todas las configuraciones;
+- una tabla resumen en Markdown y HTML.
+
+El reporte es incremental: cada archivo se regenera solo si cambiaron los datos que lo
+alimentan (se guarda un hash por archivo en ``.report_manifest.json``). matplotlib es
+opcional; sin él solo se generan las tablas.
+
+    python3 -m benchmark report
+"""
+
+import hashlib
+import html
+import json
+import os
+import re
+
+import numpy as np
+
+from benchmark.query import ACCURACY_COLUMNS, SPEED_COLUMNS, aggregate, load_table
+
+# Cambiar al modificar el aspecto de las gráficas, para forzar que se regeneren
+REPORT_VERSION = 1
+
+MANIFEST = ".report_manifest.json"
+GROUP = ("model", "backend", "precision", "batch", "imgsz")
+
+SIZE_GROUPS = (("n", "n/t"), ("s", "s"), ("m", "m"))
+BACKEND_LABELS = {'pytorch': "PyTorch", 'tensorrt': "TensorRT", 'onnxruntime': "ONNX Runtime", 'opencv': "OpenCV"}
+STAGES = (("pre", "Preprocess (ms)"), ("inf", "Inference (ms)"), ("post", "Postprocess (ms)"))
+METRICS = (("p", "Precision (%)"), ("r", "Recall (%)"), ("map_50", "mAP@0.50 (%)"),
+           ("map_50_95", "mAP@0.50:0.95 (%)"))
+
+def model_size(model):
+    """
+    Tamaño del modelo ('n', 's' o 'm') según su sufijo; 'yolov9t' se agrupa con los 'n'.
+    """
+    suffix = model[-1:]
+    if suffix == "t":
+        return "n"
+    return suffix if suffix in ("n", "s", "m") else "otros"
+
+def model_order(model):
+    """
+    Llave para ordenar los modelos por versión y tamaño (yolov8n, yolov9t, yolov10n, ...).
+    """
+    match = re.match(r"[a-z]*?(\d+)([a-z]*)$", model)
+    if match is None:
+        return (float("inf"), 0, model)
+    sizes = "ntsmlx"
+    size = sizes.index(match.group(2)) if match.group(2) in sizes else len(sizes)
+    return (int(match.group(1)), size, model)
+
+def display_name(model):
+    return model.replace("yolov", "YOLOv").replace("yolo", "YOLO")
+
+def config_label(backend, precision):
+    return f"{BACKEND_LABELS.get(backend, backend)} {precision}"
+
+def collect(paths):
+    """
+    Filas del reporte: una por modelo, backend, precisión, batch y tamaño de imagen.
+
+    Returns:
+        list: Diccionarios con los campos del grupo, 'runs', la media y desviación de cada
+        etapa ('pre', 'inf', 'post', 'total' y sus '_std'), las métricas de validación
+        ('p' y 'r' para precision y recall, 'map_50', 'map_50_95' y sus '_std'; None sin
+        validación) y 'pareto' (si la fila está en la frontera de latencia frente a
+        mAP@0.5:0.95).
+    """
+    rows = {}
+    speed = load_table(paths, kind="predict", columns=GROUP + SPEED_COLUMNS)
+    if speed and len(speed['model']):
+        speed['results.total'] = sum(speed[column] for column in SPEED_COLUMNS)
+        summary = aggregate(speed, by=GROUP, values=SPEED_COLUMNS + ("results.total",))
+        for i, key in enumerate(zip(*(summary[name].tolist() for name in GROUP))):
+            row = rows.setdefault(key, dict(zip(GROUP, key)))
+            row['runs'] = int(summary['count'][i])
+            for name, column in zip(("pre", "inf", "post", "total"), SPEED_COLUMNS + ("results.total",)):
+                row[name] = float(summary[f"{column}.mean"][i])
+                row[f"{name}_std"] = float(summary[f"{column}.std"][i])
+
+    accuracy = load_table(paths, kind="val", columns=GROUP + ACCURACY_COLUMNS)
+    if accuracy and len(accuracy['model']):
+        summary = aggregate(accuracy, by=GROUP, values=ACCURACY_COLUMNS)
+        for i, key in enumerate(zip(*(summary[name].tolist() for name in GROUP))):
+            row = rows.setdefault(key, dict(zip(GROUP, key)))
+            for name, column in zip(("p", "r", "map_50", "map_50_95"), ACCURACY_COLUMNS):
+                row[name] = float(summary[f"{column}.mean"][i])
+                row[f"{name}_std"] = float(summary[f"{column}.std"][i])
+
+    rows = [normalize_row(row) for row in rows.values()]
+    rows.sort(key=lambda row: (row['batch'] or 0, row['imgsz'] or 0, row['backend'], row['precision'],
+                               model_order(row['model'])))
+    mark_pareto(rows)
+    return rows
+
+def normalize_row(row):
+    row['batch'] = int(row['batch']) if row.get('batch') == row.get('batch') else None
+    row['imgsz'] = int(row['imgsz']) if row.get('imgsz') == row.get('imgsz') else None
+    row.setdefault('runs', 0)
+    for name in ("pre", "inf", "post", "total", "p", "r", "map_50", "map_50_95"):
+        row.setdefault(name, None)
+        row.setdefault(f"{name}_std", None)
+    return row
+
+def pareto_front(latency, quality):
+    """
+    Puntos no dominados: ningún otro punto tiene menor o igual latencia y mayor o igual
+    calidad, con al menos una de las dos estrictamente mejor.
+
+    Returns:
+        np.ndarray: Máscara booleana.
+    """
+    latency = np.asarray(latency, dtype=np.float64)
+    quality = np.asarray(quality, dtype=np.float64)
+    no_worse = (latency[None, :] <= latency[:, None]) & (quality[None, :] >= quality[:, None])
+    better = (latency[None, :] < latency[:, None]) | (quality[None, :] > quality[:, None])
+    return ~(no_worse & better).any(axis=1)
+
+def mark_pareto(rows):
+    for row in rows:
+        row['pareto'] = False
+    # La frontera se calcula por batch y tamaño de imagen, entre todos los backends y precisiones
+    scenarios = {}
+    for row in rows:
+        if row['total'] is not None and row['map_50_95'] is not None:
+            scenarios.setdefault((row['batch'], row['imgsz']), []).append(row)
+    for candidates in scenarios.values():
+        mask = pareto_front([row['total'] for row in candidates], [row['map_50_95'] for row in candidates])
+        for row, on_front in zip(candidates, mask.tolist()):
+            row['pareto'] = on_front
+
+def report_files(rows):
+    """
+    Archivos del reporte con los datos de los que depende cada uno.
+
+    Returns:
+        list: ``(nombre, tipo, título, filas)``.
+    """
+    files = []
+    scenarios = sorted({(row['batch'], row['imgsz']) for row in rows}, key=lambda key: tuple(v or 0 for v in key))
+    configs = sorted({(row['backend'], row['precision']) for row in rows})
+    for batch, imgsz in scenarios:
+        scenario_rows = [row for row in rows if (row['batch'], row['imgsz']) == (batch, imgsz)]
+        suffix = f"b{batch}_{imgsz}"
+        for backend, precision in configs:
+            for size, size_label in SIZE_GROUPS + (("otros", "otros"),):
+                selected = [row for row in scenario_rows if (row['backend'], row['precision']) == (backend, precision)
+                            and model_size(row['model']) == size]
+                title = f"{config_label(backend, precision)} - modelos {size_label} - batch {batch}, {imgsz} px"
+                speed = [row for row in selected if row['total'] is not None]
+                if speed:
+                    files.append((f"speed_{size}_{backend}_{precision}_{suffix}.png", "speed",
+                                  f"Tiempos de procesamiento - {title}", speed))
+                accuracy = [row for row in selected if row['map_50_95'] is not None]
+                if accuracy:
+                    files.append((f"accuracy_{size}_{backend}_{precision}_{suffix}.png", "accuracy",
+                                  f"Métricas - {title}", accuracy))
+        front = [row for row in scenario_rows if row['total'] is not None and row['map_50_95'] is not None]
+        if front:
+            files.append((f"pareto_{suffix}.png", "pareto",
+                          f"Latencia vs mAP@0.5:0.95 - batch {batch}, {imgsz} px", front))
+    files.append(("report.md", "markdown", "Resumen del benchmark", rows))
+    files.append(("report.html", "html", "Resumen del benchmark", rows))
+    return files
+
+# Campos de cada fila que usa cada tipo de archivo; el resto no invalida el archivo
+HASH_FIELDS = {
+    'speed': ('model', 'pre', 'pre_std', 'inf', 'inf_std', 'post', 'post_std'),
+    'accuracy': ('model', 'p', 'p_std', 'r', 'r_std', 'map_50', 'map_50_std', 'map_50_95', 'map_50_95_std'),
+    'pareto': ('model', 'backend', 'precision', 'total', 'total_std', 'map_50_95', 'pareto'),
+}
+
+def content_hash(kind, title, rows):
+    fields = HASH_FIELDS.get(kind)
+    if fields is not None:
+        rows = [{field: row[field] for field in fields} for row in rows]
+    payload = json.dumps({'version': REPORT_VERSION, 'kind': kind, 'title': title, 'rows': rows}, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def load_pyplot():
+    """
+    ``matplotlib.pyplot`` con un backend sin pantalla, o None si matplotlib no está instalado.
+    """
+    try:
+        import matplotlib
+    except ImportError:
+        return None
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    return plt
+
+def build_report(paths, output_dir, force=False, log=print):
+    """
+    Genera o actualiza el reporte en ``output_dir``.
+
+    Parameters:
+        paths (sequence): Archivos de resultados.
+        output_dir (str): Directorio del reporte.
+        force (bool): Regenerar todos los archivos aunque sus datos no hayan cambiado.
+
+    Returns:
+        dict: Número de archivos 'rendered', 'unchanged' y 'skipped' (gráficas omitidas
+        por falta de matplotlib).
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    manifest_path = os.path.join(output_dir, MANIFEST)
+    manifest = {}
+    if os.path.exists(manifest_path) and not force:
+        with open(manifest_path, "r") as f:
+            manifest = json.load(f)
+
+    rows = collect(paths)
+    counts = {'rendered': 0, 'unchanged': 0, 'skipped': 0}
+    plt = None
+    pyplot_loaded = False
+    for name, kind, title, file_rows in report_files(rows):
+        path = os.path.join(output_dir, name)
+        digest = content_hash(kind, title, file_rows)
+        if manifest.get(name) == digest and os.path.exists(path):
+            counts['unchanged'] += 1
+            continue
+
+        if kind in ("markdown", "html"):
+            with open(path, "w") as f:
+                f.write(markdown_table(file_rows) if kind == "markdown" else html_table(file_rows, title))
+        else:
+            # matplotlib solo se importa si hay alguna gráfica por regenerar
+            if not pyplot_loaded:
+                plt = load_pyplot()
+                pyplot_loaded = True
+                if plt is None:
+                    log("matplotlib no está instalado: se omiten las gráficas")
+            if plt is None:
+                counts['skipped'] += 1
+                continue
+            DRAW[kind](plt, file_rows, title, path)
+        manifest[name] = digest
+        counts['rendered'] += 1
+        log(f"{path}")
+
+    with open(manifest_path, "w") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    return counts
+
+def draw_bars(plt, rows, title, path, series, ylabel, scale=1.0, ylim=None):
+    models = [display_name(row['model']) for row in rows]
+    x = np.arange(len(models))
+    width = 0.8 / len(series)
+    fig, ax = plt.subplots(figsize=(max(8, 1.6 * len(models) + 3), 5))
+    for i, (name, label) in enumerate(series):
+        values = np.array([row[name] * scale for row in rows])
+        errors = np.array([(row[f"{name}_std"] or 0.0) * scale for row in rows])
+        bars = ax.bar(x + (i - (len(series) - 1) / 2) * width, values, width, yerr=errors, capsize=3, label=label)
+        for bar, value in zip(bars, values):
+            ax.annotate(f"{value:.2f}", xy=(bar.get_x() + bar.get_width() / 2, bar.get_height()), xytext=(0, 3),
+                        textcoords="offset points", ha="center", va="bottom", fontsize=7)
+    ax.set_xticks(x)
+    ax.set_xticklabels(models)
+    ax.set_xlabel("Modelos")
+    ax.set_ylabel(ylabel)
+    ax.set_title(title, fontsize=10)
+    if ylim is not None:
+        ax.set_ylim(ylim)
+    ax.legend(loc="upper left", bbox_to_anchor=(1.02, 1))
+    fig.tight_layout()
+    fig.savefig(path, dpi=200)
+    plt.close(fig)
+
+def draw_speed(plt, rows, title, path):
+    draw_bars(plt, rows, title, path, STAGES, "Tiempo (ms)")
+
+def draw_accuracy(plt, rows, title, path):
+    # Zoom sobre el rango de los valores, como en las gráficas originales
+    lowest = min(row[name] for row in rows for name, _ in METRICS) * 100
+    draw_bars(plt, rows, title, path, METRICS, "Porcentaje (%)", scale=100.0, ylim=(max(0, np.floor(lowest / 10) * 10), 100))
+
+def draw_pareto(plt, rows, title, path):
+    fig, ax = plt.subplots(figsize=(9, 6))
+    configs = sorted({(row['backend'], row['precision']) for row in rows})
+    for backend, precision in configs:
+        selected = [row for row in rows if (row['backend'], row['precision']) == (backend, precision)]
+        ax.errorbar([row['total'] for row in selected], [row['map_50_95'] * 100 for row in selected],
+                    xerr=[row['total_std'] or 0.0 for row in selected], fmt="o", capsize=3,
+                    label=config_label(backend, precision))
+        for row in selected:
+            ax.annotate(display_name(row['model']), xy=(row['total'], row['map_50_95'] * 100), xytext=(4, 3),
+                        textcoords="offset points", fontsize=7)
+    front = sorted((row for row in rows if row['pareto']), key=lambda row: row['total'])
+    ax.step([row['total'] for row in front], [row['map_50_95'] * 100 for row in front], where="post",
+            color="black", linestyle="--", linewidth=1, label="Frontera de Pareto")
+    ax.set_xlabel("Latencia total por imagen (ms)")
+    ax.set_ylabel("mAP@0.50:0.95 (%)")
+    ax.set_title(title, fontsize=10)
+    ax.grid(True, alpha=0.3)
+    ax.legend(loc="lower right", fontsize=8)
+    fig.tight_layout()
+    fig.savefig(path, dpi=200)
+    plt.close(fig)
+
+DRAW = {'speed': draw_speed, 'accuracy': draw_accuracy, 'pareto': draw_pareto}
+
+SUMMARY_COLUMNS = (
+    ("Modelo", lambda row: display_name(row['model'])),
+    ("Backend", lambda row: BACKEND_LABELS.get(row['backend'], row['backend'])),
+    ("Precisión", lambda row: row['precision']),
+    ("Batch", lambda row: row['batch']),
+    ("imgsz", lambda row: row['imgsz']),
+    ("Pasadas", lambda row: row['runs']),
+    ("Pre (ms)", lambda row: _mean_std(row, 'pre')),
+    ("Inf (ms)", lambda row: _mean_std(row, 'inf')),
+    ("Post (ms)", lambda row: _mean_std(row, 'post')),
+    ("Total (ms)", lambda row: _mean_std(row, 'total')),
+    ("FPS", lambda row: f"{1e3 / row['total']:.1f}" if row['total'] else "-"),
+    ("Precision (%)", lambda row: _percent(row, 'p')),
+    ("Recall (%)", lambda row: _percent(row, 'r')),
+    ("mAP@0.5 (%)", lambda row: _percent(row, 'map_50')),
+    ("mAP@0.5:0.95 (%)", lambda row: _percent(row, 'map_50_95')),
+    ("Pareto", lambda row: "sí" if row['pareto'] else ""),
+)
+
+def _mean_std(row, name):
+    if row[name] is None:
+        return "-"
+    return f"{row[name]:.2f} ± {row[f'{name}_std'] or 0.0:.2f}"
+
+def _percent(row, name):
+    return f"{row[name] * 100:.2f}" if row[name] is not None else "-"
+
+def markdown_table(rows):
+    lines = [
+        "# Resumen del benchmark",
+        "",
+        "Promedio ± desviación estándar entre pasadas. 'Pareto': sin otra configuración más rápida y "
+        "más precisa (mAP@0.5:0.95) con el mismo batch y tamaño de imagen.",
+        "",
+        "| " + " | ".join(name for name, _ in SUMMARY_COLUMNS) + " |",
+        "|" + "|".join("---" for _ in SUMMARY_COLUMNS) + "|",
+    ]
+    for row in rows:
+        lines.append("| " + " | ".join(str(value(row)) for _, value in SUMMARY_COLUMNS) + " |")
+    return "\n".join(lines) + "\n"
+
+def html_table(rows, title):
+    header = "".join(f"<th>{html.escape(name)}</th>" for name, _ in SUMMARY_COLUMNS)
+    body = "\n".join(
+        "<tr{}>{}</tr>".format(' class="pareto"' if row['pareto'] else "",
+                               "".join(f"<td>{html.escape(str(value(row)))}</td>" for _, value in SUMMARY_COLUMNS))
+        for row in rows
+    )
+    return f"""<!DOCTYPE html>
+<html lang="es">
+<head>
+<meta charset="utf-8">
+<title>{html.escape(title)}</title>
+<style>
+body {{ font-family: sans-serif; margin: 2em; }}
+table {{ border-collapse: collapse; font-size: 0.85em; }}
+th, td {{ border: 1px solid #ccc; padding: 4px 8px; text-align: right; }}
+th {{ background: #f0f0f0; }}
+tr.pareto {{ background: #e8f5e9; }}
+</style>
+</head>
+<body>
+<h1>{html.escape(title)}</h1>
+<p>Promedio ± desviación estándar entre pasadas. Las filas resaltadas están en la frontera de Pareto de
+latencia total frente a mAP@0.5:0.95.</p>
+<table>
+<tr>{header}</tr>
+{body}
+</table>
+</body>
+</html>
+"""
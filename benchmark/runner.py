@@ -0,0 +1,132 @@
+"""
+Ejecución de los casos de la matriz.
+
+Los casos que comparten pesos reutilizan el modelo cargado; el costo de carga y de la
+primera inferencia se registra una vez por modelo como resultado ``cold_start`` en lugar
+de mezclarse en cada corrida. Las pasadas de inferencia recorren el conjunto batch a batch
+y acumulan los tiempos en memoria constante, de modo que conjuntos de prueba grandes no
+agotan la memoria del Jetson.
+"""
+
+import itertools
+import time
+
+from benchmark.backends import get_backend
+from benchmark.matrix import TASK_PREDICT, TASK_VAL
+from benchmark.memory import MemoryMonitor
+from benchmark.stats import LatencyAccumulator
+
+STAGES = ("preprocess", "inference", "postprocess")
+
+def cold_start(backend, case, dataset):
+    """
+    Carga el modelo y mide la primera inferencia.
+
+    Returns:
+        dict: 'load_ms' y 'first_inference_ms'.
+    """
+    start = time.perf_counter()
+    backend.load(case)
+    loaded = time.perf_counter()
+    backend.predict(dataset.head(case.batch), case.imgsz)
+    end = time.perf_counter()
+    return {'load_ms': (loaded - start) * 1e3, 'first_inference_ms': (end - loaded) * 1e3}
+
+def predict_run(backend, case, dataset, warmup=0):
+    """
+    Una pasada de inferencia sobre todo el conjunto de imágenes.
+
+    Las primeras ``warmup`` llamadas (batches) se ejecutan sobre el inicio del conjunto y se
+    descartan, para que la inicialización de CUDA/TensorRT y de las cachés no entre en las
+    estadísticas. Luego se registra el tiempo de cada etapa por imagen y el tiempo de reloj
+    de extremo a extremo de cada batch, repartido entre sus imágenes. Los tiempos se
+    acumulan a medida que se generan (``LatencyAccumulator``) y se mide el pico de memoria
+    de la pasada.
+
+    Returns:
+        dict: Promedio por imagen de cada etapa en ms (mismas llaves que los resultados
+        históricos), número de imágenes, tiempo total de la pasada, en 'stats' el resumen
+        (percentiles, desviación e intervalos de confianza) de cada etapa y del extremo a
+        extremo, en 'memory' el pico de RSS y de memoria de GPU y en 'timings' los tiempos
+        por imagen de cada etapa.
+    """
+    warmup_batches = 0
+    for batch in itertools.islice(dataset.batches(case.batch), warmup):
+        backend.predict(batch, case.imgsz)
+        warmup_batches += 1
+
+    accumulators = {stage: LatencyAccumulator() for stage in STAGES + ("end_to_end",)}
+    with MemoryMonitor() as memory:
+        start = time.perf_counter()
+        for batch in dataset.batches(case.batch):
+            batch_start = time.perf_counter()
+            timings = backend.predict(batch, case.imgsz)
+            per_image = (time.perf_counter() - batch_start) * 1e3 / len(batch)
+            for i, stage in enumerate(STAGES):
+                accumulators[stage].extend(timings[:, i])
+            accumulators['end_to_end'].extend([per_image] * len(timings))
+        wall = time.perf_counter() - start
+
+    stats = {stage: accumulator.summary() for stage, accumulator in accumulators.items()}
+    return {
+        'avg_preprocess_speed': accumulators['preprocess'].mean,
+        'avg_inf_speed': accumulators['inference'].mean,
+        'avg_postprocess_speed': accumulators['postprocess'].mean,
+        'images': accumulators['inference'].count,
+        'warmup_batches': warmup_batches,
+        'wall_s': wall,
+        'stats': stats,
+        'memory': memory.results(),
+        # Tiempos por imagen (una muestra si el conjunto supera la capacidad del acumulador)
+        'timings': {stage: accumulator.samples().round(4).tolist() for stage, accumulator in accumulators.items()},
+    }
+
+def run_matrix(cases, dataset, store, runs=1, tasks=(TASK_PREDICT,), data=None, matrix_name="", warmup=0, log=print):
+    """
+    Ejecuta todos los casos y guarda cada resultado en ``store``.
+
+    Parameters:
+        cases (list): ``Case`` de la matriz.
+        dataset (ImageSet): Imágenes de prueba, compartidas por todos los casos.
+        store (ResultStore): Destino de los resultados.
+        runs (int): Pasadas de inferencia por caso.
+        tasks (sequence): 'predict' y/o 'val'.
+        data (str): YAML del dataset para la validación.
+        matrix_name (str): Nombre de la matriz, registrado con cada resultado.
+        warmup (int): Batches descartados al inicio de cada pasada.
+        log (callable): Función para el progreso.
+    """
+    backend = None
+    loaded_key = None
+    for case in cases:
+        base = dict(case.describe(), matrix=matrix_name)
+        try:
+            if case.weights_key != loaded_key:
+                backend = get_backend(case.backend)
+                result = cold_start(backend, case, dataset)
+                loaded_key = case.weights_key
+                store.append(dict(base, kind="cold_start", timestamp=time.time(), results=result))
+                log(f"{case.label}: carga {result['load_ms']:.0f} ms, primera inferencia {result['first_inference_ms']:.0f} ms")
+
+            if TASK_PREDICT in tasks:
+                for run in range(runs):
+                    result = predict_run(backend, case, dataset, warmup)
+                    store.append(dict(base, kind="predict", run=run, timestamp=time.time(), results=result))
+                    inference = result['stats']['inference']
+                    e2e = result['stats']['end_to_end']
+                    log(f"{case.label} corrida {run + 1}/{runs}: pre {result['avg_preprocess_speed']:.2f} ms, "
+                        f"inf {inference['mean']:.2f} ms (p50 {inference['p50']:.2f}, p99 {inference['p99']:.2f}), "
+                        f"post {result['avg_postprocess_speed']:.2f} ms, extremo a extremo p99 {e2e['p99']:.2f} ms, "
+                        f"RSS pico {result['memory']['rss_peak_mb'] or 0:.0f} MB")
+
+            if TASK_VAL in tasks and data:
+                metrics = backend.validate(data, case)
+                if metrics is None:
+                    log(f"{case.label}: el backend {case.backend} no soporta validación")
+                else:
+                    store.append(dict(base, kind="val", timestamp=time.time(), results=metrics))
+                    log(f"{case.label}: mAP@0.5 {metrics['map_50']:.4f}, mAP@0.5:0.95 {metrics['map_50_95']:.4f}")
+        except Exception as e:
+            # Un caso fallido (p. ej. pesos inexistentes) no detiene el resto de la matriz
+            log(f"{case.label}: error {type(e).__name__}: {e}")
+            loaded_key = None
@@ -0,0 +1,283 @@
+"""
+Selección del modelo a desplegar a partir de los resultados guardados.
+
+Dado un objetivo (cámaras por dispositivo, FPS por cámara y mínimos de mAP y recall de la
+clase de interés), se estima para cada modelo, backend, precisión y tamaño de imagen la
+capacidad con batch igual al número de cámaras (como ``nvstreammux``) y se descartan los
+que no la alcanzan o no cumplen la precisión. Entre los que cumplen se calcula la frontera
+de Pareto de latencia frente a mAP y se recomienda el más preciso, con la configuración de
+``dstest1_pgie_config.txt`` correspondiente.
+
+La capacidad se toma, en orden de preferencia, de la curva del barrido de rendimiento
+(``python3 -m benchmark throughput``), interpolada en el número de cámaras; de corridas de
+inferencia con ese batch; o de las corridas con batch 1 (estimación conservadora, pues el
+batch solo aumenta el rendimiento). Si ``max_interval`` lo permite, también se considera
+inferir uno de cada ``interval + 1`` frames (propiedad ``interval`` de nvinfer).
+
+    python3 -m benchmark select --cameras 5 --fps 15 --min-map 0.72 --min-recall 0.95
+"""
+
+import math
+
+import numpy as np
+
+from benchmark.query import SPEED_COLUMNS, aggregate, load_table
+from benchmark.report import pareto_front
+from benchmark.store import ResultStore
+
+# network-mode de nvinfer: 0 = FP32, 1 = INT8, 2 = FP16
+NETWORK_MODES = {'fp32': 0, 'int8': 1, 'fp16': 2}
+
+SOURCE_THROUGHPUT = "throughput"
+SOURCE_BATCH = "predict-batch"
+SOURCE_BATCH_1 = "predict-batch-1"
+
+class Target:
+    """
+    Requisitos de un sitio.
+
+    Parameters:
+        cameras (int): Cámaras que atiende el dispositivo (batch de nvstreammux y nvinfer).
+        fps (float): FPS que debe procesar cada cámara.
+        min_map (float): mAP mínimo (fracción, p. ej. 0.72) de la clase ``class_name``.
+        min_recall (float): Recall mínimo de la clase ``class_name``.
+        class_name (str): Clase de interés; si los resultados no tienen métricas por clase
+            se usan las globales.
+        metric (str): 'map_50_95' o 'map_50', usado para ``min_map`` y para la frontera.
+        max_interval (int): Máximo valor de ``interval`` de nvinfer aceptado (0 = inferir
+            todos los frames).
+        headroom (float): Margen de capacidad exigido (1.2 = 20 % por encima de lo necesario).
+    """
+
+    def __init__(self, cameras, fps, min_map=0.0, min_recall=0.0, class_name="person", metric="map_50_95",
+                 max_interval=0, headroom=1.0):
+        self.cameras = cameras
+        self.fps = fps
+        self.min_map = min_map
+        self.min_recall = min_recall
+        self.class_name = class_name
+        self.metric = metric
+        self.max_interval = max_interval
+        self.headroom = headroom
+
+    def required_images_per_s(self, interval=0):
+        return self.cameras * self.fps * self.headroom / (interval + 1)
+
+def load_candidates(paths, class_name="person"):
+    """
+    Combina velocidad, rendimiento y precisión de cada modelo, backend, precisión y
+    tamaño de imagen.
+
+    Returns:
+        list: Diccionarios con 'model', 'backend', 'precision', 'imgsz', 'weights',
+        'latency_ms' (``{batch: ms por imagen}``), 'curve' (puntos del barrido), y las
+        métricas 'map_50', 'map_50_95' y 'recall' (de la clase si hay, con
+        'class_metrics' indicándolo).
+    """
+    if isinstance(paths, str):
+        paths = [paths]
+    candidates = {}
+
+    def candidate(model, backend, precision, imgsz):
+        key = (model, backend, precision, int(imgsz))
+        if key not in candidates:
+            candidates[key] = {
+                'model': model, 'backend': backend, 'precision': precision, 'imgsz': int(imgsz), 'weights': None,
+                'latency_ms': {}, 'curve': [], 'map_50': None, 'map_50_95': None, 'recall': None,
+                'class_metrics': False,
+            }
+        return candidates[key]
+
+    group = ("model", "backend", "precision", "batch", "imgsz")
+    speed = load_table(paths, kind="predict", columns=group + SPEED_COLUMNS + ("weights",))
+    if len(speed.get('model', ())):
+        speed['results.total'] = sum(speed[column] for column in SPEED_COLUMNS)
+        summary = aggregate(speed, by=group, values=("results.total",))
+        for i in range(len(summary['model'])):
+            item = candidate(*(summary[name][i] for name in ("model", "backend", "precision", "imgsz")))
+            item['latency_ms'][int(summary['batch'][i])] = float(summary['results.total.mean'][i])
+        for i in range(len(speed['model'])):
+            if speed['weights'][i]:
+                candidate(*(speed[name][i] for name in ("model", "backend", "precision", "imgsz")))['weights'] = speed['weights'][i]
+
+    metric_columns = ("results.map_50", "results.map_50_95", "results.recall")
+    class_columns = tuple(f"results.per_class.{class_name}.{name}" for name in ("map_50", "map_50_95", "recall"))
+    accuracy = load_table(paths, kind="val", columns=("model", "backend", "precision", "imgsz") + metric_columns + class_columns)
+    if len(accuracy.get('model', ())):
+        summary = aggregate(accuracy, by=("model", "backend", "precision", "imgsz"), values=metric_columns + class_columns)
+        for i in range(len(summary['model'])):
+            item = candidate(*(summary[name][i] for name in ("model", "backend", "precision", "imgsz")))
+            per_class = [summary.get(f"{column}.mean") for column in class_columns]
+            if all(values is not None and not np.isnan(values[i]) for values in per_class):
+                values, item['class_metrics'] = [values[i] for values in per_class], True
+            else:
+                values = [summary[f"{column}.mean"][i] for column in metric_columns]
+            item['map_50'], item['map_50_95'], item['recall'] = (float(value) for value in values)
+
+    for path in paths:
+        for record in ResultStore(path, meta={}).records("throughput_summary"):
+            item = candidate(record['model'], record['backend'], record['precision'], record['imgsz'])
+            # La última corrida del barrido reemplaza a las anteriores
+            item['curve'] = sorted(record['results']['curve'], key=lambda point: point['batch'])
+    return list(candidates.values())
+
+def capacity(candidate, batch):
+    """
+    Imágenes por segundo estimadas con ``batch`` imágenes por llamada.
+
+    Returns:
+        tuple: (imágenes por segundo, latencia p99 del batch en ms o None, fuente), o
+        (None, None, None) si no hay mediciones de velocidad.
+    """
+    curve = candidate['curve']
+    if curve:
+        batches = [point['batch'] for point in curve]
+        rates = [point['images_per_s'] for point in curve]
+        if batch in batches:
+            point = curve[batches.index(batch)]
+            return point['images_per_s'], point['batch_p99_ms'], SOURCE_THROUGHPUT
+        if batch < batches[-1]:
+            # Interpolación en log2(batch) entre los dos puntos medidos vecinos
+            rate = float(np.interp(math.log2(batch), np.log2(batches), rates))
+            return rate, batch * 1e3 / rate, SOURCE_THROUGHPUT
+        # Más allá del barrido se asume que el rendimiento ya no crece
+        return rates[-1], batch * 1e3 / rates[-1], SOURCE_THROUGHPUT
+
+    latency = candidate['latency_ms']
+    if batch in latency:
+        return 1e3 / latency[batch], batch * latency[batch], SOURCE_BATCH
+    if 1 in latency:
+        return 1e3 / latency[1], batch * latency[1], SOURCE_BATCH_1
+    return None, None, None
+
+def evaluate(candidates, target):
+    """
+    Verifica cada candidato contra el objetivo.
+
+    Returns:
+        list: Los candidatos con 'images_per_s', 'batch_ms', 'capacity_source', 'interval'
+        (el menor que alcanza la capacidad, o None), 'load' (fracción de la capacidad
+        usada), 'quality' (métrica del objetivo), 'feasible' y 'reasons' (por qué no cumple).
+    """
+    interval_ms = 1e3 / target.fps
+    evaluated = []
+    for candidate in candidates:
+        item = dict(candidate)
+        rate, batch_ms, source = capacity(candidate, target.cameras)
+        item.update(images_per_s=rate, batch_ms=batch_ms, capacity_source=source, interval=None, load=None,
+                    quality=candidate.get(target.metric))
+        reasons = []
+        if rate is None:
+            reasons.append("sin mediciones de velocidad")
+        else:
+            for interval in range(target.max_interval + 1):
+                # El batch debe terminar antes de que llegue el siguiente frame a inferir
+                if rate >= target.required_images_per_s(interval) and batch_ms <= interval_ms * (interval + 1):
+                    item['interval'] = interval
+                    item['load'] = target.required_images_per_s(interval) / target.headroom / rate
+                    break
+            if item['interval'] is None:
+                reasons.append(f"capacidad {rate:.0f} img/s < {target.required_images_per_s(target.max_interval):.0f} img/s")
+        if item['quality'] is None:
+            reasons.append("sin resultados de validación")
+        elif item['quality'] < target.min_map:
+            reasons.append(f"{target.metric} {item['quality']:.3f} < {target.min_map:.3f}")
+        if item['recall'] is not None and item['recall'] < target.min_recall:
+            reasons.append(f"recall {item['recall']:.3f} < {target.min_recall:.3f}")
+        elif item['recall'] is None and target.min_recall:
+            reasons.append("sin recall")
+        item['feasible'] = not reasons
+        item['reasons'] = reasons
+        evaluated.append(item)
+    return evaluated
+
+def select(paths, target, backends=("tensorrt",)):
+    """
+    Candidatos que cumplen el objetivo, su frontera de Pareto y la recomendación.
+
+    Parameters:
+        paths (sequence): Archivos de resultados.
+        target (Target): Objetivo del sitio.
+        backends (sequence): Backends desplegables considerados; None para todos.
+
+    Returns:
+        tuple: (recomendado o None, frontera de Pareto, todos los candidatos evaluados).
+        La frontera usa la latencia por frame de cada cámara (duración del batch) y la
+        métrica del objetivo; la recomendación es el candidato de la frontera con mayor
+        métrica, con menor ``interval`` y menor carga como desempate.
+    """
+    candidates = [candidate for candidate in load_candidates(paths, target.class_name)
+                  if backends is None or candidate['backend'] in backends]
+    evaluated = evaluate(candidates, target)
+    feasible = [item for item in evaluated if item['feasible']]
+    if not feasible:
+        return None, [], evaluated
+
+    mask = pareto_front([item['batch_ms'] for item in feasible], [item['quality'] for item in feasible])
+    front = sorted((item for item, on_front in zip(feasible, mask.tolist()) if on_front), key=lambda item: item['batch_ms'])
+    best = max(front, key=lambda item: (item['quality'], -item['interval'], -item['load']))
+    return best, front, evaluated
+
+def pgie_settings(choice, target):
+    """
+    Propiedades de ``[property]`` de ``dstest1_pgie_config.txt`` para el candidato elegido.
+    """
+    settings = {
+        'batch-size': target.cameras,
+        'network-mode': NETWORK_MODES[choice['precision']],
+        'interval': choice['interval'],
+    }
+    weights = choice.get('weights')
+    if weights and weights.endswith(".engine"):
+        settings['model-engine-file'] = weights
+    elif weights and weights.endswith(".onnx"):
+        settings['onnx-file'] = weights
+    return settings
+
+def update_pgie_config(text, settings, section="property"):
+    """
+    Aplica ``settings`` a la sección ``[section]`` del archivo de configuración de nvinfer,
+    conservando el resto del texto; las llaves que no existen se agregan al final de la
+    sección.
+    """
+    lines = text.splitlines()
+    pending = dict(settings)
+    output = []
+    in_section = False
+    for line in lines:
+        stripped = line.strip()
+        if stripped.startswith("[") and stripped.endswith("]"):
+            if in_section:
+                output.extend(f"{key}={value}" for key, value in pending.items())
+                pending = {}
+            in_section = stripped[1:-1] == section
+        elif in_section and "=" in stripped and not stripped.startswith("#"):
+            key = stripped.split("=", 1)[0].strip()
+            if key in pending:
+                line = f"{key}={pending.pop(key)}"
+        output.append(line)
+    if in_section:
+        output.extend(f"{key}={value}" for key, value in pending.items())
+    return "\n".join(output) + "\n"
+
+def format_candidates(items, target):
+    """
+    Tabla de texto de los candidatos.
+    """
+    lines = [f"{'modelo':<10} {'backend':<9} {'prec.':<5} {'imgsz':>5} {'img/s':>8} {'batch ms':>9} "
+             f"{'int.':>4} {'carga':>6} {target.metric:>10} {'recall':>7}  fuente / motivo"]
+    for item in items:
+        rate = f"{item['images_per_s']:.1f}" if item['images_per_s'] is not None else "-"
+        batch_ms = f"{item['batch_ms']:.1f}" if item['batch_ms'] is not None else "-"
+        interval = str(item['interval']) if item['interval'] is not None else "-"
+        load = f"{item['load'] * 100:.0f}%" if item['load'] is not None else "-"
+        quality = f"{item['quality']:.4f}" if item['quality'] is not None else "-"
+        recall = f"{item['recall']:.4f}" if item['recall'] is not None else "-"
+        note = item['capacity_source'] or ""
+        if item['reasons']:
+            note = "; ".join(item['reasons'])
+        elif not item['class_metrics']:
+            note += " (métricas globales)"
+        lines.append(f"{item['model']:<10} {item['backend']:<9} {item['precision']:<5} {item['imgsz']:>5} {rate:>8} "
+                     f"{batch_ms:>9} {interval:>4} {load:>6} {quality:>10} {recall:>7}  {note}")
+    return "\n".join(lines)
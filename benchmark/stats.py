@@ -0,0 +1,133 @@
+"""
+Estadísticas de latencia del benchmark.
+
+Los promedios ocultan la cola de la distribución, que es la que rompe el presupuesto de
+tiempo real. ``summarize`` reporta percentiles, desviación estándar e intervalos de
+confianza por bootstrap a partir de las muestras por imagen.
+"""
+
+import numpy as np
+
+PERCENTILES = (50, 90, 99)
+
+def summarize(samples, confidence=0.95, resamples=1000, seed=0):
+    """
+    Resume una serie de tiempos.
+
+    Parameters:
+        samples (array-like): Tiempos en ms.
+        confidence (float): Nivel de los intervalos de confianza.
+        resamples (int): Remuestreos del bootstrap; 0 los desactiva.
+        seed (int): Semilla del bootstrap, para resultados reproducibles.
+
+    Returns:
+        dict: 'n', 'mean', 'std', 'min', 'max', 'p50', 'p90', 'p99' y, con bootstrap,
+        'mean_ci', 'p50_ci' y 'p99_ci' como ``[inferior, superior]``.
+    """
+    values = np.asarray(samples, dtype=np.float64)
+    if values.size == 0:
+        return {'n': 0}
+    summary = {
+        'n': int(values.size),
+        'mean': float(values.mean()),
+        'std': float(values.std(ddof=1)) if values.size > 1 else 0.0,
+        'min': float(values.min()),
+        'max': float(values.max()),
+    }
+    for q, value in zip(PERCENTILES, np.percentile(values, PERCENTILES)):
+        summary[f'p{q}'] = float(value)
+
+    if resamples and values.size > 1:
+        summary.update(bootstrap_ci(values, confidence, resamples, seed))
+    return summary
+
+def bootstrap_ci(values, confidence=0.95, resamples=1000, seed=0):
+    """
+    Intervalos de confianza por bootstrap (percentil) de la media, la mediana y el p99.
+
+    Returns:
+        dict: 'mean_ci', 'p50_ci' y 'p99_ci'.
+    """
+    rng = np.random.default_rng(seed)
+    # Remuestreo vectorizado: una fila de índices por remuestreo
+    resampled = values[rng.integers(0, values.size, size=(resamples, values.size))]
+    alpha = (1 - confidence) / 2 * 100
+    bounds = (alpha, 100 - alpha)
+    return {
+        'mean_ci': np.percentile(resampled.mean(axis=1), bounds).tolist(),
+        'p50_ci': np.percentile(np.percentile(resampled, 50, axis=1), bounds).tolist(),
+        'p99_ci': np.percentile(np.percentile(resampled, 99, axis=1), bounds).tolist(),
+    }
+
+class LatencyAccumulator:
+    """
+    Acumulador de tiempos en memoria constante.
+
+    Media, desviación (Welford), mínimo y máximo son exactos para cualquier número de
+    muestras. Los percentiles y los intervalos de confianza se calculan sobre una muestra
+    por reservorio de a lo sumo ``capacity`` valores, exacta mientras no se supere.
+
+    Parameters:
+        capacity (int): Tamaño del reservorio.
+        seed (int): Semilla del muestreo por reservorio.
+    """
+
+    def __init__(self, capacity=20000, seed=0):
+        self.capacity = capacity
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+        self._reservoir = np.empty(capacity, dtype=np.float64)
+        self._rng = np.random.default_rng(seed)
+
+    def extend(self, values):
+        """
+        Agrega un arreglo de muestras.
+        """
+        values = np.asarray(values, dtype=np.float64).reshape(-1)
+        if values.size == 0:
+            return
+        # Combinación de Welford por bloques (Chan et al.)
+        n = values.size
+        batch_mean = values.mean()
+        total = self.count + n
+        delta = batch_mean - self.mean
+        self._m2 += ((values - batch_mean) ** 2).sum() + delta ** 2 * self.count * n / total
+        self.mean += delta * n / total
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+
+        # Mientras el reservorio no se llena se copian las muestras tal cual
+        fill = min(n, self.capacity - self.count) if self.count < self.capacity else 0
+        self._reservoir[self.count:self.count + fill] = values[:fill]
+        self.count += fill
+        for value in values[fill:]:
+            slot = self._rng.integers(0, self.count + 1)
+            if slot < self.capacity:
+                self._reservoir[slot] = value
+            self.count += 1
+
+    def samples(self):
+        """
+        Muestras del reservorio: todas, en orden de llegada, mientras no se supere ``capacity``.
+        """
+        return self._reservoir[:min(self.count, self.capacity)].copy()
+
+    def summary(self, **kwargs):
+        """
+        Resumen con el mismo formato que ``summarize``; acepta sus mismos parámetros.
+        """
+        if self.count == 0:
+            return {'n': 0}
+        summary = summarize(self._reservoir[:min(self.count, self.capacity)], **kwargs)
+        summary.update({
+            'n': self.count,
+            'mean': self.mean,
+            'std': float(np.sqrt(self._m2 / (self.count - 1))) if self.count > 1 else 0.0,
+            'min': self.min,
+            'max': self.max,
+            'sampled': min(self.count, self.capacity),
+        })
+        return summary
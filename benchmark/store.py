@@ -0,0 +1,180 @@
+"""
+Almacén de resultados del benchmark en formato JSON Lines.
+
+Cada resultado es una línea independiente: agregar una corrida no requiere leer ni
+reescribir el archivo. La línea se escribe con una sola llamada bajo un bloqueo exclusivo
+del archivo y se sincroniza al disco, de modo que dos corridas simultáneas no intercalan
+sus líneas y un corte de energía deja a lo sumo una última línea incompleta, que la
+lectura descarta.
+
+Cada resultado lleva la versión del esquema (``SCHEMA_VERSION``) y los metadatos de la
+corrida (``run_metadata``): identificador, commit de git, equipo e inicio. Los campos del
+caso (modelo, backend, precisión, batch, tamaño de imagen, dispositivo, pesos y su hash)
+van en el nivel superior del registro y las mediciones en 'results'.
+"""
+
+import datetime
+import fcntl
+import hashlib
+import json
+import os
+import platform
+import subprocess
+import uuid
+
+SCHEMA_VERSION = 2
+
+# Campos obligatorios de todo registro
+REQUIRED_FIELDS = ('schema', 'kind', 'model', 'backend', 'precision')
+
+_weights_hashes = {}
+
+def git_revision(path="."):
+    """
+    Commit actual del repositorio que contiene ``path`` (con '-dirty' si hay cambios), o None.
+    """
+    try:
+        revision = subprocess.run(["git", "rev-parse", "HEAD"], cwd=path, capture_output=True, text=True,
+                                  check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=path,
+                               capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return revision + ("-dirty" if dirty else "")
+
+def weights_hash(path):
+    """
+    SHA-256 de un archivo de pesos, calculado una vez por ruta, tamaño y fecha de
+    modificación. None si el archivo no existe.
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+    if key not in _weights_hashes:
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(block)
+        _weights_hashes[key] = digest.hexdigest()
+    return _weights_hashes[key]
+
+def run_metadata(matrix_name=""):
+    """
+    Metadatos comunes a todos los resultados de una invocación del benchmark.
+    """
+    return {
+        'run_id': uuid.uuid4().hex,
+        'matrix': matrix_name,
+        'git': git_revision(os.path.dirname(os.path.abspath(__file__))),
+        'host': platform.node(),
+        'python': platform.python_version(),
+        'started_at': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+    }
+
+def validate_record(record):
+    """
+    Raises:
+        ValueError: Si al registro le falta un campo obligatorio o su esquema es más nuevo
+            que el soportado.
+    """
+    missing = [field for field in REQUIRED_FIELDS if field not in record]
+    if missing:
+        raise ValueError(f"Al resultado le faltan los campos {', '.join(missing)}")
+    if record['schema'] > SCHEMA_VERSION:
+        raise ValueError(f"Esquema {record['schema']} no soportado (máximo {SCHEMA_VERSION})")
+
+def upgrade_record(record):
+    """
+    Lleva un registro de una versión anterior del esquema a la actual.
+    """
+    if 'schema' not in record:
+        # Versión 1: sin esquema ni metadatos de la corrida
+        record = dict(record, schema=SCHEMA_VERSION, meta=record.get('meta') or {'matrix': record.get('matrix', "")})
+    return record
+
+class ResultStore:
+    """
+    Parameters:
+        path (str): Archivo .jsonl de resultados.
+        meta (dict): Metadatos de la corrida agregados a cada resultado; por defecto
+            ``run_metadata()``.
+        fsync (bool): Sincronizar cada resultado al disco.
+    """
+
+    def __init__(self, path, meta=None, fsync=True):
+        self.path = path
+        self.meta = meta if meta is not None else run_metadata()
+        self.fsync = fsync
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def append(self, record):
+        """
+        Agrega un resultado al final del archivo de forma atómica.
+
+        Los campos 'schema' y 'meta' se completan si faltan y, si el registro indica sus
+        pesos, se agrega 'weights_sha256'.
+        """
+        record = dict(record)
+        record.setdefault('schema', SCHEMA_VERSION)
+        record.setdefault('meta', self.meta)
+        if record.get('weights') and 'weights_sha256' not in record:
+            record['weights_sha256'] = weights_hash(record['weights'])
+        validate_record(record)
+        self.append_lines([json.dumps(record)])
+
+    def extend(self, records):
+        """
+        Agrega varios resultados con una sola escritura.
+        """
+        lines = []
+        for record in records:
+            record = dict(record)
+            record.setdefault('schema', SCHEMA_VERSION)
+            record.setdefault('meta', self.meta)
+            validate_record(record)
+            lines.append(json.dumps(record))
+        if lines:
+            self.append_lines(lines)
+
+    def append_lines(self, lines):
+        data = "".join(line + "\n" for line in lines).encode("utf-8")
+        fd = os.open(self.path, os.O_RDWR | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            # Una línea previa cortada (p. ej. por un corte de energía) no debe unirse a esta
+            size = os.fstat(fd).st_size
+            if size and os.pread(fd, 1, size - 1) != b"\n":
+                data = b"\n" + data
+            written = 0
+            while written < len(data):
+                written += os.write(fd, data[written:])
+            if self.fsync:
+                os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    def records(self, kind=None):
+        """
+        Recorre los resultados guardados, en el esquema actual.
+
+        Parameters:
+            kind (str): Solo los resultados de este tipo ('predict', 'val', ...).
+        """
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "r") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # Última línea incompleta de una escritura interrumpida
+                    continue
+                record = upgrade_record(record)
+                if kind is None or record.get('kind') == kind:
+                    yield record
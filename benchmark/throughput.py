@@ -0,0 +1,188 @@
+"""
+Barrido de rendimiento por tamaño de batch.
+
+Para cada modelo, backend, precisión y tamaño de imagen se ejecuta el mismo batch una y
+otra vez durante un tiempo mínimo con cada tamaño de batch del barrido, y se registran las
+imágenes por segundo y la latencia de cada llamada. Con la curva resultante se calcula:
+
+- el codo: el batch a partir del cual duplicar el batch ya casi no aumenta el rendimiento;
+- las cámaras por dispositivo: el mayor batch (una imagen por cámara, como en
+  ``nvstreammux``) cuya latencia p99 cabe en el intervalo entre frames de una cámara.
+
+Los motores TensorRT deben exportarse con ``dynamic=True`` y un ``batch`` máximo igual o
+mayor al del barrido; un batch que el motor no admite se registra como error y corta el
+barrido de ese modelo.
+"""
+
+import math
+import time
+
+from benchmark.backends import get_backend
+from benchmark.stats import LatencyAccumulator
+
+SWEEP_BATCH_SIZES = (1, 2, 4, 8, 16)
+
+def fixed_batch(dataset, batch_size):
+    """
+    Las primeras ``batch_size`` imágenes del conjunto, repetidas si el conjunto es menor.
+    """
+    images = dataset.head(batch_size)
+    return [images[i % len(images)] for i in range(batch_size)]
+
+def measure_batch(backend, case, dataset, warmup=3, min_batches=20, min_seconds=2.0):
+    """
+    Rendimiento sostenido de ``backend`` con el batch de ``case``.
+
+    Parameters:
+        warmup (int): Llamadas descartadas antes de medir.
+        min_batches (int): Llamadas mínimas medidas.
+        min_seconds (float): Tiempo mínimo de medición; con batches pequeños asegura que
+            haya muestras suficientes para el p99.
+
+    Returns:
+        dict: 'images_per_s', 'batches', 'wall_s', 'image_ms' (latencia promedio repartida
+        por imagen) y en 'batch_latency' el resumen de la latencia por llamada en ms.
+    """
+    images = fixed_batch(dataset, case.batch)
+    for _ in range(warmup):
+        backend.predict(images, case.imgsz)
+
+    latency = LatencyAccumulator()
+    batches = 0
+    start = time.perf_counter()
+    while True:
+        batch_start = time.perf_counter()
+        backend.predict(images, case.imgsz)
+        end = time.perf_counter()
+        latency.extend([(end - batch_start) * 1e3])
+        batches += 1
+        if batches >= min_batches and end - start >= min_seconds:
+            break
+    wall = time.perf_counter() - start
+    return {
+        'images_per_s': batches * case.batch / wall,
+        'batches': batches,
+        'wall_s': wall,
+        'image_ms': latency.mean / case.batch,
+        'batch_latency': latency.summary(),
+    }
+
+def find_knee(points, min_gain=0.10):
+    """
+    Codo de la curva de rendimiento.
+
+    Parameters:
+        points (list): ``(batch, imágenes por segundo)`` ordenados por batch.
+        min_gain (float): Mejora relativa mínima por cada duplicación del batch para seguir
+            considerando que vale la pena aumentarlo.
+
+    Returns:
+        int: El primer batch cuyo siguiente paso mejora menos que ``min_gain`` por
+        duplicación, o el último batch si el rendimiento sigue creciendo. None sin puntos.
+    """
+    if not points:
+        return None
+    for (batch, rate), (next_batch, next_rate) in zip(points, points[1:]):
+        doublings = math.log2(next_batch / batch)
+        if rate <= 0 or (next_rate / rate) ** (1 / doublings) - 1 < min_gain:
+            return batch
+    return points[-1][0]
+
+def cameras_per_device(points, camera_fps):
+    """
+    Cámaras que puede atender un dispositivo con un frame por cámara en cada batch.
+
+    Parameters:
+        points (list): Resultados de ``measure_batch`` con la llave 'batch'.
+        camera_fps (float): FPS de cada cámara.
+
+    Returns:
+        dict: 'cameras' (mayor batch medido cuya latencia p99 cabe en el intervalo entre
+        frames), 'cameras_batch' (el batch que lo logra) y 'cameras_upper' (cota superior
+        extrapolada con el mejor rendimiento medido, sin considerar la latencia).
+    """
+    interval_ms = 1e3 / camera_fps
+    fitting = [point['batch'] for point in points if point['batch_latency']['p99'] <= interval_ms]
+    best_rate = max((point['images_per_s'] for point in points), default=0.0)
+    return {
+        'cameras': max(fitting, default=0),
+        'cameras_batch': max(fitting, default=None),
+        'cameras_upper': int(best_rate // camera_fps),
+    }
+
+def group_cases(cases):
+    """
+    Agrupa los casos que difieren solo en el batch.
+
+    Returns:
+        list: Listas de ``Case`` ordenadas por batch.
+    """
+    groups = {}
+    for case in cases:
+        key = (case.model, case.backend, case.precision, case.imgsz, case.device)
+        groups.setdefault(key, []).append(case)
+    return [sorted(group, key=lambda case: case.batch) for group in groups.values()]
+
+def run_sweep(cases, dataset, store, camera_fps=25.0, warmup=3, min_batches=20, min_seconds=2.0, matrix_name="",
+              log=print):
+    """
+    Ejecuta el barrido y guarda un resultado ``throughput`` por batch y un resumen
+    ``throughput_summary`` por modelo, precisión y tamaño de imagen.
+
+    Returns:
+        list: Los resúmenes.
+    """
+    summaries = []
+    for group in group_cases(cases):
+        backend = None
+        loaded_key = None
+        points = []
+        for case in group:
+            base = dict(case.describe(), matrix=matrix_name)
+            try:
+                if case.weights_key != loaded_key:
+                    backend = get_backend(case.backend)
+                    backend.load(case)
+                    loaded_key = case.weights_key
+                result = measure_batch(backend, case, dataset, warmup, min_batches, min_seconds)
+            except Exception as e:
+                # Típicamente un batch mayor al máximo del motor: los siguientes también fallarían
+                log(f"{case.label}: error {type(e).__name__}: {e}")
+                store.append(dict(base, kind="throughput", timestamp=time.time(), error=f"{type(e).__name__}: {e}"))
+                break
+            store.append(dict(base, kind="throughput", timestamp=time.time(), results=result))
+            points.append(dict(result, batch=case.batch))
+            log(f"{case.label}: {result['images_per_s']:.1f} img/s, batch p50 {result['batch_latency']['p50']:.2f} ms, "
+                f"p99 {result['batch_latency']['p99']:.2f} ms")
+
+        if not points:
+            continue
+        first = group[0]
+        summary = {
+            'knee_batch': find_knee([(point['batch'], point['images_per_s']) for point in points]),
+            'peak_images_per_s': max(point['images_per_s'] for point in points),
+            'camera_fps': camera_fps,
+            'curve': [{'batch': point['batch'], 'images_per_s': point['images_per_s'],
+                       'batch_p99_ms': point['batch_latency']['p99']} for point in points],
+        }
+        summary.update(cameras_per_device(points, camera_fps))
+        record = {
+            'model': first.model, 'backend': first.backend, 'precision': first.precision, 'imgsz': first.imgsz,
+            'device': first.device, 'matrix': matrix_name, 'kind': "throughput_summary", 'timestamp': time.time(),
+            'results': summary,
+        }
+        store.append(record)
+        summaries.append(record)
+    return summaries
+
+def format_summaries(summaries):
+    """
+    Tabla de texto con el codo, el rendimiento máximo y las cámaras por dispositivo.
+    """
+    lines = [f"{'modelo':<12} {'backend':<12} {'prec.':<6} {'imgsz':>5} {'codo':>5} {'img/s':>9} {'cámaras':>8} {'cota':>6}"]
+    for record in summaries:
+        summary = record['results']
+        lines.append(f"{record['model']:<12} {record['backend']:<12} {record['precision']:<6} {record['imgsz']:>5} "
+                     f"{summary['knee_batch']:>5} {summary['peak_images_per_s']:>9.1f} {summary['cameras']:>8} "
+                     f"{summary['cameras_upper']:>6}")
+    return "\n".join(lines)
@@ -0,0 +1,125 @@
+"""
+Detector ONNX diminuto para probar el benchmark sin Jetson ni modelos entrenados.
+
+Escribe directamente el protobuf de un modelo con la misma interfaz de entrada y salida
+que un YOLO exportado (``images`` N x 3 x H x W -> ``output0`` N x (4 + clases) x anclas),
+de modo que los backends ONNX y su postproceso se ejercitan en CPU. Los pesos son
+aleatorios: las detecciones no significan nada, solo los tiempos. No requiere el paquete
+``onnx``.
+
+    python3 -m benchmark.tiny_onnx models/tiny.onnx --width 16
+"""
+
+import argparse
+import os
+
+import numpy as np
+
+OPSET = 13
+IR_VERSION = 7
+FLOAT = 1
+INT64 = 7
+ATTR_INTS = 7
+
+def _varint(value):
+    out = bytearray()
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return bytes(out)
+
+def _key(field, wire_type):
+    return _varint((field << 3) | wire_type)
+
+def _int(field, value):
+    return _key(field, 0) + _varint(value & 0xFFFFFFFFFFFFFFFF)
+
+def _bytes(field, data):
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    return _key(field, 2) + _varint(len(data)) + data
+
+def _tensor(name, array):
+    dims = b"".join(_int(1, d) for d in array.shape)
+    data_type = FLOAT if array.dtype == np.float32 else INT64
+    return dims + _int(2, data_type) + _bytes(8, name) + _bytes(9, array.tobytes())
+
+def _attr_ints(name, values):
+    return _bytes(1, name) + b"".join(_int(8, v) for v in values) + _int(20, ATTR_INTS)
+
+def _node(op_type, inputs, outputs, name, attributes=()):
+    return (b"".join(_bytes(1, i) for i in inputs) + b"".join(_bytes(2, o) for o in outputs)
+            + _bytes(3, name) + _bytes(4, op_type) + b"".join(_bytes(5, a) for a in attributes))
+
+def _value_info(name, dims):
+    shape = b"".join(_bytes(1, _bytes(2, d) if isinstance(d, str) else _int(1, d)) for d in dims)
+    tensor_type = _int(1, FLOAT) + _bytes(2, shape)
+    return _bytes(1, name) + _bytes(2, _bytes(1, tensor_type))
+
+def build_tiny_detector(num_classes=1, width=16, seed=0):
+    """
+    Construye el modelo: tres convoluciones (paso total 8) y un reshape a la salida YOLO.
+
+    Parameters:
+        num_classes (int): Clases de la salida.
+        width (int): Canales intermedios; escala el costo de cómputo.
+        seed (int): Semilla de los pesos aleatorios.
+
+    Returns:
+        bytes: ModelProto serializado.
+    """
+    rng = np.random.default_rng(seed)
+    outputs = 4 + num_classes
+    weights = {
+        "w1": rng.normal(0, 0.1, (width, 3, 4, 4)).astype(np.float32),
+        "b1": np.zeros(width, np.float32),
+        "w2": rng.normal(0, 0.1, (width, width, 3, 3)).astype(np.float32),
+        "b2": np.zeros(width, np.float32),
+        "w3": rng.normal(0, 0.1, (outputs, width, 2, 2)).astype(np.float32),
+        "b3": np.zeros(outputs, np.float32),
+        "shape": np.array([0, outputs, -1], np.int64),
+    }
+    nodes = [
+        _node("Conv", ["images", "w1", "b1"], ["c1"], "conv1",
+              [_attr_ints("kernel_shape", [4, 4]), _attr_ints("strides", [4, 4])]),
+        _node("Relu", ["c1"], ["r1"], "relu1"),
+        _node("Conv", ["r1", "w2", "b2"], ["c2"], "conv2",
+              [_attr_ints("kernel_shape", [3, 3]), _attr_ints("pads", [1, 1, 1, 1])]),
+        _node("Relu", ["c2"], ["r2"], "relu2"),
+        _node("Conv", ["r2", "w3", "b3"], ["c3"], "conv3",
+              [_attr_ints("kernel_shape", [2, 2]), _attr_ints("strides", [2, 2])]),
+        _node("Reshape", ["c3", "shape"], ["raw"], "reshape"),
+        _node("Sigmoid", ["raw"], ["output0"], "sigmoid"),
+    ]
+    graph = (b"".join(_bytes(1, n) for n in nodes) + _bytes(2, "tiny_detector")
+             + b"".join(_bytes(5, _tensor(name, array)) for name, array in weights.items())
+             + _bytes(11, _value_info("images", ["batch", 3, "height", "width"]))
+             + _bytes(12, _value_info("output0", ["batch", outputs, "anchors"])))
+    opset = _bytes(1, "") + _int(2, OPSET)
+    return _int(1, IR_VERSION) + _bytes(2, "benchmark.tiny_onnx") + _bytes(7, graph) + _bytes(8, opset)
+
+def write_tiny_detector(path, num_classes=1, width=16, seed=0):
+    """
+    Escribe el detector diminuto en ``path`` y retorna la ruta.
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(build_tiny_detector(num_classes, width, seed))
+    return path
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("path")
+    parser.add_argument("--classes", type=int, default=1)
+    parser.add_argument("--width", type=int, default=16)
+    args = parser.parse_args()
+    print(write_tiny_detector(args.path, args.classes, args.width))
+
+if __name__ == "__main__":
+    main()